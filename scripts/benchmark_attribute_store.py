@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+紧凑属性存储基准测试脚本
+对比大量 NPC 使用 CharacterAttributes 与 AttributeTable 时的内存占用和批量重算耗时
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.core.attribute_store import AttributeTable
+from src.xwe.core.attributes import CharacterAttributes
+
+
+def run(count: int) -> None:
+    rng = random.Random(42)
+    stats = [(rng.randint(5, 50), rng.randint(5, 50), rng.randint(1, 100)) for _ in range(count)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = [
+        CharacterAttributes(strength_base=s, agility_base=a, cultivation_level_base=lv) for s, a, lv in stats
+    ]
+    object_create_s = time.perf_counter() - start
+    object_mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for attrs, (s, a, lv) in zip(objects, stats):
+        attrs.strength = s + 1
+        attrs.agility = a + 1
+        attrs.cultivation_level = lv + 1
+    object_update_s = time.perf_counter() - start
+    del objects
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    table = AttributeTable(capacity=count)
+    views = [table.create(strength=s, agility=a, cultivation_level=lv) for s, a, lv in stats]
+    table.recalculate_all()
+    table_create_s = time.perf_counter() - start
+    table_mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for view, (s, a, lv) in zip(views, stats):
+        view.strength = s + 1
+        view.agility = a + 1
+        view.cultivation_level = lv + 1
+    marked_s = time.perf_counter() - start
+    start = time.perf_counter()
+    table.recalculate_all()
+    recalc_s = time.perf_counter() - start
+
+    print("\n" + "=" * 60)
+    print(f"属性存储基准测试 (角色数={count})")
+    print("=" * 60)
+    print(f"CharacterAttributes: 创建 {object_create_s * 1000:.1f} ms, 内存 {object_mem / 1024 / 1024:.1f} MB, "
+          f"修改3项属性 {object_update_s * 1000:.1f} ms（每次赋值立即重算）")
+    print(f"AttributeTable:      创建 {table_create_s * 1000:.1f} ms, 内存 {table_mem / 1024 / 1024:.1f} MB, "
+          f"修改3项属性 {marked_s * 1000:.1f} ms + 批量重算 {recalc_s * 1000:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="紧凑属性存储基准测试")
+    parser.add_argument("--count", type=int, default=50_000, help="NPC 数量")
+    args = parser.parse_args()
+    run(args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+批量战斗模拟基准测试脚本
+对比 NumPy 批量模拟与 CombatSystem 逐场战斗循环的吞吐
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.core.combat_simulator import BatchCombatSimulator, CombatantTemplate
+
+
+def run(fights: int, scalar_fights: int, seed: int) -> None:
+    logging.disable(logging.INFO)
+    side_a = CombatantTemplate("剑修", level=5, strength=16, agility=14)
+    side_b = CombatantTemplate("体修", level=5, constitution=18, agility=9, luck=14)
+    simulator = BatchCombatSimulator()
+
+    start = time.perf_counter()
+    scalar = simulator.simulate_scalar(side_a, side_b, fights=scalar_fights, seed=seed)
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = simulator.simulate(side_a, side_b, fights=fights, seed=seed)
+    batch_s = time.perf_counter() - start
+
+    scalar_rate = scalar_fights / scalar_s
+    batch_rate = fights / batch_s
+    print("\n" + "=" * 60)
+    print(f"批量战斗模拟基准测试 (批量={fights} 场, 逐场={scalar_fights} 场)")
+    print("=" * 60)
+    print(f"逐场循环: {scalar_rate:,.0f} 场/秒, A 胜率 {scalar.win_rates()['a']:.2%}, "
+          f"平均击杀回合 {scalar.time_to_kill().get('mean', 0):.2f}")
+    print(f"批量模拟: {batch_rate:,.0f} 场/秒, A 胜率 {batch.win_rates()['a']:.2%}, "
+          f"平均击杀回合 {batch.time_to_kill().get('mean', 0):.2f}")
+    print(f"加速比: {batch_rate / scalar_rate:.0f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="批量战斗模拟基准测试")
+    parser.add_argument("--fights", type=int, default=100_000, help="批量模拟的战斗场数")
+    parser.add_argument("--scalar-fights", type=int, default=2_000, help="逐场循环的战斗场数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+    run(args.fights, args.scalar_fights, args.seed)
+
+
+if __name__ == "__main__":
+    main()
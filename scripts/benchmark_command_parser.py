@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+命令解析吞吐基准测试脚本
+用一批真实的玩家命令，对比逐条比较别名、逐条 re.match 模式、逐条 startswith 路由的
+旧实现与编译后的前缀树/Aho–Corasick 匹配的吞吐；再追加大量别名、模式、同义词和路由，
+看解析耗时是否随规则数增长。
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, Tuple
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.core.command_parser import CommandParser, CommandType, ParsedCommand
+from src.xwe.core.command_router import CommandPriority, CommandRouter
+
+# 玩家实际会输入的命令
+CORPUS = [
+    "状态", "查看状态", "背包", "bag", "技能", "地图", "帮助", "保存", "?",
+    "探索", "四处闲逛", "随便走走", "逛逛", "search",
+    "去丹药铺", "前往青云山", "移动到 天南坊市", "move to north gate", "go north",
+    "攻击妖狼", "打 山贼", "attack wolf", "揍他",
+    "使用火球术", "施展 御剑术 技能", "cast fireball", "use item 回春丹",
+    "和王长老对话", "跟掌柜说话", "talk to merchant", "与师兄交谈",
+    "使用回春丹", "装备青云剑", "equip iron sword",
+    "给 灵石 给 掌柜", "give herb to elder",
+    "修炼", "打坐", "闭关修行", "突破", "进阶",
+    "防御", "格挡", "逃跑", "run", "交易", "shop",
+    "看看四周有什么", "今天天气不错", "我想去坊市买点丹药",
+]
+
+
+class LegacyCommandParser(CommandParser):
+    """旧实现：逐条比较别名、逐条 re.match 模式字符串"""
+
+    def normalize_command(self, text: str) -> str:
+        text = text.strip().lower()
+        for key, synonyms in self.synonyms.items():
+            for synonym in synonyms:
+                if synonym in text:
+                    text = text.replace(synonym, key)
+                    break
+        return text
+
+    def parse(self, text: str) -> ParsedCommand:
+        text = text.strip().lower()
+        normalized_text = self.normalize_command(text)
+        if not text:
+            return ParsedCommand(text, CommandType.UNKNOWN)
+        for alias, cmd_type in self.command_aliases.items():
+            if normalized_text == alias:
+                return ParsedCommand(text, cmd_type)
+        for pattern, cmd_type, param_names in self.command_patterns:
+            match = re.match(pattern, normalized_text, re.IGNORECASE)
+            if match:
+                if isinstance(param_names, str):
+                    params = {param_names: match.group(1).strip()}
+                    target = params.get("target") or params.get(param_names)
+                else:
+                    params = {name: match.group(i + 1).strip() for i, name in enumerate(param_names)}
+                    target = params.get("target")
+                return ParsedCommand(text, cmd_type, target, params)
+        words = text.split()
+        if words:
+            for alias, cmd_type in self.command_aliases.items():
+                if words[0] == alias or words[0] in alias:
+                    target = " ".join(words[1:]) if len(words) > 1 else None
+                    return ParsedCommand(text, cmd_type, target)
+        return ParsedCommand(text, CommandType.UNKNOWN)
+
+
+class LegacyCommandRouter(CommandRouter):
+    """旧实现：逐条检查上下文并 startswith 匹配"""
+
+    def _traditional_route(self, input_text: str) -> Tuple[str, Dict[str, Any]]:
+        for route in self.routes:
+            if "*" not in route.contexts and self.current_context not in route.contexts:
+                continue
+            if input_text.lower().startswith(route.pattern.lower()):
+                params = self._extract_params(input_text, route.pattern)
+                params["raw_text"] = input_text
+                return route.handler, params
+        return "unknown", {"raw_text": input_text}
+
+
+def _grow(parser: CommandParser, router: CommandRouter, count: int) -> None:
+    """追加模组式的自定义命令：别名、模式、同义词组和路由"""
+    for i in range(count):
+        if isinstance(parser, LegacyCommandParser):
+            parser.command_aliases[f"秘法{i}"] = CommandType.USE_SKILL
+            parser.command_patterns.append((rf"^祭炼{i}号\s*(.+)$", CommandType.USE_ITEM, "item"))
+            parser.synonyms[f"炼器{i}"] = [f"炼器{i}", f"锻造{i}"]
+        else:
+            parser.add_alias(f"秘法{i}", CommandType.USE_SKILL)
+            parser.add_pattern(rf"^祭炼{i}号\s*(.+)$", CommandType.USE_ITEM, "item")
+            parser.add_synonyms(f"炼器{i}", [f"炼器{i}", f"锻造{i}"])
+        router.add_route(f"阵法{i}", f"formation_{i}", CommandPriority.NORMAL, ["exploration"])
+
+
+def _throughput(parser: CommandParser, router: CommandRouter, rounds: int) -> Tuple[float, float]:
+    """返回 (每秒解析条数, 每秒路由条数)"""
+    corpus = CORPUS * rounds
+    start = time.perf_counter()
+    for text in corpus:
+        parser.parse(text)
+    parse_rate = len(corpus) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for text in corpus:
+        router._traditional_route(text)
+    route_rate = len(corpus) / (time.perf_counter() - start)
+    return parse_rate, route_rate
+
+
+def _check_same(legacy: CommandParser, parser: CommandParser) -> None:
+    for text in CORPUS:
+        old, new = legacy.parse(text), parser.parse(text)
+        assert (old.command_type, old.target, old.parameters) == (new.command_type, new.target, new.parameters), text
+
+
+def run(rounds: int, extra: int) -> None:
+    print("\n" + "=" * 60)
+    print(f"命令解析吞吐基准测试 (语料={len(CORPUS)} 条 x {rounds} 轮)")
+    print("=" * 60)
+
+    systems = {
+        "逐条匹配": (LegacyCommandParser(), LegacyCommandRouter(use_nlp=False)),
+        "编译匹配": (CommandParser(), CommandRouter(use_nlp=False)),
+    }
+    for label in ("默认规则", f"追加 {extra} 组规则后"):
+        if label != "默认规则":
+            for parser, router in systems.values():
+                _grow(parser, router, extra)
+        _check_same(systems["逐条匹配"][0], systems["编译匹配"][0])
+        print(f"\n{label} (别名 {len(systems['编译匹配'][0].command_aliases)}, "
+              f"路由 {len(systems['编译匹配'][1].routes)}):")
+        for name, (parser, router) in systems.items():
+            parse_rate, route_rate = _throughput(parser, router, rounds)
+            print(f"  {name}: 解析 {parse_rate:,.0f} 条/秒, 路由 {route_rate:,.0f} 条/秒")
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description="命令解析吞吐基准测试")
+    parser.add_argument("--rounds", type=int, default=200, help="语料重复轮数")
+    parser.add_argument("--extra", type=int, default=500, help="追加的规则组数")
+    args = parser.parse_args()
+    run(args.rounds, args.extra)
+
+
+if __name__ == "__main__":
+    main()
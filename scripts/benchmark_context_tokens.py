@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+上下文 token 计数基准测试脚本
+按 NLP 处理器每轮的调用方式（append、get_context、append、get_stats）跑一个长会话，
+对比每次逐字符重新统计与增量计数的耗时。分两种情况：
+
+- 正常：摘要立即返回，队列长度有界；
+- 摘要卡住：LLM 迟迟不返回，待压缩消息持续积压。
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.core.context.compressor import ContextCompressor
+
+
+class _StubSummarizer:
+    """摘要桩：``stalled`` 时在 release 之前一直阻塞"""
+
+    def __init__(self, stalled: bool):
+        self.release = threading.Event()
+        if not stalled:
+            self.release.set()
+
+    def summarize(self, messages, structured=False, max_tokens=150):
+        self.release.wait()
+        return f"{len(messages)}条对话的摘要：玩家四处修炼，经历了若干战斗"
+
+    def calculate_importance(self, messages):
+        text = " ".join(messages)
+        return min(1.0, 0.5 + sum(0.1 for kw in ("突破", "战斗", "获得") if kw in text))
+
+
+class LegacyCompressor(ContextCompressor):
+    """每次都逐字符重新统计全部消息的旧实现"""
+
+    def _estimate_tokens(self, text):
+        chinese_chars = sum(1 for c in text if '一' <= c <= '鿿')
+        other_chars = len(text) - chinese_chars
+        return chinese_chars // 2 + other_chars // 4
+
+    def _estimate_total_tokens(self):
+        total = sum(block.token_estimate for block in self.memory_blocks)
+        total += sum(self._estimate_tokens(m) for m in self.recent_messages)
+        total += sum(self._estimate_tokens(m) for m in self.pending_messages)
+        return total
+
+    def get_context(self, max_tokens=None):
+        with self._lock:
+            unsummarized = self.pending_messages[:max(0, len(self.pending_messages) - len(self.recent_messages))]
+            context = self._render_context(list(self.memory_blocks), unsummarized, list(self.recent_messages))
+        self._estimate_tokens(context)
+        return context
+
+
+def _messages(count):
+    rng = random.Random(42)
+    templates = [
+        "玩家: 前往{place}修炼，尝试突破瓶颈",
+        "系统: 你在{place}遇到了一只妖兽，战斗开始，对方气息浑厚，似乎是筑基期的修为",
+        "玩家: look around the {place} and pick up items",
+        "系统: 你获得了灵石 x{n}，修为有所精进",
+        "玩家: 与{place}的掌柜交谈，询问近来的传闻",
+    ]
+    places = ["青云山", "落霞谷", "天机阁", "北冥海", "万妖林"]
+    return [
+        rng.choice(templates).format(place=rng.choice(places), n=rng.randint(1, 99))
+        for _ in range(count)
+    ]
+
+
+def _run(cls, messages, budget, stalled):
+    summarizer = _StubSummarizer(stalled)
+    compressor = cls(llm_client=MagicMock(), window_size=20, block_size=30, background=stalled)
+    compressor.summarizer = summarizer
+
+    start = time.perf_counter()
+    for i in range(0, len(messages) - 1, 2):
+        compressor.append(messages[i])
+        compressor.get_context(max_tokens=budget)
+        compressor.append(messages[i + 1])
+        compressor.get_stats()
+    elapsed = time.perf_counter() - start
+    pending = len(compressor.pending_messages)
+
+    summarizer.release.set()
+    compressor.flush(timeout=30)
+    return elapsed, pending
+
+
+def run(count: int, budget: int) -> None:
+    messages = _messages(count)
+    turns = count // 2
+
+    print("\n" + "=" * 60)
+    print(f"上下文 token 计数基准测试 (消息数={count}, 预算={budget} tokens)")
+    print("=" * 60)
+    for stalled in (False, True):
+        print("摘要卡住:" if stalled else "正常:")
+        for name, cls, limit in (
+            ("  逐字符重扫", LegacyCompressor, None),
+            ("  增量计数  ", ContextCompressor, None),
+            ("  增量计数+预算", ContextCompressor, budget),
+        ):
+            elapsed, pending = _run(cls, messages, limit, stalled)
+            print(f"{name}: 总计 {elapsed * 1000:.0f} ms, 每轮 {elapsed / turns * 1e6:.0f} µs "
+                  f"(结束时积压 {pending} 条)")
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description="上下文 token 计数基准测试")
+    parser.add_argument("--count", type=int, default=10_000, help="会话消息数")
+    parser.add_argument("--budget", type=int, default=3000, help="上下文 token 预算")
+    args = parser.parse_args()
+    run(args.count, args.budget)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+EventStore 基准测试脚本
+测量大量事件流经环形缓冲区时的写入吞吐和类型/时间范围查询耗时
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.events import DomainEvent, EventStore
+
+EVENT_TYPES = ["combat", "world", "player", "system", "trade", "dialogue", "cultivation", "quest"]
+
+
+def run(total: int, max_size: int, queries: int, spill: bool) -> None:
+    spill_dir = tempfile.mkdtemp(prefix="xwe_events_") if spill else None
+    store = EventStore(max_size=max_size, spill_path=spill_dir, spill_segment_size=10000)
+    rng = random.Random(42)
+
+    events = [
+        DomainEvent(type=rng.choice(EVENT_TYPES), data={"i": i}, timestamp=float(i))
+        for i in range(total)
+    ]
+
+    start = time.perf_counter()
+    for event in events:
+        store.append(event)
+    append_s = time.perf_counter() - start
+
+    newest = float(total - 1)
+    oldest = newest - len(store) + 1
+    samples = []
+    for _ in range(queries):
+        lo = rng.uniform(oldest, newest)
+        begin = time.perf_counter()
+        store.get_events(event_type=rng.choice(EVENT_TYPES), start_time=lo, end_time=lo + 500, limit=100)
+        samples.append(time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    for _ in range(queries):
+        store.get_event_types()
+    types_s = (time.perf_counter() - begin) / queries
+
+    print("\n" + "=" * 60)
+    print(f"EventStore 基准测试 (事件数={total}, 容量={max_size}, 溢出={'是' if spill else '否'})")
+    print("=" * 60)
+    print(f"写入吞吐: {total / append_s:,.0f} 事件/秒")
+    print(f"类型+时间范围查询: 中位数 {statistics.median(samples) * 1e6:.1f} µs, "
+          f"P99 {sorted(samples)[int(len(samples) * 0.99) - 1] * 1e6:.1f} µs")
+    print(f"get_event_types: {types_s * 1e6:.1f} µs")
+
+    if spill:
+        store.flush_spill()
+        begin = time.perf_counter()
+        spilled = store.get_spilled_events(event_type="combat", start_time=1000, end_time=2000, limit=0)
+        print(f"溢出日志查询: {len(spilled)} 条, {(time.perf_counter() - begin) * 1000:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EventStore 基准测试")
+    parser.add_argument("--events", type=int, default=1_000_000, help="写入的事件总数")
+    parser.add_argument("--max-size", type=int, default=100_000, help="环形缓冲区容量")
+    parser.add_argument("--queries", type=int, default=1000, help="查询次数")
+    parser.add_argument("--spill", action="store_true", help="启用磁盘溢出日志")
+    args = parser.parse_args()
+    run(args.events, args.max_size, args.queries, args.spill)
+
+
+if __name__ == "__main__":
+    main()
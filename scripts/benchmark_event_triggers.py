@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+世界事件触发检查基准测试脚本
+生成大量事件定义（地点、天气等值条件，时辰、等级范围条件），模拟逐回合推进的
+上下文，对比逐条比较全部事件的旧实现与增量触发索引的每次检查耗时。
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.events import WorldEvent
+from src.xwe.world import EventDefinition, EventSystem
+
+AREAS = [f"area_{i}" for i in range(200)]
+WEATHERS = ["sunny", "rain", "storm", "snow", "fog"]
+
+
+class LegacyEventSystem(EventSystem):
+    """旧实现：每次逐条比较全部事件的触发条件"""
+
+    def add_event(self, event: EventDefinition) -> None:
+        self.events[event.id] = event
+
+    def check_triggers(self, context: Dict[str, Any]) -> List[WorldEvent]:
+        triggered: List[WorldEvent] = []
+        for evt in self.events.values():
+            if self._matches(evt.trigger, context):
+                triggered.append(WorldEvent(type="world", data={"id": evt.id}))
+        return triggered
+
+    @staticmethod
+    def _matches(cond, ctx):
+        for key, value in cond.items():
+            if key not in ctx:
+                return False
+            if isinstance(value, dict):
+                try:
+                    if not value.get("min", ctx[key]) <= ctx[key] <= value.get("max", ctx[key]):
+                        return False
+                except TypeError:
+                    return False
+            elif ctx[key] != value:
+                return False
+        return True
+
+
+def _definitions(count: int, seed: int = 42) -> List[EventDefinition]:
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        trigger: Dict[str, Any] = {"location": rng.choice(AREAS)}
+        if rng.random() < 0.5:
+            trigger["weather"] = rng.choice(WEATHERS)
+        if rng.random() < 0.4:
+            start = rng.randint(0, 23)
+            trigger["hour"] = {"min": start, "max": min(23, start + rng.randint(0, 3))}
+        if rng.random() < 0.3:
+            trigger["player_level"] = {"min": rng.randint(1, 50)}
+        events.append(EventDefinition(f"event_{i}", f"事件{i}", trigger, ""))
+    return events
+
+
+def _contexts(turns: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """每回合时辰前进，偶尔换地点、变天或升级"""
+    rng = random.Random(seed)
+    context = {"location": AREAS[0], "weather": "sunny", "hour": 0, "player_level": 1}
+    contexts = []
+    for turn in range(turns):
+        context = dict(context)
+        context["hour"] = turn % 24
+        if rng.random() < 0.2:
+            context["location"] = rng.choice(AREAS)
+        if rng.random() < 0.05:
+            context["weather"] = rng.choice(WEATHERS)
+        if rng.random() < 0.02:
+            context["player_level"] += 1
+        contexts.append(context)
+    return contexts
+
+
+def _run(system: EventSystem, contexts) -> tuple:
+    fired = 0
+    start = time.perf_counter()
+    for context in contexts:
+        fired += len(system.check_triggers(context))
+    return time.perf_counter() - start, fired
+
+
+def run(count: int, turns: int) -> None:
+    definitions = _definitions(count)
+    contexts = _contexts(turns)
+
+    print("\n" + "=" * 60)
+    print(f"世界事件触发检查基准测试 (事件数={count}, 回合数={turns})")
+    print("=" * 60)
+
+    for name, cls in (("逐条比较", LegacyEventSystem), ("增量索引", EventSystem)):
+        system = cls()
+        start = time.perf_counter()
+        for definition in definitions:
+            system.add_event(definition)
+        build = time.perf_counter() - start
+        elapsed, fired = _run(system, contexts)
+        print(f"{name}: 加入事件 {build * 1000:.0f} ms, 每次检查 {elapsed / turns * 1e6:.0f} µs "
+              f"(共触发 {fired} 次)")
+        if cls is EventSystem:
+            stats = system.get_stats()
+            print(f"          每次检查平均触及 {stats['touched_events'] / stats['evaluations']:.1f} 个事件")
+
+    system = EventSystem()
+    for definition in definitions:
+        system.add_event(definition)
+    start = time.perf_counter()
+    for definition in definitions[: count // 10]:
+        system.remove_event(definition.id)
+    print(f"删除 {count // 10} 个事件: 每个 {(time.perf_counter() - start) / (count // 10) * 1e6:.1f} µs")
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description="世界事件触发检查基准测试")
+    parser.add_argument("--count", type=int, default=50_000, help="事件定义数")
+    parser.add_argument("--turns", type=int, default=2_000, help="检查次数")
+    args = parser.parse_args()
+    run(args.count, args.turns)
+
+
+if __name__ == "__main__":
+    main()
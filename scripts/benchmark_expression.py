@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+表达式引擎基准测试脚本
+对比原始 eval、缓存代码对象、编译表达式及批量求值在属性公式上的耗时
+"""
+
+import argparse
+import os
+import sys
+
+# 添加项目路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+
+from src.xwe.core.optimizations.expression_jit import ExpressionBenchmark
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="表达式引擎基准测试")
+    parser.add_argument("--characters", type=int, default=10_000, help="参与计算的角色数量")
+    parser.add_argument("--rounds", type=int, default=5, help="重复轮数")
+    args = parser.parse_args()
+
+    benchmark = ExpressionBenchmark()
+    suite = benchmark.run_suite(characters=args.characters, rounds=args.rounds)
+
+    print("\n" + "=" * 80)
+    print(f"表达式引擎基准测试 (角色数={args.characters}, 轮数={args.rounds})，单次求值耗时")
+    print("=" * 80)
+    print(ExpressionBenchmark.format_report(suite))
+
+    print("\n相对原始 eval 的加速比:")
+    for formula, results in suite.items():
+        baseline = results["eval"].seconds
+        print(
+            f"  {formula:<14} 编译: {baseline / results['compiled'].seconds:.1f}x, "
+            f"批量: {baseline / results['compiled_batch'].seconds:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+天道法则检查基准测试脚本
+对攻击、施法、突破三类行动各做一批法则检查，对比旧的逐条硬编码检查
+（每次重建境界列表、禁术列表并线性查找）与按行动类型索引的编译法则。
+
+另外在法则文件里追加一批只对其他行动生效的法则，对比不建索引、
+每次逐条检查全部法则的做法，看法则数量增长时每次检查的开销。
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.core.heaven_law_engine import REALM_ORDER, ActionContext, Event, HeavenLawEngine, ThunderTribulation
+from src.xwe.world.laws import WorldLaw
+
+log = logging.getLogger("src.xwe.core.heaven_law_engine")
+
+
+class LegacyHeavenLawEngine(HeavenLawEngine):
+    """旧实现：每次调用都重建列表，并依次检查硬编码的法则"""
+
+    def get_realm_index(self, realm_name):
+        realm_order = [
+            "凡人", "炼气期", "筑基期", "金丹期",
+            "元婴期", "化神期", "合体期", "大乘期", "渡劫期"
+        ]
+        try:
+            return realm_order.index(realm_name)
+        except ValueError:
+            return 0
+
+    def enforce(self, actor, target, ctx):
+        law = self.laws.get("CROSS_REALM_KILL")
+        if not (law and law.enabled) or not target:
+            return
+        actor_realm = getattr(actor.attributes, 'realm_name', '炼气期') if hasattr(actor, 'attributes') else '炼气期'
+        target_realm = getattr(target.attributes, 'realm_name', '炼气期') if hasattr(target, 'attributes') else '炼气期'
+        diff = self.get_realm_index(actor_realm) - self.get_realm_index(target_realm)
+        if diff >= law.params.get("max_gap", 2):
+            log.info(
+                f"HeavenLawEngine: cross-realm kill attempt blocked "
+                f"({actor.name}[{actor_realm}] → {target.name}[{target_realm}])"
+            )
+            ctx.cancelled = True
+            ctx.reason = f"天道不容！{actor_realm}修士不可肆意斩杀{target_realm}修士！"
+            severity = "severe" if diff >= law.params.get("severity_threshold", 3) else "moderate"
+            ctx.events.append(ThunderTribulation(actor=actor, severity=severity))
+
+    def check_forbidden_art(self, actor, skill_name, ctx):
+        law = self.laws.get("FORBIDDEN_ARTS")
+        if not (law and law.enabled):
+            return
+        forbidden_skills = ["血魔大法", "噬魂术", "九幽冥火", "天魔解体大法"]
+        if skill_name in forbidden_skills:
+            log.info(f"HeavenLawEngine: forbidden art detected - {skill_name}")
+            ctx.events.append(Event("ForbiddenArtBacklash"))
+            if hasattr(actor, 'karma'):
+                actor.karma -= law.params.get("karma_penalty", 100)
+
+    def check_breakthrough(self, actor, new_realm, ctx):
+        law = self.laws.get("REALM_BREAKTHROUGH")
+        if not (law and law.enabled):
+            return
+        major_realms = law.params.get("major_realms", [])
+        if new_realm in major_realms:
+            difficulty = law.params.get("tribulation_difficulty", {}).get(new_realm, 1)
+            log.info(f"HeavenLawEngine: realm breakthrough tribulation required for {new_realm}")
+            ctx.events.append(Event(f"BreakthroughTribulation_Level{difficulty}"))
+
+
+class UnindexedHeavenLawEngine(HeavenLawEngine):
+    """对照组：不按行动类型建索引，每次逐条检查全部法则的触发条件"""
+
+    def set_laws(self, laws):
+        super().set_laws(laws)
+        self._all = []
+        for action, compiled_laws in self._index.items():
+            for compiled in compiled_laws:
+                self._all.append((action, compiled))
+
+    def _evaluate(self, action, actor, target, extra, ctx):
+        for trigger, compiled in self._all:
+            if trigger != action or not compiled.law.enabled:
+                continue
+            compiled.evaluations += 1
+            if compiled.predicate(actor, target, extra):
+                compiled.matches += 1
+                compiled.effect(compiled.law, actor, target, extra, ctx)
+
+
+def _extra_laws(count):
+    """只对交易、炼丹等其他行动生效的法则"""
+    actions = ["trade", "craft", "cultivate", "explore", "steal"]
+    return {
+        f"EXTRA_{i}": WorldLaw(
+            code=f"EXTRA_{i}",
+            triggers=[actions[i % len(actions)]],
+            conditions=[{"fact": "actor_karma", "op": "<", "value": -i}],
+            effect="forbidden_art_backlash",
+        )
+        for i in range(count)
+    }
+
+
+def _characters(count, rng):
+    return [
+        SimpleNamespace(name=f"修士{i}", attributes=SimpleNamespace(realm_name=rng.choice(REALM_ORDER[1:])))
+        for i in range(count)
+    ]
+
+
+def _workload(count, seed=42):
+    """约八成攻击、一成施法、一成突破"""
+    rng = random.Random(seed)
+    characters = _characters(64, rng)
+    skills = ["火球术", "剑气", "血魔大法", "御风术", "噬魂术"]
+    actions = []
+    for _ in range(count):
+        roll = rng.random()
+        actor = rng.choice(characters)
+        if roll < 0.8:
+            actions.append(("attack", actor, rng.choice(characters)))
+        elif roll < 0.9:
+            actions.append(("skill", actor, rng.choice(skills)))
+        else:
+            actions.append(("breakthrough", actor, rng.choice(REALM_ORDER)))
+    return actions
+
+
+def _run(engine, actions):
+    enforce, forbidden, breakthrough = engine.enforce, engine.check_forbidden_art, engine.check_breakthrough
+    blocked = 0
+    start = time.perf_counter()
+    for kind, actor, arg in actions:
+        ctx = ActionContext()
+        if kind == "attack":
+            enforce(actor, arg, ctx)
+        elif kind == "skill":
+            forbidden(actor, arg, ctx)
+        else:
+            breakthrough(actor, arg, ctx)
+        blocked += ctx.cancelled
+    return time.perf_counter() - start, blocked
+
+
+def run(count: int, extra_laws: int) -> None:
+    actions = _workload(count)
+
+    print("\n" + "=" * 60)
+    print(f"天道法则检查基准测试 (检查次数={count})")
+    print("=" * 60)
+
+    legacy_time, legacy_blocked = _run(LegacyHeavenLawEngine(), actions)
+    print(f"旧实现    : 总计 {legacy_time:.2f} s, 每次 {legacy_time / count * 1e6:.2f} µs (拦截 {legacy_blocked})")
+
+    engine = HeavenLawEngine()
+    compiled_time, compiled_blocked = _run(engine, actions)
+    print(f"编译法则  : 总计 {compiled_time:.2f} s, 每次 {compiled_time / count * 1e6:.2f} µs (拦截 {compiled_blocked})")
+    print(f"加速: {legacy_time / compiled_time:.2f}x")
+
+    print("\n各法则计数:")
+    for code, stats in engine.get_law_stats().items():
+        print(f"  {code}: 评估 {stats['evaluations']} 次, 命中 {stats['matches']} 次")
+
+    print(f"\n追加 {extra_laws} 条其他行动的法则后:")
+    for name, cls in (("逐条检查", UnindexedHeavenLawEngine), ("按行动索引", HeavenLawEngine)):
+        engine = cls()
+        engine.set_laws({**engine.laws, **_extra_laws(extra_laws)})
+        elapsed, _ = _run(engine, actions)
+        print(f"  {name}: 每次 {elapsed / count * 1e6:.2f} µs")
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description="天道法则检查基准测试")
+    parser.add_argument("--count", type=int, default=1_000_000, help="法则检查次数")
+    parser.add_argument("--extra-laws", type=int, default=50, help="追加的其他行动法则数")
+    args = parser.parse_args()
+    run(args.count, args.extra_laws)
+
+
+if __name__ == "__main__":
+    main()
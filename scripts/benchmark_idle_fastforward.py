@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+挂机修炼快进基准测试脚本
+对比逐步模拟与一次算出两种方式补算不同离线时长的耗时，并核对结果一致。
+"""
+
+import argparse
+import copy
+import logging
+import os
+import sys
+import time
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.core.attributes import CharacterAttributes
+from src.xwe.core.character import Character, CharacterType
+from src.xwe.core.cultivation_fastforward import CultivationFastForward, IdleSettings
+from src.xwe.core.status import StatusEffect, StatusType
+
+START = time.time()
+
+
+def _player(effects: int) -> Character:
+    attrs = CharacterAttributes()
+    attrs.comprehension = 20
+    attrs.realm_name = "金丹期"
+    player = Character(id="player", character_type=CharacterType.PLAYER, attributes=attrs)
+    attrs.current_health = attrs.current_mana = attrs.current_stamina = 0
+    for i in range(effects):
+        player.status_effects.effects[f"buff{i}"] = StatusEffect(
+            id=f"buff{i}", name=f"聚灵{i}", description="", status_type=StatusType.BUFF,
+            duration=(i + 1) * 12 * 3600, modifiers={"cultivation_speed": 0.1}, start_time=START,
+        )
+    return player
+
+
+def _time(fn, player, hours, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        target = copy.deepcopy(player)
+        start = time.perf_counter()
+        result = fn(target, hours, START)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(step_hours: float, effects: int, repeat: int) -> None:
+    engine = CultivationFastForward(settings=IdleSettings(step_hours=step_hours))
+    player = _player(effects)
+    print("\n" + "=" * 60)
+    print(f"挂机修炼快进基准测试 (每步 {step_hours} 小时, 状态效果 {effects} 个)")
+    print("=" * 60)
+    for days in (1, 30, 365, 3650):
+        hours = days * 24
+        slow, slow_result = _time(engine.step_through, player, hours, repeat)
+        fast, fast_result = _time(engine.fast_forward, player, hours, repeat)
+        assert slow_result == fast_result
+        print(f"  离线 {days:>5} 天 ({slow_result.steps} 步): 逐步模拟 {slow * 1000:8.2f} ms, "
+              f"一次算出 {fast * 1000:6.3f} ms, 加速 {slow / fast:,.0f}x, 修为 +{fast_result.exp_gained:,.0f}")
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description="挂机修炼快进基准测试")
+    parser.add_argument("--step-hours", type=float, default=2.0, help="每步修炼时长（小时）")
+    parser.add_argument("--effects", type=int, default=5, help="状态效果个数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数（取最快）")
+    args = parser.parse_args()
+    run(args.step_hours, args.effects, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+游戏实例池基准测试脚本
+模拟登录潮：对比每个新会话现场构建游戏实例与从预热池取用的延迟，
+并测量过期实例重置回收的耗时。
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("ENABLE_PROMETHEUS", "false")
+
+from src.app import _build_game, _reset_game
+from src.xwe.server.instance_pool import GameInstancePool
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return f"p50 {pick(0.5):.2f} ms, p99 {pick(0.99):.2f} ms, 最大 {samples[-1] * 1000:.2f} ms"
+
+
+def run(logins: int, pool_size: int, gap_ms: float) -> None:
+    logging.disable(logging.WARNING)
+    print("\n" + "=" * 60)
+    print(f"游戏实例池基准测试 (登录 {logins} 次, 预热 {pool_size} 个, 间隔 {gap_ms} ms)")
+    print("=" * 60)
+
+    _build_game()  # 预热共享的编译结构，避免首次构建计入
+    direct = []
+    for _ in range(logins):
+        start = time.perf_counter()
+        _build_game()
+        direct.append(time.perf_counter() - start)
+        time.sleep(gap_ms / 1000)
+    print(f"现场构建: {_percentiles(direct)}")
+
+    pool = GameInstancePool(_build_game, target_size=pool_size, reset=_reset_game, max_size=pool_size * 2)
+    pool.prewarm()
+    pool.start()
+    pooled, games = [], []
+    for _ in range(logins):
+        start = time.perf_counter()
+        games.append(pool.acquire())
+        pooled.append(time.perf_counter() - start)
+        time.sleep(gap_ms / 1000)
+    stats = pool.get_stats()
+    print(f"实例池取用: {_percentiles(pooled)}, 命中率 {stats['hit_rate']:.1%}, "
+          f"平均构建 {stats['avg_build_seconds'] * 1000:.2f} ms")
+    pool.stop()
+
+    resets = []
+    for game in games:
+        start = time.perf_counter()
+        _reset_game(game)
+        resets.append(time.perf_counter() - start)
+    print(f"重置回收: {_percentiles(resets)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="游戏实例池基准测试")
+    parser.add_argument("--logins", type=int, default=500, help="模拟登录次数")
+    parser.add_argument("--pool-size", type=int, default=8, help="预热实例数量")
+    parser.add_argument("--gap-ms", type=float, default=2.0, help="相邻登录的间隔（毫秒）")
+    args = parser.parse_args()
+    run(args.logins, args.pool_size, args.gap_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+区域实体查询基准测试脚本
+在一个挤满实体的集散地上，对比旧的复制列表/扫描全部 NPC 档案与兴趣管理索引的查询耗时。
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.npc import DialogueSystem, NPCManager, NPCProfile
+from src.xwe.world import EntityKind, LocationManager, WorldMap
+from src.xwe.world.world_map import DEFAULT_MAP_DATA
+
+
+def _timed(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def run(players: int, npcs: int, rounds: int) -> None:
+    world_map = WorldMap()
+    world_map.load_from_dict(DEFAULT_MAP_DATA)
+    areas = list(world_map.areas)
+    hub = areas[0]
+
+    manager = LocationManager(world_map)
+    npc_manager = NPCManager(DialogueSystem(), manager.interest)
+    for i in range(players):
+        manager.set_location(f"player{i}", hub)
+    for i in range(npcs):
+        npc_id = f"npc{i}"
+        npc_manager.add_profile(NPCProfile(id=npc_id, name=npc_id))
+        # 一半 NPC 聚在集散地，其余分散到其他区域
+        npc_manager.set_npc_location(npc_id, hub if i % 2 else areas[i % len(areas)])
+
+    area_set = set(manager.interest.entities_in(hub))
+    npc_locations = npc_manager.npc_locations
+    profiles = npc_manager.npc_profiles
+
+    def legacy_npcs():
+        return [npc_id for npc_id in profiles if npc_locations.get(npc_id) == hub]
+
+    print("\n" + "=" * 60)
+    print(f"区域实体查询基准测试 (集散地玩家={players}, NPC={npcs})")
+    print("=" * 60)
+    old = _timed(lambda: list(area_set), rounds)
+    new = _timed(lambda: manager.interest.entities_in(hub), rounds)
+    print(f"区域实体(复制列表)   : 每次 {old * 1e6:.1f} µs")
+    print(f"区域实体(视图)       : 每次 {new * 1e6:.2f} µs")
+
+    old = _timed(legacy_npcs, rounds)
+    new = _timed(lambda: list(manager.interest.entities_in(hub, EntityKind.NPC)), rounds)
+    print(f"集散地NPC(扫描档案)  : 每次 {old * 1e6:.1f} µs")
+    print(f"集散地NPC(按类型分桶): 每次 {new * 1e6:.1f} µs")
+
+    new = _timed(lambda: manager.get_nearby_entities("player0", radius=2, kind=EntityKind.NPC, limit=10), rounds)
+    print(f"附近10个NPC(两环)    : 每次 {new * 1e6:.1f} µs")
+
+    start = time.perf_counter()
+    for i in range(players):
+        manager.set_location(f"player{i}", areas[1 + i % (len(areas) - 1)])
+    elapsed = time.perf_counter() - start
+    print(f"移动 {players} 个玩家: 每次 {elapsed / players * 1e6:.2f} µs")
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description="区域实体查询基准测试")
+    parser.add_argument("--players", type=int, default=20_000, help="集散地玩家数")
+    parser.add_argument("--npcs", type=int, default=5_000, help="NPC 数")
+    parser.add_argument("--rounds", type=int, default=200, help="每项查询次数")
+    args = parser.parse_args()
+    run(args.players, args.npcs, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
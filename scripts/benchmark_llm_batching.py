@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+LLM 请求合并基准测试脚本
+在本地起一个模拟 DeepSeek 的 HTTP 服务（固定延迟 + 每条输出的生成耗时 + 并发上限），
+让多名玩家同时发命令，对比逐条调用、同键合并、同键合并 + 微批打包三种模式下的
+API 调用次数、单次解析延迟和吞吐。
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.core.nlp.coalescer import MicroBatcher, SingleFlight
+from src.xwe.core.nlp.llm_client import LLMClient
+from src.xwe.core.nlp.nlp_processor import DeepSeekNLPProcessor
+
+# 热门命令重复出现，长尾命令各不相同
+HOT = ["探索", "修炼", "查看状态", "打开背包", "打坐"]
+TAIL = ["去{}", "前往{}看看", "和{}对话", "攻击{}", "使用{}"]
+NAMES = ["丹药铺", "青云山", "王长老", "妖狼", "回春丹", "藏经阁", "坊市", "掌柜", "山贼", "灵石"]
+
+BATCH_LINE = re.compile(r'^(\d+)\. 输入: "(.*)"$', re.MULTILINE)
+SINGLE_INPUT = re.compile(r'输入: "(.*)"\s*输出:\s*$')
+
+
+def _parse_result(text):
+    return {"raw": text, "normalized_command": text[:2], "intent": "action", "args": {}, "explanation": "模拟"}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        prompt = json.loads(self.rfile.read(length))["messages"][-1]["content"]
+        lines = BATCH_LINE.findall(prompt)
+        if lines:
+            content = json.dumps(
+                [{"id": int(i), **_parse_result(text)} for i, text in lines], ensure_ascii=False
+            )
+        else:
+            match = SINGLE_INPUT.search(prompt)
+            content = json.dumps(_parse_result(match.group(1) if match else "未知"), ensure_ascii=False)
+
+        with server.slots:
+            time.sleep(server.latency + server.per_item * max(len(lines), 1))
+        with server.lock:
+            server.calls += 1
+
+        body = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stub_server(latency, per_item, concurrency):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.latency, server.per_item = latency, per_item
+    server.slots = threading.BoundedSemaphore(concurrency)
+    server.lock = threading.Lock()
+    server.calls = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _workload(players, rounds, hot_ratio, seed=42):
+    """每轮每名玩家一条命令"""
+    rng = random.Random(seed)
+    return [
+        [
+            rng.choice(HOT) if rng.random() < hot_ratio else rng.choice(TAIL).format(rng.choice(NAMES))
+            for _ in range(players)
+        ]
+        for _ in range(rounds)
+    ]
+
+
+def _make_processor(url, mode, window, max_batch_size):
+    processor = DeepSeekNLPProcessor(api_key="stub")
+    processor.llm.cleanup()
+    processor.llm = LLMClient(api_key="stub", api_url=url, pool_size=64)
+    processor.context_compressor = None
+    processor.set_intent_classifier(None)
+    processor._inflight = SingleFlight() if mode != "逐条调用" else None
+    processor._batcher = (
+        MicroBatcher(processor._call_deepseek_batch, window, max_batch_size) if mode == "合并 + 打包" else None
+    )
+    return processor
+
+
+def run(players, rounds, hot_ratio, latency, per_item, concurrency, window, max_batch_size):
+    print("\n" + "=" * 60)
+    print(f"LLM 请求合并基准测试 (玩家={players}, 轮数={rounds}, 热门命令占比={hot_ratio:.0%})")
+    print(f"模拟服务: 延迟 {latency * 1000:.0f} ms + 每条输出 {per_item * 1000:.0f} ms, 并发上限 {concurrency}")
+    print("=" * 60)
+
+    workload = _workload(players, rounds, hot_ratio)
+    total = players * rounds
+    for mode in ("逐条调用", "同键合并", "合并 + 打包"):
+        server = start_stub_server(latency, per_item, concurrency)
+        url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+        processor = _make_processor(url, mode, window, max_batch_size)
+        latencies = []
+
+        def timed_parse(text):
+            start = time.perf_counter()
+            parsed = processor.parse(text)
+            latencies.append(time.perf_counter() - start)
+            return parsed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(players) as pool:
+            for commands in workload:
+                # 每轮开始清空解析缓存，模拟一波冷启动的突发请求
+                processor.parse_cache.clear()
+                results = list(pool.map(timed_parse, commands))
+                assert all(r.explanation == "模拟" for r in results), "出现了回退解析"
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"\n{mode}:")
+        print(f"  API 调用: {server.calls} 次 (每次调用 {total / server.calls:.2f} 条解析)")
+        print(f"  解析延迟: 中位数 {statistics.median(latencies) * 1000:.0f} ms, P95 {p95 * 1000:.0f} ms")
+        print(f"  吞吐: {total / elapsed:.1f} 条/秒")
+
+        processor.parse_cache.close()
+        processor.llm.cleanup()
+        server.shutdown()
+        server.server_close()
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description="LLM 请求合并基准测试")
+    parser.add_argument("--players", type=int, default=32, help="同时发命令的玩家数")
+    parser.add_argument("--rounds", type=int, default=5, help="轮数")
+    parser.add_argument("--hot-ratio", type=float, default=0.5, help="热门命令占比")
+    parser.add_argument("--latency", type=float, default=0.2, help="模拟服务的固定延迟（秒）")
+    parser.add_argument("--per-item", type=float, default=0.02, help="模拟服务每条输出的生成耗时（秒）")
+    parser.add_argument("--concurrency", type=int, default=4, help="模拟服务的并发上限")
+    parser.add_argument("--window", type=float, default=0.02, help="微批收集窗口（秒）")
+    parser.add_argument("--max-batch-size", type=int, default=8, help="每批最多条数")
+    args = parser.parse_args()
+    os.environ.setdefault("XWE_MAX_LLM_RETRIES", "1")
+    run(args.players, args.rounds, args.hot_ratio, args.latency, args.per_item,
+        args.concurrency, args.window, args.max_batch_size)
+
+
+if __name__ == "__main__":
+    main()
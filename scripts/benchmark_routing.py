@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+地图寻路基准测试脚本
+在合成的网格地图上对比每次复制路径的广度优先搜索与路由表查表，
+并测量加权旅行规划（plan_travel）的耗时。
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from collections import deque
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.world import LocationManager, RouteCostModel, RouteTable, WorldMap
+from src.xwe.world.world_map import Area, AreaType
+
+
+def _build_map(size: int, seed: int = 42) -> WorldMap:
+    """size×size 的网格地图，地形随机"""
+    rng = random.Random(seed)
+    types = list(AreaType)
+    world_map = WorldMap()
+    for y in range(size):
+        for x in range(size):
+            connections = [
+                f"{nx}_{ny}"
+                for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                if 0 <= nx < size and 0 <= ny < size
+            ]
+            world_map.areas[f"{x}_{y}"] = Area(
+                id=f"{x}_{y}",
+                name=f"{x}_{y}",
+                type=rng.choice(types),
+                connected_areas=connections,
+                level_requirement=rng.choice([0, 0, 0, 10, 20]),
+                danger_level=rng.randint(0, 5),
+            )
+    return world_map
+
+
+def legacy_find_path(world_map: WorldMap, start_id: str, end_id: str):
+    """旧实现：每次展开都复制整条路径的广度优先搜索"""
+    if start_id == end_id:
+        return [start_id]
+    queue = deque([[start_id]])
+    visited = {start_id}
+    while queue:
+        path = queue.popleft()
+        current = path[-1]
+        if current == end_id:
+            return path
+        for nxt in world_map.areas[current].connected_areas:
+            if nxt not in visited and nxt in world_map.areas:
+                visited.add(nxt)
+                queue.append(path + [nxt])
+    return None
+
+
+def _timed(func, pairs):
+    start = time.perf_counter()
+    for a, b in pairs:
+        func(a, b)
+    return time.perf_counter() - start
+
+
+def run(size: int, queries: int, sources: int) -> None:
+    world_map = _build_map(size)
+    ids = list(world_map.areas)
+    rng = random.Random(7)
+    # 玩家通常从少数几个城镇出发
+    starts = rng.sample(ids, sources)
+    pairs = [(rng.choice(starts), rng.choice(ids)) for _ in range(queries)]
+
+    print("\n" + "=" * 60)
+    print(f"地图寻路基准测试 (区域数={len(ids)}, 查询数={queries}, 起点数={sources})")
+    print("=" * 60)
+
+    legacy = _timed(lambda a, b: legacy_find_path(world_map, a, b), pairs)
+    print(f"旧 find_path       : 每次 {legacy / queries * 1e3:.2f} ms")
+
+    table = world_map.routes
+    first = _timed(table.route, [(s, ids[0]) for s in starts])
+    print(f"路由表建树(按步数)  : 每个起点 {first / sources * 1e3:.2f} ms")
+    cached = _timed(world_map.find_path, pairs)
+    print(f"新 find_path(查表) : 每次 {cached / queries * 1e6:.1f} µs  "
+          f"(加速 {legacy / cached:.0f}x)")
+
+    weighted = RouteTable(world_map, RouteCostModel(danger_weight=2.0))
+    first = _timed(weighted.route, [(s, ids[0]) for s in starts])
+    print(f"路由表建树(加权)    : 每个起点 {first / sources * 1e3:.2f} ms")
+
+    manager = LocationManager(world_map)
+    for i, start in enumerate(starts):
+        manager.set_location(f"p{i}", start)
+    entities = {start: f"p{i}" for i, start in enumerate(starts)}
+    manager.plan_travel(entities[starts[0]], ids[0])
+    planned = _timed(lambda a, b: manager.plan_travel(entities[a], b), pairs)
+    print(f"plan_travel(加权)  : 每次 {planned / queries * 1e6:.1f} µs")
+
+    world_map.discover_area(starts[0])
+    print(f"发现一个区域后: {world_map.routes.get_stats()}")
+    print(f"               {manager.routes.get_stats()}")
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    parser = argparse.ArgumentParser(description="地图寻路基准测试")
+    parser.add_argument("--size", type=int, default=100, help="网格边长，区域数为其平方")
+    parser.add_argument("--queries", type=int, default=2000, help="查询次数")
+    parser.add_argument("--sources", type=int, default=20, help="出发点数量")
+    args = parser.parse_args()
+    run(args.size, args.queries, args.sources)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+存档引擎基准测试脚本
+对比旧版 JSON+pickle 双写与 .xws 单格式存档的保存/加载耗时和磁盘占用
+"""
+
+import argparse
+import gzip
+import json
+import os
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.systems.persistence.save_engine import SaveEngine
+
+
+def build_state(npc_count: int) -> Dict[str, Any]:
+    """构造一个包含大量 NPC 的游戏状态"""
+    def character(i: int) -> Dict[str, Any]:
+        return {
+            "id": f"npc_{i}",
+            "name": f"弟子{i}",
+            "attributes": {
+                "realm_name": "筑基期",
+                "realm_level": i % 9 + 1,
+                "current_health": 100 + i % 50,
+                "max_health": 150,
+                "attack_power": 10 + i % 7,
+                "defense": 5 + i % 3,
+            },
+            "inventory": {"items": {"灵石": i % 30, "回气丹": i % 5}},
+            "extra_data": {"mood": "平静", "affinity": i % 100},
+        }
+
+    return {
+        "player": {**character(0), "id": "player", "name": "无名侠客"},
+        "current_location": "青云城",
+        "game_time": 1234.5,
+        "flags": {f"quest_{i}": i % 2 == 0 for i in range(50)},
+        "npcs": {f"npc_{i}": character(i) for i in range(npc_count)},
+    }
+
+
+def legacy_save(save_dir: Path, name: str, state: Dict[str, Any]) -> None:
+    save_data = {"version": "1.0.0", "timestamp": "2025-01-01T00:00:00", "game_state": state}
+    with open(save_dir / f"{name}.json", "w", encoding="utf-8") as f:
+        json.dump(save_data, f, ensure_ascii=False, indent=2)
+    with gzip.open(save_dir / f"{name}.gz", "wb") as f:
+        pickle.dump(save_data, f)
+
+
+def legacy_load(save_dir: Path, name: str) -> Dict[str, Any]:
+    with gzip.open(save_dir / f"{name}.gz", "rb") as f:
+        return pickle.load(f)["game_state"]
+
+
+def legacy_list(save_dir: Path) -> List[Dict[str, Any]]:
+    saves = []
+    for path in save_dir.glob("*.json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        saves.append({"filename": path.stem, "timestamp": data.get("timestamp")})
+    return saves
+
+
+def timed(func: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.iterdir() if p.is_file())
+
+
+def run(npc_count: int, save_count: int, repeat: int) -> Dict[str, Any]:
+    state = build_state(npc_count)
+    results: Dict[str, Any] = {"npcs": npc_count, "saves": save_count}
+
+    with tempfile.TemporaryDirectory() as legacy_dir, tempfile.TemporaryDirectory() as xws_dir:
+        legacy_path, xws_path = Path(legacy_dir), Path(xws_dir)
+        engine = SaveEngine(xws_path)
+
+        results["legacy_save_s"] = timed(lambda: legacy_save(legacy_path, "slot", state), repeat)
+        results["xws_save_s"] = timed(lambda: engine.save("slot", state), repeat)
+        results["legacy_load_s"] = timed(lambda: legacy_load(legacy_path, "slot"), repeat)
+        results["xws_load_s"] = timed(lambda: engine.load("slot"), repeat)
+        results["legacy_bytes"] = dir_size(legacy_path)
+        results["xws_bytes"] = dir_size(xws_path)
+
+        for i in range(save_count):
+            legacy_save(legacy_path, f"save_{i}", state)
+            engine.save(f"save_{i}", state)
+        results["legacy_list_s"] = timed(lambda: legacy_list(legacy_path), repeat)
+        results["xws_list_s"] = timed(engine.list, repeat)
+
+    return results
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print("\n" + "=" * 60)
+    print(f"存档基准测试 (NPC数={results['npcs']}, 存档数={results['saves']})")
+    print("=" * 60)
+    for op in ("save", "load", "list"):
+        legacy = results[f"legacy_{op}_s"]
+        xws = results[f"xws_{op}_s"]
+        print(f"{op:>5}: 旧版 {legacy * 1000:9.2f} ms | xws {xws * 1000:9.2f} ms | 加速 {legacy / xws:6.1f}x")
+    print(
+        f"磁盘: 旧版 {results['legacy_bytes'] / 1024:9.1f} KB | "
+        f"xws {results['xws_bytes'] / 1024:9.1f} KB | "
+        f"节省 {100 - results['xws_bytes'] / results['legacy_bytes'] * 100:5.1f}%"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="存档引擎基准测试")
+    parser.add_argument("--npcs", type=int, default=1000, help="每个存档中的 NPC 数量")
+    parser.add_argument("--saves", type=int, default=200, help="列举测试使用的存档数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每项测试重复次数（取中位数）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    results = run(args.npcs, args.saves, args.repeat)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
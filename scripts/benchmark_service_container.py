@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+服务容器解析基准测试脚本
+对比每次解析都反射构造函数（旧实现）与预编译构造计划的解析吞吐，
+并检查多线程并发首次解析单例时只创建一个实例。
+"""
+
+import argparse
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.services import ServiceContainer, ServiceLifetime
+
+
+class Config:
+    pass
+
+
+class Repository:
+    def __init__(self, config: Config) -> None:
+        self.config = config
+
+
+class Cache:
+    def __init__(self, container: ServiceContainer, config: Config) -> None:
+        self.container = container
+        self.config = config
+
+
+class Handler:
+    def __init__(self, repository: Repository, cache: Cache, retries: int = 3) -> None:
+        self.repository = repository
+        self.cache = cache
+
+
+class RequestContext:
+    def __init__(self, handler: Handler) -> None:
+        self.handler = handler
+
+
+def reflective_resolve(container, service_type):
+    """旧实现：单例/作用域缓存 + 每次构造都用 inspect.signature 分析参数"""
+    descriptor = container._descriptors[service_type]
+    if descriptor.lifetime == ServiceLifetime.SINGLETON and service_type in container._singletons:
+        return container._singletons[service_type]
+    kwargs = {}
+    for name, param in inspect.signature(descriptor.implementation.__init__).parameters.items():
+        if name == "self" or param.annotation is param.empty:
+            continue
+        if param.annotation in (ServiceContainer, "ServiceContainer"):
+            kwargs[name] = container
+        elif param.annotation in container._descriptors:
+            kwargs[name] = reflective_resolve(container, param.annotation)
+    instance = descriptor.implementation(**kwargs)
+    if descriptor.lifetime == ServiceLifetime.SINGLETON:
+        container._singletons[service_type] = instance
+    return instance
+
+
+def build_container() -> ServiceContainer:
+    container = ServiceContainer()
+    container.register(Config, lifetime=ServiceLifetime.SINGLETON)
+    container.register(Repository, lifetime=ServiceLifetime.SINGLETON)
+    container.register(Cache)
+    container.register(Handler)
+    container.register(RequestContext, lifetime=ServiceLifetime.SCOPED)
+    return container
+
+
+def _rate(fn, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - start)
+
+
+def run(count: int, threads: int) -> None:
+    logging.disable(logging.WARNING)
+    print("\n" + "=" * 60)
+    print(f"服务容器解析基准测试 (每项 {count} 次, 线程={threads})")
+    print("=" * 60)
+
+    container = build_container()
+    container.validate()
+    old = _rate(lambda: reflective_resolve(container, Handler), count)
+    new = _rate(lambda: container.resolve(Handler), count)
+    print(f"瞬时服务(3 层依赖): 逐次反射 {old:,.0f} 次/秒, 预编译 {new:,.0f} 次/秒, 加速 {new / old:.1f}x")
+
+    singleton = _rate(lambda: container.resolve(Repository), count)
+    print(f"单例命中: {singleton:,.0f} 次/秒")
+
+    with container.create_scope():
+        scoped = _rate(lambda: container.resolve(RequestContext), count)
+    print(f"作用域命中: {scoped:,.0f} 次/秒")
+    scopes = _rate(lambda: container.create_scope().resolve(RequestContext), count // 10)
+    print(f"新建作用域并解析: {scopes:,.0f} 次/秒")
+
+    per_thread = count // threads
+    with ThreadPoolExecutor(threads) as pool:
+        start = time.perf_counter()
+        list(pool.map(lambda _: [container.resolve(Handler) for _ in range(per_thread)], range(threads)))
+        elapsed = time.perf_counter() - start
+    print(f"{threads} 线程并发解析瞬时服务: {per_thread * threads / elapsed:,.0f} 次/秒")
+
+    created = []
+
+    class Slow:
+        def __init__(self) -> None:
+            time.sleep(0.01)
+            created.append(self)
+
+    racing = ServiceContainer().register(Slow, lifetime=ServiceLifetime.SINGLETON)
+    barrier = threading.Barrier(threads)
+
+    def first_resolve(_):
+        barrier.wait()
+        return racing.resolve(Slow)
+
+    with ThreadPoolExecutor(threads) as pool:
+        instances = set(map(id, pool.map(first_resolve, range(threads))))
+    print(f"{threads} 线程并发首次解析单例: 创建 {len(created)} 个实例, 拿到 {len(instances)} 个不同实例")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="服务容器解析基准测试")
+    parser.add_argument("--count", type=int, default=200_000, help="每项解析次数")
+    parser.add_argument("--threads", type=int, default=8, help="并发线程数")
+    args = parser.parse_args()
+    run(args.count, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+会话注册表基准测试脚本
+模拟一个工作进程托管大量大多闲置的会话：内存上限触发 LRU 休眠，
+统计休眠/恢复耗时与快照大小；并在后台持续休眠/恢复冷会话的同时，
+对比单分片（等价于一把全局锁）与多分片注册表上热会话的查找延迟。
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("ENABLE_PROMETHEUS", "false")
+
+import src.app as app_module
+from src.xwe.server.session_registry import SessionRegistry
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return f"p50 {pick(0.5):.3f} ms, p99 {pick(0.99):.3f} ms, 最大 {samples[-1] * 1000:.2f} ms"
+
+
+def _registry(**kwargs):
+    return SessionRegistry(
+        tempfile.mkdtemp(prefix="xwe_sessions_"),
+        hibernate=app_module._snapshot_session,
+        restore=app_module._restore_session,
+        size_of=app_module._estimate_session_bytes,
+        **kwargs,
+    )
+
+
+def _login(registry, count):
+    for i in range(count):
+        registry.get_or_create(f"session-{i}", lambda: app_module._new_session(True))
+
+
+def run_capacity(sessions: int, live: int, revisits: int) -> None:
+    registry = _registry(max_live=live)
+    start = time.perf_counter()
+    _login(registry, sessions)
+    elapsed = time.perf_counter() - start
+    stats = registry.get_stats()
+    snapshot_dir = registry.engine.save_dir
+    sizes = [path.stat().st_size for path in snapshot_dir.iterdir()]
+    print(f"登录 {sessions} 个会话: {sessions / elapsed:,.0f} 个/秒, 活跃 {stats['live']}, "
+          f"休眠 {stats['hibernated']}, 活跃内存估算 {stats['memory_bytes'] / 1024 / 1024:.1f} MB")
+    print(f"休眠快照: 平均 {sum(sizes) / max(1, len(sizes)) / 1024:.2f} KB/个 "
+          f"(活跃会话估算 {app_module.config.session_estimated_kb} KB/个), "
+          f"平均休眠耗时 {stats['avg_hibernate_seconds'] * 1000:.2f} ms")
+
+    rng = random.Random(42)
+    for _ in range(revisits):
+        registry[f"session-{rng.randrange(sessions)}"]
+    stats = registry.get_stats()
+    print(f"随机回访 {revisits} 次: 恢复 {stats['hydrated']} 次, "
+          f"平均恢复耗时 {stats['avg_hydrate_seconds'] * 1000:.2f} ms")
+
+
+def run_contention(shards: int, sessions: int, threads: int, lookups: int) -> None:
+    registry = _registry(shards=shards)
+    _login(registry, sessions)
+    ids = list(registry)
+    hot, cold = ids[: len(ids) // 2], ids[len(ids) // 2:]
+
+    stop = threading.Event()
+
+    def churn():
+        index = 0
+        while not stop.is_set():
+            sid = cold[index % len(cold)]
+            registry.hibernate(sid)
+            registry.lookup(sid)
+            index += 1
+
+    churner = threading.Thread(target=churn, daemon=True)
+    churner.start()
+
+    per_thread = lookups // threads
+
+    def worker(seed):
+        local = random.Random(seed)
+        samples = []
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            registry.lookup(hot[local.randrange(len(hot))])
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    with ThreadPoolExecutor(threads) as pool:
+        start = time.perf_counter()
+        samples = [s for part in pool.map(worker, range(threads)) for s in part]
+        elapsed = time.perf_counter() - start
+    stop.set()
+    churner.join()
+    print(f"{shards:>2} 分片, {threads} 线程查找热会话 (后台持续休眠/恢复): "
+          f"{len(samples) / elapsed:,.0f} 次/秒, {_percentiles(samples)}, "
+          f"期间恢复 {registry.get_stats()['hydrated']} 次")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="会话注册表基准测试")
+    parser.add_argument("--sessions", type=int, default=5000, help="登录的会话数")
+    parser.add_argument("--live", type=int, default=500, help="活跃会话上限")
+    parser.add_argument("--revisits", type=int, default=1000, help="随机回访次数")
+    parser.add_argument("--contention-sessions", type=int, default=256, help="并发测试的会话数")
+    parser.add_argument("--threads", type=int, default=8, help="并发查找线程数")
+    parser.add_argument("--lookups", type=int, default=80_000, help="并发查找总次数")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print("\n" + "=" * 60)
+    print(f"会话注册表基准测试 (会话 {args.sessions} 个, 活跃上限 {args.live} 个)")
+    print("=" * 60)
+    run_capacity(args.sessions, args.live, args.revisits)
+    for shards in (1, 16):
+        run_contention(shards, args.contention_sessions, args.threads, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
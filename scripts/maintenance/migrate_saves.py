@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+旧存档迁移脚本
+把 saves 目录下的 .json/.gz 双份存档转换为单一的 .xws 存档
+"""
+
+import argparse
+import os
+import sys
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.xwe.systems.persistence.save_engine import SaveEngine
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="迁移旧版存档到 .xws 格式")
+    parser.add_argument("save_dir", nargs="?", default="saves", help="存档目录")
+    parser.add_argument("--remove-legacy", action="store_true", help="迁移成功后删除旧文件")
+    args = parser.parse_args()
+
+    engine = SaveEngine(args.save_dir)
+    pending = engine.legacy_names()
+    print(f"发现 {len(pending)} 个待迁移存档")
+
+    result = engine.migrate_all(remove_legacy=args.remove_legacy)
+    print(f"迁移完成: 成功 {result['migrated']}, 跳过 {result['skipped']}, 失败 {result['failed']}")
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
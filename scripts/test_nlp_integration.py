@@ -48,13 +48,6 @@ def check_environment():
         print("❌ requests 未安装")
         return False
         
-    try:
-        import backoff
-        print("✅ backoff 已安装")
-    except ImportError:
-        print("❌ backoff 未安装")
-        return False
-        
     return True
 
 
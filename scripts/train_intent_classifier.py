@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+本地意图分类器离线训练脚本
+读取 NLPMonitor.export_labeled_parses 导出的 JSON Lines 训练样本，留出一部分评估
+在给定置信度阈值下本地层能接住多少请求、接住的有多准、每次预测多快，然后用全部
+样本训练并保存模型（把路径填进 nlp_config.json 的 local_intent.model_path 即可启用）。
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.xwe.core.nlp.config import get_nlp_config
+from src.xwe.core.nlp.intent_classifier import IntentClassifier
+
+
+def _load(paths, min_confidence):
+    records = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get("confidence", 1.0) >= min_confidence:
+                    records.append(record)
+    return records
+
+
+def evaluate(records, threshold, holdout, seed=42):
+    """留出评估：返回 (本地命中率, 命中准确率, 平均预测耗时 µs)"""
+    rng = random.Random(seed)
+    records = list(records)
+    rng.shuffle(records)
+    split = int(len(records) * (1 - holdout))
+    train, test = records[:split], records[split:]
+    if not test:
+        return 0.0, 0.0, 0.0
+
+    classifier = IntentClassifier()
+    classifier.fit(train)
+    answered = correct = 0
+    start = time.perf_counter()
+    for record in test:
+        prediction = classifier.predict(record["text"])
+        if prediction is None or prediction.confidence < threshold:
+            continue
+        answered += 1
+        correct += prediction.command == record["command"] and prediction.args == (record.get("args") or {})
+    elapsed = time.perf_counter() - start
+    return answered / len(test), (correct / answered if answered else 0.0), elapsed / len(test) * 1e6
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    threshold = get_nlp_config().get("local_intent", {}).get("confidence_threshold", 0.8)
+    parser = argparse.ArgumentParser(description="本地意图分类器离线训练")
+    parser.add_argument("inputs", nargs="+", help="训练样本文件（JSON Lines）")
+    parser.add_argument("-o", "--output", required=True, help="模型输出路径")
+    parser.add_argument("--threshold", type=float, default=threshold, help="评估用的置信度阈值")
+    parser.add_argument("--holdout", type=float, default=0.2, help="留出评估的比例")
+    parser.add_argument("--min-confidence", type=float, default=0.8, help="样本的最低置信度")
+    args = parser.parse_args()
+
+    records = _load(args.inputs, args.min_confidence)
+    print(f"训练样本: {len(records)} 条")
+
+    coverage, precision, latency = evaluate(records, args.threshold, args.holdout)
+    print(f"留出评估 (阈值 {args.threshold}): 本地命中 {coverage:.1%}, 命中准确率 {precision:.1%}, "
+          f"每次预测 {latency:.1f} µs")
+
+    classifier = IntentClassifier()
+    used = classifier.fit(records)
+    classifier.save(args.output)
+    print(f"已用 {used} 条样本训练，标签 {len(classifier.labels)} 个，模型保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -50,6 +50,9 @@ setup(
             "isort",
             "pre-commit",
         ],
+        "sim": [
+            "numpy",
+        ],
         "docs": [
             "sphinx",
             "sphinx-rtd-theme",
@@ -59,6 +62,8 @@ setup(
     entry_points={
         "console_scripts": [
             "xwe=xwe.cli:main",
+            "xwe-combat-sim=xwe.cli.combat_sim:main",
+            "xwe-progression-sim=xwe.cli.progression_sim:main",
         ],
     },
     include_package_data=True,
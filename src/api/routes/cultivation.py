@@ -131,10 +131,7 @@ def start_cultivation():
                 player, hours, location_bonus
             )
             player.attributes.cultivation_exp += exp_gained
-            req = game.cultivation_system.realm_breakthroughs.get(
-                player.attributes.realm_name, {}
-            )
-            need = req.get("exp_required", 100)
+            need = game.cultivation_system.get_bottleneck_exp(player)
             player.attributes.realm_progress = min(
                 100.0, player.attributes.cultivation_exp / need * 100
             )
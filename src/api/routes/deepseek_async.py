@@ -235,8 +235,11 @@ async def batch_process():
         ],
         "total": 10,
         "successful": 8,
-        "failed": 2
+        "failed": 2,
+        "api_calls": 7
     }
+
+    Identical prompts within one request are sent to the API only once.
     """
     try:
         data = request.get_json()
@@ -255,22 +258,29 @@ async def batch_process():
         client = get_default_client()
         
         # Process requests concurrently
-        async def process_single(req_data):
+        async def process_single(prompt):
             try:
-                prompt = req_data.get('prompt', '')
-                if not prompt:
-                    return {"error": "Missing prompt", "success": False}
-                
                 response = await client.chat_async(prompt)
                 return {**response, "success": True}
             except Exception as e:
                 return {"error": str(e), "success": False}
         
-        # Create tasks for all requests
-        tasks = [process_single(req) for req in requests_data]
+        # Identical prompts share one API call
+        prompts = [
+            req.get('prompt', '') if isinstance(req, dict) else ''
+            for req in requests_data
+        ]
+        unique_prompts = list(dict.fromkeys(p for p in prompts if p))
         
         # Run concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=False)
+        unique_results = await asyncio.gather(
+            *(process_single(p) for p in unique_prompts), return_exceptions=False
+        )
+        by_prompt = dict(zip(unique_prompts, unique_results))
+        results = [
+            dict(by_prompt[p]) if p else {"error": "Missing prompt", "success": False}
+            for p in prompts
+        ]
         
         # Calculate statistics
         successful = sum(1 for r in results if r.get('success', False))
@@ -280,7 +290,8 @@ async def batch_process():
             "results": results,
             "total": len(results),
             "successful": successful,
-            "failed": failed
+            "failed": failed,
+            "api_calls": len(unique_prompts)
         })
         
     except Exception as e:
@@ -1,34 +1,19 @@
 from __future__ import annotations
 
-import json
-import time
-from flask import Blueprint, Response, stream_with_context, session, jsonify, request, current_app
+from flask import Blueprint, session, jsonify, request, current_app
 
-from src.app import build_status_data, status_cache
+from src.app import status_stream_response
 
 
 events_bp = Blueprint("events", __name__)
 
-
-def _generate_events():
-    session_id = session.get("session_id", "default")
-    last_data = status_cache.get(session_id)
-    while True:
-        data = build_status_data()
-        subset = {
-            "player": data.get("player", {}),
-            "inventory": data.get("inventory", {}),
-        }
-        if subset != last_data:
-            last_data = subset
-            status_cache[session_id] = subset
-            yield f"data: {json.dumps(subset, ensure_ascii=False)}\n\n"
-        time.sleep(1)
+# /events 只推送玩家和背包
+EVENT_FIELDS = ("player", "inventory")
 
 
 @events_bp.route("/events")
 def events_stream():
-    return Response(stream_with_context(_generate_events()), mimetype="text/event-stream")
+    return status_stream_response(fields=EVENT_FIELDS)
 
 
 @events_bp.get("/api/events/random")
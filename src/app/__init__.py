@@ -15,12 +15,15 @@ from dotenv import load_dotenv
 from flask import (
     Blueprint,
     Flask,
+    Response,
+    g,
     has_request_context,
     jsonify,
     redirect,
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
 
@@ -38,16 +41,22 @@ if str(SRC_PATH) not in sys.path:
 
 from src.common.request_utils import is_dev_request
 from src.config.game_config import config
+from src.xwe.core.attributes import CharacterAttributes
 from src.xwe.core.command_router import CommandRouter, handle_attack
+from src.xwe.core.cultivation_fastforward import CultivationFastForward, IdleSettings
 from src.xwe.core.cultivation_system import CultivationSystem
 from src.xwe.core.data_loader import DataLoader
-from src.xwe.core.game_core import create_enhanced_game
+from src.xwe.core.game_core import GameState, create_enhanced_game
 from src.xwe.features import ExplorationSystem, InventorySystem
 from src.xwe.features.ai_personalization import AIPersonalization
 from src.xwe.features.community_system import CommunitySystem
 from src.xwe.features.narrative_system import NarrativeSystem
 from src.xwe.features.technical_ops import TechnicalOps
 from src.xwe.server.app_factory import create_app as _create_flask_app
+from src.xwe.server.instance_pool import GameInstancePool, InstanceRetiredError
+from src.xwe.server.session_registry import SessionRegistry
+from src.xwe.server.status_channel import StatusChannel
+from src.xwe.world.time_system import TimeSystem
 
 # Setup logging
 verbose_mode = os.getenv("VERBOSE_LOG", "false").lower() == "true"
@@ -71,105 +80,276 @@ log_level = logging.DEBUG if config.debug_mode else logging.INFO
 
 data_loader = DataLoader()
 exploration_system = ExplorationSystem()
-inventory_system = InventorySystem()
+inventory_system = InventorySystem(
+    write_behind=config.inventory_write_behind,
+    flush_interval=config.inventory_flush_interval,
+    max_pending=config.inventory_flush_max_pending,
+)
+status_channel = StatusChannel(
+    max_connections=config.status_stream_max_connections,
+    heartbeat_interval=config.status_stream_heartbeat,
+    history_size=config.status_stream_history,
+)
 command_router: CommandRouter | None = None
 # Flask 应用实例，初始化后赋值
 app: Flask | None = None
 
-game_instances: Dict[str, Dict] = {}
-status_cache: Dict[str, Dict] = {}
-
 
 # ---------------- Game instance helpers -----------------
 
 
-def get_game_instance(session_id: str, initialize_player: bool = True):
-    """Get or create a game instance."""
-    if session_id not in game_instances:
-        game_mode = os.getenv("GAME_MODE", "player")
-        game = create_enhanced_game(game_mode=game_mode)
-
-        # 初始化系统
-        game.cultivation_system = CultivationSystem()
-        game.narrative_system = NarrativeSystem()
-        game.ai_personalization = AIPersonalization()
-        game.community_system = CommunitySystem()
-        game.technical_ops = TechnicalOps()
-
-        # 创建默认玩家（可选）
-        if initialize_player and not game.game_state.player:
-            from src.xwe.core.attributes import CharacterAttributes
-            from src.xwe.core.character import Character, CharacterType
-
-            attrs = CharacterAttributes()
-            attrs.realm_name = "炼气期"
-            attrs.realm_level = 1
-            attrs.level = 1
-            attrs.cultivation_level = 0
-            attrs.max_cultivation = 100
-            attrs.realm_progress = 0
-            attrs.faction = "正道"
-
-            attrs.current_health = 100
-            attrs.max_health = 100
-            attrs.current_mana = 50
-            attrs.max_mana = 50
-            attrs.current_stamina = 100
-            attrs.max_stamina = 100
-            attrs.attack_power = 10
-            attrs.defense = 5
-
-            player = Character(
-                id="player",
-                name="无名侠客",
-                character_type=CharacterType.PLAYER,
-                attributes=attrs,
-            )
-            game.game_state.player = player
-            game.game_state.current_location = "青云城"
-            game.game_state.logs = []
-
-            info_dict = {
-                "id": player.id,
-                "name": player.name,
-                "attributes": attrs.to_dict(),
-                "spiritual_root": player.spiritual_root,
-                "inventory": inventory_system.get_inventory_data(
-                    session.get("player_id", player.id)
-                    if has_request_context()
-                    else player.id
-                ),
-            }
-            logger.debug(f"[PLAYER] Initialized: {info_dict}")
+def _attach_feature_systems(game) -> None:
+    """挂载与会话相关的功能系统"""
+    game.cultivation_system = CultivationSystem()
+    game.narrative_system = NarrativeSystem()
+    game.ai_personalization = AIPersonalization()
+    game.community_system = CommunitySystem()
+    game.technical_ops = TechnicalOps()
+
+
+def _build_game():
+    """构建一个未绑定会话的游戏实例"""
+    game = create_enhanced_game(game_mode=os.getenv("GAME_MODE", "player"))
+    _attach_feature_systems(game)
+    return game
+
+
+def _reset_game(game, game_mode: str | None = None):
+    """清空会话状态，让过期实例可以交给下一个会话"""
+    game.reset_session(game_mode)
+    _attach_feature_systems(game)
+    return game
+
+
+game_pool = GameInstancePool(
+    _build_game,
+    target_size=config.instance_pool_size,
+    reset=_reset_game,
+    max_size=config.instance_pool_max_size,
+)
 
-        game_instances[session_id] = {
-            "game": game,
-            "last_update": time.time(),
-            "need_refresh": True,
+
+def _new_session(initialize_player: bool) -> Dict:
+    """从实例池取出游戏实例，组装成新会话"""
+    game_mode = os.getenv("GAME_MODE", "player")
+    game = game_pool.acquire()
+    if game.game_mode != game_mode:
+        _reset_game(game, game_mode)
+
+    # 创建默认玩家（可选）
+    if initialize_player and not game.game_state.player:
+        from src.xwe.core.character import Character, CharacterType
+
+        attrs = CharacterAttributes()
+        attrs.realm_name = "炼气期"
+        attrs.realm_level = 1
+        attrs.level = 1
+        attrs.cultivation_level = 0
+        attrs.max_cultivation = 100
+        attrs.realm_progress = 0
+        attrs.faction = "正道"
+
+        attrs.current_health = 100
+        attrs.max_health = 100
+        attrs.current_mana = 50
+        attrs.max_mana = 50
+        attrs.current_stamina = 100
+        attrs.max_stamina = 100
+        attrs.attack_power = 10
+        attrs.defense = 5
+
+        player = Character(
+            id="player",
+            name="无名侠客",
+            character_type=CharacterType.PLAYER,
+            attributes=attrs,
+        )
+        game.game_state.player = player
+        game.game_state.current_location = "青云城"
+        game.game_state.logs = []
+
+        info_dict = {
+            "id": player.id,
+            "name": player.name,
+            "attributes": attrs.to_dict(),
+            "spiritual_root": player.spiritual_root,
+            "inventory": inventory_system.get_inventory_data(
+                session.get("player_id", player.id)
+                if has_request_context()
+                else player.id
+            ),
         }
+        logger.debug(f"[PLAYER] Initialized: {info_dict}")
+
+    now = time.time()
+    return {
+        "game": game,
+        "generation": game_pool.generation(game),
+        "last_update": now,
+        "last_seen": now,
+        "need_refresh": True,
+    }
 
-    return game_instances[session_id]
 
+# 随会话休眠的功能系统：快照键 → 游戏实例上的属性名
+_SESSION_FEATURES = {
+    "narrative": "narrative_system",
+    "achievements": "achievement_system",
+    "community": "community_system",
+    "ai_personalization": "ai_personalization",
+}
 
-def cleanup_old_instances() -> None:
-    """Clean timed-out game instances."""
-    current_time = time.time()
-    timeout = 3600
-
-    to_remove = [
-        sid
-        for sid, inst in game_instances.items()
-        if current_time - inst["last_update"] > timeout
-    ]
-    for sid in to_remove:
+
+def _snapshot_session(session_id: str, instance: Dict, reason: str) -> Dict:
+    """会话转入休眠：保留游戏状态、功能系统和会话元数据，游戏实例交回实例池
+
+    实例仍被请求借用时，实例池等借用全部归还后才会重置它。
+    """
+    game = instance["game"]
+    if reason == "idle" and hasattr(game, "technical_ops"):
         try:
-            instance = game_instances[sid]
-            if hasattr(instance["game"], "technical_ops"):
-                instance["game"].technical_ops.save_game(instance["game"].game_state)
+            game.technical_ops.save_game(game.game_state)
         except Exception:
             pass
 
-        del game_instances[sid]
+    stats = dict(getattr(game, "stats", {}))
+    stats["areas_explored"] = list(stats.get("areas_explored", ()))
+    player = game.game_state.player
+    attributes = getattr(player, "attributes", None)
+    if hasattr(attributes, "to_attributes"):
+        attributes = attributes.to_attributes()
+    snapshot = {
+        "state": game.game_state.to_dict(),
+        # Character.to_dict 会丢掉 _base/_buff 原值和附加字段，玩家属性单独无损保存
+        "player_attributes": attributes.to_state() if attributes is not None else None,
+        "logs": list(getattr(game.game_state, "logs", [])),
+        "stats": stats,
+        "features": {
+            key: getattr(game, attr).to_dict()
+            for key, attr in _SESSION_FEATURES.items()
+            if hasattr(game, attr)
+        },
+        "last_update": instance.get("last_update"),
+        "last_seen": instance.get("last_seen", instance.get("last_update")),
+    }
+    status_channel.drop_session(session_id)
+    game_pool.release(game)
+    return snapshot
+
+
+def _restore_session(session_id: str, snapshot: Dict) -> Dict:
+    """从休眠快照恢复会话，离线期间的挂机修炼由 resume_idle_progress 补算"""
+    state = GameState.from_dict(snapshot["state"])
+    state.logs = snapshot.get("logs", [])
+    if state.player is not None and snapshot.get("player_attributes"):
+        state.player.attributes = CharacterAttributes.from_state(snapshot["player_attributes"])
+    game = game_pool.acquire()
+    if game.game_mode != state.game_mode:
+        _reset_game(game, state.game_mode)
+    game.game_state = state
+    game.stats.update(snapshot.get("stats", {}))
+    game.stats["areas_explored"] = set(game.stats.get("areas_explored", ()))
+    for key, data in snapshot.get("features", {}).items():
+        system = getattr(game, _SESSION_FEATURES.get(key, ""), None)
+        if system is not None:
+            system.load_from_dict(data)
+    return {
+        "game": game,
+        "generation": game_pool.generation(game),
+        "last_update": snapshot.get("last_update") or time.time(),
+        "last_seen": snapshot.get("last_seen") or time.time(),
+        "need_refresh": True,
+    }
+
+
+def _estimate_session_bytes(instance: Dict) -> int:
+    """估算活跃会话占用的内存"""
+    logs = getattr(getattr(instance.get("game"), "game_state", None), "logs", None) or ()
+    return config.session_estimated_kb * 1024 + 256 * len(logs)
+
+
+game_instances = SessionRegistry(
+    Path(config.save_dir) / "sessions",
+    hibernate=_snapshot_session,
+    restore=_restore_session,
+    shards=config.session_shards,
+    max_live=config.session_max_live,
+    memory_limit=config.session_memory_limit_mb * 1024 * 1024,
+    idle_timeout=config.session_idle_timeout,
+    snapshot_ttl=config.session_snapshot_ttl or None,
+    size_of=_estimate_session_bytes,
+    in_use=lambda instance: game_pool.is_borrowed(instance["game"]),
+)
+
+
+def _lease_game(instance: Dict) -> bool:
+    """请求结束前借用会话的游戏实例，会话期间被休眠时实例要等请求结束才重置"""
+    if not has_request_context():
+        return True
+    game = instance["game"]
+    if not game_pool.borrow(game, instance.get("generation")):
+        return False
+    g.setdefault("leased_games", []).append(game)
+    return True
+
+
+def release_leased_games(exc=None) -> None:
+    """归还本次请求借用的游戏实例"""
+    for game in g.pop("leased_games", ()):
+        game_pool.give_back(game)
+
+
+def get_game_instance(session_id: str, initialize_player: bool = True):
+    """Get or create a game instance."""
+    for _ in range(3):
+        instance, created = game_instances.get_or_create(
+            session_id, lambda: _new_session(initialize_player)
+        )
+        # 查到会话后、借用前它恰好转入休眠时，重新查找会从快照恢复
+        if _lease_game(instance):
+            break
+    else:
+        raise InstanceRetiredError(f"会话 {session_id} 的游戏实例已被回收")
+    if not created:
+        resume_idle_progress(instance)
+    return instance
+
+
+def resume_idle_progress(instance: Dict, now: float | None = None):
+    """会话恢复时一次性补算离线期间的挂机修炼，返回快进结果（未推进时为 None）"""
+    now = time.time() if now is None else now
+    last_seen = instance.setdefault("last_seen", instance["last_update"])
+    instance["last_seen"] = now
+    game = instance["game"]
+    player = getattr(game.game_state, "player", None)
+    if not config.offline_progress_enabled or player is None or not hasattr(game, "cultivation_system"):
+        return None
+
+    # 两次请求间隔不足一步视为仍在线
+    settings = IdleSettings(seconds_per_hour=3600.0 / config.offline_progress_time_scale)
+    engine = CultivationFastForward(game.cultivation_system, settings)
+    hours = (now - last_seen) / engine.settings.seconds_per_hour
+    if hours < engine.settings.step_hours:
+        return None
+
+    hours = min(hours, config.offline_progress_max_hours)
+    result = engine.fast_forward(player, hours, start_time=last_seen)
+    (getattr(game, "time_system", None) or TimeSystem()).advance_idle(game.game_state, result.hours)
+    instance["offline_progress"] = result.to_dict()
+    instance["need_refresh"] = True
+    logger.info(
+        f"[IDLE] 补算离线 {result.hours:.0f} 小时: 修为 +{result.exp_gained}, "
+        f"可突破={result.can_breakthrough}"
+    )
+    return result
+
+
+def cleanup_old_instances() -> None:
+    """闲置超时的会话转入休眠，清理过期的休眠快照"""
+    game_instances.sweep()
+
+    # 写回模式下顺带落盘积压的背包
+    inventory_system.flush()
 
 
 def build_status_data():
@@ -240,6 +420,31 @@ def build_status_data():
     return status_dict
 
 
+def status_stream_response(fields=None) -> Response:
+    """
+    Build a push-based SSE response for the current session.
+
+    The stream sends a full snapshot first, then JSON-patch deltas whenever
+    ``status_channel.notify`` is called for this session.
+    """
+    if not status_channel.has_capacity():
+        response = jsonify({"error": "too_many_connections"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+
+    session_id = session.get("session_id", "default")
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+    stream = status_channel.stream(
+        session_id, build_status_data, last_event_id=last_event_id, fields=fields
+    )
+    return Response(
+        stream_with_context(stream),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 main_bp = Blueprint("main", __name__)
 
 
@@ -294,6 +499,7 @@ def continue_game():
         if state:
             game.game_state = state
             instance["need_refresh"] = True
+            status_channel.notify(session["session_id"])
         else:
             return redirect(url_for(".intro_screen"))
 
@@ -395,6 +601,7 @@ def create_app(log_level: int = log_level) -> Flask:
 
     app = _create_flask_app(log_level=log_level)
     app.game_instances = game_instances
+    app.teardown_request(release_leased_games)
 
     dev_password = os.getenv("DEV_PASSWORD", "")
     if not dev_password:
@@ -440,15 +647,18 @@ def create_app(log_level: int = log_level) -> Flask:
             def update_game_metrics():
                 """Update game-related metrics before each request"""
                 if metrics_collector:
+                    # values() 只读快照，不刷新会话的访问时间
                     metrics_collector.update_game_metrics(
                         instances=len(game_instances),
                         players=len(
                             [
                                 inst
                                 for inst in game_instances.values()
-                                if inst.get("game", {})
-                                .get("game_state", {})
-                                .get("player")
+                                if getattr(
+                                    getattr(inst.get("game"), "game_state", None),
+                                    "player",
+                                    None,
+                                )
                             ]
                         ),
                     )
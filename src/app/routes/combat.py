@@ -31,6 +31,7 @@ from .. import (
     data_loader,
     handle_attack,
     logger,
+    status_channel,
 )
 import src.app as app_module
 from src.common.request_utils import is_dev_request
@@ -78,6 +79,7 @@ def load_game_route():
             if loaded_state:
                 game.game_state = loaded_state
                 instance["need_refresh"] = True
+                status_channel.notify(session["session_id"])
                 return jsonify({"success": True, "message": "游戏已加载"})
         return jsonify({"success": False, "error": "没有找到存档"})
     except Exception as e:
@@ -214,6 +216,7 @@ def process_command():
         location = params.get("location", params.get("target", ""))
         if location:
             session["location"] = location
+            status_channel.notify(session.get("session_id", "default"))
             result_text = f"你来到了{location}。"
         else:
             result_text = "你想去哪里？（可用地点：城主府、丹药铺、任务大厅、城外）"
@@ -244,6 +247,7 @@ def process_command():
         instance = get_game_instance(session.get("session_id"))
         game = instance["game"]
         attack_result = handle_attack(target, game)
+        status_channel.notify(session.get("session_id", "default"))
         return jsonify({
             **attack_result,
             "parsed_command": {"handler": command_handler, "params": params},
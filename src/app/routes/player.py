@@ -2,9 +2,8 @@
 
 from __future__ import annotations
 
-import json
 import time
-from flask import Blueprint, jsonify, request, session, Response, stream_with_context
+from flask import Blueprint, jsonify, request, session
 
 from src.common.request_utils import is_dev_request
 
@@ -13,7 +12,8 @@ from .. import (
     get_game_instance,
     inventory_system,
     logger,
-    status_cache,
+    status_channel,
+    status_stream_response,
 )
 import src.app as app_module
 
@@ -78,6 +78,7 @@ def create_character():
         game.game_state.player = player
         game.game_state.current_location = session.get("location", "青云城")
         game.game_state.logs = []
+        status_channel.notify(session["session_id"])
         logger.info(f"[PLAYER] attributes set: {attrs.to_dict()}")
 
     if dev_mode:
@@ -95,19 +96,7 @@ def get_status():
 
 @player_bp.route("/status/stream")
 def stream_status():
-    @stream_with_context
-    def event_stream():
-        session_id = session.get("session_id", "default")
-        last_data = status_cache.get(session_id)
-        while True:
-            data = build_status_data()
-            if data != last_data:
-                last_data = data
-                status_cache[session_id] = data
-                yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
-            time.sleep(2)
-
-    return Response(event_stream(), mimetype="text/event-stream")
+    return status_stream_response()
 
 
 @player_bp.route("/log")
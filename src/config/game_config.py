@@ -21,6 +21,9 @@ class GameConfig:
     max_health: int = 100
     base_damage: float = 10.0
     cultivation_exp_multiplier: float = 1.0
+    offline_progress_enabled: bool = False  # 会话恢复时补算离线期间的挂机修炼
+    offline_progress_time_scale: float = 1.0  # 离线 1 小时（现实）折算的游戏小时数
+    offline_progress_max_hours: float = 12.0  # 单次最多补算的游戏小时数
 
     # API设置
     deepseek_api_key: str = ""
@@ -34,6 +37,20 @@ class GameConfig:
     data_cache_ttl: int = 300
     smart_cache_ttl: int = 300
     smart_cache_size: int = 128
+    inventory_write_behind: bool = True
+    inventory_flush_interval: float = 2.0
+    inventory_flush_max_pending: int = 64
+    status_stream_max_connections: int = 200
+    status_stream_heartbeat: float = 15.0
+    status_stream_history: int = 64
+    instance_pool_size: int = 4  # 后台预热的空闲游戏实例数，0 表示不预热
+    instance_pool_max_size: int = 16  # 空闲实例上限（含回收的过期实例）
+    session_shards: int = 16
+    session_idle_timeout: float = 3600.0  # 闲置多久（秒）后转入休眠
+    session_max_live: int = 0  # 活跃会话上限，0 表示只按内存限制
+    session_memory_limit_mb: int = 256  # 活跃会话估算内存上限
+    session_estimated_kb: int = 64  # 单个活跃会话的估算内存
+    session_snapshot_ttl: float = 7 * 24 * 3600  # 休眠快照保留时长（秒），0 表示永久
 
     # 路径设置
     data_path: str | Path | None = "xwe/data"
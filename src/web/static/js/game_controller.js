@@ -447,15 +447,14 @@ class XianxiaGameController {
         if (this.eventSource) {
             this.eventSource.close();
         }
-        this.eventSource = new EventSource('/events');
-        this.eventSource.onmessage = (event) => {
+        const onState = (data, changed) => {
             try {
-                const data = JSON.parse(event.data);
-                if (data.player && this.modules.profile) {
+                const touched = (key) => !changed || changed.some((p) => p.startsWith(`/${key}`));
+                if (data.player && this.modules.profile && touched('player')) {
                     this.modules.profile.updateProfile(data.player);
                 }
 
-                if (data.inventory) {
+                if (data.inventory && touched('inventory')) {
                     const gold = data.inventory.gold || 0;
                     const goldElem = document.getElementById('status-gold');
                     if (goldElem) goldElem.textContent = gold;
@@ -467,6 +466,17 @@ class XianxiaGameController {
                 console.error('事件流解析失败:', e);
             }
         };
+
+        if (window.StatusStream) {
+            this.eventSource = window.StatusStream.connect('/events', onState);
+        } else {
+            // 页面未引入 status_stream.js 时退回原生 EventSource：
+            // 只处理完整快照，差量补丁由 checkForUpdates 轮询兜底
+            this.eventSource = new EventSource('/events');
+            const onSnapshot = (event) => onState(JSON.parse(event.data), null);
+            this.eventSource.addEventListener('snapshot', onSnapshot);
+            this.eventSource.onmessage = onSnapshot;
+        }
         this.eventSource.onerror = (e) => {
             console.error('事件流连接失败:', e);
         };
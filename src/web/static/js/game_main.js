@@ -127,14 +127,12 @@ const GameUI = {
         if (this.eventSource) {
             this.eventSource.close();
         }
-        this.eventSource = new EventSource('/status/stream');
-        this.eventSource.onmessage = (event) => {
-            const data = JSON.parse(event.data);
+        this.eventSource = StatusStream.connect('/status/stream', (data) => {
             if (data.player) {
                 this.updateHeader(data.player, data.location);
                 this.updateStats(data.player);
             }
-        };
+        });
         this.eventSource.onerror = (e) => {
             console.error('状态更新流连接失败:', e);
         };
@@ -0,0 +1,71 @@
+/**
+ * 状态推送流客户端
+ * 接收服务端的 snapshot / patch 事件，在本地维护完整状态
+ */
+const StatusStream = {
+    /**
+     * 应用 RFC 6902 JSON Patch（add / remove / replace）
+     * @param {Object} doc - 当前文档
+     * @param {Array} ops - 补丁操作
+     * @returns {Object} 更新后的文档
+     */
+    applyPatch(doc, ops) {
+        const unescape = (t) => t.replace(/~1/g, '/').replace(/~0/g, '~');
+        for (const op of ops) {
+            const tokens = op.path.split('/').slice(1).map(unescape);
+            if (tokens.length === 0) {
+                doc = op.value;
+                continue;
+            }
+            let parent = doc;
+            for (const token of tokens.slice(0, -1)) {
+                parent = parent[token];
+            }
+            const last = tokens[tokens.length - 1];
+            if (Array.isArray(parent)) {
+                const index = last === '-' ? parent.length : parseInt(last, 10);
+                if (op.op === 'add') parent.splice(index, 0, op.value);
+                else if (op.op === 'remove') parent.splice(index, 1);
+                else parent[index] = op.value;
+            } else if (op.op === 'remove') {
+                delete parent[last];
+            } else {
+                parent[last] = op.value;
+            }
+        }
+        return doc;
+    },
+
+    /**
+     * 连接状态流
+     * 浏览器断线重连时会自动携带 Last-Event-ID，服务端据此补发差量
+     * @param {string} url - 流地址
+     * @param {Function} onState - 收到新状态时回调 (state, changedPaths)
+     * @returns {EventSource}
+     */
+    connect(url, onState) {
+        const source = new EventSource(url);
+        let state = null;
+
+        source.addEventListener('snapshot', (event) => {
+            state = JSON.parse(event.data);
+            onState(state, null);
+        });
+        source.addEventListener('patch', (event) => {
+            if (state === null) return;
+            const ops = JSON.parse(event.data);
+            state = this.applyPatch(state, ops);
+            onState(state, ops.map((op) => op.path));
+        });
+        source.addEventListener('error', (event) => {
+            if (event.data) {
+                // 服务端连接数已满，停止重连
+                console.warn('状态流被拒绝:', event.data);
+                source.close();
+            }
+        });
+        return source;
+    }
+};
+
+window.StatusStream = StatusStream;
@@ -14,6 +14,7 @@ const STATIC_ASSETS = [
     '/game',
     '/static/css/ink_theme.css',
     '/static/css/layout.css',
+    '/static/js/status_stream.js',
     '/static/js/game_controller.js',
     '/static/js/modules/ui_controller.js',
     '/static/js/modules/audio_controller.js',
@@ -445,6 +446,7 @@ async function doBackgroundSync() {
  */
 async function preloadCriticalResources() {
     const criticalUrls = [
+        '/static/js/status_stream.js',
         '/static/js/game_controller.js',
         '/static/js/modules/ui_controller.js',
         '/static/css/ink_theme.css',
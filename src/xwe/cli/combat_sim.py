@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""批量战斗模拟 CLI 工具
+
+示例:
+    python -m src.xwe.cli.combat_sim --a "level=3,strength=14" --b "level=3,constitution=16" --fights 100000 --seed 42
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+# 添加项目根目录到 Python 路径，便于直接执行
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.xwe.core.combat_simulator import BatchCombatSimulator, CombatantTemplate
+
+
+def parse_template(spec: str, default_name: str) -> CombatantTemplate:
+    """解析 ``key=value,...`` 形式的模板，或以 ``@`` 开头的 JSON 文件路径"""
+    if spec.startswith("@"):
+        data: Dict[str, Any] = json.loads(Path(spec[1:]).read_text(encoding="utf-8"))
+    else:
+        data = {"name": default_name}
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            key, _, value = part.partition("=")
+            data[key.strip()] = value.strip() if key.strip() == "name" else float(value)
+        if "level" in data:
+            data["level"] = int(data["level"])
+    return CombatantTemplate.from_dict(data)
+
+
+def print_report(title: str, summary: Dict[str, Any]) -> None:
+    rates = summary["win_rates"]
+    print("\n" + "=" * 60)
+    print(f"{title} (战斗场数={summary['fights']}, 种子={summary['seed']})")
+    print("=" * 60)
+    print(f"胜率: A {rates['a']:.2%}  B {rates['b']:.2%}  平局 {rates['draw']:.2%}")
+    ttk = summary["time_to_kill"]
+    if ttk.get("count"):
+        print(f"击杀回合: 平均 {ttk['mean']:.2f}, 中位数 {ttk['median']:.0f}, P90 {ttk['p90']:.0f}")
+    for side in ("a", "b"):
+        stats = summary[side]
+        hit = stats["damage_per_hit"]
+        if hit.get("count"):
+            print(
+                f"{side.upper()} 方: 单次伤害 平均 {hit['mean']:.1f} (P10 {hit['p10']:.1f} / P90 {hit['p90']:.1f}), "
+                f"暴击率 {stats['critical_rate']:.2%}, 被闪避 {stats['dodged_rate']:.2%}"
+            )
+
+
+def main() -> None:
+    """主函数"""
+    parser = argparse.ArgumentParser(description="XWE 批量战斗模拟 - 用于战斗数值平衡")
+    parser.add_argument("--a", default="", help="A 方模板，如 'level=3,strength=14' 或 '@a.json'")
+    parser.add_argument("--b", default="", help="B 方模板，格式同 --a")
+    parser.add_argument("--fights", type=int, default=100_000, help="战斗场数 (默认: 100000)")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，用于复现结果")
+    parser.add_argument("--max-rounds", type=int, default=100, help="回合上限 (默认: 100)")
+    parser.add_argument("--damage-type", choices=["physical", "magical"], default="physical", help="伤害类型")
+    parser.add_argument("--scalar", type=int, default=0, help="额外用 CombatSystem 逐场运行的场数，用于对照")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    # 逐场对照时角色死亡会写日志，这里只保留警告
+    logging.basicConfig(level=logging.WARNING)
+
+    side_a = parse_template(args.a, "A")
+    side_b = parse_template(args.b, "B")
+    simulator = BatchCombatSimulator(max_rounds=args.max_rounds, damage_type=args.damage_type)
+
+    results = {"batch": simulator.simulate(side_a, side_b, fights=args.fights, seed=args.seed).summary()}
+    if args.scalar:
+        results["scalar"] = simulator.simulate_scalar(side_a, side_b, fights=args.scalar, seed=args.seed).summary()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print_report("批量模拟", results["batch"])
+    if "scalar" in results:
+        print_report("逐场对照", results["scalar"])
+
+
+if __name__ == "__main__":
+    main()
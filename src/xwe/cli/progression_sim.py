@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""修炼进度模拟 CLI 工具
+
+示例:
+    python -m src.xwe.cli.progression_sim --population 1000000 --seed 42 --workers 4
+    python -m src.xwe.cli.progression_sim --target 金丹期 --income 筑基期=10 --tribulation-failure fall
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加项目根目录到 Python 路径，便于直接执行
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.xwe.core.progression_simulator import (
+    DEFAULT_STONE_INCOME,
+    TRIBULATION_POLICIES,
+    ProgressionSettings,
+    ProgressionSimulator,
+)
+
+
+def parse_income(specs: List[str]) -> Dict[str, float]:
+    """解析 ``境界=每小时灵石`` 形式的收入设置，未指定的境界使用默认值"""
+    income = dict(DEFAULT_STONE_INCOME)
+    for spec in specs:
+        realm, _, value = spec.partition("=")
+        income[realm.strip()] = float(value)
+    return income
+
+
+def print_report(title: str, summary: Dict[str, Any]) -> None:
+    print("\n" + "=" * 60)
+    print(
+        f"{title} (角色数={summary['population']}, 种子={summary['seed']}, "
+        f"{summary['start_realm']} → {summary['target_realm']}, 时限 {summary['horizon_days']:.0f} 天)"
+    )
+    print("=" * 60)
+    for realm, stats in summary["realms"].items():
+        days = stats["days"]
+        line = f"{realm}: 到达 {stats['reached_rate']:.2%}"
+        if days.get("count"):
+            line += f", 用时(天) P10 {days['p10']:.0f} / 中位数 {days['p50']:.0f} / P90 {days['p90']:.0f} / P99 {days['p99']:.0f}"
+        line += f", 人均突破 {stats['attempts_per_character']:.2f} 次, 成功率 {stats['breakthrough_success_rate']:.2%}"
+        if "tribulation_failure_rate" in stats:
+            line += f", 渡劫失败 {stats['tribulation_failure_rate']:.2%}"
+        print(line)
+
+    tribulation = summary["tribulation"]
+    print(f"渡劫: {tribulation['faced']} 次, 失败 {tribulation['failed']} 次, 陨落率 {tribulation['death_rate']:.2%}")
+    economy = summary["economy"]
+    print(
+        f"灵石: 人均收入 {economy['earned']['mean']:,.0f}, 人均消耗 {economy['spent']['mean']:,.0f}, "
+        f"消耗占收入 {economy['drain_rate']:.2%}"
+    )
+    for root, stats in summary["by_spiritual_root"].items():
+        median = stats["median_days"]
+        print(
+            f"{root}: {stats['population']} 人, 到达 {stats['reached_rate']:.2%}"
+            + (f", 中位数 {median:.0f} 天" if median is not None else "")
+        )
+
+
+def main() -> None:
+    """主函数"""
+    parser = argparse.ArgumentParser(description="XWE 修炼进度模拟 - 用于境界节奏平衡")
+    parser.add_argument("--population", type=int, default=100_000, help="角色数 (默认: 100000)")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，用于复现结果")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数 (默认: 1)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="每段角色数，结果只与种子和分段有关")
+    parser.add_argument("--start", default="炼气期", help="起始境界 (默认: 炼气期)")
+    parser.add_argument("--target", default=None, help="目标境界，默认为最后一个有突破要求的境界")
+    parser.add_argument("--days", type=float, default=20 * 365, help="模拟时长上限（游戏天）")
+    parser.add_argument("--step-hours", type=float, default=2.0, help="每步修炼时长（小时）")
+    parser.add_argument("--location-bonus", type=float, default=1.0, help="地点加成")
+    parser.add_argument("--start-stones", type=int, default=200, help="初始灵石（下品）")
+    parser.add_argument("--income", action="append", default=[], help="境界每小时灵石收入，如 '金丹期=30'，可重复")
+    parser.add_argument("--technique", default=None, help="全体角色修炼的功法ID")
+    parser.add_argument("--tribulation-failure", choices=TRIBULATION_POLICIES, default="death", help="渡劫失败的处理")
+    parser.add_argument("--scalar", type=int, default=0, help="额外用 CultivationSystem 逐个运行的角色数，用于对照")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    # 逐个对照时背包会写日志，这里只保留警告
+    logging.basicConfig(level=logging.WARNING)
+
+    settings = ProgressionSettings(
+        step_hours=args.step_hours,
+        location_bonus=args.location_bonus,
+        horizon_days=args.days,
+        start_realm=args.start,
+        target_realm=args.target,
+        start_stones=args.start_stones,
+        stone_income=parse_income(args.income),
+        technique=args.technique,
+        tribulation_failure=args.tribulation_failure,
+    )
+    simulator = ProgressionSimulator(settings)
+
+    results = {
+        "batch": simulator.simulate(
+            args.population, seed=args.seed, workers=args.workers, chunk_size=args.chunk_size
+        ).summary()
+    }
+    if args.scalar:
+        results["scalar"] = simulator.simulate_scalar(args.scalar, seed=args.seed).summary()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print_report("批量模拟", results["batch"])
+    if "scalar" in results:
+        print_report("逐个对照", results["scalar"])
+
+
+if __name__ == "__main__":
+    main()
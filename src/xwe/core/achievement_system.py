@@ -4,7 +4,7 @@
 """
 
 from typing import Dict, List, Optional, Any, Callable
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from enum import Enum
 import logging
@@ -218,6 +218,26 @@ class AchievementSystem:
         """添加成就定义"""
         self.achievements[achievement.id] = achievement
         
+    def to_dict(self) -> Dict[str, Any]:
+        """导出成就进度（成就定义是静态数据，不导出）"""
+        return {
+            "player_progress": {
+                aid: {
+                    **asdict(progress),
+                    "completion_date": progress.completion_date.isoformat() if progress.completion_date else None,
+                }
+                for aid, progress in self.player_progress.items()
+            }
+        }
+
+    def load_from_dict(self, data: Dict[str, Any]) -> None:
+        """恢复 ``to_dict`` 导出的成就进度"""
+        for aid, progress in data.get("player_progress", {}).items():
+            completion_date = progress.get("completion_date")
+            self.player_progress[aid] = AchievementProgress(
+                **{**progress, "completion_date": datetime.fromisoformat(completion_date) if completion_date else None}
+            )
+
     def check_achievement(self, achievement_id: str, value: int = 1) -> bool:
         """
         检查成就进度
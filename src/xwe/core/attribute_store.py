@@ -0,0 +1,379 @@
+"""
+紧凑属性存储
+
+大量 NPC 的属性按列（struct-of-arrays）存放在共享的 ``AttributeTable`` 中，
+每个角色只持有一个带 ``__slots__`` 的 ``AttributeView``，属性访问接口与
+``CharacterAttributes`` 相同。
+
+修改基础属性只把该行标记为待重算，读取衍生属性时才按需重算单行；
+``AttributeTable.recalculate_all()`` 则对所有待重算的行一次性按列计算。
+
+NumPy 为可选依赖，未安装时退回到 ``array('d')`` 并逐行重算。
+"""
+
+from __future__ import annotations
+
+import threading
+from array import array
+from dataclasses import MISSING, fields
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.xwe.core.attributes import (
+    ATTRIBUTE_FIELDS,
+    DERIVED_ATTRIBUTES,
+    RECALCULATE_ON_SET,
+    CharacterAttributes,
+    derive_attributes,
+)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+    NUMPY_AVAILABLE = False
+
+_DERIVED = frozenset(DERIVED_ATTRIBUTES)
+_RECALCULATE = frozenset(RECALCULATE_ON_SET)
+_COLUMNS = tuple(f"{name}_{part}" for name in ATTRIBUTE_FIELDS for part in ("base", "buff"))
+# 衍生属性公式的输入
+_INPUTS = ("strength", "constitution", "agility", "intelligence", "willpower", "luck", "cultivation_level")
+
+
+def _field_defaults() -> Dict[str, Any]:
+    defaults = {}
+    for f in fields(CharacterAttributes):
+        if f.default is not MISSING:
+            defaults[f.name] = f.default
+        elif f.default_factory is not MISSING:  # type: ignore[misc]
+            defaults[f.name] = f.default_factory()  # type: ignore[misc]
+    return defaults
+
+
+_DEFAULTS = _field_defaults()
+
+
+class AttributeTable:
+    """按列存放角色属性的共享表"""
+
+    def __init__(self, capacity: int = 256, use_numpy: Optional[bool] = None) -> None:
+        """
+        Args:
+            capacity: 初始行数，不足时自动翻倍
+            use_numpy: 是否使用 NumPy 数组，默认在可用时使用
+        """
+        self.use_numpy = NUMPY_AVAILABLE if use_numpy is None else (use_numpy and NUMPY_AVAILABLE)
+        self._capacity = max(1, capacity)
+        self._columns: Dict[str, Any] = {
+            name: self._new_column(self._capacity, _DEFAULTS[name]) for name in _COLUMNS
+        }
+        self._realm_names: List[str] = []
+        self._elemental: List[Optional[Dict[str, float]]] = []
+        self._dirty = bytearray(self._capacity)
+        self._live = bytearray(self._capacity)
+        self._free: List[int] = []
+        self._size = 0
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # 列存储
+    # ------------------------------------------------------------------
+    def _new_column(self, size: int, default: float) -> Any:
+        if self.use_numpy:
+            return np.full(size, default, dtype=np.float64)
+        return array("d", [default]) * size
+
+    def _grow(self) -> None:
+        old = self._capacity
+        self._capacity = old * 2
+        for name, column in self._columns.items():
+            extra = self._new_column(old, _DEFAULTS[name])
+            self._columns[name] = np.concatenate([column, extra]) if self.use_numpy else column + extra
+        self._dirty.extend(bytes(old))
+        self._live.extend(bytes(old))
+
+    def column(self, name: str) -> Any:
+        """返回某一列（如 ``strength_base``）的底层数组，前 ``capacity`` 行有效"""
+        return self._columns[name]
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self) -> int:
+        return self._size - len(self._free)
+
+    def memory_bytes(self) -> int:
+        """数值列占用的字节数"""
+        return len(self._columns) * self._capacity * 8
+
+    # ------------------------------------------------------------------
+    # 行分配
+    # ------------------------------------------------------------------
+    def _allocate_row(self) -> int:
+        with self._lock:
+            if self._free:
+                # 复用已释放的行时恢复默认值；新行在建列时已是默认值
+                row = self._free.pop()
+                for name in _COLUMNS:
+                    self._columns[name][row] = _DEFAULTS[name]
+                self._realm_names[row] = _DEFAULTS["realm_name"]
+                self._elemental[row] = None
+            else:
+                if self._size >= self._capacity:
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._realm_names.append(_DEFAULTS["realm_name"])
+                self._elemental.append(None)
+            self._live[row] = 1
+            self._dirty[row] = 1
+            return row
+
+    def create(self, **values: Any) -> "AttributeView":
+        """
+        新建一行属性
+
+        Args:
+            **values: 基础值，可写 ``strength=15`` 或 ``strength_base=15``，
+                也可包含 ``realm_name``/``elemental_resistance``
+        """
+        view = AttributeView(self, self._allocate_row())
+        for key, value in values.items():
+            if key in _COLUMNS or key in ("realm_name", "elemental_resistance"):
+                setattr(view, key, value)
+            elif f"{key}_base" in self._columns:
+                setattr(view, f"{key}_base", value)
+            else:
+                raise AttributeError(f"未知属性: {key}")
+        return view
+
+    def adopt(self, attributes: Any) -> "AttributeView":
+        """把一个 ``CharacterAttributes``（或另一个视图）复制为表中的新行"""
+        # 分配与写列需在同一把锁内完成，否则并发扩容会替换列数组导致写入丢失
+        with self._lock:
+            row = self._allocate_row()
+            columns = self._columns
+            for name in _COLUMNS:
+                columns[name][row] = getattr(attributes, name)
+            self._realm_names[row] = attributes.realm_name
+            resistance = attributes.elemental_resistance
+            if resistance != _DEFAULTS["elemental_resistance"]:
+                self._elemental[row] = dict(resistance)
+            # 源对象的衍生属性已是最新，保留其值（包括手动修改过的衍生属性）
+            self._dirty[row] = 0
+        return AttributeView(self, row)
+
+    def release(self, view: "AttributeView") -> None:
+        """释放视图占用的行，之后该视图不可再使用"""
+        with self._lock:
+            row = view._row
+            if row < 0 or not self._live[row]:
+                return
+            self._live[row] = 0
+            self._dirty[row] = 0
+            self._elemental[row] = None
+            self._free.append(row)
+            view._row = -1
+
+    def rows(self) -> Iterator[int]:
+        """所有在用的行号"""
+        live = self._live
+        return (row for row in range(self._size) if live[row])
+
+    # ------------------------------------------------------------------
+    # 衍生属性
+    # ------------------------------------------------------------------
+    def is_dirty(self, row: int) -> bool:
+        return bool(self._dirty[row])
+
+    def mark_dirty(self, row: int) -> None:
+        self._dirty[row] = 1
+
+    def dirty_count(self) -> int:
+        return self._dirty.count(1)
+
+    def recalculate_row(self, row: int) -> None:
+        """重算单行的衍生属性"""
+        columns = self._columns
+        inputs = [
+            columns[f"{name}_base"][row] + columns[f"{name}_buff"][row] for name in _INPUTS
+        ]
+        for name, value in derive_attributes(*inputs).items():
+            columns[f"{name}_base"][row] = value
+        self._dirty[row] = 0
+
+    def recalculate_all(self, dirty_only: bool = True) -> int:
+        """
+        批量重算衍生属性
+
+        使用 NumPy 时对所有目标行按列一次计算；否则逐行重算。
+
+        Args:
+            dirty_only: 只重算被标记的行，False 时重算所有在用的行
+
+        Returns:
+            重算的行数
+        """
+        with self._lock:
+            size = self._size
+            if not size:
+                return 0
+            flags = self._dirty if dirty_only else self._live
+            if not self.use_numpy:
+                rows = [row for row in range(size) if flags[row] and self._live[row]]
+                for row in rows:
+                    self.recalculate_row(row)
+                return len(rows)
+
+            mask = np.frombuffer(bytes(flags[:size]), dtype=np.uint8).astype(bool)
+            mask &= np.frombuffer(bytes(self._live[:size]), dtype=np.uint8).astype(bool)
+            rows = np.flatnonzero(mask)
+            if not rows.size:
+                return 0
+            columns = self._columns
+            inputs = [
+                columns[f"{name}_base"][rows] + columns[f"{name}_buff"][rows] for name in _INPUTS
+            ]
+            for name, values in derive_attributes(*inputs, clip=np.clip).items():
+                columns[f"{name}_base"][rows] = values
+            for row in rows.tolist():
+                self._dirty[row] = 0
+            return int(rows.size)
+
+
+def _base_property(column: str, derived: bool) -> property:
+    def getter(self: "AttributeView") -> float:
+        table, row = self._table, self._row
+        if derived and table._dirty[row]:
+            table.recalculate_row(row)
+        return float(table._columns[column][row])
+
+    def setter(self: "AttributeView", value: float) -> None:
+        table, row = self._table, self._row
+        if derived and table._dirty[row]:
+            # 先完成挂起的重算，保证与即时重算时相同的赋值顺序语义
+            table.recalculate_row(row)
+        table._columns[column][row] = value
+
+    return property(getter, setter)
+
+
+def _value_property(name: str) -> property:
+    """``<name>`` = ``<name>_base`` + ``<name>_buff``，赋值写入 base"""
+    base, buff = f"{name}_base", f"{name}_buff"
+    derived = name in _DERIVED
+    recalculate = name in _RECALCULATE
+
+    def getter(self: "AttributeView") -> float:
+        table, row = self._table, self._row
+        if derived and table._dirty[row]:
+            table.recalculate_row(row)
+        columns = table._columns
+        return float(columns[base][row] + columns[buff][row])
+
+    def setter(self: "AttributeView", value: float) -> None:
+        table, row = self._table, self._row
+        if derived and table._dirty[row]:
+            table.recalculate_row(row)
+        table._columns[base][row] = value
+        if recalculate:
+            table._dirty[row] = 1
+
+    return property(getter, setter, doc=f"{name}（base + buff）")
+
+
+class AttributeView:
+    """
+    属性表中一行的视图
+
+    与 ``CharacterAttributes`` 接口相同，但不立即重算衍生属性：
+    ``calculate_derived_attributes`` 只做标记，实际计算推迟到读取衍生属性
+    或调用 ``AttributeTable.recalculate_all`` 时进行。
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: AttributeTable, row: int) -> None:
+        self._table = table
+        self._row = row
+
+    @property
+    def table(self) -> AttributeTable:
+        return self._table
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    @property
+    def realm_name(self) -> str:
+        return self._table._realm_names[self._row]
+
+    @realm_name.setter
+    def realm_name(self, value: str) -> None:
+        self._table._realm_names[self._row] = value
+
+    @property
+    def elemental_resistance(self) -> Dict[str, float]:
+        # 大多数 NPC 没有元素抗性修正，首次访问时才创建字典
+        elemental = self._table._elemental
+        resistance = elemental[self._row]
+        if resistance is None:
+            resistance = elemental[self._row] = dict(_DEFAULTS["elemental_resistance"])
+        return resistance
+
+    @elemental_resistance.setter
+    def elemental_resistance(self, value: Dict[str, float]) -> None:
+        self._table._elemental[self._row] = dict(value)
+
+    def calculate_derived_attributes(self) -> None:
+        """标记衍生属性待重算"""
+        self._table._dirty[self._row] = 1
+
+    def get(self, attr_name: str, default: Any = 0) -> Any:
+        return getattr(self, attr_name, default)
+
+    def set(self, attr_name: str, value: Any) -> None:
+        if hasattr(self, attr_name):
+            setattr(self, attr_name, value)
+            self.calculate_derived_attributes()
+
+    def modify(self, attr_name: str, delta: float) -> None:
+        self.set(attr_name, self.get(attr_name, 0) + delta)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return CharacterAttributes.to_dict(self)  # type: ignore[arg-type]
+
+    def to_attributes(self) -> CharacterAttributes:
+        """导出为独立的 ``CharacterAttributes``"""
+        attrs = CharacterAttributes()
+        for name in _COLUMNS:
+            setattr(attrs, name, getattr(self, name))
+        attrs.realm_name = self.realm_name
+        attrs.elemental_resistance = dict(self.elemental_resistance)
+        return attrs
+
+    def release(self) -> None:
+        self._table.release(self)
+
+    def __copy__(self) -> "AttributeView":
+        return self._table.adopt(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "AttributeView":
+        view = self._table.adopt(self)
+        memo[id(self)] = view
+        return view
+
+    def __repr__(self) -> str:
+        return f"AttributeView(row={self._row}, realm_name={self.realm_name!r})"
+
+
+for _name in ATTRIBUTE_FIELDS:
+    setattr(AttributeView, _name, _value_property(_name))
+    setattr(AttributeView, f"{_name}_base", _base_property(f"{_name}_base", _name in _DERIVED))
+    setattr(AttributeView, f"{_name}_buff", _base_property(f"{_name}_buff", False))
+del _name
+
+
+__all__ = ["AttributeTable", "AttributeView", "NUMPY_AVAILABLE"]
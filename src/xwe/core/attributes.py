@@ -4,9 +4,72 @@
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional
+import copy
 import math
 
+from src.xwe.engine.expression import ExpressionError, get_expression_compiler
+
+
+# 以 ``<name>_base``/``<name>_buff`` 成对存储的数值属性
+ATTRIBUTE_FIELDS = (
+    "strength", "constitution", "agility", "intelligence", "willpower", "comprehension", "luck",
+    "realm_level", "cultivation_level", "cultivation_exp", "max_cultivation", "realm_progress",
+    "current_health", "max_health", "current_mana", "max_mana", "current_stamina", "max_stamina",
+    "attack_power", "spell_power", "defense", "magic_resistance", "speed",
+    "critical_rate", "critical_damage", "dodge_rate",
+)
+
+# 赋值后需要重新计算衍生属性的属性
+RECALCULATE_ON_SET = (
+    "strength", "constitution", "agility", "intelligence", "willpower", "comprehension", "luck",
+    "realm_level", "cultivation_level",
+)
+
+# 由 ``derive_attributes`` 计算的衍生属性
+DERIVED_ATTRIBUTES = (
+    "max_health", "max_mana", "max_stamina", "attack_power", "spell_power", "defense",
+    "magic_resistance", "speed", "critical_rate", "critical_damage", "dodge_rate",
+)
+
+
+def _clip(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+def derive_attributes(strength: Any, constitution: Any, agility: Any, intelligence: Any,
+                      willpower: Any, luck: Any, level: Any, clip: Any = _clip) -> Dict[str, Any]:
+    """
+    衍生属性公式
+    
+    只使用算术运算和 ``clip``，既可传入单个数值，也可传入 NumPy 数组
+    （此时 ``clip`` 传 ``numpy.clip``）一次算出整列。
+    """
+    return {
+        # 生命值 = 体质 * 10 + 力量 * 5 + 等级 * 20
+        "max_health": constitution * 10 + strength * 5 + level * 20,
+        # 灵力 = 智力 * 10 + 意志 * 5 + 等级 * 10
+        "max_mana": intelligence * 10 + willpower * 5 + level * 10,
+        # 体力 = 体质 * 5 + 力量 * 3 + 等级 * 5
+        "max_stamina": constitution * 5 + strength * 3 + level * 5,
+        # 攻击力 = 力量 * 2 + 敏捷 * 0.5 + 等级 * 3
+        "attack_power": strength * 2 + agility * 0.5 + level * 3,
+        # 法术威力 = 智力 * 2 + 意志 * 0.5 + 等级 * 3
+        "spell_power": intelligence * 2 + willpower * 0.5 + level * 3,
+        # 防御 = 体质 * 1.5 + 力量 * 0.5 + 等级 * 2
+        "defense": constitution * 1.5 + strength * 0.5 + level * 2,
+        # 法术抗性 = 意志 * 1.5 + 智力 * 0.5 + 等级 * 2
+        "magic_resistance": willpower * 1.5 + intelligence * 0.5 + level * 2,
+        # 速度 = 敏捷 * 1.5 + 等级
+        "speed": agility * 1.5 + level,
+        # 暴击率 = 基础5% + 运气影响，限制在 1%~50%
+        "critical_rate": clip(0.05 + (luck - 10) * 0.005, 0.01, 0.5),
+        # 暴击伤害 = 基础150% + 力量影响
+        "critical_damage": 1.5 + (strength - 10) * 0.01,
+        # 闪避率 = 基础5% + 敏捷影响，限制在 1%~30%
+        "dodge_rate": clip(0.05 + (agility - 10) * 0.003, 0.01, 0.3),
+    }
+
 
 @dataclass
 class CharacterAttributes:
@@ -308,42 +371,12 @@ class CharacterAttributes:
     
     def calculate_derived_attributes(self) -> None:
         """计算衍生属性"""
-        # 生命值 = 体质 * 10 + 力量 * 5 + 等级 * 20
-        self.max_health = self.constitution * 10 + self.strength * 5 + self.cultivation_level * 20
-        
-        # 灵力 = 智力 * 10 + 意志 * 5 + 等级 * 10
-        self.max_mana = self.intelligence * 10 + self.willpower * 5 + self.cultivation_level * 10
-        
-        # 体力 = 体质 * 5 + 力量 * 3 + 等级 * 5
-        self.max_stamina = self.constitution * 5 + self.strength * 3 + self.cultivation_level * 5
-        
-        # 攻击力 = 力量 * 2 + 敏捷 * 0.5 + 等级 * 3
-        self.attack_power = self.strength * 2 + self.agility * 0.5 + self.cultivation_level * 3
-        
-        # 法术威力 = 智力 * 2 + 意志 * 0.5 + 等级 * 3
-        self.spell_power = self.intelligence * 2 + self.willpower * 0.5 + self.cultivation_level * 3
-        
-        # 防御 = 体质 * 1.5 + 力量 * 0.5 + 等级 * 2
-        self.defense = self.constitution * 1.5 + self.strength * 0.5 + self.cultivation_level * 2
-        
-        # 法术抗性 = 意志 * 1.5 + 智力 * 0.5 + 等级 * 2
-        self.magic_resistance = self.willpower * 1.5 + self.intelligence * 0.5 + self.cultivation_level * 2
-        
-        # 速度 = 敏捷 * 1.5 + 等级
-        self.speed = self.agility * 1.5 + self.cultivation_level
-        
-        # 暴击率 = 基础5% + 运气影响
-        self.critical_rate = 0.05 + (self.luck - 10) * 0.005
-        
-        # 暴击伤害 = 基础150% + 力量影响
-        self.critical_damage = 1.5 + (self.strength - 10) * 0.01
-        
-        # 闪避率 = 基础5% + 敏捷影响
-        self.dodge_rate = 0.05 + (self.agility - 10) * 0.003
-        
-        # 限制数值范围
-        self.critical_rate = max(0.01, min(0.5, self.critical_rate))
-        self.dodge_rate = max(0.01, min(0.3, self.dodge_rate))
+        derived = derive_attributes(
+            self.strength, self.constitution, self.agility, self.intelligence,
+            self.willpower, self.luck, self.cultivation_level,
+        )
+        for name, value in derived.items():
+            setattr(self, f"{name}_base", value)
     
     def get(self, attr_name: str, default: Any = 0) -> Any:
         """获取属性值"""
@@ -401,6 +434,24 @@ class CharacterAttributes:
             "elemental_resistance": self.elemental_resistance
         }
     
+    def to_state(self) -> Dict[str, Any]:
+        """
+        无损导出全部字段
+
+        ``to_dict`` 只导出合计值，``from_dict`` 还会重算衍生属性；这里保留各属性
+        ``_base``/``_buff`` 原值以及运行时附加的字段（如 ``level``、``faction``），
+        用于会话休眠快照。
+        """
+        return copy.deepcopy(vars(self))
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "CharacterAttributes":
+        """按字段恢复 ``to_state`` 导出的属性，不重算衍生属性"""
+        attrs = cls()
+        for key, value in copy.deepcopy(state).items():
+            setattr(attrs, key, value)
+        return attrs
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "CharacterAttributes":
         """从字典创建"""
@@ -426,6 +477,7 @@ class AttributeSystem:
     
     def __init__(self, expression_parser: Any = None):
         self.parser = expression_parser
+        self.compiler = get_expression_compiler()
         self.attribute_formulas = {
             "max_health": "constitution * 10 + strength * 5 + level * 20",
             "max_mana": "intelligence * 10 + willpower * 5 + level * 10",
@@ -437,6 +489,8 @@ class AttributeSystem:
         """
         根据公式计算属性值
         
+        公式只在第一次使用时编译，之后命中编译缓存。
+        
         Args:
             formula: 计算公式
             context: 变量上下文
@@ -447,17 +501,36 @@ class AttributeSystem:
         if self.parser:
             return self.parser.evaluate(formula, context)
         
-        # 简单的备用计算
+        # 备用计算：出错时返回0
         try:
-            # 使用eval的安全版本
-            allowed_names = {
-                k: v for k, v in context.items() 
-                if isinstance(v, (int, float))
-            }
-            return eval(formula, {"__builtins__": {}}, allowed_names)
-        except:
+            return self.compiler.evaluate(formula, context)
+        except ExpressionError:
             return 0
     
+    def calculate_attribute_many(self, formula: str,
+                                 contexts: Iterable[Dict[str, Any]]) -> List[float]:
+        """
+        用同一公式批量计算多个角色的属性值
+        
+        Args:
+            formula: 计算公式
+            contexts: 每个角色的变量上下文
+            
+        Returns:
+            与 contexts 顺序一致的结果列表
+        """
+        contexts = list(contexts)
+        if self.parser and hasattr(self.parser, "evaluate_many"):
+            return self.parser.evaluate_many(formula, contexts)
+        if self.parser:
+            return [self.parser.evaluate(formula, context) for context in contexts]
+        
+        try:
+            return self.compiler.evaluate_many(formula, contexts)
+        except ExpressionError:
+            # 个别上下文出错时逐个计算，出错的记为0
+            return [self.calculate_attribute(formula, context) for context in contexts]
+    
     def apply_buff(self, attributes: CharacterAttributes,
                    buff_type: str, value: float, is_percentage: bool = False) -> None:
         """
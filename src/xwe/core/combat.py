@@ -12,6 +12,11 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
+# 伤害公式参数（批量战斗模拟器共用同一组常量）
+DEFENSE_CONSTANT = 100      # 减伤 = 防御 / (防御 + DEFENSE_CONSTANT)
+DAMAGE_VARIANCE = 0.1       # 伤害随机浮动 ±10%
+MIN_DAMAGE = 1              # 最低伤害
+
 
 class CombatActionType(Enum):
     """战斗行动类型"""
@@ -209,10 +214,13 @@ class CombatSystem:
     处理所有战斗相关的逻辑
     """
     
-    def __init__(self, skill_system: Any = None, expression_parser: Any = None, heaven_law_engine: Any = None):
+    def __init__(self, skill_system: Any = None, expression_parser: Any = None, heaven_law_engine: Any = None,
+                 rng: Optional[random.Random] = None):
         self.skill_system = skill_system
         self.parser = expression_parser
         self.heaven_law_engine = heaven_law_engine
+        # 随机数来源，传入带种子的 random.Random 可复现战斗结果
+        self.rng = rng or random
         self.active_combats: Dict[str, CombatState] = {}
         
     def create_combat(self, combat_id: Optional[str] = None) -> CombatState:
@@ -422,7 +430,7 @@ class CombatSystem:
             
         flee_chance = max(0.1, min(0.9, flee_chance))  # 限制在10%-90%
         
-        if random.random() < flee_chance:
+        if self.rng.random() < flee_chance:
             # 逃跑成功
             combat.remove_participant(actor.id)
             return CombatResult(True, f"{actor.name} 成功逃离战斗")
@@ -433,7 +441,7 @@ class CombatSystem:
                          damage_type: str = "physical") -> DamageInfo:
         """计算伤害"""
         # 检查闪避
-        if random.random() < defender.attributes.dodge_rate:
+        if self.rng.random() < defender.attributes.dodge_rate:
             return DamageInfo(0, damage_type, is_evaded=True)
             
         # 基础伤害
@@ -445,18 +453,18 @@ class CombatSystem:
             defense = defender.attributes.magic_resistance
             
         # 防御减伤
-        damage_reduction = defense / (defense + 100)  # 防御力公式
+        damage_reduction = defense / (defense + DEFENSE_CONSTANT)  # 防御力公式
         damage = base_damage * (1 - damage_reduction)
         
         # 暴击判定
-        is_critical = random.random() < attacker.attributes.critical_rate
+        is_critical = self.rng.random() < attacker.attributes.critical_rate
         if is_critical:
             damage *= attacker.attributes.critical_damage
             
         # 随机浮动±10%
-        damage *= random.uniform(0.9, 1.1)
+        damage *= self.rng.uniform(1 - DAMAGE_VARIANCE, 1 + DAMAGE_VARIANCE)
         
         # 最少造成1点伤害
-        damage = max(1, damage)
+        damage = max(MIN_DAMAGE, damage)
         
         return DamageInfo(damage, damage_type, is_critical)
@@ -0,0 +1,419 @@
+"""
+批量战斗模拟器
+
+用于数值平衡：一次运行大量相互独立的一对一战斗。属性、闪避/暴击判定、
+防御减伤和 ±10% 浮动都按数组整体计算，公式与 ``CombatSystem._calculate_damage``
+一致（共用 ``combat`` 模块中的常量，衍生属性来自 ``CharacterAttributes``）。
+
+出手顺序与 ``CombatState`` 相同：速度高者先手，速度相同时 A 方先手；
+每回合双方各攻击一次，一方倒下即结束。
+
+NumPy 为可选依赖，只有批量模式需要；``simulate_scalar`` 使用真实的
+``CombatSystem`` 逐场运行，作为对照和基准。
+"""
+
+from __future__ import annotations
+
+import copy
+import random
+import uuid
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from src.xwe.core.attribute_store import AttributeView
+from src.xwe.core.attributes import CharacterAttributes
+from src.xwe.core.character import Character
+from src.xwe.core.combat import (
+    DAMAGE_VARIANCE,
+    DEFENSE_CONSTANT,
+    MIN_DAMAGE,
+    CombatAction,
+    CombatActionType,
+    CombatState,
+    CombatSystem,
+)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+    NUMPY_AVAILABLE = False
+
+# 结果中的胜者编码
+WINNER_A = 0
+WINNER_B = 1
+DRAW = -1
+
+
+@dataclass
+class CombatantTemplate:
+    """战斗者模板，只包含决定衍生属性的基础数值"""
+
+    name: str = "未命名"
+    level: int = 1
+    strength: float = 10
+    constitution: float = 10
+    agility: float = 10
+    intelligence: float = 10
+    willpower: float = 10
+    luck: float = 10
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CombatantTemplate":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def to_attributes(self) -> CharacterAttributes:
+        """按 CharacterAttributes 的公式生成完整属性"""
+        return CharacterAttributes(
+            strength_base=self.strength,
+            constitution_base=self.constitution,
+            agility_base=self.agility,
+            intelligence_base=self.intelligence,
+            willpower_base=self.willpower,
+            luck_base=self.luck,
+            cultivation_level_base=self.level,
+        )
+
+    def to_character(self) -> Character:
+        return Character(name=self.name, attributes=self.to_attributes(), level=self.level)
+
+
+Combatant = Union[CombatantTemplate, CharacterAttributes, AttributeView, Character, Dict[str, Any]]
+
+
+def _to_attributes(combatant: Combatant) -> CharacterAttributes:
+    if isinstance(combatant, CombatantTemplate):
+        return combatant.to_attributes()
+    if isinstance(combatant, (CharacterAttributes, AttributeView)):
+        return combatant
+    if isinstance(combatant, dict):
+        return CombatantTemplate.from_dict(combatant).to_attributes()
+    if hasattr(combatant, "attributes"):
+        return combatant.attributes
+    raise TypeError(f"无法识别的战斗者类型: {type(combatant).__name__}")
+
+
+def _to_character(combatant: Combatant) -> Character:
+    """为单场战斗生成满血的独立角色"""
+    if isinstance(combatant, dict):
+        combatant = CombatantTemplate.from_dict(combatant)
+    if isinstance(combatant, CombatantTemplate):
+        return combatant.to_character()
+    if isinstance(combatant, AttributeView):
+        combatant = combatant.to_attributes()
+    if isinstance(combatant, CharacterAttributes):
+        attrs = copy.deepcopy(combatant)
+        return Character(attributes=attrs, level=int(attrs.cultivation_level))
+    character = copy.deepcopy(combatant)
+    character.id = str(uuid.uuid4())
+    character.attributes.current_health = character.attributes.max_health
+    return character
+
+
+def _as_list(side: Union[Combatant, Sequence[Combatant]]) -> List[Combatant]:
+    if isinstance(side, (list, tuple)):
+        return list(side)
+    return [side]
+
+
+def _resolve_fights(a: List[Any], b: List[Any], fights: Optional[int]) -> int:
+    n = fights or max(len(a), len(b))
+    for name, side in (("A", a), ("B", b)):
+        if len(side) not in (1, n):
+            raise ValueError(f"{name} 方数量为 {len(side)}，应为 1 或 {n}")
+    return n
+
+
+@dataclass
+class BatchCombatResult:
+    """
+    批量战斗结果
+
+    ``winners`` 中 0 表示 A 胜，1 表示 B 胜，-1 表示达到回合上限的平局；
+    ``rounds`` 为结束时所在回合（从 1 开始）。
+    """
+
+    winners: Any
+    rounds: Any
+    damage_dealt_a: Any
+    damage_dealt_b: Any
+    hit_damage_a: Any
+    hit_damage_b: Any
+    counters: Dict[str, int] = field(default_factory=dict)
+    max_rounds: int = 0
+    seed: Optional[int] = None
+
+    @property
+    def fights(self) -> int:
+        return int(len(self.winners))
+
+    def win_rates(self) -> Dict[str, float]:
+        n = max(1, self.fights)
+        return {
+            "a": float(np.count_nonzero(self.winners == WINNER_A)) / n,
+            "b": float(np.count_nonzero(self.winners == WINNER_B)) / n,
+            "draw": float(np.count_nonzero(self.winners == DRAW)) / n,
+        }
+
+    def time_to_kill(self, side: Optional[str] = None) -> Dict[str, float]:
+        """
+        击杀所需回合数的统计
+
+        Args:
+            side: ``"a"``/``"b"`` 只统计该方获胜的战斗，默认统计全部分出胜负的战斗
+        """
+        if side is None:
+            mask = self.winners != DRAW
+        else:
+            mask = self.winners == (WINNER_A if side == "a" else WINNER_B)
+        return _describe(self.rounds[mask])
+
+    def damage_distribution(self, side: str = "a", bins: int = 20) -> Dict[str, Any]:
+        """单次命中伤害的分布（不含被闪避的攻击）"""
+        hits = self.hit_damage_a if side == "a" else self.hit_damage_b
+        stats = _describe(hits)
+        if hits.size:
+            counts, edges = np.histogram(hits, bins=bins)
+            stats["histogram"] = {"counts": counts.tolist(), "bin_edges": edges.round(3).tolist()}
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        counters = self.counters
+        result: Dict[str, Any] = {
+            "fights": self.fights,
+            "seed": self.seed,
+            "max_rounds": self.max_rounds,
+            "win_rates": self.win_rates(),
+            "time_to_kill": self.time_to_kill(),
+        }
+        for side in ("a", "b"):
+            attacks = max(1, counters.get(f"attacks_{side}", 0))
+            damage = self.damage_dealt_a if side == "a" else self.damage_dealt_b
+            result[side] = {
+                "time_to_kill": self.time_to_kill(side),
+                "damage_per_fight": _describe(damage),
+                "damage_per_hit": self.damage_distribution(side, bins=10),
+                "dodged_rate": counters.get(f"dodged_{side}", 0) / attacks,
+                "critical_rate": counters.get(f"critical_{side}", 0) / attacks,
+            }
+        return result
+
+
+def _describe(values: Any) -> Dict[str, float]:
+    if not len(values):
+        return {"count": 0}
+    values = np.asarray(values, dtype=float)
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "p10": float(p10),
+        "median": float(p50),
+        "p90": float(p90),
+        "max": float(values.max()),
+    }
+
+
+class BatchCombatSimulator:
+    """NumPy 批量战斗模拟器"""
+
+    def __init__(self, max_rounds: int = 100, damage_type: str = "physical") -> None:
+        """
+        Args:
+            max_rounds: 回合上限，超过视为平局
+            damage_type: ``physical`` 或 ``magical``，决定使用的攻防属性
+        """
+        if damage_type not in ("physical", "magical"):
+            raise ValueError(f"未知的伤害类型: {damage_type}")
+        self.max_rounds = max_rounds
+        self.damage_type = damage_type
+
+    def _columns(self, side: List[Combatant], n: int) -> Dict[str, Any]:
+        """把一方的属性转成列数组"""
+        attrs = [_to_attributes(c) for c in side]
+        physical = self.damage_type == "physical"
+        columns = {
+            "hp": [a.max_health for a in attrs],
+            "power": [a.attack_power if physical else a.spell_power for a in attrs],
+            "defense": [a.defense if physical else a.magic_resistance for a in attrs],
+            "dodge": [a.dodge_rate for a in attrs],
+            "crit_rate": [a.critical_rate for a in attrs],
+            "crit_damage": [a.critical_damage for a in attrs],
+            "speed": [a.speed for a in attrs],
+        }
+        return {
+            name: np.full(n, values[0], dtype=float) if len(values) == 1 else np.asarray(values, dtype=float)
+            for name, values in columns.items()
+        }
+
+    def simulate(
+        self,
+        side_a: Union[Combatant, Sequence[Combatant]],
+        side_b: Union[Combatant, Sequence[Combatant]],
+        fights: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> BatchCombatResult:
+        """
+        运行批量战斗
+
+        Args:
+            side_a: A 方，单个战斗者（广播到每场战斗）或每场一个的列表
+            side_b: B 方，规则同上
+            fights: 战斗场数，默认取两方列表的长度
+            seed: 随机种子，相同种子得到相同结果
+
+        Returns:
+            批量战斗结果
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("批量战斗模拟需要安装 numpy")
+
+        a_list, b_list = _as_list(side_a), _as_list(side_b)
+        n = _resolve_fights(a_list, b_list, fights)
+        sides = (self._columns(a_list, n), self._columns(b_list, n))
+        rng = np.random.default_rng(seed)
+
+        hp = [sides[0]["hp"].copy(), sides[1]["hp"].copy()]
+        a_first = sides[0]["speed"] >= sides[1]["speed"]
+        winners = np.full(n, DRAW, dtype=np.int8)
+        rounds = np.full(n, self.max_rounds, dtype=np.int32)
+        damage_dealt = [np.zeros(n), np.zeros(n)]
+        hits: List[List[Any]] = [[], []]
+        counters = {f"{k}_{s}": 0 for k in ("attacks", "dodged", "critical") for s in ("a", "b")}
+
+        active = np.arange(n)
+        for rnd in range(1, self.max_rounds + 1):
+            if not active.size:
+                break
+            # 每回合两个阶段：先手方攻击，然后（若仍存活）后手方反击
+            for first in (True, False):
+                a_attacks = a_first[active] == first
+                for attacker, idx in ((0, active[a_attacks]), (1, active[~a_attacks])):
+                    if not idx.size:
+                        continue
+                    defender = 1 - attacker
+                    damage, dodged, critical = self._strike(sides[attacker], sides[defender], idx, rng)
+                    hp[defender][idx] -= damage
+                    damage_dealt[attacker][idx] += damage
+                    hits[attacker].append(damage[~dodged])
+                    side = "ab"[attacker]
+                    counters[f"attacks_{side}"] += int(idx.size)
+                    counters[f"dodged_{side}"] += int(np.count_nonzero(dodged))
+                    counters[f"critical_{side}"] += int(np.count_nonzero(critical))
+
+                    killed = idx[hp[defender][idx] <= 0]
+                    winners[killed] = attacker
+                    rounds[killed] = rnd
+                active = active[winners[active] == DRAW]
+                if not active.size:
+                    break
+
+        return BatchCombatResult(
+            winners=winners,
+            rounds=rounds,
+            damage_dealt_a=damage_dealt[0],
+            damage_dealt_b=damage_dealt[1],
+            hit_damage_a=np.concatenate(hits[0]) if hits[0] else np.zeros(0),
+            hit_damage_b=np.concatenate(hits[1]) if hits[1] else np.zeros(0),
+            counters=counters,
+            max_rounds=self.max_rounds,
+            seed=seed,
+        )
+
+    @staticmethod
+    def _strike(attacker: Dict[str, Any], defender: Dict[str, Any], idx: Any, rng: Any):
+        """对 ``idx`` 中的战斗同时结算一次攻击，公式同 CombatSystem._calculate_damage"""
+        m = idx.size
+        dodged = rng.random(m) < defender["dodge"][idx]
+        critical = (rng.random(m) < attacker["crit_rate"][idx]) & ~dodged
+        variance = rng.uniform(1 - DAMAGE_VARIANCE, 1 + DAMAGE_VARIANCE, m)
+
+        defense = defender["defense"][idx]
+        damage = attacker["power"][idx] * (1 - defense / (defense + DEFENSE_CONSTANT))
+        damage = np.where(critical, damage * attacker["crit_damage"][idx], damage)
+        damage = np.maximum(MIN_DAMAGE, damage * variance)
+        damage[dodged] = 0
+        return damage, dodged, critical
+
+    def simulate_scalar(
+        self,
+        side_a: Union[Combatant, Sequence[Combatant]],
+        side_b: Union[Combatant, Sequence[Combatant]],
+        fights: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> BatchCombatResult:
+        """
+        用 CombatSystem 逐场运行同样的对局，返回相同格式的结果
+
+        速度远慢于 ``simulate``，用于校验和基准对比。
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("结果汇总需要安装 numpy")
+
+        a_list, b_list = _as_list(side_a), _as_list(side_b)
+        n = _resolve_fights(a_list, b_list, fights)
+        system = CombatSystem(rng=random.Random(seed))
+
+        winners = np.full(n, DRAW, dtype=np.int8)
+        rounds = np.full(n, self.max_rounds, dtype=np.int32)
+        damage_dealt = [np.zeros(n), np.zeros(n)]
+        hits: List[List[float]] = [[], []]
+        counters = {f"{k}_{s}": 0 for k in ("attacks", "dodged", "critical") for s in ("a", "b")}
+
+        for i in range(n):
+            a = _to_character(a_list[i if len(a_list) > 1 else 0])
+            b = _to_character(b_list[i if len(b_list) > 1 else 0])
+            side_of = {a.id: 0, b.id: 1}
+
+            combat_id = f"sim-{i}"
+            combat = CombatState(combat_id)
+            combat.add_participant(a, "a")
+            combat.add_participant(b, "b")
+            system.active_combats[combat_id] = combat
+            try:
+                while not combat.is_combat_over() and combat.round_count < self.max_rounds:
+                    actor = combat.get_current_actor()
+                    target = combat.get_enemies(actor)[0]
+                    rnd = combat.round_count + 1
+                    if self.damage_type == "physical":
+                        result = system.execute_action(
+                            combat_id, CombatAction(CombatActionType.ATTACK, actor.id, [target.id])
+                        )
+                        info = result.damage_dealt[target.id]
+                    else:
+                        info = system._calculate_damage(actor, target, "magical")
+                        if not info.is_evaded:
+                            target.take_damage(info.damage, info.damage_type)
+                        combat.next_turn()
+
+                    attacker = side_of[actor.id]
+                    side = "ab"[attacker]
+                    counters[f"attacks_{side}"] += 1
+                    if info.is_evaded:
+                        counters[f"dodged_{side}"] += 1
+                    else:
+                        damage_dealt[attacker][i] += info.damage
+                        hits[attacker].append(info.damage)
+                        if info.is_critical:
+                            counters[f"critical_{side}"] += 1
+                    if not target.is_alive:
+                        winners[i] = attacker
+                        rounds[i] = rnd
+            finally:
+                system.active_combats.pop(combat_id, None)
+
+        return BatchCombatResult(
+            winners=winners,
+            rounds=rounds,
+            damage_dealt_a=damage_dealt[0],
+            damage_dealt_b=damage_dealt[1],
+            hit_damage_a=np.asarray(hits[0], dtype=float),
+            hit_damage_b=np.asarray(hits[1], dtype=float),
+            counters=counters,
+            max_rounds=self.max_rounds,
+            seed=seed,
+        )
@@ -9,8 +9,56 @@ from enum import Enum
 import re
 import logging
 
+from .command_trie import KeywordAutomaton, PrefixTrie
+
 logger = logging.getLogger(__name__)
 
+# 正则元字符，遇到即结束字面前缀
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+def _leading_literal(fragment: str) -> str:
+    """正则片段开头的字面串（紧跟 ? * { 的那个字符可省略，不计入）"""
+    chars = []
+    for ch in fragment:
+        if ch in _REGEX_META:
+            if ch in "?*{" and chars:
+                chars.pop()
+            break
+        chars.append(ch)
+    return "".join(chars)
+
+
+def literal_prefixes(pattern: str) -> Optional[List[str]]:
+    """
+    提取命令模式必须以之开头的字面前缀
+
+    只识别 ``^literal`` 和 ``^(?:a|b|c)`` 两种开头；无法确定前缀的模式返回 None，
+    这类模式对每条输入都要尝试。
+
+    Args:
+        pattern: 命令模式正则
+
+    Returns:
+        前缀列表（小写），或 None
+    """
+    if not pattern.startswith("^"):
+        return None
+    body = pattern[1:]
+    if body.startswith("(?:"):
+        end = body.find(")")
+        if end < 0:
+            return None
+        inner = body[3:end]
+        if any(ch in inner for ch in "([\\") or body[end + 1:end + 2] in ("?", "*", "{"):
+            return None
+        prefixes = [_leading_literal(alt) for alt in inner.split("|")]
+    else:
+        prefixes = [_leading_literal(body)]
+    if not all(prefixes):
+        return None
+    return [prefix.lower() for prefix in prefixes]
+
 
 class CommandType(Enum):
     """命令类型"""
@@ -64,12 +112,28 @@ class ParsedCommand:
             self.parameters = {}
 
 
+# _compile 生成的匹配结构
+_COMPILED_ATTRS = (
+    "_synonym_groups",
+    "_synonym_matcher",
+    "_compiled_patterns",
+    "_pattern_trie",
+    "_floating_patterns",
+    "_alias_substrings",
+    "_alias_trie",
+)
+
+
 class CommandParser:
     """
     命令解析器
     
-    将玩家输入的文本解析为结构化命令
+    将玩家输入的文本解析为结构化命令。默认表编译出的匹配结构在同一个类的实例
+    之间共享，实例第一次 add_alias/add_pattern/add_synonyms 时才复制一份自己的。
     """
+
+    # 类 → 默认表编译出的匹配结构
+    _shared_compiled: Dict[type, Dict[str, Any]] = {}
     
     def __init__(self):
         # 初始化同义词表
@@ -218,6 +282,8 @@ class CommandParser:
             (r"^(?:给|赠送)\s*(.+?)\s*(?:给|到)\s*(.+)$", CommandType.GIVE, ["item", "target"]),
             (r"^give\s+(.+?)\s+to\s+(.+)$", CommandType.GIVE, ["item", "target"]),
         ]
+
+        self._load_compiled()
         
     def _init_synonyms(self):
         """初始化同义词表"""
@@ -230,6 +296,137 @@ class CommandParser:
             "查看": ["查看", "看", "检查", "观察", "察看"],
         }
         
+    def _compile(self) -> None:
+        """
+        把别名、命令模式和同义词编译成匹配结构
+
+        - 同义词：一个 Aho–Corasick 自动机，一次扫描找出全部出现的同义词；
+        - 命令模式：按字面前缀建前缀树，只尝试前缀命中的模式（外加无法确定前缀的模式）；
+        - 模糊匹配：别名的全部子串 → 最先出现的包含它的别名对应的命令类型。
+        """
+        self._synonym_groups: List[Tuple[str, List[str]]] = []
+        self._synonym_matcher = KeywordAutomaton()
+        for key, synonyms in self.synonyms.items():
+            self._add_synonym_group(key, synonyms)
+
+        self._compiled_patterns: List[Tuple[re.Pattern, CommandType, Any]] = []
+        self._pattern_trie = PrefixTrie()
+        self._floating_patterns: List[int] = []
+        for pattern, cmd_type, param_names in self.command_patterns:
+            self._compile_pattern(pattern, cmd_type, param_names)
+
+        self._alias_substrings: Dict[str, CommandType] = {}
+        self._alias_trie = PrefixTrie()
+        for position, (alias, cmd_type) in enumerate(self.command_aliases.items()):
+            self._index_alias(alias, cmd_type, position)
+
+    def _load_compiled(self) -> None:
+        """使用本类共享的匹配结构，第一个实例负责编译"""
+        shared = CommandParser._shared_compiled.get(type(self))
+        if shared is None:
+            self._compile()
+            # 自动机在第一次查找时才建失败指针，共享前先建好，之后只读
+            next(self._synonym_matcher.find(""), None)
+            shared = {name: getattr(self, name) for name in _COMPILED_ATTRS}
+            CommandParser._shared_compiled[type(self)] = shared
+        else:
+            self.__dict__.update(shared)
+        self._shares_compiled = True
+
+    def _own_compiled(self) -> None:
+        """修改前按本实例的表重新编译，不影响共享同一结构的其他实例"""
+        if not self._shares_compiled:
+            return
+        self._compile()
+        self._shares_compiled = False
+
+    def _add_synonym_group(self, key: str, synonyms: List[str]) -> None:
+        group = len(self._synonym_groups)
+        self._synonym_groups.append((key, synonyms))
+        for index, synonym in enumerate(synonyms):
+            self._synonym_matcher.add(synonym, (group, index))
+
+    def _compile_pattern(self, pattern: str, cmd_type: CommandType, param_names: Any) -> None:
+        index = len(self._compiled_patterns)
+        self._compiled_patterns.append((re.compile(pattern, re.IGNORECASE), cmd_type, param_names))
+        prefixes = literal_prefixes(pattern)
+        if prefixes is None:
+            self._floating_patterns.append(index)
+            return
+        for prefix in prefixes:
+            bucket = self._pattern_trie.get(prefix)
+            if bucket is None:
+                self._pattern_trie.insert(prefix, [index])
+            elif bucket[-1] != index:
+                bucket.append(index)
+
+    def _index_alias(self, alias: str, cmd_type: CommandType, position: int) -> None:
+        self._alias_trie.insert(alias, position)
+        substrings = self._alias_substrings
+        for start in range(len(alias)):
+            for end in range(start + 1, len(alias) + 1):
+                substrings.setdefault(alias[start:end], cmd_type)
+
+    def add_alias(self, alias: str, cmd_type: CommandType) -> None:
+        """
+        添加命令别名
+
+        Args:
+            alias: 别名
+            cmd_type: 命令类型
+        """
+        self._own_compiled()
+        existed = alias in self.command_aliases
+        self.command_aliases[alias] = cmd_type
+        if existed:
+            # 覆盖已有别名会改变模糊匹配的先后，整体重建子串表
+            self._alias_substrings = {}
+            self._alias_trie = PrefixTrie()
+            for position, (name, alias_type) in enumerate(self.command_aliases.items()):
+                self._index_alias(name, alias_type, position)
+        else:
+            self._index_alias(alias, cmd_type, len(self.command_aliases) - 1)
+
+    def add_pattern(self, pattern: str, cmd_type: CommandType, param_names: Any) -> None:
+        """
+        添加带参数的命令模式（排在已有模式之后）
+
+        Args:
+            pattern: 正则，分组依次对应参数
+            cmd_type: 命令类型
+            param_names: 参数名，单个字符串或列表
+        """
+        self._own_compiled()
+        self.command_patterns.append((pattern, cmd_type, param_names))
+        self._compile_pattern(pattern, cmd_type, param_names)
+
+    def add_synonyms(self, key: str, synonyms: List[str]) -> None:
+        """
+        添加一组同义词（排在已有各组之后）
+
+        Args:
+            key: 标准命令
+            synonyms: 同义词列表，靠前的优先
+        """
+        self._own_compiled()
+        if key in self.synonyms:
+            self.synonyms[key].extend(synonyms)
+            self._synonym_groups = []
+            self._synonym_matcher = KeywordAutomaton()
+            for name, group in self.synonyms.items():
+                self._add_synonym_group(name, group)
+        else:
+            self.synonyms[key] = list(synonyms)
+            self._add_synonym_group(key, self.synonyms[key])
+
+    def _first_synonyms(self, text: str) -> Dict[int, int]:
+        """每组同义词里，文本中出现的排位最靠前的那个（组号 → 组内序号）"""
+        found: Dict[int, int] = {}
+        for _, _, (group, index) in self._synonym_matcher.find(text):
+            if index < found.get(group, len(self._synonym_groups[group][1])):
+                found[group] = index
+        return found
+
     def normalize_command(self, text: str) -> str:
         """
         归一化命令文本
@@ -242,13 +439,20 @@ class CommandParser:
         """
         text = text.strip().lower()
         
-        # 查找同义词
-        for key, synonyms in self.synonyms.items():
-            for synonym in synonyms:
-                if synonym in text:
-                    # 替换为标准命令
-                    text = text.replace(synonym, key)
-                    break
+        # 依次处理每组同义词：替换组内最靠前的那个出现的同义词
+        found = self._first_synonyms(text)
+        group = -1
+        while True:
+            pending = [g for g in found if g > group]
+            if not pending:
+                break
+            group = min(pending)
+            key, synonyms = self._synonym_groups[group]
+            synonym = synonyms[found[group]]
+            if synonym != key:
+                # 替换为标准命令，后面各组要看替换后的文本
+                text = text.replace(synonym, key)
+                found = self._first_synonyms(text)
                     
         return text
         
@@ -272,13 +476,19 @@ class CommandParser:
             return ParsedCommand(text, CommandType.UNKNOWN)
             
         # 尝试直接匹配命令别名
-        for alias, cmd_type in self.command_aliases.items():
-            if normalized_text == alias:
-                return ParsedCommand(text, cmd_type)
+        cmd_type = self.command_aliases.get(normalized_text)
+        if cmd_type is not None:
+            return ParsedCommand(text, cmd_type)
                 
-        # 尝试匹配带参数的命令模式
-        for pattern, cmd_type, param_names in self.command_patterns:
-            match = re.match(pattern, normalized_text, re.IGNORECASE)
+        # 尝试匹配带参数的命令模式：只尝试字面前缀命中的模式，按原顺序
+        candidates = list(self._floating_patterns)
+        for _, indexes in self._pattern_trie.prefixes(normalized_text):
+            candidates.extend(indexes)
+        if len(candidates) > 1:
+            candidates = sorted(set(candidates))
+        for index in candidates:
+            compiled, cmd_type, param_names = self._compiled_patterns[index]
+            match = compiled.match(normalized_text)
             if match:
                 params = {}
                 
@@ -299,12 +509,12 @@ class CommandParser:
         if words:
             first_word = words[0]
             
-            # 检查第一个词是否是命令
-            for alias, cmd_type in self.command_aliases.items():
-                if first_word == alias or first_word in alias:
-                    # 剩余部分作为参数
-                    target = " ".join(words[1:]) if len(words) > 1 else None
-                    return ParsedCommand(text, cmd_type, target)
+            # 检查第一个词是否是某个命令别名（的一部分）
+            cmd_type = self._alias_substrings.get(first_word)
+            if cmd_type is not None:
+                # 剩余部分作为参数
+                target = " ".join(words[1:]) if len(words) > 1 else None
+                return ParsedCommand(text, cmd_type, target)
                     
         # 无法识别
         logger.debug(f"无法解析命令: {text}")
@@ -364,13 +574,11 @@ class CommandParser:
         Returns:
             可能的命令列表
         """
-        suggestions = []
         partial_lower = partial.lower()
         
-        # 从别名中查找
-        for alias in self.command_aliases.keys():
-            if alias.startswith(partial_lower):
-                suggestions.append(alias)
+        # 从别名前缀树中查找，按别名定义顺序排列（树里存的是别名的定义序号）
+        matches = sorted(self._alias_trie.items_with_prefix(partial_lower), key=lambda item: item[1])
+        suggestions = [alias for alias, _ in matches]
                 
         # 限制建议数量
         return suggestions[:10]
@@ -8,6 +8,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from .command_trie import PrefixTrie
+
 logger = logging.getLogger("xwe.command_router")
 
 # 尝试导入 NLP 模块（可选）
@@ -69,6 +71,10 @@ class CommandRouter:
             use_nlp: 是否启用 NLP 处理器
         """
         self.routes: List[CommandRoute] = []
+        # 按添加顺序记录 (优先级, 序号, 路由)，元组顺序即匹配先后
+        self._route_entries: List[Tuple[int, int, CommandRoute]] = []
+        # 每个上下文一棵路由前缀树（小写模式 → 路由记录），按需构建
+        self._route_tries: Dict[str, PrefixTrie] = {}
         self.current_context = "exploration"  # 默认探索模式
         self.use_nlp = use_nlp and HAS_NLP  # 只有在模块可用时才启用
         self._nlp_handler: Optional[Callable[[str, dict], Any]] = None
@@ -161,6 +167,36 @@ class CommandRouter:
         # 按优先级排序
         self.routes.sort(key=lambda r: r.priority.value)
 
+        # 增量更新已构建的各上下文前缀树
+        entry = (priority.value, len(self._route_entries), route)
+        self._route_entries.append(entry)
+        for context, trie in self._route_tries.items():
+            if self._route_applies(route, context):
+                self._insert_route(trie, entry)
+
+    @staticmethod
+    def _route_applies(route: CommandRoute, context: str) -> bool:
+        return "*" in route.contexts or context in route.contexts
+
+    @staticmethod
+    def _insert_route(trie: PrefixTrie, entry: Tuple[int, int, CommandRoute]) -> None:
+        """同一模式只保留最先匹配的路由（优先级高、添加早）"""
+        key = entry[2].pattern.lower()
+        current = trie.get(key)
+        if current is None or entry[:2] < current[:2]:
+            trie.insert(key, entry)
+
+    def _route_trie(self, context: str) -> PrefixTrie:
+        """当前上下文可用路由的前缀树"""
+        trie = self._route_tries.get(context)
+        if trie is None:
+            trie = PrefixTrie()
+            for entry in self._route_entries:
+                if self._route_applies(entry[2], context):
+                    self._insert_route(trie, entry)
+            self._route_tries[context] = trie
+        return trie
+
     def set_context(self, context: str) -> None:
         """设置当前上下文"""
         self.current_context = context
@@ -291,19 +327,18 @@ class CommandRouter:
         Returns:
             (命令类型, 参数字典)
         """
-        # 精确匹配路由
-        for route in self.routes:
-            # 检查上下文
-            if "*" not in route.contexts and self.current_context not in route.contexts:
-                continue
-
-            # 检查模式匹配
-            if input_text.lower().startswith(route.pattern.lower()):
-                # 提取参数
-                params = self._extract_params(input_text, route.pattern)
-                params["raw_text"] = input_text
-                logger.debug("传统路由选择处理器 %s，参数 %s", route.handler, params)
-                return route.handler, params
+        # 沿当前上下文的前缀树走一遍输入，所有命中的模式里取最先匹配的路由
+        best = None
+        for _, entry in self._route_trie(self.current_context).prefixes(input_text.lower()):
+            if best is None or entry[:2] < best[:2]:
+                best = entry
+        if best is not None:
+            route = best[2]
+            # 提取参数
+            params = self._extract_params(input_text, route.pattern)
+            params["raw_text"] = input_text
+            logger.debug("传统路由选择处理器 %s，参数 %s", route.handler, params)
+            return route.handler, params
 
         # 默认返回未知命令
         logger.warning("传统路由未找到匹配处理器，返回未知命令")
@@ -0,0 +1,183 @@
+"""
+命令匹配用的编译结构
+
+- ``PrefixTrie``：字符前缀树，一次遍历输入即可找出所有是输入前缀的键，
+  供命令别名、带参数命令模式和路由规则的前缀匹配使用；
+- ``KeywordAutomaton``：Aho–Corasick 多模式匹配自动机，一次扫描输入即可
+  找出所有出现的关键词，供同义词归一化使用。
+
+两者都支持增量添加，匹配耗时只和输入长度有关，不随键的数量增长。
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 节点字典里存放值的键（单个字符永远不会是空串）
+_VALUE = ""
+
+
+class PrefixTrie:
+    """
+    字符前缀树
+
+    每个节点是一个 dict：字符 → 子节点，终止节点在 ``""`` 键下挂值。
+    空串也是合法的键（挂在根节点上），它是任何文本的前缀。
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, items: Iterable[Tuple[str, Any]] = ()):
+        self._root: Dict[str, Any] = {}
+        self._size = 0
+        for key, value in items:
+            self.insert(key, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) is not None
+
+    def _find(self, key: str) -> Optional[Dict[str, Any]]:
+        node = self._root
+        for ch in key:
+            node = node.get(ch)
+            if node is None:
+                return None
+        return node if _VALUE in node else None
+
+    def insert(self, key: str, value: Any) -> None:
+        """插入键，已存在则覆盖其值"""
+        node = self._root
+        for ch in key:
+            child = node.get(ch)
+            if child is None:
+                child = node[ch] = {}
+            node = child
+        if _VALUE not in node:
+            self._size += 1
+        node[_VALUE] = value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        node = self._find(key)
+        return default if node is None else node[_VALUE]
+
+    def prefixes(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """
+        依次产出所有是 ``text`` 前缀的键（由短到长）
+
+        Yields:
+            (键长度, 值)
+        """
+        node = self._root
+        if _VALUE in node:
+            yield 0, node[_VALUE]
+        for i, ch in enumerate(text):
+            node = node.get(ch)
+            if node is None:
+                return
+            if _VALUE in node:
+                yield i + 1, node[_VALUE]
+
+    def longest_prefix(self, text: str) -> Optional[Tuple[int, Any]]:
+        """最长的前缀键，没有则返回 None"""
+        found = None
+        for found in self.prefixes(text):
+            pass
+        return found
+
+    def items_with_prefix(self, prefix: str) -> List[Tuple[str, Any]]:
+        """以 ``prefix`` 开头的全部 (键, 值)"""
+        node = self._root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return []
+        items = []
+        stack = [(prefix, node)]
+        while stack:
+            key, node = stack.pop()
+            for ch, child in node.items():
+                if ch == _VALUE:
+                    items.append((key, child))
+                else:
+                    stack.append((key + ch, child))
+        return items
+
+
+class KeywordAutomaton:
+    """
+    Aho–Corasick 关键词自动机
+
+    同一关键词可以挂多个值。添加关键词后失败指针在下一次扫描前重建。
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._values: List[List[Any]] = [[]]
+        # 沿失败链可达的全部输出（关键词长度, 值），建好后才有效
+        self._outputs: List[List[Tuple[int, Any]]] = [[]]
+        self._lengths: List[int] = [0]
+        self._dirty = False
+        for keyword, value in keywords:
+            self.add(keyword, value)
+
+    def add(self, keyword: str, value: Any) -> None:
+        """添加关键词"""
+        if not keyword:
+            raise ValueError("KeywordAutomaton 不支持空关键词")
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._values.append([])
+                self._outputs.append([])
+                self._lengths.append(self._lengths[state] + 1)
+            state = nxt
+        self._values[state].append(value)
+        self._dirty = True
+
+    def _build(self) -> None:
+        """按层序计算失败指针并合并输出"""
+        goto, fail = self._goto, self._fail
+        self._outputs[0] = []
+        queue = deque()
+        for state in goto[0].values():
+            fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            length = self._lengths[state]
+            self._outputs[state] = [(length, value) for value in self._values[state]]
+            self._outputs[state].extend(self._outputs[fail[state]])
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                queue.append(nxt)
+        self._dirty = False
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """
+        扫描文本，产出全部关键词出现位置
+
+        Yields:
+            (起始下标, 结束下标, 值)
+        """
+        if self._dirty:
+            self._build()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, value in outputs[state]:
+                yield i + 1 - length, i + 1, value
@@ -8,9 +8,12 @@
 from .compressor import ContextCompressor
 from .memory_block import MemoryBlock
 from .summarizer import ContextSummarizer
+from .token_counter import TokenCounter, create_token_counter
 
 __all__ = [
     "ContextCompressor",
     "MemoryBlock", 
-    "ContextSummarizer"
+    "ContextSummarizer",
+    "TokenCounter",
+    "create_token_counter"
 ]
@@ -1,23 +1,61 @@
 """
 上下文压缩器核心实现
 使用滑动窗口和 LLM 摘要技术管理对话上下文
+
+摘要生成需要调用 LLM，默认在后台工作线程中完成：``append`` 立即返回，
+摘要落地之前 ``get_context`` 直接提供尚未压缩的原始消息。
+
+每条消息的 token 数和重要性只在加入时计算一次，各队列维护 token 运行总数，
+压缩触发判断和统计都是 O(1)。
 """
 
+import heapq
 import logging
+import os
+import threading
 import time
+from bisect import bisect_left
 from collections import deque
-from typing import List, Optional, Deque, Dict, Any
-import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Deque, Dict, Any, Tuple
 
 from .memory_block import MemoryBlock
 from .summarizer import ContextSummarizer
+from .token_counter import TokenCounterSpec, create_token_counter
 from typing import TYPE_CHECKING
 
+# 导入 Prometheus 指标收集器
+try:
+    from ...metrics.prometheus_metrics import get_metrics_collector
+    PROMETHEUS_ENABLED = True
+except ImportError:  # pragma: no cover - 可选依赖
+    PROMETHEUS_ENABLED = False
+
 if TYPE_CHECKING:
     from ..nlp.llm_client import LLMClient
 
 logger = logging.getLogger(__name__)
 
+# get_context 使用的分节标题
+_SECTION_HEADERS = ("=== 历史记忆 ===", "=== 待整理对话 ===", "=== 最近对话 ===")
+
+# 所有压缩器共用的后台工作线程池
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """懒加载共享的压缩线程池，线程数由 XWE_CONTEXT_COMPRESSION_WORKERS 控制"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = max(1, int(os.getenv("XWE_CONTEXT_COMPRESSION_WORKERS", "2")))
+                _executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="context-compress"
+                )
+    return _executor
+
 
 class ContextCompressor:
     """
@@ -35,7 +73,10 @@ class ContextCompressor:
                  window_size: int = 20,
                  block_size: int = 30,
                  max_memory_blocks: int = 10,
-                 enable_compression: bool = True):
+                 enable_compression: bool = True,
+                 background: bool = True,
+                 token_counter: TokenCounterSpec = None,
+                 max_context_tokens: Optional[int] = None):
         """
         初始化压缩器
         
@@ -45,6 +86,9 @@ class ContextCompressor:
             block_size: 触发压缩的消息数量阈值
             max_memory_blocks: 最大记忆块数量
             enable_compression: 是否启用压缩（用于测试）
+            background: 是否在后台线程中生成摘要；False 时在 ``append`` 中同步完成
+            token_counter: token 计数器或其描述（见 ``create_token_counter``），默认启发式估算
+            max_context_tokens: ``get_context`` 的默认 token 预算，None 表示不限制
         """
         if llm_client is None:
             from ..nlp.llm_client import LLMClient
@@ -54,6 +98,11 @@ class ContextCompressor:
         self.block_size = block_size
         self.max_memory_blocks = max_memory_blocks
         self.enable_compression = enable_compression
+        self.background = background
+        self.max_context_tokens = max_context_tokens
+        self.token_counter = create_token_counter(token_counter)
+        # 各分节标题的 token 数，按预算组装时预留
+        self._header_tokens = tuple(self._estimate_tokens(h) + 1 for h in _SECTION_HEADERS)
         
         # 初始化组件
         self.llm_client = llm_client
@@ -63,14 +112,32 @@ class ContextCompressor:
         self.recent_messages: Deque[str] = deque(maxlen=window_size)
         self.pending_messages: List[str] = []
         self.memory_blocks: Deque[MemoryBlock] = deque(maxlen=max_memory_blocks)
+
+        # 与 recent_messages / pending_messages 一一对应的 (token 数, 重要性)
+        self._recent_meta: Deque[Tuple[int, float]] = deque(maxlen=window_size)
+        self._pending_meta: List[Tuple[int, float]] = []
+        # 各队列的 token 运行总数
+        self._recent_tokens = 0
+        self._pending_tokens = 0
+        self._memory_tokens = 0
         
         # 统计信息
         self.stats = {
             "total_messages": 0,
             "total_compressions": 0,
             "total_tokens_saved": 0,
-            "compression_errors": 0
+            "compression_errors": 0,
+            "budget_evictions": 0
         }
+
+        # 后台压缩状态：同一压缩器同时最多一个任务，完成后按需接着排下一个，
+        # 因此重复触发会被合并，且记忆块按消息顺序生成
+        self._lock = threading.RLock()
+        self._job_scheduled = False
+        self._idle = threading.Event()
+        self._idle.set()
+        # clear() 时递增，丢弃清空前已开始的任务结果
+        self._generation = 0
         
         logger.info(
             f"ContextCompressor 初始化: "
@@ -93,18 +160,35 @@ class ContextCompressor:
         """
         if not message:
             return
+
+        # token 数和重要性只在这里计算一次
+        meta = (
+            self._estimate_tokens(message),
+            self.summarizer.calculate_importance([message]),
+        )
         
-        # 更新统计
-        self.stats["total_messages"] += 1
-        
-        # 添加到最近消息队列
-        self.recent_messages.append(message)
-        
-        # 添加到待压缩队列
-        self.pending_messages.append(message)
-        
-        # 检查是否需要压缩
-        if self.enable_compression and self._should_compress():
+        with self._lock:
+            # 更新统计
+            self.stats["total_messages"] += 1
+            
+            # 添加到最近消息队列（窗口已满时先扣除即将滑出的消息）
+            if self._recent_meta and len(self._recent_meta) == self._recent_meta.maxlen:
+                self._recent_tokens -= self._recent_meta[0][0]
+            self.recent_messages.append(message)
+            self._recent_meta.append(meta)
+            self._recent_tokens += meta[0]
+            
+            # 添加到待压缩队列
+            self.pending_messages.append(message)
+            self._pending_meta.append(meta)
+            self._pending_tokens += meta[0]
+            
+            # 检查是否需要压缩
+            should_compress = self.enable_compression and self._should_compress()
+            if should_compress and self.background:
+                self._schedule_compression()
+
+        if should_compress and not self.background:
             self._compress_old_messages()
         
         logger.debug(
@@ -113,37 +197,137 @@ class ContextCompressor:
             f"最近: {len(self.recent_messages)}"
         )
     
-    def get_context(self) -> str:
+    def get_context(self, max_tokens: Optional[int] = None) -> str:
         """
         获取压缩后的完整上下文
+
+        超出 token 预算时，按重要性从低到高（同分先旧后新）剔除记忆块和消息，
+        最新的一条消息始终保留。
         
+        Args:
+            max_tokens: token 预算，默认使用 ``max_context_tokens``；None 表示不限制
+
         Returns:
             格式化的上下文字符串
         """
+        budget = max_tokens if max_tokens is not None else self.max_context_tokens
+
+        with self._lock:
+            memory_blocks = list(self.memory_blocks)
+            recent_messages = list(self.recent_messages)
+            recent_meta = list(self._recent_meta)
+            # 已滑出窗口但摘要尚未生成的消息（recent_messages 总是 pending_messages 的尾部）
+            unsummarized_count = max(0, len(self.pending_messages) - len(recent_messages))
+            unsummarized = self.pending_messages[:unsummarized_count]
+            unsummarized_meta = self._pending_meta[:unsummarized_count]
+            estimated_tokens = self._memory_tokens + self._recent_tokens
+            if unsummarized_count:
+                estimated_tokens += self._pending_tokens - self._recent_tokens
+
+        # 按显示顺序排列的 (token 数, 重要性)
+        items = (
+            [(block.token_estimate, block.importance_score) for block in memory_blocks]
+            + unsummarized_meta
+            + recent_meta
+        )
+        kept: Optional[set] = None
+
+        if budget is None:
+            if estimated_tokens > 3500:  # 留出余量
+                logger.warning(f"上下文可能过长: {estimated_tokens} tokens")
+        else:
+            # 预留分节标题，每条再计 1 个 token 抵消换行和逐条取整的误差
+            sections = (memory_blocks, unsummarized, recent_messages)
+            reserve = sum(t for t, section in zip(self._header_tokens, sections) if section)
+            if items and estimated_tokens + len(items) > budget - reserve:
+                order = self._retention_order(items, budget - reserve)
+                keep_count = len(order)
+                kept = set(order)
+
+        full_context = self._render_context(memory_blocks, unsummarized, recent_messages, kept)
+
+        # 估算按条累加，与整段计数（标题、换行）会有出入；预算是硬上限，必要时继续剔除
+        if kept is not None:
+            while keep_count > 1:
+                excess = self._estimate_tokens(full_context) - budget
+                if excess <= 0:
+                    break
+                while excess > 0 and keep_count > 1:
+                    keep_count -= 1
+                    excess -= max(1, items[order[keep_count]][0])
+                kept = set(order[:keep_count])
+                full_context = self._render_context(memory_blocks, unsummarized, recent_messages, kept)
+
+            evicted = len(items) - len(kept)
+            with self._lock:
+                self.stats["budget_evictions"] += evicted
+            logger.debug(f"上下文超出预算 {budget} tokens，剔除了 {evicted} 项")
+
+        return full_context
+
+    @staticmethod
+    def _retention_order(items: List[Tuple[int, float]], budget: int) -> List[int]:
+        """
+        按保留优先级从高到低选出总 token 数不超过预算的条目下标
+
+        最新一条消息排在最前（始终保留），其余按重要性降序，同分时新的在前。
+        只从堆中取出实际保留的条目，积压很多时不必对全部条目排序。
+        """
+        newest = len(items) - 1
+        order = [newest]
+        used = items[newest][0] + 1
+        heap = [(-items[i][1], -i) for i in range(newest)]
+        heapq.heapify(heap)
+        while heap:
+            _, neg_index = heapq.heappop(heap)
+            used += items[-neg_index][0] + 1
+            if used > budget:
+                break
+            order.append(-neg_index)
+        return order
+
+    @staticmethod
+    def _render_context(memory_blocks: List[MemoryBlock], unsummarized: List[str],
+                        recent_messages: List[str], kept: Optional[set] = None) -> str:
+        """
+        按固定格式拼接上下文
+
+        Args:
+            kept: 要保留的条目下标（按显示顺序统一编号），None 表示全部保留
+        """
         context_parts = []
-        
+        ordered = None if kept is None else sorted(kept)
+
+        def select(entries, offset):
+            if ordered is None:
+                return entries
+            lo = bisect_left(ordered, offset)
+            hi = bisect_left(ordered, offset + len(entries))
+            return [entries[i - offset] for i in ordered[lo:hi]]
+
         # 1. 添加记忆块摘要
-        if self.memory_blocks:
-            context_parts.append("=== 历史记忆 ===")
-            for i, block in enumerate(self.memory_blocks):
+        blocks = select(memory_blocks, 0)
+        if blocks:
+            context_parts.append(_SECTION_HEADERS[0])
+            for i, block in enumerate(blocks):
                 context_parts.append(f"[记忆{i+1}] {block.summary}")
             context_parts.append("")
+
+        # 2. 摘要落地前，直接提供未压缩的原始消息
+        pending = select(unsummarized, len(memory_blocks))
+        if pending:
+            context_parts.append(_SECTION_HEADERS[1])
+            context_parts.extend(pending)
+            context_parts.append("")
         
-        # 2. 添加最近的对话
-        if self.recent_messages:
-            context_parts.append("=== 最近对话 ===")
-            context_parts.extend(list(self.recent_messages))
-        
-        # 3. 组合上下文
-        full_context = "\n".join(context_parts)
-        
-        # 4. Token 限制检查
-        estimated_tokens = self._estimate_tokens(full_context)
-        if estimated_tokens > 3500:  # 留出余量
-            logger.warning(f"上下文可能过长: {estimated_tokens} tokens")
-            # 可以在这里进一步压缩
+        # 3. 添加最近的对话
+        recent = select(recent_messages, len(memory_blocks) + len(unsummarized))
+        if recent:
+            context_parts.append(_SECTION_HEADERS[2])
+            context_parts.extend(recent)
         
-        return full_context
+        # 4. 组合上下文
+        return "\n".join(context_parts)
     
     def _should_compress(self) -> bool:
         """
@@ -163,18 +347,72 @@ class ContextCompressor:
         
         return False
     
-    def _compress_old_messages(self) -> None:
+    def _schedule_compression(self) -> None:
         """
-        压缩旧消息为摘要
+        提交后台压缩任务（调用方需持有 ``self._lock``）
+
+        已有任务在排队或执行时直接返回，由该任务结束时决定是否继续压缩。
         """
-        if not self.pending_messages:
+        if self._job_scheduled:
             return
-        
+        self._job_scheduled = True
+        self._idle.clear()
         try:
-            start_time = time.time()
-            
+            _get_executor().submit(self._run_compression_job, time.monotonic())
+        except RuntimeError as e:
+            # 解释器退出时线程池已关闭
+            logger.warning(f"提交后台压缩任务失败: {e}")
+            self._job_scheduled = False
+            self._idle.set()
+
+    def _run_compression_job(self, queued_at: float) -> None:
+        """后台任务：压缩一批消息，积压仍超过阈值时接着排下一批"""
+        queue_wait = time.monotonic() - queued_at
+        try:
+            self._compress_old_messages(queue_wait=queue_wait)
+        finally:
+            with self._lock:
+                self._job_scheduled = False
+                if self.enable_compression and len(self.pending_messages) >= self.block_size:
+                    self._schedule_compression()
+                if not self._job_scheduled:
+                    self._idle.set()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待后台压缩全部完成
+
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            是否已经空闲
+        """
+        return self._idle.wait(timeout)
+
+    @property
+    def compression_in_progress(self) -> bool:
+        """是否有后台压缩任务在排队或执行"""
+        return not self._idle.is_set()
+    
+    def _compress_old_messages(self, queue_wait: Optional[float] = None) -> None:
+        """
+        压缩旧消息为摘要
+
+        摘要生成期间不持有锁，新消息可以继续追加；完成后只移除本批消息。
+
+        Args:
+            queue_wait: 后台任务的排队时间（秒），同步压缩时为 None
+        """
+        with self._lock:
+            if not self.pending_messages:
+                return
             # 获取要压缩的消息
             messages_to_compress = self.pending_messages[:self.block_size]
+            generation = self._generation
+        
+        try:
+            start_time = time.time()
             
             # 生成摘要
             summary = self.summarizer.summarize(
@@ -194,73 +432,87 @@ class ContextCompressor:
             memory_block = MemoryBlock(
                 summary=summary,
                 message_count=len(messages_to_compress),
+                token_estimate=self._estimate_tokens(summary),
                 importance_score=importance,
                 original_messages=messages_to_compress if logger.isEnabledFor(logging.DEBUG) else None
             )
             
-            # 添加到记忆块队列
-            self.memory_blocks.append(memory_block)
-            
-            # 清理已压缩的消息
-            self.pending_messages = self.pending_messages[self.block_size:]
-            
-            # 更新统计
             elapsed = time.time() - start_time
-            self.stats["total_compressions"] += 1
-            tokens_before = sum(self._estimate_tokens(m) for m in messages_to_compress)
-            tokens_after = self._estimate_tokens(summary)
-            self.stats["total_tokens_saved"] += (tokens_before - tokens_after)
+            tokens_after = memory_block.token_estimate
+
+            with self._lock:
+                if generation != self._generation:
+                    logger.debug("上下文已清空，丢弃过期的压缩结果")
+                    return
+
+                # 添加到记忆块队列
+                self._add_memory_block(memory_block)
+
+                # 清理已压缩的消息
+                tokens_before = self._drop_pending(len(messages_to_compress))
+
+                # 更新统计
+                self.stats["total_compressions"] += 1
+                self.stats["total_tokens_saved"] += (tokens_before - tokens_after)
+                memory_blocks = len(self.memory_blocks)
             
             logger.info(
                 f"压缩完成: {len(messages_to_compress)}条消息 -> "
                 f"{len(summary)}字符, 耗时{elapsed:.2f}秒, "
                 f"节省{tokens_before - tokens_after} tokens"
             )
+
+            if PROMETHEUS_ENABLED:
+                get_metrics_collector().record_context_compression(
+                    memory_blocks=memory_blocks,
+                    compression_ratio=self._calculate_compression_ratio(),
+                    duration=elapsed,
+                    queue_wait=queue_wait,
+                )
             
         except Exception as e:
             logger.error(f"压缩失败: {e}")
-            self.stats["compression_errors"] += 1
-            # 失败时清理部分消息避免无限增长
-            if len(self.pending_messages) > self.block_size * 2:
-                self.pending_messages = self.pending_messages[self.block_size:]
+            with self._lock:
+                self.stats["compression_errors"] += 1
+                # 失败时清理部分消息避免无限增长
+                if len(self.pending_messages) > self.block_size * 2:
+                    self._drop_pending(self.block_size)
+
+    def _drop_pending(self, count: int) -> int:
+        """从待压缩队列头部移除 ``count`` 条消息（调用方需持有锁），返回移除的 token 数"""
+        removed = sum(tokens for tokens, _ in self._pending_meta[:count])
+        del self.pending_messages[:count]
+        del self._pending_meta[:count]
+        self._pending_tokens -= removed
+        return removed
+
+    def _add_memory_block(self, block: MemoryBlock) -> None:
+        """添加记忆块（调用方需持有锁），队列已满时扣除被挤出的旧块"""
+        if self.memory_blocks.maxlen and len(self.memory_blocks) == self.memory_blocks.maxlen:
+            self._memory_tokens -= self.memory_blocks[0].token_estimate
+        self.memory_blocks.append(block)
+        self._memory_tokens += block.token_estimate
     
     def _estimate_tokens(self, text: str) -> int:
         """
-        估算文本的 token 数量
+        计算文本的 token 数量
         
         Args:
             text: 输入文本
             
         Returns:
-            估算的 token 数
+            token 数（由 ``token_counter`` 给出）
         """
-        # 简单估算：中文约 2 字符/token，英文约 4 字符/token
-        chinese_chars = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
-        other_chars = len(text) - chinese_chars
-        return chinese_chars // 2 + other_chars // 4
+        return self.token_counter.count(text)
     
     def _estimate_total_tokens(self) -> int:
         """
-        估算当前总 token 数
+        当前总 token 数（记忆块、最近消息和待压缩消息的运行总数之和）
         
         Returns:
             总 token 数估算
         """
-        total = 0
-        
-        # 记忆块的 tokens
-        for block in self.memory_blocks:
-            total += block.token_estimate
-        
-        # 最近消息的 tokens
-        for msg in self.recent_messages:
-            total += self._estimate_tokens(msg)
-        
-        # 待压缩消息的 tokens
-        for msg in self.pending_messages:
-            total += self._estimate_tokens(msg)
-        
-        return total
+        return self._memory_tokens + self._recent_tokens + self._pending_tokens
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -271,6 +523,7 @@ class ContextCompressor:
         """
         return {
             **self.stats,
+            "compression_in_progress": self.compression_in_progress,
             "current_memory_blocks": len(self.memory_blocks),
             "current_recent_messages": len(self.recent_messages),
             "current_pending_messages": len(self.pending_messages),
@@ -299,9 +552,14 @@ class ContextCompressor:
         """
         清空所有上下文
         """
-        self.recent_messages.clear()
-        self.pending_messages.clear()
-        self.memory_blocks.clear()
+        with self._lock:
+            self._generation += 1
+            self.recent_messages.clear()
+            self.pending_messages.clear()
+            self.memory_blocks.clear()
+            self._recent_meta.clear()
+            self._pending_meta.clear()
+            self._recent_tokens = self._pending_tokens = self._memory_tokens = 0
         logger.info("上下文已清空")
     
     def export_memory(self) -> List[Dict[str, Any]]:
@@ -320,15 +578,17 @@ class ContextCompressor:
         Args:
             memory_data: 记忆数据列表
         """
-        self.memory_blocks.clear()
-        for data in memory_data:
-            block = MemoryBlock(
-                summary=data["summary"],
-                message_count=data["message_count"],
-                created_at=data.get("created_at", time.time()),
-                token_estimate=data.get("token_estimate", 0),
-                importance_score=data.get("importance_score", 0.5)
-            )
-            self.memory_blocks.append(block)
+        with self._lock:
+            self.memory_blocks.clear()
+            self._memory_tokens = 0
+            for data in memory_data:
+                block = MemoryBlock(
+                    summary=data["summary"],
+                    message_count=data["message_count"],
+                    created_at=data.get("created_at", time.time()),
+                    token_estimate=data.get("token_estimate", 0),
+                    importance_score=data.get("importance_score", 0.5)
+                )
+                self._add_memory_block(block)
         
         logger.info(f"导入了 {len(memory_data)} 个记忆块")
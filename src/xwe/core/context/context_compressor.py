@@ -9,6 +9,8 @@ import time
 from typing import List, Dict, Any, Optional
 from collections import deque
 
+from .token_counter import TokenCounterSpec, create_token_counter
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +27,7 @@ class ContextCompressor:
                  preserve_recent: int = 10,
                  strategy: str = 'hybrid',
                  window_size: int = 20,
+                 token_counter: TokenCounterSpec = None,
                  **kwargs):
         """
         初始化压缩器
@@ -35,15 +38,20 @@ class ContextCompressor:
             preserve_recent: 保留最近的消息数
             strategy: 压缩策略 ('sliding_window', 'importance_based', 'hybrid')
             window_size: 滑动窗口大小
+            token_counter: token 计数器（见 ``create_token_counter``），默认按字符数估算
         """
         self.max_tokens = max_tokens
         self.compression_ratio = compression_ratio
         self.preserve_recent = preserve_recent
         self.strategy = strategy
         self.window_size = window_size
+        self.token_counter = create_token_counter(token_counter) if token_counter is not None else None
         
         # 内部状态
         self._message_buffer = deque(maxlen=window_size)
+        # 与 _message_buffer 一一对应的 token 数及其运行总数
+        self._buffer_tokens = deque(maxlen=window_size)
+        self._buffer_token_total = 0
         self._importance_scores = {}
         
         # 统计信息
@@ -280,11 +288,22 @@ class ContextCompressor:
 
         return deduplicated
     
+    def _count_text(self, text: str) -> int:
+        """计算单段文本的 token 数"""
+        if self.token_counter is not None:
+            return self.token_counter.count(text)
+        # 简单估算：平均每个字符约0.5个token（中文）
+        return int(len(text) * 0.5)
+
     def _estimate_tokens(self, messages: Any) -> int:
         """估算token数量"""
-        # 简单估算：平均每个字符约0.5个token（中文）
         if isinstance(messages, str):
-            return int(len(messages) * 0.5)
+            return self._count_text(messages)
+        elif isinstance(messages, list) and self.token_counter is not None:
+            return sum(
+                self._count_text(msg if isinstance(msg, str) else msg.get('content', ''))
+                for msg in messages
+            )
         elif isinstance(messages, list):
             if messages and isinstance(messages[0], str):
                 # 字符串列表
@@ -298,15 +317,26 @@ class ContextCompressor:
     def clear(self) -> None:
         """清空上下文"""
         self._message_buffer.clear()
+        self._buffer_tokens.clear()
+        self._buffer_token_total = 0
         self._importance_scores.clear()
         logger.info("上下文已清空")
     
     def append(self, message: str) -> None:
         """添加消息到上下文"""
         if message:
-            self._message_buffer.append(message)
+            self._buffer_append(message)
             logger.debug(f"消息已添加到上下文: {message[:50]}...")
     
+    def _buffer_append(self, message: str) -> None:
+        """加入缓冲区，token 数只计算一次并累加到运行总数"""
+        if self._buffer_tokens and len(self._buffer_tokens) == self._buffer_tokens.maxlen:
+            self._buffer_token_total -= self._buffer_tokens[0]
+        tokens = self._count_text(message)
+        self._message_buffer.append(message)
+        self._buffer_tokens.append(tokens)
+        self._buffer_token_total += tokens
+
     def get_context(self) -> str:
         """获取当前上下文"""
         messages = list(self._message_buffer)
@@ -330,7 +360,7 @@ class ContextCompressor:
         stats = dict(self.stats)
         stats.update({
             "buffer_size": len(self._message_buffer),
-            "estimated_total_tokens": self._estimate_tokens(list(self._message_buffer)),
+            "estimated_total_tokens": self._buffer_token_total,
             "compression_enabled": True
         })
         return stats
@@ -345,7 +375,9 @@ class ContextCompressor:
     def import_memory(self, memory_data: List[Dict[str, Any]]) -> None:
         """导入记忆数据"""
         self._message_buffer.clear()
+        self._buffer_tokens.clear()
+        self._buffer_token_total = 0
         for item in memory_data:
             if isinstance(item, dict) and "content" in item:
-                self._message_buffer.append(item["content"])
+                self._buffer_append(item["content"])
         logger.info(f"导入了 {len(memory_data)} 条记忆")
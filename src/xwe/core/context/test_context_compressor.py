@@ -23,12 +23,13 @@ class TestContextCompressor:
     
     @pytest.fixture
     def compressor(self, mock_llm_client):
-        """创建测试用的压缩器实例"""
+        """创建测试用的压缩器实例（同步压缩，便于断言）"""
         return ContextCompressor(
             llm_client=mock_llm_client,
             window_size=5,
             block_size=3,
-            max_memory_blocks=2
+            max_memory_blocks=2,
+            background=False
         )
     
     def test_initialization(self, compressor):
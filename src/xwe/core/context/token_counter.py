@@ -0,0 +1,147 @@
+"""
+Token 计数器
+
+上下文压缩器在消息加入时只计数一次，并维护运行总数，因此计数器本身
+只需要关心单段文本。默认使用字符启发式估算；安装了本地分词器时可以
+换成精确计数：
+
+- ``tiktoken``：``create_token_counter("tiktoken")`` 或 ``"tiktoken:cl100k_base"``；
+- HuggingFace ``tokenizers``：``create_token_counter("hf:/path/to/tokenizer.json")``；
+- 任意可调用对象：``create_token_counter(len)``。
+
+默认计数器可通过环境变量 ``XWE_CONTEXT_TOKENIZER`` 指定，取值同上。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Callable, Union
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:  # pragma: no cover - 可选依赖
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    from tokenizers import Tokenizer as _HFTokenizer
+    HF_TOKENIZERS_AVAILABLE = True
+except ImportError:  # pragma: no cover - 可选依赖
+    _HFTokenizer = None
+    HF_TOKENIZERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 匹配连续的非中文字符，删除后剩下的长度即中文字符数
+_NON_CJK_RUNS = re.compile(r"[^一-鿿]+")
+
+
+class TokenCounter(ABC):
+    """Token 计数器基类"""
+
+    name = "base"
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """计算一段文本的 token 数"""
+
+    def __call__(self, text: str) -> int:
+        return self.count(text)
+
+
+class HeuristicTokenCounter(TokenCounter):
+    """字符启发式估算：中文约 2 字符/token，其他约 4 字符/token"""
+
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if text.isascii():
+            return len(text) // 4
+        # 用正则整段删除非中文字符，避免逐字符的 Python 循环
+        chinese_chars = len(_NON_CJK_RUNS.sub("", text))
+        other_chars = len(text) - chinese_chars
+        return chinese_chars // 2 + other_chars // 4
+
+
+class TiktokenCounter(TokenCounter):
+    """基于 tiktoken 的精确计数"""
+
+    name = "tiktoken"
+
+    def __init__(self, encoding: str = "cl100k_base") -> None:
+        if not TIKTOKEN_AVAILABLE:
+            raise ImportError("The 'tiktoken' package is required for TiktokenCounter")
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class HFTokenizerCounter(TokenCounter):
+    """基于本地 HuggingFace tokenizer.json 的精确计数"""
+
+    name = "hf"
+
+    def __init__(self, path: str) -> None:
+        if not HF_TOKENIZERS_AVAILABLE:
+            raise ImportError("The 'tokenizers' package is required for HFTokenizerCounter")
+        self._tokenizer = _HFTokenizer.from_file(path)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+class CallableTokenCounter(TokenCounter):
+    """把任意 ``str -> int`` 函数包装成计数器"""
+
+    name = "callable"
+
+    def __init__(self, func: Callable[[str], int]) -> None:
+        self._func = func
+
+    def count(self, text: str) -> int:
+        return int(self._func(text)) if text else 0
+
+
+TokenCounterSpec = Union[None, str, TokenCounter, Callable[[str], int]]
+
+
+def create_token_counter(spec: TokenCounterSpec = None) -> TokenCounter:
+    """
+    创建 token 计数器
+
+    Args:
+        spec: 计数器实例、可调用对象，或字符串 ``"heuristic"``、``"tiktoken[:encoding]"``、
+            ``"hf:<tokenizer.json 路径>"``；None 时读取 ``XWE_CONTEXT_TOKENIZER``
+
+    Returns:
+        计数器实例；指定的分词器不可用时退回启发式估算
+    """
+    if isinstance(spec, TokenCounter):
+        return spec
+    if callable(spec):
+        return CallableTokenCounter(spec)
+
+    spec = spec or os.getenv("XWE_CONTEXT_TOKENIZER", "heuristic")
+    kind, _, arg = spec.partition(":")
+    try:
+        if kind == "tiktoken":
+            return TiktokenCounter(arg or "cl100k_base")
+        if kind == "hf":
+            return HFTokenizerCounter(arg)
+        if kind != "heuristic":
+            logger.warning(f"未知的 token 计数器: {spec}，使用启发式估算")
+    except Exception as e:
+        logger.warning(f"加载 token 计数器 {spec} 失败: {e}，使用启发式估算")
+    return HeuristicTokenCounter()
+
@@ -0,0 +1,257 @@
+"""
+离线/挂机修炼快进
+
+玩家离线一段时间后回来，逐步重放每次修炼（每步 ``step_hours`` 小时）的代价与离线
+时长成正比。这里把整段时间按"事件"切成若干段：状态效果到期会改变修炼速度，修为
+达到当前境界瓶颈后停止增长；每段内每步的经验、资源恢复量都不变，可以直接用乘法
+算出，总耗时只与状态效果个数有关，与步数无关。
+
+``step_through`` 是逐步模拟的参考实现，``fast_forward`` 与它的结果完全一致。
+"""
+
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .cultivation_system import CultivationSystem
+
+# 资源名 → (当前值属性, 上限属性)
+RESOURCES = {
+    "health": ("current_health", "max_health"),
+    "mana": ("current_mana", "max_mana"),
+    "stamina": ("current_stamina", "max_stamina"),
+}
+
+
+@dataclass
+class IdleSettings:
+    """挂机修炼参数"""
+
+    step_hours: float = 2.0  # 每步修炼时长，与 TimeSystem 的 cultivate_basic 一致
+    location_bonus: float = 1.0  # 地点加成
+    # 每小时恢复的比例（相对上限），每步恢复量取整
+    regen_rates: Dict[str, float] = field(
+        default_factory=lambda: {"health": 0.05, "mana": 0.1, "stamina": 0.1}
+    )
+    seconds_per_hour: float = 3600.0  # 状态效果时长（秒）与游戏小时的换算
+    cultivate: bool = True  # 是否积累修为，否则只恢复资源
+
+
+@dataclass
+class FastForwardResult:
+    """快进结果"""
+
+    hours: float  # 实际推进的小时数（整步）
+    steps: int
+    remaining_hours: float  # 不足一步、未推进的时长
+    exp_gained: float
+    bottleneck_exp: float
+    can_breakthrough: bool  # 是否已到瓶颈、可以尝试突破
+    breakthrough_ready_at: Optional[float]  # 从起点算起第几小时到达瓶颈，None 表示未到达
+    regenerated: Dict[str, float]
+    expired_effects: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _Plan:
+    """一次快进的不变量"""
+
+    steps: int
+    remaining_hours: float
+    start_time: float
+    step_seconds: float
+    # 效果ID → 从第几步开始失效（永久效果不在其中）
+    expiry_steps: Dict[str, int]
+    regen: Dict[str, float]
+
+
+class CultivationFastForward:
+    """
+    挂机修炼快进引擎
+
+    每一步依次：若修为未到瓶颈则获得一步修为（速度受当时生效的状态效果
+    ``cultivation_speed`` 修正影响），然后各项资源按恢复量回升、不超过上限。
+    突破有随机性且消耗资源，仍由玩家主动发起，快进只报告何时到达瓶颈。
+    """
+
+    def __init__(
+        self,
+        cultivation_system: Optional[CultivationSystem] = None,
+        settings: Optional[IdleSettings] = None,
+    ):
+        self.cultivation_system = cultivation_system or CultivationSystem()
+        self.settings = settings or IdleSettings()
+
+    # ------------------------------------------------------------------
+    # 公共部分
+    # ------------------------------------------------------------------
+
+    def _plan(self, character: Any, hours: float, start_time: Optional[float]) -> _Plan:
+        settings = self.settings
+        steps = max(0, int(hours // settings.step_hours))
+        start_time = time.time() if start_time is None else start_time
+        step_seconds = settings.step_hours * settings.seconds_per_hour
+
+        expiry_steps = {}
+        for effect_id, effect in character.status_effects.effects.items():
+            if effect.duration >= 0:
+                expiry_steps[effect_id] = self._expiry_step(effect, start_time, step_seconds)
+
+        attrs = character.attributes
+        regen = {
+            name: float(max(0, int(getattr(attrs, max_attr) * rate * settings.step_hours)))
+            for name, (_, max_attr) in RESOURCES.items()
+            for rate in [settings.regen_rates.get(name, 0)]
+        }
+        return _Plan(steps, hours - steps * settings.step_hours, start_time, step_seconds, expiry_steps, regen)
+
+    @staticmethod
+    def _expired(effect: Any, now: float) -> bool:
+        # 与 StatusEffect.is_expired 相同的判定，只是时间点由参数给出
+        return now - effect.start_time >= effect.duration
+
+    def _expiry_step(self, effect: Any, start_time: float, step_seconds: float) -> int:
+        """第一个开始时效果已过期的步序号"""
+        estimate = (effect.start_time + effect.duration - start_time) / step_seconds
+        step = max(0, int(estimate))
+        # 浮点估算可能差一步，按逐步模拟的判定式校正
+        while step > 0 and self._expired(effect, start_time + (step - 1) * step_seconds):
+            step -= 1
+        while not self._expired(effect, start_time + step * step_seconds):
+            step += 1
+        return step
+
+    def _step_exp(self, character: Any, plan: _Plan, step: int) -> int:
+        """第 step 步获得的修为"""
+        speed = 1.0
+        for effect_id, effect in character.status_effects.effects.items():
+            bonus = effect.modifiers.get("cultivation_speed")
+            if bonus and plan.expiry_steps.get(effect_id, step + 1) > step:
+                speed += bonus * effect.stack_count
+        return self.cultivation_system.calculate_cultivation_exp(
+            character, self.settings.step_hours, self.settings.location_bonus * speed
+        )
+
+    def _finish(
+        self,
+        character: Any,
+        plan: _Plan,
+        exp: float,
+        need: float,
+        ready_step: Optional[int],
+        resources: Dict[str, float],
+        apply: bool,
+    ) -> FastForwardResult:
+        attrs = character.attributes
+        end_time = plan.start_time + plan.steps * plan.step_seconds
+        expired = [
+            effect_id
+            for effect_id, effect in character.status_effects.effects.items()
+            if effect.duration >= 0 and self._expired(effect, end_time)
+        ]
+        result = FastForwardResult(
+            hours=plan.steps * self.settings.step_hours,
+            steps=plan.steps,
+            remaining_hours=plan.remaining_hours,
+            exp_gained=exp - attrs.cultivation_exp,
+            bottleneck_exp=need,
+            can_breakthrough=exp >= need,
+            breakthrough_ready_at=None if ready_step is None else ready_step * self.settings.step_hours,
+            regenerated={
+                name: resources[name] - getattr(attrs, current_attr)
+                for name, (current_attr, _) in RESOURCES.items()
+            },
+            expired_effects=expired,
+        )
+        if apply:
+            attrs.cultivation_exp = exp
+            if need > 0:
+                attrs.realm_progress = min(100.0, exp / need * 100)
+            for name, (current_attr, _) in RESOURCES.items():
+                setattr(attrs, current_attr, resources[name])
+            for effect_id in expired:
+                character.status_effects.remove_effect(effect_id)
+        return result
+
+    # ------------------------------------------------------------------
+    # 快进
+    # ------------------------------------------------------------------
+
+    def fast_forward(
+        self,
+        character: Any,
+        hours: float,
+        start_time: Optional[float] = None,
+        apply: bool = True,
+    ) -> FastForwardResult:
+        """
+        一次算出挂机 hours 小时的结果
+
+        Args:
+            character: 角色
+            hours: 挂机时长（游戏小时），不足一步的部分不推进，见 remaining_hours
+            start_time: 挂机开始的时间戳，用于判定状态效果何时到期，默认当前时间
+            apply: 是否把结果写回角色
+
+        Returns:
+            快进结果
+        """
+        plan = self._plan(character, hours, start_time)
+        attrs = character.attributes
+        exp = attrs.cultivation_exp
+        need = self.cultivation_system.get_bottleneck_exp(character)
+        ready_step = 0 if exp >= need else None
+
+        if self.settings.cultivate:
+            # 状态效果到期的步把时间轴切成若干段，段内每步修为相同
+            bounds = sorted({step for step in plan.expiry_steps.values() if 0 < step < plan.steps})
+            segment_start = 0
+            for segment_end in bounds + [plan.steps]:
+                if exp >= need:
+                    break
+                per_step = self._step_exp(character, plan, segment_start)
+                if per_step > 0:
+                    taken = min(segment_end - segment_start, -((exp - need) // per_step))
+                    exp += taken * per_step
+                    if exp >= need:
+                        ready_step = segment_start + int(taken)
+                else:
+                    exp += (segment_end - segment_start) * per_step
+                segment_start = segment_end
+
+        resources = {}
+        for name, (current_attr, max_attr) in RESOURCES.items():
+            current = getattr(attrs, current_attr)
+            if plan.steps:
+                current = min(getattr(attrs, max_attr), current + plan.steps * plan.regen[name])
+            resources[name] = current
+
+        return self._finish(character, plan, exp, need, ready_step, resources, apply)
+
+    def step_through(
+        self,
+        character: Any,
+        hours: float,
+        start_time: Optional[float] = None,
+        apply: bool = True,
+    ) -> FastForwardResult:
+        """逐步模拟，参数与返回值同 fast_forward"""
+        plan = self._plan(character, hours, start_time)
+        attrs = character.attributes
+        exp = attrs.cultivation_exp
+        need = self.cultivation_system.get_bottleneck_exp(character)
+        ready_step = 0 if exp >= need else None
+        resources = {name: getattr(attrs, current_attr) for name, (current_attr, _) in RESOURCES.items()}
+
+        for step in range(plan.steps):
+            if self.settings.cultivate and exp < need:
+                exp += self._step_exp(character, plan, step)
+                if exp >= need:
+                    ready_step = step + 1
+            for name, (_, max_attr) in RESOURCES.items():
+                resources[name] = min(getattr(attrs, max_attr), resources[name] + plan.regen[name])
+
+        return self._finish(character, plan, exp, need, ready_step, resources, apply)
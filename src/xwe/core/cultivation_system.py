@@ -45,16 +45,27 @@ class CultivationSystem:
     """
     修炼系统管理器
     
-    处理修炼、突破、功法等相关逻辑
+    处理修炼、突破、功法等相关逻辑。功法表和突破要求在同一个类的实例之间共享
+    条目，每个实例只持有自己的顶层字典，增删条目互不影响，条目本身视为只读。
     """
+
+    # 类 → (功法表, 突破要求)
+    _shared_tables: Dict[type, Tuple[Dict[str, CultivationTechnique], Dict[str, Dict[str, Any]]]] = {}
     
     def __init__(self):
-        self.techniques: Dict[str, CultivationTechnique] = {}
-        self.realm_breakthroughs: Dict[str, Dict[str, Any]] = {}
-        
-        # 初始化基础功法
-        self._init_techniques()
-        self._init_breakthrough_requirements()
+        shared = CultivationSystem._shared_tables.get(type(self))
+        if shared is None:
+            self.techniques: Dict[str, CultivationTechnique] = {}
+            self.realm_breakthroughs: Dict[str, Dict[str, Any]] = {}
+
+            # 初始化基础功法
+            self._init_techniques()
+            self._init_breakthrough_requirements()
+            shared = (self.techniques, self.realm_breakthroughs)
+            CultivationSystem._shared_tables[type(self)] = shared
+
+        self.techniques = dict(shared[0])
+        self.realm_breakthroughs = dict(shared[1])
         
     def _init_techniques(self) -> None:
         """初始化修炼功法"""
@@ -155,6 +166,15 @@ class CultivationSystem:
         
         return total_exp
     
+    def get_bottleneck_exp(self, character: Any) -> int:
+        """
+        当前境界的修为瓶颈
+        
+        修为达到后 realm_progress 为 100，需先突破才能继续修炼
+        """
+        requirements = self.realm_breakthroughs.get(character.attributes.realm_name, {})
+        return requirements.get("exp_required", 100)
+    
     def _calculate_spiritual_root_bonus(self, character: Any) -> float:
         """计算灵根加成"""
         if not hasattr(character, 'spiritual_root'):
@@ -328,16 +348,19 @@ class CultivationSystem:
         Returns:
             是否成功渡劫
         """
+        success_rate = self._calculate_tribulation_success_rate(character, difficulty)
+        return random.random() < success_rate
+
+    def _calculate_tribulation_success_rate(self, character: Any, difficulty: int) -> float:
+        """计算渡劫成功率"""
         # 基础成功率
         base_rate = 0.7 - (difficulty * 0.1)
-        
+
         # 装备加成
         equipment_bonus = 0  # TODO: 根据装备计算
-        
+
         # 最终成功率
-        success_rate = base_rate + equipment_bonus
-        
-        return random.random() < success_rate
+        return base_rate + equipment_bonus
     
     def get_cultivation_info(self, character: Any) -> Dict[str, Any]:
         """获取修炼信息"""
@@ -39,11 +39,18 @@ class GameCore(CombatMixin, CultivationMixin):
             return
         self._initialized = True
 
+        # 与会话无关的数据和规则，回收复用实例时保留
         self.data_loader = DataLoader(data_path)
         self.parser = ExpressionParser()
         self.attribute_system = AttributeSystem(self.parser)
-        self.skill_system = SkillSystem()
         self.heaven_law_engine = HeavenLawEngine()
+        self.character_roller = CharacterRoller()
+        self._init_session(game_mode)
+        logger.info("游戏核心初始化完成")
+
+    def _init_session(self, game_mode: str) -> None:
+        """创建与会话相关的子系统和状态"""
+        self.skill_system = SkillSystem()
         self.combat_system = CombatSystem(self.skill_system, self.parser, self.heaven_law_engine)
         self.ai_controller = AIController(self.skill_system)
         self.command_parser = CommandParser()
@@ -55,8 +62,7 @@ class GameCore(CombatMixin, CultivationMixin):
         from src.xwe.npc import DialogueSystem, NPCManager
 
         self.dialogue_system = DialogueSystem()
-        self.npc_manager = NPCManager(self.dialogue_system)
-        self.character_roller = CharacterRoller()
+        self.npc_manager = NPCManager(self.dialogue_system, self.location_manager.interest)
         self.status_manager = StatusDisplayManager()
         self.achievement_system = AchievementSystem()
         self.command_router = CommandRouter()
@@ -73,7 +79,10 @@ class GameCore(CombatMixin, CultivationMixin):
             "cultivation_time": 0,
             "gold": 0,
         }
-        logger.info("游戏核心初始化完成")
+
+    def reset_session(self, game_mode: Optional[str] = None) -> None:
+        """丢弃全部会话状态，回到刚创建时的样子，供实例池回收复用"""
+        self._init_session(self.game_mode if game_mode is None else game_mode)
 
     # --- 简化的方法，仅保留接口 ---
 
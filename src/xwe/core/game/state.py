@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 
+from src.xwe.core.attribute_store import AttributeTable
 from src.xwe.core.character import Character
 
 
@@ -19,20 +20,50 @@ class GameState:
     flags: Dict[str, Any] = field(default_factory=dict)
     npcs: Dict[str, Character] = field(default_factory=dict)
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, lazy: bool = False) -> Dict[str, Any]:
+        """
+        转为字典
+
+        Args:
+            lazy: 为 True 时角色保持对象形式，由存档引擎在编码到它时再转换
+        """
+        def convert(character: Any) -> Any:
+            return character if lazy else character.to_dict()
+
         return {
-            "player": self.player.to_dict() if self.player else None,
+            "player": convert(self.player) if self.player else None,
             "current_location": self.current_location,
             "current_combat": self.current_combat,
             "game_time": self.game_time,
             "active_hours": self.active_hours,
             "game_mode": self.game_mode,
             "flags": self.flags,
-            "npcs": {nid: npc.to_dict() for nid, npc in self.npcs.items()},
+            "npcs": {nid: convert(npc) for nid, npc in self.npcs.items()},
         }
 
+    def compact_npc_attributes(self, table: Optional[AttributeTable] = None) -> AttributeTable:
+        """
+        把所有 NPC 的属性迁移到共享的紧凑属性表
+
+        Args:
+            table: 目标属性表，默认新建
+
+        Returns:
+            使用的属性表
+        """
+        table = table if table is not None else AttributeTable(capacity=max(1, len(self.npcs)))
+        for npc in self.npcs.values():
+            if getattr(npc.attributes, "table", None) is not table:
+                npc.attributes = table.adopt(npc.attributes)
+        return table
+
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "GameState":
+    def from_dict(cls, data: Dict[str, Any], attribute_table: Optional[AttributeTable] = None) -> "GameState":
+        """
+        Args:
+            data: ``to_dict`` 的结果
+            attribute_table: 提供时 NPC 属性存入该共享属性表
+        """
         state = cls()
         if data.get("player"):
             state.player = Character.from_dict(data["player"])
@@ -44,4 +75,6 @@ class GameState:
         state.flags = data.get("flags", {})
         if "npcs" in data:
             state.npcs = {nid: Character.from_dict(nc) for nid, nc in data["npcs"].items()}
+            if attribute_table is not None:
+                state.compact_npc_attributes(attribute_table)
         return state
@@ -1,10 +1,21 @@
-"""Heaven Law Engine - Enforces world-level laws and triggers divine punishment."""
+"""Heaven Law Engine - Enforces world-level laws and triggers divine punishment.
+
+Laws are data: each entry in ``data/world_laws.json`` declares the action
+types it applies to (``triggers``), the conditions that must hold and the
+named effect to apply. Conditions are compiled once into predicates and the
+compiled laws are indexed by action type, so checking an action only
+evaluates the laws that can apply to it. Reload the file with ``reload()``,
+or pass ``auto_reload=True`` to pick up edits automatically.
+"""
 
 from __future__ import annotations
 import logging
-from typing import TYPE_CHECKING, Optional, List
+import operator
+import pathlib
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from src.xwe.world.laws import load_world_laws, WorldLaw
+from src.xwe.world.laws import DEFAULT_LAWS_PATH, load_world_laws, resolve_laws_path, WorldLaw
 
 if TYPE_CHECKING:
     from src.xwe.core.character import Character
@@ -12,6 +23,148 @@ if TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+REALM_ORDER: Tuple[str, ...] = (
+    "凡人", "炼气期", "筑基期", "金丹期",
+    "元婴期", "化神期", "合体期", "大乘期", "渡劫期"
+)
+_REALM_INDEX: Dict[str, int] = {name: i for i, name in enumerate(REALM_ORDER)}
+
+# Rules for laws whose file entry predates triggers/conditions, keyed by law
+# code; ``defaults`` fill in params the entry leaves out.
+_BUILTIN_RULES: Dict[str, Dict[str, Any]] = {
+    "CROSS_REALM_KILL": {
+        "triggers": ["attack"],
+        "conditions": [{"fact": "realm_gap", "op": ">=", "value": "$max_gap"}],
+        "effect": "thunder_tribulation",
+        "defaults": {"max_gap": 2, "severity_threshold": 3},
+    },
+    "FORBIDDEN_ARTS": {
+        "triggers": ["use_skill"],
+        "conditions": [{"fact": "skill", "op": "in", "value": "$forbidden_skills"}],
+        "effect": "forbidden_art_backlash",
+        "defaults": {
+            "forbidden_skills": ["血魔大法", "噬魂术", "九幽冥火", "天魔解体大法"],
+            "karma_penalty": 100,
+        },
+    },
+    "REALM_BREAKTHROUGH": {
+        "triggers": ["breakthrough"],
+        "conditions": [{"fact": "new_realm", "op": "in", "value": "$major_realms"}],
+        "effect": "breakthrough_tribulation",
+        "defaults": {"major_realms": [], "tribulation_difficulty": {}},
+    },
+}
+
+_NO_FACTS: Dict[str, Any] = {}
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "in": lambda value, options: value in options,
+    "not_in": lambda value, options: value not in options,
+}
+
+
+def _realm_of(character: Any) -> str:
+    attributes = getattr(character, 'attributes', None)
+    if attributes is None:
+        return '炼气期'
+    return getattr(attributes, 'realm_name', '炼气期')
+
+
+def _realm_gap(actor: Any, target: Any, extra: Dict[str, Any]) -> Optional[int]:
+    if target is None:
+        return None
+    # Inlined _realm_of: this runs on every attack
+    attributes = getattr(actor, 'attributes', None)
+    actor_realm = getattr(attributes, 'realm_name', '炼气期') if attributes is not None else '炼气期'
+    attributes = getattr(target, 'attributes', None)
+    target_realm = getattr(attributes, 'realm_name', '炼气期') if attributes is not None else '炼气期'
+    return _REALM_INDEX.get(actor_realm, 0) - _REALM_INDEX.get(target_realm, 0)
+
+
+FactGetter = Callable[[Any, Any, Dict[str, Any]], Any]
+
+# Facts derived from the actor and target; any other fact name is read from
+# the extra facts passed with the action (``skill``, ``new_realm``, ...).
+FACT_PROVIDERS: Dict[str, FactGetter] = {
+    "actor_realm": lambda actor, target, extra: _realm_of(actor),
+    "target_realm": lambda actor, target, extra: _realm_of(target) if target is not None else None,
+    "realm_gap": _realm_gap,
+    "has_target": lambda actor, target, extra: target is not None,
+    "actor_karma": lambda actor, target, extra: getattr(actor, 'karma', None),
+}
+
+
+def get_fact(name: str, actor: Any, target: Any = None, extra: Optional[Dict[str, Any]] = None) -> Any:
+    """Look up a fact by name, as law conditions see it."""
+    provider = FACT_PROVIDERS.get(name)
+    if provider is not None:
+        return provider(actor, target, extra or _NO_FACTS)
+    return (extra or _NO_FACTS).get(name)
+
+
+# Effects are called as effect(law, actor, target, extra_facts, ctx)
+LawEffect = Callable[[WorldLaw, Any, Any, Dict[str, Any], "ActionContext"], None]
+LawPredicate = Callable[[Any, Any, Dict[str, Any]], bool]
+
+
+class CompiledLaw:
+    """A law with its conditions compiled into a single predicate."""
+
+    __slots__ = ("law", "predicate", "effect", "evaluations", "matches")
+
+    def __init__(self, law: WorldLaw, predicate: LawPredicate, effect: LawEffect) -> None:
+        self.law = law
+        self.predicate = predicate
+        self.effect = effect
+        self.evaluations = 0
+        self.matches = 0
+
+
+def _compile_condition(condition: Dict[str, Any], params: Dict[str, Any]) -> LawPredicate:
+    fact = condition["fact"]
+    op_name = condition.get("op", "==")
+    compare = _OPERATORS.get(op_name)
+    if compare is None:
+        raise ValueError(f"unknown operator {op_name!r}")
+
+    value = condition.get("value")
+    if isinstance(value, str) and value.startswith("$"):
+        value = params.get(value[1:])
+    if op_name in ("in", "not_in"):
+        value = frozenset(value or ())
+
+    getter = FACT_PROVIDERS.get(fact)
+    if getter is None:
+        if op_name == "in":
+            # The common "skill in forbidden list" shape: a single set lookup
+            return lambda actor, target, extra: extra.get(fact) in value
+        getter = lambda actor, target, extra: extra.get(fact)
+
+    def predicate(actor: Any, target: Any, extra: Dict[str, Any]) -> bool:
+        actual = getter(actor, target, extra)
+        return actual is not None and compare(actual, value)
+
+    return predicate
+
+
+def compile_conditions(conditions: Iterable[Dict[str, Any]], params: Dict[str, Any]) -> LawPredicate:
+    """Compile a list of conditions into one predicate that requires all of them.
+
+    A predicate takes ``(actor, target, extra_facts)``.
+    """
+    predicates = tuple(_compile_condition(c, params) for c in conditions)
+    if not predicates:
+        return lambda actor, target, extra: True
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda actor, target, extra: all(p(actor, target, extra) for p in predicates)
+
 
 class ActionContext:
     """Context for action execution with law enforcement."""
@@ -90,23 +243,139 @@ class ThunderTribulation(Event):
 class HeavenLawEngine:
     """Central authority that enforces world-level laws before/after actions."""
     
-    def __init__(self):
-        self.laws = load_world_laws()
+    def __init__(
+        self,
+        path: str | pathlib.Path = DEFAULT_LAWS_PATH,
+        auto_reload: bool = False,
+        reload_interval: float = 2.0,
+    ):
+        """
+        Args:
+            path: World laws JSON file
+            auto_reload: Re-read the file when it changes (checked at most
+                once per ``reload_interval`` seconds, on the next check)
+            reload_interval: Seconds between modification-time checks
+        """
+        self.path = path
+        self.auto_reload = auto_reload
+        self.reload_interval = reload_interval
+        self.effects: Dict[str, LawEffect] = {
+            "thunder_tribulation": self._thunder_tribulation,
+            "forbidden_art_backlash": self._forbidden_art_backlash,
+            "breakthrough_tribulation": self._breakthrough_tribulation,
+        }
+        self.laws: Dict[str, WorldLaw] = {}
+        self._index: Dict[str, Tuple[CompiledLaw, ...]] = {}
+        self._mtime: Optional[float] = None
+        self._next_reload_check = 0.0
+        self.reload()
         log.info(f"HeavenLawEngine initialized with {len(self.laws)} laws")
     
-    def get_realm_index(self, realm_name: str) -> int:
-        """Get numerical index for a realm name."""
-        realm_order = [
-            "凡人", "炼气期", "筑基期", "金丹期", 
-            "元婴期", "化神期", "合体期", "大乘期", "渡劫期"
-        ]
-        
+    # ------------------------------------------------------------------
+    # Loading and compilation
+    # ------------------------------------------------------------------
+    def reload(self) -> None:
+        """Re-read the law file and recompile the index."""
+        resolved = resolve_laws_path(self.path)
+        self._mtime = resolved.stat().st_mtime if resolved else None
+        self._next_reload_check = time.monotonic() + self.reload_interval
+        self.set_laws(load_world_laws(self.path))
+
+    def reload_if_changed(self) -> bool:
+        """Reload the law file if its modification time changed."""
+        self._next_reload_check = time.monotonic() + self.reload_interval
+        resolved = resolve_laws_path(self.path)
+        mtime = resolved.stat().st_mtime if resolved else None
+        if mtime == self._mtime:
+            return False
+        try:
+            self.reload()
+        except Exception as e:
+            # Keep enforcing the previous laws if the edited file is broken
+            self._mtime = mtime
+            log.error(f"HeavenLawEngine: failed to reload laws: {e}")
+            return False
+        log.info(f"HeavenLawEngine reloaded {len(self.laws)} laws")
+        return True
+
+    def set_laws(self, laws: Dict[str, WorldLaw]) -> None:
+        """Replace the active laws and rebuild the action index."""
+        index: Dict[str, List[CompiledLaw]] = {}
+        for law in laws.values():
+            compiled = self._compile(law)
+            if compiled is None:
+                continue
+            builtin = _BUILTIN_RULES.get(law.code, {})
+            for action in law.triggers or builtin.get("triggers", []):
+                index.setdefault(action, []).append(compiled)
+        self.laws = laws
+        self._index = {action: tuple(entries) for action, entries in index.items()}
+
+    def _compile(self, law: WorldLaw) -> Optional[CompiledLaw]:
+        builtin = _BUILTIN_RULES.get(law.code, {})
+        if builtin.get("defaults"):
+            law.params = {**builtin["defaults"], **law.params}
+        effect_name = law.effect or builtin.get("effect")
+        if effect_name is None:
+            return None
+        effect = self.effects.get(effect_name)
+        if effect is None:
+            log.warning(f"HeavenLawEngine: law {law.code} uses unknown effect {effect_name!r}")
+            return None
+        conditions = law.conditions if law.triggers else builtin.get("conditions", [])
         try:
-            return realm_order.index(realm_name)
-        except ValueError:
-            # Default to 0 if realm not found
-            return 0
+            predicate = compile_conditions(conditions, law.params)
+        except (KeyError, TypeError, ValueError) as e:
+            log.warning(f"HeavenLawEngine: invalid conditions in law {law.code}: {e}")
+            return None
+        return CompiledLaw(law, predicate, effect)
+
+    def register_effect(self, name: str, effect: LawEffect) -> None:
+        """Register a named effect for laws to use and recompile."""
+        self.effects[name] = effect
+        self.set_laws(self.laws)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+    def get_realm_index(self, realm_name: str) -> int:
+        """Get numerical index for a realm name (0 if unknown)."""
+        return _REALM_INDEX.get(realm_name, 0)
     
+    def check(
+        self,
+        action: str,
+        actor: "Character",
+        ctx: ActionContext,
+        target: Optional["Character"] = None,
+        **facts: Any,
+    ) -> None:
+        """Evaluate the laws triggered by ``action`` and apply their effects to ``ctx``.
+
+        Args:
+            action: Action type, matched against each law's ``triggers``
+            actor: The character performing the action
+            ctx: Action context to modify
+            target: The target of the action (if any)
+            **facts: Extra facts for conditions, e.g. ``skill`` or ``new_realm``
+        """
+        self._evaluate(action, actor, target, facts, ctx)
+
+    def _evaluate(self, action: str, actor: Any, target: Any, extra: Dict[str, Any], ctx: ActionContext) -> None:
+        if self.auto_reload and time.monotonic() >= self._next_reload_check:
+            self.reload_if_changed()
+        laws = self._index.get(action)
+        if not laws:
+            return
+        for compiled in laws:
+            law = compiled.law
+            if not law.enabled:
+                continue
+            compiled.evaluations += 1
+            if compiled.predicate(actor, target, extra):
+                compiled.matches += 1
+                compiled.effect(law, actor, target, extra, ctx)
+
     def enforce(self, actor: "Character", target: Optional["Character"], ctx: ActionContext) -> None:
         """Raise ThunderTribulation or modify ctx according to active laws.
         
@@ -115,73 +384,69 @@ class HeavenLawEngine:
             target: The target of the action (if any)
             ctx: Action context to modify
         """
-        # Check CROSS_REALM_KILL law
-        law = self.laws.get("CROSS_REALM_KILL")
-        if not (law and law.enabled):
-            return
-        
-        if not target:
-            return
-        
-        # Get realm indices
-        actor_realm = getattr(actor.attributes, 'realm_name', '炼气期') if hasattr(actor, 'attributes') else '炼气期'
-        target_realm = getattr(target.attributes, 'realm_name', '炼气期') if hasattr(target, 'attributes') else '炼气期'
-        
-        actor_idx = self.get_realm_index(actor_realm)
-        target_idx = self.get_realm_index(target_realm)
-        
-        # Calculate realm difference (positive means actor is higher realm)
-        diff = actor_idx - target_idx
-        threshold = law.params.get("max_gap", 2)
-        
-        # Check if violating the law (higher realm attacking much lower realm)
-        if diff >= threshold:
-            log.info(
-                f"HeavenLawEngine: cross-realm kill attempt blocked "
-                f"({actor.name}[{actor_realm}] → {target.name}[{target_realm}])"
-            )
-            
-            ctx.cancelled = True
-            ctx.reason = f"天道不容！{actor_realm}修士不可肆意斩杀{target_realm}修士！"
-            
-            # Determine severity based on realm gap
-            if diff >= law.params.get("severity_threshold", 3):
-                severity = "severe"
-            else:
-                severity = "moderate"
-            
-            ctx.events.append(ThunderTribulation(actor=actor, severity=severity))
+        self._evaluate("attack", actor, target, _NO_FACTS, ctx)
     
     def check_forbidden_art(self, actor: "Character", skill_name: str, ctx: ActionContext) -> None:
         """Check if a skill is forbidden and apply penalties."""
-        law = self.laws.get("FORBIDDEN_ARTS")
-        if not (law and law.enabled):
-            return
-        
-        # List of forbidden arts (could be loaded from data)
-        forbidden_skills = ["血魔大法", "噬魂术", "九幽冥火", "天魔解体大法"]
-        
-        if skill_name in forbidden_skills:
-            log.info(f"HeavenLawEngine: forbidden art detected - {skill_name}")
-            
-            # Apply backlash
-            ctx.events.append(Event("ForbiddenArtBacklash"))
-            
-            # Add karma penalty
-            if hasattr(actor, 'karma'):
-                penalty = law.params.get("karma_penalty", 100)
-                actor.karma -= penalty
+        self._evaluate("use_skill", actor, None, {"skill": skill_name}, ctx)
     
     def check_breakthrough(self, actor: "Character", new_realm: str, ctx: ActionContext) -> None:
         """Check if realm breakthrough requires tribulation."""
-        law = self.laws.get("REALM_BREAKTHROUGH")
-        if not (law and law.enabled):
-            return
+        self._evaluate("breakthrough", actor, None, {"new_realm": new_realm}, ctx)
+
+    def get_law_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-law evaluation and match counters."""
+        stats: Dict[str, Dict[str, int]] = {}
+        for laws in self._index.values():
+            for compiled in laws:
+                stats[compiled.law.code] = {
+                    "evaluations": compiled.evaluations,
+                    "matches": compiled.matches,
+                }
+        return stats
+
+    # ------------------------------------------------------------------
+    # Built-in effects
+    # ------------------------------------------------------------------
+    def _thunder_tribulation(
+        self, law: WorldLaw, actor: Any, target: Any, extra: Dict[str, Any], ctx: ActionContext
+    ) -> None:
+        actor_realm, target_realm = _realm_of(actor), _realm_of(target)
+        log.info(
+            f"HeavenLawEngine: cross-realm kill attempt blocked "
+            f"({actor.name}[{actor_realm}] → {getattr(target, 'name', '?')}[{target_realm}])"
+        )
         
-        major_realms = law.params.get("major_realms", [])
-        if new_realm in major_realms:
-            difficulty = law.params.get("tribulation_difficulty", {}).get(new_realm, 1)
-            log.info(f"HeavenLawEngine: realm breakthrough tribulation required for {new_realm}")
-            
-            # Create breakthrough tribulation event
-            ctx.events.append(Event(f"BreakthroughTribulation_Level{difficulty}"))
+        ctx.cancelled = True
+        ctx.reason = f"天道不容！{actor_realm}修士不可肆意斩杀{target_realm}修士！"
+        
+        # Determine severity based on realm gap
+        gap = _REALM_INDEX.get(actor_realm, 0) - _REALM_INDEX.get(target_realm, 0)
+        if gap >= law.params.get("severity_threshold", 3):
+            severity = "severe"
+        else:
+            severity = "moderate"
+        
+        ctx.events.append(ThunderTribulation(actor=actor, severity=severity))
+
+    def _forbidden_art_backlash(
+        self, law: WorldLaw, actor: Any, target: Any, extra: Dict[str, Any], ctx: ActionContext
+    ) -> None:
+        log.info(f"HeavenLawEngine: forbidden art detected - {extra.get('skill')}")
+        
+        # Apply backlash
+        ctx.events.append(Event("ForbiddenArtBacklash"))
+        
+        # Add karma penalty
+        if hasattr(actor, 'karma'):
+            actor.karma -= law.params.get("karma_penalty", 100)
+
+    def _breakthrough_tribulation(
+        self, law: WorldLaw, actor: Any, target: Any, extra: Dict[str, Any], ctx: ActionContext
+    ) -> None:
+        new_realm = extra.get("new_realm")
+        difficulty = law.params.get("tribulation_difficulty", {}).get(new_realm, 1)
+        log.info(f"HeavenLawEngine: realm breakthrough tribulation required for {new_realm}")
+        
+        # Create breakthrough tribulation event
+        ctx.events.append(Event(f"BreakthroughTribulation_Level{difficulty}"))
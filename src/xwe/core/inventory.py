@@ -6,6 +6,7 @@
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +30,8 @@ class Inventory:
     """
     物品栏类
     
-    管理角色的物品存储和操作
+    管理角色的物品存储和操作。修改与 ``to_dict`` 都持有 ``lock``，
+    后台写回线程据此取得一致的副本。
     """
     
     def __init__(self, capacity: int = 50):
@@ -42,7 +44,17 @@ class Inventory:
         self.capacity = capacity
         self.items: Dict[str, int] = {}  # item_id -> quantity
         self.gold: int = 0  # 金币
-        
+        self.lock = threading.RLock()
+
+    def __getstate__(self) -> Dict[str, any]:
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
     def add(self, item_id: str, quantity: int = 1) -> bool:
         """
         添加物品
@@ -57,14 +69,14 @@ class Inventory:
         if quantity <= 0:
             return False
             
-        # 检查容量（简化处理，每种物品占一个格子）
-        if item_id not in self.items and len(self.items) >= self.capacity:
-            logger.warning(f"物品栏已满，无法添加 {item_id}")
-            return False
-            
-        # 添加物品
-        current = self.items.get(item_id, 0)
-        self.items[item_id] = current + quantity
+        with self.lock:
+            # 检查容量（简化处理，每种物品占一个格子）
+            if item_id not in self.items and len(self.items) >= self.capacity:
+                logger.warning(f"物品栏已满，无法添加 {item_id}")
+                return False
+
+            # 添加物品
+            self.items[item_id] = self.items.get(item_id, 0) + quantity
         
         logger.info(f"添加物品: {item_id} x{quantity}")
         return True
@@ -83,17 +95,17 @@ class Inventory:
         if quantity <= 0:
             return False
             
-        current = self.items.get(item_id, 0)
-        if current < quantity:
-            logger.warning(f"物品数量不足: {item_id} (需要{quantity}，拥有{current})")
-            return False
-            
-        # 移除物品
-        self.items[item_id] = current - quantity
-        
-        # 如果数量为0，移除该物品
-        if self.items[item_id] == 0:
-            del self.items[item_id]
+        with self.lock:
+            current = self.items.get(item_id, 0)
+            if current < quantity:
+                logger.warning(f"物品数量不足: {item_id} (需要{quantity}，拥有{current})")
+                return False
+
+            # 移除物品，数量为0时删除该物品
+            if current == quantity:
+                del self.items[item_id]
+            else:
+                self.items[item_id] = current - quantity
             
         logger.info(f"移除物品: {item_id} x{quantity}")
         return True
@@ -134,13 +146,15 @@ class Inventory:
         
     def clear(self) -> None:
         """清空物品栏"""
-        self.items.clear()
+        with self.lock:
+            self.items.clear()
         logger.info("物品栏已清空")
         
     def add_gold(self, amount: int) -> None:
         """添加金币"""
         if amount > 0:
-            self.gold += amount
+            with self.lock:
+                self.gold += amount
             logger.info(f"获得金币: {amount}")
             
     def spend_gold(self, amount: int) -> bool:
@@ -156,21 +170,22 @@ class Inventory:
         if amount <= 0:
             return False
             
-        if self.gold < amount:
-            logger.warning(f"金币不足: 需要{amount}，拥有{self.gold}")
-            return False
-            
-        self.gold -= amount
+        with self.lock:
+            if self.gold < amount:
+                logger.warning(f"金币不足: 需要{amount}，拥有{self.gold}")
+                return False
+            self.gold -= amount
         logger.info(f"花费金币: {amount}")
         return True
         
     def to_dict(self) -> Dict[str, any]:
         """转换为字典"""
-        return {
-            "capacity": self.capacity,
-            "items": self.items.copy(),
-            "gold": self.gold
-        }
+        with self.lock:
+            return {
+                "capacity": self.capacity,
+                "items": self.items.copy(),
+                "gold": self.gold
+            }
         
     @classmethod
     def from_dict(cls, data: Dict[str, any]) -> "Inventory":
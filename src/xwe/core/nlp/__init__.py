@@ -6,6 +6,8 @@ NLP 模块
 from .llm_client import LLMClient
 from .nlp_processor import NLPProcessor, DeepSeekNLPProcessor, ParsedCommand
 from .config import NLPConfig, get_nlp_config, reset_nlp_config
+from .coalescer import MicroBatcher, SingleFlight
+from .intent_classifier import IntentClassifier, IntentPrediction
 from .monitor import NLPMonitor, get_nlp_monitor, reset_nlp_monitor
 from . import tool_router
 
@@ -17,6 +19,10 @@ __all__ = [
     'NLPConfig',
     'get_nlp_config',
     'reset_nlp_config',
+    'MicroBatcher',
+    'SingleFlight',
+    'IntentClassifier',
+    'IntentPrediction',
     'NLPMonitor',
     'get_nlp_monitor',
     'reset_nlp_monitor',
@@ -2,6 +2,7 @@
 LLM 异步配置和工具函数
 """
 
+import atexit
 import os
 import asyncio
 from typing import Optional, List, Any, Callable, TypeVar, Coroutine
@@ -117,7 +118,10 @@ class AsyncHelper:
     def run_async_in_sync(coro: Coroutine[Any, Any, T]) -> T:
         """
         在同步代码中运行异步协程
-        
+
+        协程提交到常驻的共享事件循环执行，不再每次新建事件循环，
+        绑定在事件循环上的连接池（如 ``httpx.AsyncClient``）可以跨调用复用。
+
         Args:
             coro: 异步协程
             
@@ -127,20 +131,15 @@ class AsyncHelper:
         Example:
             result = run_async_in_sync(client.chat_async("hello"))
         """
+        loop = get_shared_loop()
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # 如果事件循环已经在运行，创建新任务
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as pool:
-                    future = pool.submit(asyncio.run, coro)
-                    return future.result()
-            else:
-                # 直接运行
-                return loop.run_until_complete(coro)
+            running = asyncio.get_running_loop()
         except RuntimeError:
-            # 没有事件循环，创建新的
-            return asyncio.run(coro)
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("不能在共享事件循环内同步等待协程")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
 
 
 class AsyncWrapper:
@@ -388,3 +387,59 @@ def cleanup_global_executor():
         _global_executor.shutdown(wait=True)
         _global_executor = None
         logger.info("全局异步执行器已清理")
+
+
+# 共享事件循环管理
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_thread: Optional[threading.Thread] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_loop() -> asyncio.AbstractEventLoop:
+    """获取在后台守护线程中常驻运行的共享事件循环"""
+    global _shared_loop, _shared_thread
+    with _shared_lock:
+        if _shared_loop is None or _shared_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            _shared_thread = threading.Thread(target=_run, name="llm_async_loop", daemon=True)
+            _shared_thread.start()
+            ready.wait()
+            _shared_loop = loop
+        return _shared_loop
+
+
+def shutdown_shared_loop(timeout: float = 5.0) -> None:
+    """停止共享事件循环，取消仍未完成的任务"""
+    global _shared_loop, _shared_thread
+    with _shared_lock:
+        loop, thread = _shared_loop, _shared_thread
+        _shared_loop = _shared_thread = None
+    if loop is None or loop.is_closed():
+        return
+
+    async def _cancel_pending():
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        asyncio.run_coroutine_threadsafe(_cancel_pending(), loop).result(timeout)
+    except Exception as e:  # pragma: no cover - 关闭时尽力而为
+        logger.debug(f"取消共享事件循环任务失败: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout)
+    if not loop.is_running():
+        loop.close()
+    logger.info("共享事件循环已停止")
+
+
+atexit.register(shutdown_shared_loop)
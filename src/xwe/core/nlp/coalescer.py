@@ -0,0 +1,173 @@
+"""
+LLM 请求合并
+
+同步解析路径（Flask 工作线程里调用 ``DeepSeekNLPProcessor.parse``）上的两层合并：
+
+- ``SingleFlight``：同一个键的并发调用只执行一次，其余调用等待并共享结果
+- ``MicroBatcher``：已有调用在途时，短窗口内到达的不同请求打包成一批，一次执行
+
+两者都不启动后台线程：第一个到达的调用者负责执行，其余调用者阻塞等待。
+``async_utils.AsyncBatchProcessor`` 绑定单个事件循环，而 Flask 每个异步视图都在
+各自的事件循环里运行，因此这里按线程实现。
+"""
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("xwe.nlp")
+
+
+class SingleFlight:
+    """同键并发调用合并"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行 fn，同一键已有调用在途时等待其结果
+
+        Args:
+            key: 合并键
+            fn: 无参调用
+
+        Returns:
+            (结果, 是否共享了其他调用的结果)；fn 抛出的异常会传给所有等待者
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"executed": self.executed, "shared": self.shared}
+
+
+class _Batch:
+    """一个正在收集或执行的批次"""
+
+    __slots__ = ("items", "futures", "full")
+
+    def __init__(self, item: Any):
+        self.items: List[Any] = [item]
+        self.futures: List[Future] = [Future()]
+        self.full = threading.Event()
+
+
+class MicroBatcher:
+    """
+    微批处理器
+
+    空闲时请求立即单独执行，不增加延迟；已有批次在执行时，新请求开启一个收集窗口，
+    窗口到期或攒满 ``max_batch_size`` 条后一起交给 ``batch_fn``。
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Sequence[Any]], Sequence[Any]],
+        window: float = 0.02,
+        max_batch_size: int = 8,
+    ):
+        """
+        Args:
+            batch_fn: 批处理函数，按输入顺序返回等长结果列表；元素为异常实例时
+                只让对应的调用者失败，整体抛出异常则整批失败
+            window: 收集窗口（秒）
+            max_batch_size: 每批最多条数
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size 必须为正数")
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._open: Optional[_Batch] = None
+        self._running = 0
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: Any) -> Any:
+        """提交一条请求并阻塞到其结果可用"""
+        with self._lock:
+            batch = self._open
+            if batch is not None:
+                index = len(batch.items)
+                batch.items.append(item)
+                batch.futures.append(Future())
+                if len(batch.items) >= self.max_batch_size:
+                    self._open = None
+                    batch.full.set()
+                leader = False
+            else:
+                index = 0
+                batch = _Batch(item)
+                # 没有在途批次时直接执行，否则开一个收集窗口
+                if self._running and self.window > 0 and self.max_batch_size > 1:
+                    self._open = batch
+                else:
+                    batch.full.set()
+                self._running += 1
+                leader = True
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            self._run(batch)
+        return batch.futures[index].result()
+
+    def _run(self, batch: _Batch) -> None:
+        # 批次已关闭，items 不会再变
+        try:
+            results = list(self.batch_fn(batch.items))
+            if len(results) != len(batch.items):
+                raise ValueError(f"批处理返回 {len(results)} 条结果，期望 {len(batch.items)} 条")
+        except BaseException as e:
+            for future in batch.futures:
+                future.set_exception(e)
+        else:
+            for future, result in zip(batch.futures, results):
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.batches += 1
+                self.items += len(batch.items)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
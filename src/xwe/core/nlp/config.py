@@ -24,6 +24,25 @@ class NLPConfig:
         "timeout": 30,                      # API超时时间（秒）
         "max_retries": 3,                   # 最大重试次数
         "cache_size": 128,                  # 缓存大小
+        # 解析缓存（内存 LRU + 可选 SQLite 持久层）
+        "parse_cache": {
+            "ttl": 3600,                    # 过期时间（秒）
+            "db_path": None,                # SQLite 路径，多 worker 共享；也可用 XWE_NLP_CACHE_DB 设置
+            "synonyms": None                # 同义词表，None 使用内置默认值
+        },
+        # 本地意图分类层（在调用 LLM 之前尝试）
+        "local_intent": {
+            "enabled": True,                # 是否启用
+            "confidence_threshold": 0.8,    # 置信度低于此值时交给 LLM
+            "model_path": None              # 离线训练的模型文件，也可用 XWE_INTENT_MODEL 设置
+        },
+        # LLM 请求合并（同一输入的并发请求共享一次调用，不同输入在窗口内打包成一个 prompt）
+        "llm_batching": {
+            "coalesce": True,               # 合并同一规范化输入的并发请求
+            "enabled": True,                # 是否打包不同输入
+            "window": 0.02,                 # 已有调用在途时的收集窗口（秒）
+            "max_batch_size": 8             # 每个 prompt 最多打包的输入条数
+        },
         "temperature": 0.0,                 # 温度参数（0表示确定性输出）
         "max_tokens": 256,                  # 最大生成token数
         "fallback_enabled": True,           # 是否启用本地回退
@@ -41,6 +60,9 @@ class NLPConfig:
             "window_size": 20,              # 滑动窗口大小
             "block_size": 30,               # 压缩触发阈值
             "max_memory_blocks": 10,        # 最大记忆块数量
+            "background": True,             # 是否在后台线程中生成摘要
+            "max_context_tokens": None,     # 组装上下文的 token 预算（None 不限制）
+            "tokenizer": None,              # token 计数器，如 "tiktoken"、"hf:<路径>"（None 使用启发式估算）
             "summarization_temperature": 0.3,  # 摘要生成温度
             "summarization_max_tokens": 150,   # 摘要最大长度
             "enable_structured_summary": False, # 是否使用结构化摘要
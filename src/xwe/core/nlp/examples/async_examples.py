@@ -257,9 +257,9 @@ async def example_performance_monitoring():
                   f"QPS: {qps:.1f}, 平均延迟: {avg_latency:.0f}ms")
         
         # 资源使用情况
-        print(f"\n线程池状态:")
-        print(f"- 最大工作线程: {client._executor._max_workers}")
-        print(f"- 当前线程数: {len(client._executor._threads)}")
+        print(f"\n连接池状态:")
+        print(f"- 连接池大小: {client.pool_size}")
+        print(f"- 统计: {client.get_pool_stats()}")
         
     finally:
         client.cleanup()
@@ -0,0 +1,370 @@
+"""
+LLM HTTP 传输层
+
+为 LLMClient 提供带连接池的 HTTP 传输：
+
+- 同步路径使用持久的 ``requests.Session``，连接池大小可调，连接保持复用；
+- 异步路径使用 ``httpx.AsyncClient`` 直接在事件循环中发送请求，不占用线程；
+  每个事件循环一个客户端，事件循环关闭后其客户端随即关闭，不会泄漏连接；
+- 两条路径共用同一个 ``RetryPolicy`` 决定是否重试以及退避时长；
+- 连接池使用情况（在途请求数/池大小）上报到 Prometheus。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:  # pragma: no cover - 环境缺少 requests 时使用占位对象
+    requests = None
+    HTTPAdapter = None
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - 可选依赖
+    httpx = None
+
+# 导入 Prometheus 指标收集器
+try:
+    from ...metrics.prometheus_metrics import get_metrics_collector
+    PROMETHEUS_ENABLED = True
+except ImportError:  # pragma: no cover - 可选依赖
+    PROMETHEUS_ENABLED = False
+
+logger = logging.getLogger(__name__)
+
+
+class TransportError(Exception):
+    """HTTP 传输错误"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retryable: bool = True, body: str = "") -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.body = body
+
+
+@dataclass
+class RetryPolicy:
+    """
+    指数退避重试策略
+
+    同步和异步路径都通过 ``next_delay`` 决定下一次重试前的等待时间。
+    """
+
+    max_tries: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    max_time: float = 60.0
+    retry_statuses: Tuple[int, ...] = (408, 429, 500, 502, 503, 504)
+    jitter: bool = True
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code in self.retry_statuses
+
+    def next_delay(self, attempt: int, started: float, error: Exception) -> Optional[float]:
+        """
+        计算第 ``attempt`` 次尝试失败后的等待时间
+
+        Args:
+            attempt: 已完成的尝试次数（从 1 开始）
+            started: 第一次尝试开始的 ``time.monotonic()``
+            error: 本次失败的异常
+
+        Returns:
+            等待秒数；不应再重试时返回 None
+        """
+        if isinstance(error, TransportError) and not error.retryable:
+            return None
+        if attempt >= self.max_tries:
+            return None
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(delay / 2, delay)
+        if time.monotonic() - started + delay > self.max_time:
+            return None
+        return delay
+
+
+class LLMHttpTransport:
+    """带连接池和保持连接的 HTTP 传输"""
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30,
+        pool_size: int = 10,
+        keepalive_expiry: float = 30.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        name: str = "deepseek",
+    ) -> None:
+        """
+        Args:
+            headers: 每个请求携带的请求头
+            timeout: 请求超时（秒）
+            pool_size: 连接池中每个主机的最大连接数
+            keepalive_expiry: 空闲连接保持时间（秒，仅异步路径）
+            retry_policy: 重试策略
+            name: 名称，用作指标标签
+        """
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.pool_size = max(1, pool_size)
+        self.keepalive_expiry = keepalive_expiry
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._session: Optional[Any] = None
+        # 事件循环 → 异步客户端；httpx 的连接绑定在创建它的事件循环上
+        self._async_clients: Dict[asyncio.AbstractEventLoop, Any] = {}
+        self._in_flight = {"sync": 0, "async": 0}
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+        self._closed = False
+
+    @property
+    def supports_async(self) -> bool:
+        """是否可以使用原生异步路径"""
+        return httpx is not None
+
+    # ------------------------------------------------------------------
+    # 连接池
+    # ------------------------------------------------------------------
+    @property
+    def session(self) -> Any:
+        """懒加载的持久会话"""
+        if requests is None:
+            raise ImportError("The 'requests' package is required for network operations")
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=4,
+                        pool_maxsize=self.pool_size,
+                        max_retries=0,  # 重试由 RetryPolicy 统一处理
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self.headers)
+                    self._session = session
+        return self._session
+
+    async def _get_async_client(self) -> Any:
+        """获取当前事件循环的异步客户端，顺带关闭已关闭事件循环遗留的客户端"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            stale = [(l, c) for l, c in self._async_clients.items() if l.is_closed()]
+            for stale_loop, _ in stale:
+                del self._async_clients[stale_loop]
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = httpx.AsyncClient(
+                    headers=self.headers,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size,
+                        keepalive_expiry=self.keepalive_expiry,
+                    ),
+                )
+        for _, stale_client in stale:
+            await self._aclose_stale(stale_client)
+        return client
+
+    @staticmethod
+    async def _aclose_stale(client: Any) -> None:
+        """
+        关闭所属事件循环已关闭的客户端
+
+        套接字会被关闭，但通知旧事件循环时会抛出 RuntimeError，忽略即可。
+        """
+        try:
+            await client.aclose()
+        except RuntimeError:
+            pass
+
+    def _close_async_client(self, loop: asyncio.AbstractEventLoop, client: Any) -> None:
+        """在客户端所属的事件循环中关闭它"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        try:
+            if loop is running:
+                loop.create_task(client.aclose())
+            elif loop.is_closed():
+                if running is not None:
+                    running.create_task(self._aclose_stale(client))
+                else:
+                    asyncio.run(self._aclose_stale(client))
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(self.timeout)
+            else:
+                loop.run_until_complete(client.aclose())
+        except Exception as e:
+            logger.debug(f"关闭 {self.name} 异步客户端失败: {e}")
+
+    def close(self) -> None:
+        """关闭同步会话和所有事件循环中的异步客户端"""
+        self._closed = True
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            clients, self._async_clients = self._async_clients, {}
+        for loop, client in clients.items():
+            self._close_async_client(loop, client)
+
+    async def aclose(self) -> None:
+        """关闭传输；当前事件循环的客户端直接等待关闭"""
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 统计与指标
+    # ------------------------------------------------------------------
+    def _enter(self, kind: str) -> None:
+        with self._lock:
+            self._in_flight[kind] += 1
+            self.stats["requests"] += 1
+            in_flight = self._in_flight[kind]
+        self._report_pool(kind, in_flight)
+
+    def _leave(self, kind: str) -> None:
+        with self._lock:
+            self._in_flight[kind] -= 1
+            in_flight = self._in_flight[kind]
+        self._report_pool(kind, in_flight)
+
+    def _report_pool(self, kind: str, in_flight: int) -> None:
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().update_llm_pool_metrics(self.name, kind, in_flight, self.pool_size)
+
+    def _record_result(self, kind: str, outcome: str, retries: int, duration: float, url: str) -> None:
+        if outcome != "success":
+            with self._lock:
+                self.stats["failures"] += 1
+        if PROMETHEUS_ENABLED:
+            collector = get_metrics_collector()
+            collector.record_llm_request(self.name, kind, outcome, retries)
+            if outcome == "success":
+                collector.record_api_call(api_name=self.name, endpoint=url, duration=duration)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "in_flight_sync": self._in_flight["sync"],
+                "in_flight_async": self._in_flight["async"],
+                "utilization": max(self._in_flight.values()) / self.pool_size,
+                **self.stats,
+            }
+
+    # ------------------------------------------------------------------
+    # 请求
+    # ------------------------------------------------------------------
+    def _check_status(self, status_code: int, text: str) -> None:
+        if status_code >= 400:
+            raise TransportError(
+                f"HTTP {status_code}",
+                status_code=status_code,
+                retryable=self.retry_policy.is_retryable_status(status_code),
+                body=text[:500],
+            )
+
+    def send(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """同步发送一次请求（不重试）"""
+        if self._closed:
+            raise RuntimeError("HTTP 传输已关闭")
+        self._enter("sync")
+        try:
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            except requests.exceptions.Timeout as e:
+                raise TransportError(f"请求超时（{self.timeout}s）: {e}") from e
+            except requests.exceptions.RequestException as e:
+                raise TransportError(f"请求失败: {e}") from e
+            self._check_status(response.status_code, response.text)
+            try:
+                return response.json()
+            except ValueError as e:
+                raise TransportError(f"响应不是有效的 JSON: {e}", retryable=False) from e
+        finally:
+            self._leave("sync")
+
+    async def send_async(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """异步发送一次请求（不重试）"""
+        if self._closed:
+            raise RuntimeError("HTTP 传输已关闭")
+        if httpx is None:
+            raise ImportError("The 'httpx' package is required for async network operations")
+        client = await self._get_async_client()
+        self._enter("async")
+        try:
+            try:
+                response = await client.post(url, json=payload)
+            except httpx.TimeoutException as e:
+                raise TransportError(f"请求超时（{self.timeout}s）: {e}") from e
+            except httpx.HTTPError as e:
+                raise TransportError(f"请求失败: {e}") from e
+            self._check_status(response.status_code, response.text)
+            try:
+                return response.json()
+            except ValueError as e:
+                raise TransportError(f"响应不是有效的 JSON: {e}", retryable=False) from e
+        finally:
+            self._leave("async")
+
+    def post_json(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """同步发送请求，按重试策略重试"""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = self.send(url, payload)
+                self._record_result("sync", "success", attempt - 1, time.monotonic() - started, url)
+                return result
+            except TransportError as e:
+                delay = self.retry_policy.next_delay(attempt, started, e)
+                if delay is None:
+                    self._record_result("sync", "failure", attempt - 1, time.monotonic() - started, url)
+                    raise
+                self._on_retry(attempt, delay, e)
+                time.sleep(delay)
+
+    async def post_json_async(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """异步发送请求，按重试策略重试"""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await self.send_async(url, payload)
+                self._record_result("async", "success", attempt - 1, time.monotonic() - started, url)
+                return result
+            except TransportError as e:
+                delay = self.retry_policy.next_delay(attempt, started, e)
+                if delay is None:
+                    self._record_result("async", "failure", attempt - 1, time.monotonic() - started, url)
+                    raise
+                self._on_retry(attempt, delay, e)
+                await asyncio.sleep(delay)
+
+    def _on_retry(self, attempt: int, delay: float, error: Exception) -> None:
+        with self._lock:
+            self.stats["retries"] += 1
+        logger.warning(f"请求 {self.name} 失败（第 {attempt} 次）: {error}，{delay:.2f}s 后重试")
@@ -0,0 +1,327 @@
+"""
+本地意图分类器
+
+位于 DeepSeek 解析之前的一层：用字符 n-gram 特征的朴素贝叶斯模型，从已记录的
+LLM 解析结果（``NLPMonitor`` 历史或其导出文件）离线训练，在微秒级给出
+(标准命令, 意图, 参数, 置信度)。置信度低于阈值时返回 None，由调用方交给 LLM。
+
+参数抽取靠训练时学到的模板：若 LLM 返回的某个参数值原样出现在输入里，就把它前后
+的文本记成 (前缀, 后缀, 参数名)。预测时标签大多带参数却没有模板能套上的输入，
+一律交给 LLM。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .parse_cache import normalize_command
+
+logger = logging.getLogger("xwe.nlp")
+
+MODEL_VERSION = 1
+
+# 无法识别的标准命令，不作为分类标签
+UNKNOWN_COMMANDS = {"未知", "unknown"}
+
+
+@dataclass
+class IntentPrediction:
+    """本地分类结果"""
+
+    command: str
+    intent: str
+    args: Dict[str, Any]
+    confidence: float
+
+
+@dataclass
+class _Label:
+    """一个标准命令的训练统计"""
+
+    intent: str
+    examples: int = 0
+    with_args: int = 0
+    # (前缀, 后缀, 参数名) → 出现次数
+    templates: Dict[Tuple[str, str, str], int] = field(default_factory=dict)
+    ngram_counts: Dict[str, int] = field(default_factory=dict)
+    total_ngrams: int = 0
+
+
+class IntentClassifier:
+    """
+    字符 n-gram 朴素贝叶斯意图分类器
+
+    置信度 = 按特征数归一化后的后验（softmax）× 输入 n-gram 在词表中的覆盖率，
+    因此与游戏命令词汇无关的输入置信度很低。
+    """
+
+    def __init__(
+        self,
+        ngram_range: Tuple[int, int] = (1, 3),
+        alpha: float = 0.1,
+        min_examples: int = 2,
+        synonyms: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Args:
+            ngram_range: 字符 n-gram 的长度范围（含两端）
+            alpha: 加性平滑系数
+            min_examples: 标签至少要有多少条样本才参与预测
+            synonyms: 规范化用的同义词表，None 使用解析缓存的默认值
+        """
+        self.ngram_range = tuple(ngram_range)
+        self.alpha = alpha
+        self.min_examples = min_examples
+        self.synonyms = synonyms
+        self._labels: Dict[str, _Label] = {}
+        self._vocabulary: Dict[str, int] = {}
+        self._compiled = False
+        # 编译结果：n-gram → [(标签, 相对未见 n-gram 的对数概率增量)]
+        self._deltas: Dict[str, List[Tuple[str, float]]] = {}
+        self._unseen: Dict[str, float] = {}
+        self._priors: Dict[str, float] = {}
+        self._templates: Dict[str, List[Tuple[str, str, str]]] = {}
+
+    def __len__(self) -> int:
+        return sum(label.examples for label in self._labels.values())
+
+    @property
+    def labels(self) -> List[str]:
+        return [name for name, label in self._labels.items() if label.examples >= self.min_examples]
+
+    def _normalize(self, text: str) -> str:
+        return normalize_command(text, self.synonyms)
+
+    def _features(self, text: str) -> List[str]:
+        """带首尾标记的字符 n-gram"""
+        padded = f"^{text}$"
+        low, high = self.ngram_range
+        features = []
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                gram = padded[i:i + n]
+                if gram not in ("^", "$"):
+                    features.append(gram)
+        return features
+
+    # ------------------------------------------------------------------
+    # 训练
+    # ------------------------------------------------------------------
+
+    def add_example(
+        self, text: str, command: str, intent: str, args: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        加入一条已标注的解析结果
+
+        Args:
+            text: 玩家原始输入
+            command: 标准命令
+            intent: 意图类别
+            args: LLM 抽取的参数
+
+        Returns:
+            是否被采用（多步命令、未知命令和空输入不采用）
+        """
+        if not isinstance(command, str) or not command or command in UNKNOWN_COMMANDS:
+            return False
+        normalized = self._normalize(text)
+        if not normalized:
+            return False
+
+        label = self._labels.get(command)
+        if label is None:
+            label = self._labels[command] = _Label(intent=intent or "unknown")
+        label.examples += 1
+
+        if isinstance(args, dict) and args:
+            label.with_args += 1
+            template = self._template(normalized, args)
+            if template is not None:
+                label.templates[template] = label.templates.get(template, 0) + 1
+
+        for gram in self._features(normalized):
+            label.ngram_counts[gram] = label.ngram_counts.get(gram, 0) + 1
+            label.total_ngrams += 1
+            self._vocabulary[gram] = self._vocabulary.get(gram, 0) + 1
+        self._compiled = False
+        return True
+
+    def _template(self, normalized: str, args: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+        """只有一个字符串参数、且其值原样出现在输入里时，记下前后文"""
+        if len(args) != 1:
+            return None
+        (key, value), = args.items()
+        if not isinstance(value, str):
+            return None
+        value = self._normalize(value)
+        index = normalized.find(value) if value else -1
+        if index < 0:
+            return None
+        return normalized[:index], normalized[index + len(value):], key
+
+    def fit(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        批量训练
+
+        Args:
+            records: 字典序列，字段为 text/command/intent/args（``NLPMonitor.get_labeled_parses``
+                和 ``export_labeled_parses`` 的格式）
+
+        Returns:
+            采用的样本数
+        """
+        used = 0
+        for record in records:
+            used += self.add_example(
+                record.get("text", ""),
+                record.get("command", ""),
+                record.get("intent", ""),
+                record.get("args"),
+            )
+        return used
+
+    @classmethod
+    def from_monitor(cls, monitor: Any, min_confidence: float = 0.8, **kwargs: Any) -> "IntentClassifier":
+        """用监控器里记录的 LLM 解析结果训练"""
+        classifier = cls(**kwargs)
+        classifier.fit(monitor.get_labeled_parses(min_confidence=min_confidence))
+        return classifier
+
+    def _compile(self) -> None:
+        """把计数换算成对数概率，只保存与未见 n-gram 不同的增量"""
+        vocab_size = len(self._vocabulary) + 1
+        labels = {name: self._labels[name] for name in self.labels}
+        total_examples = sum(label.examples for label in labels.values())
+        deltas: Dict[str, List[Tuple[str, float]]] = {}
+        unseen: Dict[str, float] = {}
+        priors: Dict[str, float] = {}
+        templates: Dict[str, List[Tuple[str, str, str]]] = {}
+        for name, label in labels.items():
+            denominator = label.total_ngrams + self.alpha * vocab_size
+            unseen[name] = math.log(self.alpha / denominator)
+            priors[name] = math.log(label.examples / total_examples)
+            for gram, count in label.ngram_counts.items():
+                delta = math.log((count + self.alpha) / denominator) - unseen[name]
+                deltas.setdefault(gram, []).append((name, delta))
+            # 模板按具体程度（前后文总长）优先，其次按出现次数
+            ranked = sorted(label.templates.items(), key=lambda item: (-len(item[0][0]) - len(item[0][1]), -item[1]))
+            templates[name] = [template for template, _ in ranked]
+        # 整体替换，并发预测不会看到编译了一半的表
+        self._deltas, self._unseen, self._priors, self._templates = deltas, unseen, priors, templates
+        self._compiled = True
+
+    # ------------------------------------------------------------------
+    # 预测
+    # ------------------------------------------------------------------
+
+    def predict(self, text: str) -> Optional[IntentPrediction]:
+        """
+        预测标准命令
+
+        Returns:
+            预测结果；模型为空、输入为空，或最可能的标签需要参数却抽取不到时返回 None
+        """
+        if not self._compiled:
+            self._compile()
+        if not self._priors:
+            return None
+        normalized = self._normalize(text)
+        if not normalized:
+            return None
+
+        features = self._features(normalized)
+        n = len(features)
+        scores = {name: prior + n * self._unseen[name] for name, prior in self._priors.items()}
+        known = 0
+        deltas = self._deltas
+        for gram in features:
+            entries = deltas.get(gram)
+            if entries is None:
+                continue
+            known += 1
+            for name, delta in entries:
+                scores[name] += delta
+
+        # 按特征数归一化后做 softmax，避免长输入的后验被推到 0/1
+        best = max(scores, key=scores.__getitem__)
+        top = scores[best]
+        total = sum(math.exp((score - top) / n) for score in scores.values())
+        confidence = (1.0 / total) * (known / n)
+
+        label = self._labels[best]
+        args: Dict[str, Any] = {}
+        if label.with_args * 2 >= label.examples:
+            args = self._extract_args(normalized, self._templates[best])
+            if args is None:
+                return None
+        return IntentPrediction(best, label.intent, args, confidence)
+
+    @staticmethod
+    def _extract_args(normalized: str, templates: List[Tuple[str, str, str]]) -> Optional[Dict[str, Any]]:
+        """套用第一个能匹配的模板"""
+        for prefix, suffix, key in templates:
+            if (
+                len(normalized) > len(prefix) + len(suffix)
+                and normalized.startswith(prefix)
+                and normalized.endswith(suffix)
+            ):
+                value = normalized[len(prefix):len(normalized) - len(suffix)].strip()
+                if value:
+                    return {key: value}
+        return None
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": MODEL_VERSION,
+            "ngram_range": list(self.ngram_range),
+            "alpha": self.alpha,
+            "min_examples": self.min_examples,
+            "labels": {
+                name: {
+                    "intent": label.intent,
+                    "examples": label.examples,
+                    "with_args": label.with_args,
+                    "templates": [[p, s, k, c] for (p, s, k), c in label.templates.items()],
+                    "ngram_counts": label.ngram_counts,
+                }
+                for name, label in self._labels.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], synonyms: Optional[Dict[str, str]] = None) -> "IntentClassifier":
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"不支持的意图模型版本: {data.get('version')}")
+        classifier = cls(
+            ngram_range=tuple(data["ngram_range"]),
+            alpha=data["alpha"],
+            min_examples=data["min_examples"],
+            synonyms=synonyms,
+        )
+        for name, raw in data["labels"].items():
+            label = _Label(intent=raw["intent"], examples=raw["examples"], with_args=raw["with_args"])
+            label.templates = {(p, s, k): c for p, s, k, c in raw["templates"]}
+            label.ngram_counts = dict(raw["ngram_counts"])
+            label.total_ngrams = sum(label.ngram_counts.values())
+            for gram, count in label.ngram_counts.items():
+                classifier._vocabulary[gram] = classifier._vocabulary.get(gram, 0) + count
+            classifier._labels[name] = label
+        return classifier
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, synonyms: Optional[Dict[str, str]] = None) -> "IntentClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f), synonyms)
@@ -9,13 +9,10 @@ import json
 import logging
 import os
 from concurrent.futures import ThreadPoolExecutor
-from time import sleep, time
-from typing import Any, Dict, Optional
+from time import time
+from typing import Any, Dict, List, Optional
 
-try:
-    import requests
-except ImportError:  # pragma: no cover - 环境缺少 requests 时使用占位对象
-    requests = None
+from .http_transport import LLMHttpTransport, RetryPolicy, TransportError
 
 # 导入 Prometheus 指标收集器
 try:
@@ -26,34 +23,6 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
-# 尝试导入 backoff，如果不存在则使用简单的重试装饰器
-try:
-    import backoff
-    HAS_BACKOFF = True
-except ImportError:
-    HAS_BACKOFF = False
-    logger.warning("backoff 模块未安装，使用简单重试机制")
-
-
-def simple_retry(max_tries=3, delay=1.0):
-    """简单的重试装饰器（当 backoff 不可用时使用）"""
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(max_tries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    if attempt < max_tries - 1:
-                        sleep(delay * (attempt + 1))  # 递增延迟
-                    else:
-                        raise
-            raise last_exception
-        return wrapper
-    return decorator
-
 
 class LLMClient:
     """
@@ -62,6 +31,8 @@ class LLMClient:
     新增功能：
     - 可配置重试次数 (XWE_MAX_LLM_RETRIES)
     - 改进的错误处理和日志记录
+    - 持久连接池 (LLM_POOL_SIZE)，同步和异步请求都复用 keep-alive 连接
+    - 原生异步请求路径，不再占用线程池
     """
 
     def __init__(
@@ -71,6 +42,8 @@ class LLMClient:
         model_name: str = "deepseek-chat",
         timeout: int = 30,
         debug: bool = False,
+        pool_size: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None,
     ):
         """
         初始化客户端
@@ -81,6 +54,8 @@ class LLMClient:
             model_name: 模型名称
             timeout: 请求超时时间（秒）
             debug: 是否启用调试模式
+            pool_size: 连接池大小，默认读取 LLM_POOL_SIZE
+            retry_policy: 重试策略，默认按 XWE_MAX_LLM_RETRIES 构造
         """
         # 读取 API Key
         self.api_key = api_key or os.environ.get("DEEPSEEK_API_KEY")
@@ -94,31 +69,32 @@ class LLMClient:
         
         # 可配置的重试次数
         self.max_retries = int(os.getenv("XWE_MAX_LLM_RETRIES", "3"))
+        self.retry_policy = retry_policy or RetryPolicy(max_tries=self.max_retries)
 
         # 请求头
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
-        
-        # 初始化线程池执行器（用于异步包装）
-        self._executor = ThreadPoolExecutor(
-            max_workers=int(os.getenv("LLM_ASYNC_WORKERS", "5")),
-            thread_name_prefix="llm_async_"
+
+        # 连接池传输层，同步/异步共用重试策略
+        self.pool_size = pool_size or int(os.getenv("LLM_POOL_SIZE", "10"))
+        self.transport = LLMHttpTransport(
+            headers=self.headers,
+            timeout=self.timeout,
+            pool_size=self.pool_size,
+            retry_policy=self.retry_policy,
         )
+
+        # 线程池仅在缺少 httpx 时作为异步回退，按需创建
+        self._executor: Optional[ThreadPoolExecutor] = None
         self._executor_initialized = True
-        logger.info(f"LLMClient 线程池初始化完成，工作线程数: {self._executor._max_workers}")
         
         # Prometheus 指标收集器
         self.metrics_collector = None
         if PROMETHEUS_ENABLED:
             self.metrics_collector = get_metrics_collector()
             self.prometheus_enabled = os.getenv('ENABLE_PROMETHEUS', 'true').lower() == 'true'
-            # 更新线程池大小指标
-            if self.prometheus_enabled:
-                self.metrics_collector.update_async_metrics(
-                    thread_pool_size=self._executor._max_workers
-                )
         else:
             self.prometheus_enabled = False
     
@@ -127,39 +103,61 @@ class LLMClient:
         self.cleanup()
     
     def cleanup(self):
-        """清理线程池资源"""
+        """关闭连接池和线程池资源"""
         if hasattr(self, '_executor_initialized') and self._executor_initialized:
+            self._executor_initialized = False
             try:
-                self._executor.shutdown(wait=True, cancel_futures=True)
-                self._executor_initialized = False
-                logger.info("LLMClient 线程池已关闭")
+                self.transport.close()
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True, cancel_futures=True)
+                    self._executor = None
+                logger.info("LLMClient 连接池已关闭")
             except Exception as e:
-                logger.warning(f"关闭线程池时出错: {e}")
+                logger.warning(f"关闭连接池时出错: {e}")
 
-    def _make_request_with_retry(self, payload: Dict) -> Dict:
-        """发送请求的包装方法"""
-        if HAS_BACKOFF:
-            # 使用 backoff 库的高级重试机制
-            @backoff.on_exception(
-                backoff.expo,
-                (requests.exceptions.RequestException, requests.exceptions.Timeout),
-                max_tries=self.max_retries,
-                max_time=60,
+    async def aclose(self):
+        """在事件循环中关闭异步连接池"""
+        if self._executor_initialized:
+            await self.transport.aclose()
+        self.cleanup()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取回退用的线程池"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("LLM_ASYNC_WORKERS", "5")),
+                thread_name_prefix="llm_async_"
             )
-            def _request():
-                return self._make_request(payload)
-            return _request()
-        else:
-            # 使用简单重试机制
-            @simple_retry(max_tries=self.max_retries, delay=1.0)
-            def _request():
-                return self._make_request(payload)
-            return _request()
+            if self.prometheus_enabled and self.metrics_collector:
+                self.metrics_collector.update_async_metrics(
+                    thread_pool_size=self._executor._max_workers
+                )
+            logger.info(f"LLMClient 回退线程池初始化完成，工作线程数: {self._executor._max_workers}")
+        return self._executor
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """连接池使用情况"""
+        return self.transport.get_pool_stats()
 
+    def _make_request_with_retry(self, payload: Dict) -> Dict:
+        """发送请求，按重试策略重试"""
+        try:
+            return self.transport.post_json(self.api_url, payload)
+        except TransportError as e:
+            self._log_transport_error(e)
+            raise
+
+    async def _make_request_with_retry_async(self, payload: Dict) -> Dict:
+        """异步发送请求，按重试策略重试"""
+        try:
+            return await self.transport.post_json_async(self.api_url, payload)
+        except TransportError as e:
+            self._log_transport_error(e)
+            raise
 
     def _make_request(self, payload: Dict) -> Dict:
         """
-        发送请求到 DeepSeek API
+        发送请求到 DeepSeek API（单次，不重试）
 
         Args:
             payload: 请求载荷
@@ -167,37 +165,46 @@ class LLMClient:
         Returns:
             API响应
         """
-        if requests is None:
-            raise ImportError("The 'requests' package is required for network operations")
-
-        start_time = time()
         try:
-            response = requests.post(
-                self.api_url, headers=self.headers, json=payload, timeout=self.timeout
-            )
-            response.raise_for_status()
-            
-            # 记录 API 调用延迟
-            if self.prometheus_enabled and self.metrics_collector:
-                duration = time() - start_time
-                self.metrics_collector.record_api_call(
-                    api_name="deepseek",
-                    endpoint=self.api_url,
-                    duration=duration
-                )
-            
-            return response.json()
-
-        except requests.exceptions.Timeout:
-            logger.warning(f"Request to DeepSeek API timed out after {self.timeout}s")
+            return self.transport.send(self.api_url, payload)
+        except TransportError as e:
+            self._log_transport_error(e)
             raise
 
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Request to DeepSeek API failed: {e}")
-            if hasattr(e, "response") and e.response is not None:
-                logger.warning(f"Response status: {e.response.status_code}")
-                logger.warning(f"Response body: {e.response.text}")
-            raise
+    def _log_transport_error(self, error: TransportError) -> None:
+        logger.warning(f"Request to DeepSeek API failed: {error}")
+        if error.status_code is not None:
+            logger.warning(f"Response status: {error.status_code}")
+            logger.warning(f"Response body: {error.body}")
+
+    def _build_payload(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Dict:
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+
+    @staticmethod
+    def _build_messages(prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        messages = []
+        # 添加系统提示（如果有）
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        # 添加用户消息
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _extract_content(self, response: Dict) -> str:
+        """提取响应文本"""
+        if self.debug:
+            logger.debug(
+                f"DeepSeek full response: {json.dumps(response, ensure_ascii=False)}"
+            )
+        if "choices" in response and len(response["choices"]) > 0:
+            return response["choices"][0].get("message", {}).get("content", "")
+        logger.error(f"Unexpected response format: {response}")
+        return ""
 
     def chat(
         self,
@@ -218,22 +225,9 @@ class LLMClient:
         Returns:
             模型响应文本
         """
-        messages = []
-
-        # 添加系统提示（如果有）
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-
-        # 添加用户消息
-        messages.append({"role": "user", "content": prompt})
-
-        # 构建请求载荷
-        payload = {
-            "model": self.model_name,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-        }
+        payload = self._build_payload(
+            self._build_messages(prompt, system_prompt), temperature, max_tokens
+        )
 
         logger.debug(
             f"Sending request to DeepSeek API: {json.dumps(payload, ensure_ascii=False)[:200]}..."
@@ -243,22 +237,8 @@ class LLMClient:
             # 发送请求（带重试）
             start_time = time()
             response = self._make_request_with_retry(payload)
-            elapsed = time() - start_time
-
-            logger.debug(f"DeepSeek API response received in {elapsed:.2f}s")
-            
-            if self.debug:
-                logger.debug(
-                    f"DeepSeek full response: {json.dumps(response, ensure_ascii=False)}"
-                )
-
-            # 提取响应文本
-            if "choices" in response and len(response["choices"]) > 0:
-                content = response["choices"][0].get("message", {}).get("content", "")
-                return content
-            else:
-                logger.error(f"Unexpected response format: {response}")
-                return ""
+            logger.debug(f"DeepSeek API response received in {time() - start_time:.2f}s")
+            return self._extract_content(response)
 
         except Exception as e:
             logger.error(f"Error calling DeepSeek API: {e}")
@@ -272,7 +252,9 @@ class LLMClient:
         system_prompt: Optional[str] = None,
     ) -> str:
         """
-        异步发送聊天请求（线程池包装）
+        异步发送聊天请求
+
+        直接在事件循环中通过连接池发送；未安装 httpx 时回退到线程池。
         
         Args:
             prompt: 用户提示
@@ -296,21 +278,24 @@ class LLMClient:
             ```
         """
         if not self._executor_initialized:
-            raise RuntimeError("LLMClient 线程池已关闭")
-        
-        loop = asyncio.get_event_loop()
-
-        func = functools.partial(
-            self.chat,
-            prompt,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            system_prompt=system_prompt
-        )
+            raise RuntimeError("LLMClient 已关闭")
+
+        if not self.transport.supports_async:
+            func = functools.partial(
+                self.chat,
+                prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                system_prompt=system_prompt
+            )
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func)
 
+        payload = self._build_payload(
+            self._build_messages(prompt, system_prompt), temperature, max_tokens
+        )
         try:
-            result = await loop.run_in_executor(self._executor, func)
-            return result
+            response = await self._make_request_with_retry_async(payload)
+            return self._extract_content(response)
         except Exception as e:
             logger.error(f"Async chat error: {e}")
             raise
@@ -329,25 +314,11 @@ class LLMClient:
         Returns:
             模型响应文本
         """
-        payload = {
-            "model": self.model_name,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-        }
+        payload = self._build_payload(messages, temperature, max_tokens)
 
         try:
             response = self._make_request_with_retry(payload)
-            if self.debug:
-                logger.debug(
-                    f"DeepSeek full response: {json.dumps(response, ensure_ascii=False)}"
-                )
-
-            if "choices" in response and len(response["choices"]) > 0:
-                content = response["choices"][0].get("message", {}).get("content", "")
-                return content
-            else:
-                return ""
+            return self._extract_content(response)
 
         except Exception as e:
             logger.error(f"Error in chat_with_context: {e}")
@@ -357,7 +328,7 @@ class LLMClient:
         self, messages: list, temperature: float = 0.7, max_tokens: int = 256
     ) -> str:
         """
-        异步带上下文的聊天（线程池包装）
+        异步带上下文的聊天
         
         Args:
             messages: 消息历史列表，格式为 [{"role": "user/assistant/system", "content": "..."}]
@@ -379,22 +350,21 @@ class LLMClient:
             ```
         """
         if not self._executor_initialized:
-            raise RuntimeError("LLMClient 线程池已关闭")
-        
-        loop = asyncio.get_event_loop()
-        
-        # 使用 functools.partial 创建带参数的函数
-        func = functools.partial(
-            self.chat_with_context,
-            messages,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        
-        # 在线程池中执行
+            raise RuntimeError("LLMClient 已关闭")
+
+        if not self.transport.supports_async:
+            func = functools.partial(
+                self.chat_with_context,
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func)
+
+        payload = self._build_payload(messages, temperature, max_tokens)
         try:
-            result = await loop.run_in_executor(self._executor, func)
-            return result
+            response = await self._make_request_with_retry_async(payload)
+            return self._extract_content(response)
         except Exception as e:
             logger.error(f"Async chat_with_context error: {e}")
             raise
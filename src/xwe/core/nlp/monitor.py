@@ -36,6 +36,9 @@ class RequestMetrics:
     use_cache: bool
     error: Optional[str] = None
     token_count: int = 0
+    source: str = "llm"  # 解析来源：llm / cache / local / fallback
+    intent: str = ""
+    args: Optional[Dict[str, Any]] = None
     
 
 _instance = None
@@ -61,6 +64,14 @@ class NLPMonitor:
         self.total_cache_hits = 0
         self.total_duration = 0.0
         self.total_tokens = 0
+
+        # 解析缓存统计（按层级）
+        self.cache_memory_hits = 0
+        self.cache_disk_hits = 0
+        self.cache_misses = 0
+
+        # 解析来源统计（本地意图分类器 / LLM / 解析缓存 / 本地回退）
+        self.intent_tiers: Dict[str, int] = {"local": 0, "llm": 0, "cache": 0, "fallback": 0}
         
         # 命令统计
         self.command_stats: Dict[str, int] = {}
@@ -85,6 +96,9 @@ class NLPMonitor:
                       token_count: int = 0,
                       context_compression_enabled: bool = False,
                       context_compression_ratio: float = 1.0,
+                      source: str = "llm",
+                      intent: str = "",
+                      args: Optional[Dict[str, Any]] = None,
                       **kwargs) -> None:
         """
         记录请求
@@ -98,6 +112,9 @@ class NLPMonitor:
             use_cache: 是否使用缓存
             error: 错误信息
             token_count: token使用量
+            source: 解析来源（llm / cache / local / fallback）
+            intent: 意图类别
+            args: 解析出的参数（与命令、意图一起作为本地意图分类器的训练样本）
         """
         # 创建度量对象
         metric = RequestMetrics(
@@ -109,7 +126,10 @@ class NLPMonitor:
             confidence=confidence,
             use_cache=use_cache,
             error=error,
-            token_count=token_count
+            token_count=token_count,
+            source=source,
+            intent=intent,
+            args=args,
         )
         
         # 添加到历史
@@ -152,6 +172,107 @@ class NLPMonitor:
                 context_compression_ratio=context_compression_ratio
             )
             
+    def record_cache_lookup(self, tier: Optional[str]) -> None:
+        """
+        记录一次解析缓存查找
+
+        Args:
+            tier: 命中的层级（"memory" / "disk"），未命中为 None
+        """
+        if tier == "memory":
+            self.cache_memory_hits += 1
+        elif tier == "disk":
+            self.cache_disk_hits += 1
+        else:
+            self.cache_misses += 1
+
+        if self.prometheus_enabled and self.metrics_collector:
+            try:
+                self.metrics_collector.record_nlp_cache_lookup(tier or "miss")
+            except Exception as e:
+                logger.error(f"更新 Prometheus 指标失败: {e}")
+
+    def record_intent_tier(self, tier: str) -> None:
+        """
+        记录一次解析由哪一层给出
+
+        Args:
+            tier: "local"（本地意图分类器）/ "llm" / "cache" / "fallback"
+        """
+        self.intent_tiers[tier] = self.intent_tiers.get(tier, 0) + 1
+
+        if self.prometheus_enabled and self.metrics_collector:
+            try:
+                self.metrics_collector.record_nlp_intent_tier(tier)
+            except Exception as e:
+                logger.error(f"更新 Prometheus 指标失败: {e}")
+
+    def get_intent_tier_stats(self) -> Dict[str, Any]:
+        """各解析层的次数，以及本地分类器与 LLM 的占比"""
+        total = sum(self.intent_tiers.values())
+        stats: Dict[str, Any] = dict(self.intent_tiers)
+        stats["local_hit_rate"] = round(self.intent_tiers["local"] / total * 100, 2) if total else 0
+        stats["llm_rate"] = round(self.intent_tiers["llm"] / total * 100, 2) if total else 0
+        return stats
+
+    def get_labeled_parses(self, min_confidence: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        历史中可作为本地意图分类器训练样本的解析结果
+
+        只取成功的、来自 LLM（含解析缓存）的单条命令，本地层和回退层自己的输出不算。
+
+        Args:
+            min_confidence: 最低置信度
+
+        Returns:
+            字典列表，字段为 text/command/intent/args/confidence
+        """
+        return [
+            {
+                "text": r.command,
+                "command": r.handler,
+                "intent": r.intent,
+                "args": r.args or {},
+                "confidence": r.confidence,
+            }
+            for r in self.request_history
+            if r.success
+            and r.source in ("llm", "cache")
+            and isinstance(r.handler, str)
+            and r.handler not in ("unknown", "未知")
+            and r.confidence >= min_confidence
+        ]
+
+    def export_labeled_parses(self, filepath: str, min_confidence: float = 0.0) -> int:
+        """
+        追加导出训练样本（JSON Lines），供离线训练本地意图分类器
+
+        Returns:
+            导出的条数，失败返回 -1
+        """
+        records = self.get_labeled_parses(min_confidence)
+        try:
+            with open(filepath, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error(f"导出训练样本失败: {e}")
+            return -1
+        logger.info(f"已导出 {len(records)} 条训练样本到 {filepath}")
+        return len(records)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """解析缓存统计，命中次数即节省的 LLM 调用次数"""
+        hits = self.cache_memory_hits + self.cache_disk_hits
+        lookups = hits + self.cache_misses
+        return {
+            "memory_hits": self.cache_memory_hits,
+            "disk_hits": self.cache_disk_hits,
+            "misses": self.cache_misses,
+            "llm_calls_saved": hits,
+            "hit_rate": round(hits / lookups * 100, 2) if lookups > 0 else 0,
+        }
+
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
         uptime = time.time() - self.start_time
@@ -194,6 +315,8 @@ class NLPMonitor:
             "success_rate": round(success_rate, 2),
             "total_cache_hits": self.total_cache_hits,
             "cache_hit_rate": round(cache_hit_rate, 2),
+            "parse_cache": self.get_cache_stats(),
+            "intent_tiers": self.get_intent_tier_stats(),
             "avg_duration_ms": round(avg_duration * 1000, 2),
             "recent_avg_duration_ms": round(recent_avg_duration * 1000, 2),
             "total_tokens": self.total_tokens,
@@ -229,6 +352,8 @@ class NLPMonitor:
 总请求数: {stats['total_requests']}
 成功率: {stats['success_rate']}%
 缓存命中率: {stats['cache_hit_rate']}%
+节省LLM调用: {stats['parse_cache']['llm_calls_saved']}次
+本地意图命中率: {stats['intent_tiers']['local_hit_rate']}%
 
 平均响应时间: {stats['avg_duration_ms']}ms
 最近5分钟平均: {stats['recent_avg_duration_ms']}ms
@@ -264,6 +389,7 @@ Token使用量: {stats['total_tokens']}
                         "success": r.success,
                         "confidence": r.confidence,
                         "use_cache": r.use_cache,
+                        "source": r.source,
                         "error": r.error
                     }
                     for r in list(self.request_history)[-100:]  # 最近100条
@@ -3,18 +3,21 @@
 基于 DeepSeek API 的自然语言指令处理模块
 """
 
+import hashlib
 import json
 import logging
 import os
 import re
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 import time
-from functools import lru_cache
 
+from .coalescer import MicroBatcher, SingleFlight
 from .llm_client import LLMClient
 from .config import get_nlp_config
+from .intent_classifier import IntentClassifier
 from .monitor import get_nlp_monitor
+from .parse_cache import ParseCache, normalize_command
 from . import tool_router
 from ..context import ContextCompressor
 
@@ -66,15 +69,21 @@ class DeepSeekNLPProcessor:
             debug=self.config.get("debug_mode", False),
         )
 
-        # 初始化缓存
-        self._cache_size = cache_size or self.config.get("cache_size", 128)
-        self._init_cache()
-
         # 初始化本地回退处理器
         self._init_fallback_handler()
 
         # 加载prompt模板
         self._init_prompt_template()
+
+        # 初始化缓存（命名空间依赖 prompt 模板）
+        self._cache_size = cache_size or self.config.get("cache_size", 128)
+        self._init_cache()
+
+        # 初始化 LLM 请求合并
+        self._init_llm_batching()
+
+        # 初始化本地意图分类层
+        self._init_local_intent()
         
         # 初始化上下文压缩器
         context_config = self.config.get("context_compression", {})
@@ -85,7 +94,10 @@ class DeepSeekNLPProcessor:
                     window_size=context_config.get("window_size", 20),
                     block_size=context_config.get("block_size", 30),
                     max_memory_blocks=context_config.get("max_memory_blocks", 10),
-                    enable_compression=True
+                    enable_compression=True,
+                    background=context_config.get("background", True),
+                    token_counter=context_config.get("tokenizer"),
+                    max_context_tokens=context_config.get("max_context_tokens")
                 )
                 logger.info("上下文压缩器已启用")
             except Exception as e:
@@ -101,15 +113,101 @@ class DeepSeekNLPProcessor:
         self._conversation_history = []
 
     def _init_cache(self):
-        """初始化缓存"""
+        """初始化两级解析缓存"""
+        cache_config = self.config.get("parse_cache", {})
+        self._cache_synonyms = cache_config.get("synonyms")
+        self.parse_cache = ParseCache(
+            max_size=self._cache_size,
+            ttl=cache_config.get("ttl", 3600),
+            db_path=os.getenv("XWE_NLP_CACHE_DB") or cache_config.get("db_path"),
+            namespace=ParseCache.make_namespace(
+                self.config.get("model", "deepseek-chat"), self.prompt_template
+            ),
+        )
+
+    def _cache_key(self, user_input: str, prompt: Optional[str] = None) -> str:
+        """
+        缓存键：清理后的输入再做规范化
+
+        传入 prompt 时附加对话上下文摘要，同一输入在不同对话状态下不会共用结果。
+        """
+        key = normalize_command(self._sanitize_user_input(user_input), self._cache_synonyms)
+        if prompt is None:
+            return key
+        context = self._prompt_context(self._sanitize_user_input(user_input), prompt)
+        return f"{key}#{hashlib.sha1(context.encode('utf-8')).hexdigest()[:16]}"
+
+    def _init_llm_batching(self):
+        """初始化 LLM 请求合并：同键合并与微批处理"""
+        batch_config = self.config.get("llm_batching", {})
+        self._inflight = SingleFlight() if batch_config.get("coalesce", True) else None
+        max_batch_size = batch_config.get("max_batch_size", 8)
+        if batch_config.get("enabled", True) and max_batch_size > 1:
+            self._batcher = MicroBatcher(
+                self._call_deepseek_batch,
+                window=batch_config.get("window", 0.02),
+                max_batch_size=max_batch_size,
+            )
+        else:
+            self._batcher = None
 
-        # 使用LRU缓存装饰器创建缓存函数
-        @lru_cache(maxsize=self._cache_size)
-        def _cached_parse(text: str) -> str:
-            prompt = self.build_prompt(text)
-            return self._call_deepseek_api(prompt)
+    def get_batching_stats(self) -> Dict[str, Any]:
+        """请求合并统计"""
+        return {
+            "coalesce": self._inflight.get_stats() if self._inflight else None,
+            "batching": self._batcher.get_stats() if self._batcher else None,
+        }
+
+    def _init_local_intent(self):
+        """初始化本地意图分类层，配置了模型文件才会加载"""
+        intent_config = self.config.get("local_intent", {})
+        self.local_intent_enabled = intent_config.get("enabled", True)
+        self.local_intent_threshold = intent_config.get("confidence_threshold", 0.8)
+        self.intent_classifier: Optional[IntentClassifier] = None
+
+        model_path = os.getenv("XWE_INTENT_MODEL") or intent_config.get("model_path")
+        if self.local_intent_enabled and model_path:
+            try:
+                self.intent_classifier = IntentClassifier.load(model_path, self._cache_synonyms)
+                logger.info(f"本地意图模型已加载: {model_path} ({len(self.intent_classifier)} 条样本)")
+            except Exception as e:
+                logger.warning(f"加载本地意图模型失败: {e}，所有解析交给 LLM")
 
-        self._cached_parse = _cached_parse
+    def set_intent_classifier(self, classifier: Optional[IntentClassifier]) -> None:
+        """替换本地意图分类器（None 表示停用本地层）"""
+        self.intent_classifier = classifier
+
+    def train_local_intent(self, min_confidence: float = 0.8) -> int:
+        """
+        用监控器历史中的 LLM 解析结果重新训练本地意图分类器
+
+        Args:
+            min_confidence: 样本的最低置信度
+
+        Returns:
+            训练样本数
+        """
+        classifier = IntentClassifier.from_monitor(
+            get_nlp_monitor(), min_confidence=min_confidence, synonyms=self._cache_synonyms
+        )
+        self.intent_classifier = classifier
+        return len(classifier)
+
+    def _classify_locally(self, user_input: str) -> Optional[Dict]:
+        """本地意图分类，置信度不够时返回 None"""
+        if not self.local_intent_enabled or self.intent_classifier is None:
+            return None
+        prediction = self.intent_classifier.predict(self._sanitize_user_input(user_input))
+        if prediction is None or prediction.confidence < self.local_intent_threshold:
+            return None
+        return {
+            "raw": user_input,
+            "normalized_command": prediction.command,
+            "intent": prediction.intent,
+            "args": prediction.args,
+            "explanation": "本地意图分类",
+            "confidence": round(prediction.confidence, 3),
+        }
 
     def _init_fallback_handler(self):
         """初始化本地回退处理器"""
@@ -271,10 +369,8 @@ class DeepSeekNLPProcessor:
         # 如果启用了上下文压缩器
         if self.context_compressor:
             try:
-                # 将当前输入添加到压缩器
-                self.context_compressor.append(f"用户: {safe_input}")
-                
-                # 获取压缩后的上下文
+                # 只取已完成的对话作为上下文，当前输入单独列出，解析完成后由 parse 记录；
+                # 这样并发到达的输入上下文相同，可以合并成一批
                 compressed_context = self.context_compressor.get_context()
                 
                 # 构建带上下文的 prompt
@@ -318,11 +414,6 @@ class DeepSeekNLPProcessor:
         
         # 传统模式（无压缩或压缩失败时）
         try:
-            # 添加到历史记录
-            self._conversation_history.append(f"用户: {safe_input}")
-            if len(self._conversation_history) > 50:  # 限制历史长度
-                self._conversation_history = self._conversation_history[-30:]
-            
             # 构建基础 prompt
             base_prompt = self.prompt_template.replace('"{}"', f'"{safe_input}"')
             
@@ -499,6 +590,138 @@ class DeepSeekNLPProcessor:
             logger.error(f"DeepSeek API 调用失败: {e}", exc_info=True)
             raise
 
+    def _request_llm(self, user_input: str, prompt: str, cache_key: Optional[str]) -> str:
+        """
+        向 LLM 请求解析结果
+
+        规范化输入与对话上下文都相同的并发请求只调用一次；启用微批处理时，
+        其他调用在途期间到达的、上下文相同的不同输入会与之打包进同一个 prompt。
+
+        Args:
+            user_input: 用户输入
+            prompt: 单条解析用的完整 prompt
+            cache_key: 缓存键，None 表示不缓存，此时也不与其他请求合并
+
+        Returns:
+            API返回的JSON字符串
+        """
+        if self._batcher is None:
+            call = lambda: self._call_deepseek_api(prompt)
+        else:
+            call = lambda: self._batcher.submit((self._sanitize_user_input(user_input), prompt))
+        if self._inflight is None or cache_key is None:
+            return call()
+        json_response, shared = self._inflight.do(cache_key, call)
+        if shared:
+            logger.debug(f"合并了进行中的相同请求: {cache_key}")
+        return json_response
+
+    @staticmethod
+    def _prompt_context(text: str, prompt: str) -> str:
+        """单条 prompt 去掉当前输入后的部分，相同才能合并为一批"""
+        return '"{}"'.join(prompt.rsplit(f'"{text}"', 1))
+
+    def _build_batch_prompt(self, context: str, inputs: List[str]) -> str:
+        """
+        构建多条输入的批量 prompt
+
+        沿用这批输入共同的单条 prompt（说明、示例与对话上下文），只把末尾的
+        单条输入换成编号列表，要求按输入顺序输出带 id 的 JSON 数组。
+        """
+        if "现在请根据上述要求" in context:
+            head = context.rsplit("现在请根据上述要求", 1)[0]
+        else:
+            head = context.rsplit('输入: "{}"', 1)[0]
+        lines = [f'{i}. 输入: "{text}"' for i, text in enumerate(inputs, 1)]
+        return (
+            f"{head}现在有 {len(inputs)} 条玩家输入，请逐条按上述要求解析，输出一个 JSON 数组："
+            f'第 i 个元素是第 i 条输入的解析结果，并额外带上 "id": i 字段。'
+            "仅输出 JSON 数组，不要其他文本。\n\n" + "\n".join(lines) + "\n输出:\n"
+        )
+
+    def _split_batch_response(self, response: str, count: int) -> List[Optional[str]]:
+        """
+        把批量响应拆回逐条的 JSON 字符串
+
+        Returns:
+            长度为 count 的列表，缺失或格式不正确的条目为 None
+        """
+        results: List[Optional[str]] = [None] * count
+        match = re.search(r"\[.*\]", response or "", re.DOTALL)
+        if not match:
+            logger.warning("批量响应中没有 JSON 数组")
+            return results
+        try:
+            items = json.loads(match.group(0))
+        except json.JSONDecodeError as e:
+            logger.warning(f"批量响应 JSON 解析失败: {e}")
+            return results
+        if not isinstance(items, list):
+            return results
+
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            item = dict(item)
+            index = item.pop("id", position + 1)
+            # 模型偶尔把 id 写成字符串
+            if isinstance(index, str) and index.isdigit():
+                index = int(index)
+            if (
+                isinstance(index, int)
+                and 1 <= index <= count
+                and results[index - 1] is None
+                and self._validate_result(item)
+            ):
+                results[index - 1] = json.dumps(item, ensure_ascii=False)
+        return results
+
+    def _call_deepseek_batch(self, items: List[Tuple[str, str]]) -> List[Any]:
+        """
+        微批处理函数：一个 prompt 解析多条输入
+
+        只有上下文相同（单条 prompt 除输入外完全一致）的输入才合并成一批，
+        其余输入仍用各自的单条 prompt 请求。
+
+        Args:
+            items: (清理后的输入, 单条 prompt) 列表
+
+        Returns:
+            与 items 等长的 JSON 字符串列表；批量响应缺失的条目改用单条 prompt 重新请求，
+            仍失败的条目为异常实例
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, (text, prompt) in enumerate(items):
+            groups.setdefault(self._prompt_context(text, prompt), []).append(index)
+
+        responses: List[Optional[str]] = [None] * len(items)
+        for context, indexes in groups.items():
+            if len(indexes) == 1:
+                continue
+            try:
+                response = self.llm.chat(
+                    self._build_batch_prompt(context, [items[i][0] for i in indexes]),
+                    temperature=self.config.get("temperature", 0.0),
+                    max_tokens=self.config.get("max_tokens", 256) * len(indexes),
+                )
+                logger.debug(f"DeepSeek batch raw response: {response}")
+                parts = self._split_batch_response(response, len(indexes))
+            except Exception as e:
+                logger.warning(f"批量解析调用失败，逐条重试: {e}")
+                continue
+            for i, part in zip(indexes, parts):
+                responses[i] = part
+
+        results: List[Any] = []
+        for (_, prompt), json_response in zip(items, responses):
+            if json_response is None:
+                try:
+                    json_response = self._call_deepseek_api(prompt)
+                except Exception as e:
+                    json_response = e
+            results.append(json_response)
+        return results
+
     def local_fallback(self, user_input: str) -> Dict:
         """
         本地回退解析
@@ -589,6 +812,8 @@ class DeepSeekNLPProcessor:
         success = False
         error_msg = None
         use_fallback = False
+        cache_hit = False
+        source = "llm"
 
         try:
             # 检查是否启用NLP
@@ -601,25 +826,43 @@ class DeepSeekNLPProcessor:
             prompt = self.build_prompt(user_input, context)
             logger.debug(f"DeepSeek prompt: {prompt}")
 
-            # 调用API（带缓存）
+            # 先查缓存，未命中再调用API
+            cache_key = self._cache_key(user_input, prompt) if use_cache else None
+            json_response, cache_tier = (
+                self.parse_cache.lookup(cache_key) if use_cache else (None, None)
+            )
+            cache_hit = json_response is not None
             if use_cache:
-                json_response = self._cached_parse(user_input)
+                get_nlp_monitor().record_cache_lookup(cache_tier)
+
+            # 缓存未命中时先问本地意图分类器，置信度够高就不调用 API
+            result = None if cache_hit else self._classify_locally(user_input)
+            if cache_hit:
+                source = "cache"
+            elif result is not None:
+                source = "local"
+                logger.debug(f"本地意图分类命中: {result}")
             else:
-                json_response = self._call_deepseek_api(prompt)
+                json_response = self._request_llm(user_input, prompt, cache_key)
 
-            logger.debug(f"DeepSeek response string: {json_response}")
+            if result is None:
+                logger.debug(f"DeepSeek response string: {json_response}")
 
-            # 解析JSON
-            try:
-                result = json.loads(json_response)
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON解析错误: {e}; 响应内容: {json_response}")
-                raise
+                # 解析JSON
+                try:
+                    result = json.loads(json_response)
+                except json.JSONDecodeError as e:
+                    logger.error(f"JSON解析错误: {e}; 响应内容: {json_response}")
+                    raise
 
             # 验证结果格式
             if not self._validate_result(result):
                 raise ValueError("返回结果格式不正确")
 
+            # 只缓存 LLM 给出的有效且已识别的结果
+            if use_cache and source == "llm" and result["intent"] != "unknown":
+                self.parse_cache.set(cache_key, json_response)
+
             # 记录性能
             elapsed = time.time() - start_time
             logger.debug(f"DeepSeek解析耗时: {elapsed:.3f}秒")
@@ -636,13 +879,12 @@ class DeepSeekNLPProcessor:
             )
             logger.info(f"Parsed command: {parsed}")
             
-            # 将系统响应添加到上下文（如果启用了压缩器）
+            # 把本轮输入和系统响应一起记入上下文
             if self.context_compressor:
                 response_msg = f"系统: 解析为{parsed.normalized_command}命令 ({parsed.explanation})"
-                self.context_compressor.append(response_msg)
-            elif hasattr(self, '_conversation_history'):
+            else:
                 response_msg = f"系统: 解析为{parsed.normalized_command}命令"
-                self._conversation_history.append(response_msg)
+            self._record_turn(user_input, response_msg)
 
             success = True
             return parsed
@@ -652,8 +894,12 @@ class DeepSeekNLPProcessor:
             logger.error(f"DeepSeek解析失败，使用本地回退: {e}", exc_info=True)
             use_fallback = True
 
+            if "prompt" in locals():
+                self._record_turn(user_input)
+
             # 使用本地回退
             if self.config.get("fallback_enabled", True):
+                source = "fallback"
                 fallback_result = self.local_fallback(user_input)
 
                 parsed = ParsedCommand(
@@ -672,6 +918,8 @@ class DeepSeekNLPProcessor:
                 raise
 
         finally:
+            get_nlp_monitor().record_intent_tier(source)
+
             # 记录监控数据
             if self.config.get("performance_monitoring", True):
                 duration = time.time() - start_time
@@ -690,13 +938,33 @@ class DeepSeekNLPProcessor:
                     duration=duration,
                     success=success,
                     confidence=parsed.confidence if "parsed" in locals() else 0,
-                    use_cache=use_cache and not use_fallback,
+                    use_cache=cache_hit,
                     error=error_msg,
                     token_count=context_stats.get("estimated_total_tokens", 0),
                     context_compression_enabled=self.context_compressor is not None,
-                    context_compression_ratio=context_stats.get("compression_ratio", 1.0)
+                    context_compression_ratio=context_stats.get("compression_ratio", 1.0),
+                    source=source,
+                    intent=parsed.intent if "parsed" in locals() else "",
+                    args=parsed.args if "parsed" in locals() else None,
                 )
 
+    def _record_turn(self, user_input: str, response_msg: Optional[str] = None) -> None:
+        """把一轮对话记入上下文（启用压缩器时写入压缩器，否则写入历史记录）"""
+        messages = [f"用户: {self._sanitize_user_input(user_input)}"]
+        if response_msg:
+            messages.append(response_msg)
+        try:
+            if self.context_compressor:
+                for message in messages:
+                    self.context_compressor.append(message)
+                return
+        except Exception as e:
+            logger.warning(f"记录对话上下文失败: {e}")
+            return
+        self._conversation_history.extend(messages)
+        if len(self._conversation_history) > 50:  # 限制历史长度
+            self._conversation_history = self._conversation_history[-30:]
+
     def _validate_result(self, result: Dict) -> bool:
         """验证解析结果格式"""
         required_fields = ["normalized_command", "intent"]
@@ -718,24 +986,13 @@ class DeepSeekNLPProcessor:
         return results
 
     def clear_cache(self):
-        """清除缓存"""
-        self._cached_parse.cache_clear()
+        """清除缓存（包括磁盘层中当前 prompt 对应的记录）"""
+        self.parse_cache.clear()
         logger.info("命令解析缓存已清除")
 
     def get_cache_info(self) -> Dict:
         """获取缓存信息"""
-        info = self._cached_parse.cache_info()
-        return {
-            "hits": info.hits,
-            "misses": info.misses,
-            "maxsize": info.maxsize,
-            "currsize": info.currsize,
-            "hit_rate": (
-                info.hits / (info.hits + info.misses)
-                if (info.hits + info.misses) > 0
-                else 0
-            ),
-        }
+        return self.parse_cache.info()
     
     def clear_context(self) -> None:
         """清空上下文压缩器和历史记录"""
@@ -0,0 +1,295 @@
+"""
+NLP 解析结果缓存
+
+两级缓存：
+
+- 内存层：带 TTL 的 LRU，进程内命中最快；
+- 磁盘层：SQLite（WAL 模式），重启后仍可用，且可在多个 Gunicorn worker 间共享。
+
+缓存键是用户输入的规范化形式（见 ``normalize_command``），因此 "打开背包"、
+"打开 背包 " 和 "打开背包！" 会命中同一条记录。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认同义词（子串替换，长的优先）
+DEFAULT_SYNONYMS: Dict[str, str] = {
+    "瞧瞧": "看看",
+    "瞅瞅": "看看",
+    "康康": "看看",
+    "行囊": "背包",
+}
+
+# 缓存命中层级
+TIER_MEMORY = "memory"
+TIER_DISK = "disk"
+
+_CJK = r"㐀-䶿一-鿿豈-﫿"
+_SPACE_NEAR_CJK = re.compile(rf"(?<=[{_CJK}])\s+|\s+(?=[{_CJK}])")
+_SPACES = re.compile(r"\s+")
+
+
+def _compile_synonyms(synonyms: Dict[str, str]) -> Optional[re.Pattern]:
+    if not synonyms:
+        return None
+    keys = sorted(synonyms, key=len, reverse=True)
+    return re.compile("|".join(re.escape(k) for k in keys))
+
+
+def normalize_command(text: str, synonyms: Optional[Dict[str, str]] = None) -> str:
+    """
+    把用户输入折叠成缓存键
+
+    依次进行 NFKC 归一化（全角转半角）、转小写、去除标点、折叠空白
+    （中文字符两侧的空白直接去掉），最后做同义词替换。
+
+    Args:
+        text: 输入文本（通常已经过 ``_sanitize_user_input``）
+        synonyms: 同义词表，默认 ``DEFAULT_SYNONYMS``
+
+    Returns:
+        规范化后的文本
+    """
+    synonyms = DEFAULT_SYNONYMS if synonyms is None else synonyms
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch for ch in text
+    )
+    text = _SPACE_NEAR_CJK.sub("", text)
+    text = _SPACES.sub(" ", text).strip()
+    pattern = _compile_synonyms(synonyms)
+    if pattern is not None:
+        text = pattern.sub(lambda m: synonyms[m.group(0)], text)
+    return text
+
+
+@dataclass
+class ParseCacheStats:
+    """缓存统计"""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+
+class ParseCache:
+    """两级（内存 LRU + SQLite）解析缓存"""
+
+    # 每写入多少次清理一次磁盘上的过期记录
+    PURGE_INTERVAL = 256
+
+    def __init__(
+        self,
+        max_size: int = 128,
+        ttl: Optional[float] = 3600.0,
+        db_path: Optional[str] = None,
+        namespace: str = "",
+    ) -> None:
+        """
+        Args:
+            max_size: 内存层最大条目数
+            ttl: 过期时间（秒），None 表示不过期
+            db_path: SQLite 文件路径，None 表示只使用内存层
+            namespace: 命名空间，prompt 或模型变化时应随之变化，避免读到旧结果
+        """
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.db_path = db_path
+        self.namespace = namespace
+        self.stats = ParseCacheStats()
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes_since_purge = 0
+        if db_path:
+            self._open_db(db_path)
+
+    @staticmethod
+    def make_namespace(*parts: str) -> str:
+        """根据 prompt 模板、模型名等生成命名空间"""
+        digest = hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+        return digest[:16]
+
+    # ------------------------------------------------------------------
+    # 磁盘层
+    # ------------------------------------------------------------------
+    def _open_db(self, db_path: str) -> None:
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.commit()
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.warning(f"打开解析缓存数据库失败，仅使用内存缓存: {e}")
+            self._conn = None
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM parse_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"读取解析缓存失败: {e}")
+            return None
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            self.stats.expirations += 1
+            return None
+        return value, expires_at
+
+    def _disk_set(self, key: str, value: str, expires_at: Optional[float], now: float) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (namespace, key, value, expires_at, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, value, expires_at, now),
+            )
+            self._writes_since_purge += 1
+            if self._writes_since_purge >= self.PURGE_INTERVAL:
+                self._writes_since_purge = 0
+                self._conn.execute(
+                    "DELETE FROM parse_cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                    (now,),
+                )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"写入解析缓存失败: {e}")
+
+    # ------------------------------------------------------------------
+    # 公共接口
+    # ------------------------------------------------------------------
+    def lookup(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        查找缓存
+
+        Returns:
+            ``(value, tier)``；未命中时为 ``(None, None)``
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return value, TIER_MEMORY
+                del self._memory[key]
+                self.stats.expirations += 1
+
+            disk_entry = self._disk_get(key, now)
+            if disk_entry is not None:
+                value, expires_at = disk_entry
+                self._memory_set(key, value, expires_at)
+                self.stats.disk_hits += 1
+                return value, TIER_DISK
+
+            self.stats.misses += 1
+            return None, None
+
+    def get(self, key: str) -> Optional[str]:
+        return self.lookup(key)[0]
+
+    def set(self, key: str, value: str) -> None:
+        """写入两级缓存"""
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._memory_set(key, value, expires_at)
+            self._disk_set(key, value, expires_at, now)
+            self.stats.sets += 1
+
+    def _memory_set(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self, persistent: bool = True) -> None:
+        """
+        清空缓存
+
+        Args:
+            persistent: 是否同时清空当前命名空间的磁盘记录
+        """
+        with self._lock:
+            self._memory.clear()
+            if persistent and self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "DELETE FROM parse_cache WHERE namespace = ?", (self.namespace,)
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"清空解析缓存失败: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def info(self) -> Dict:
+        """缓存信息，字段与 ``functools.lru_cache`` 的 ``cache_info`` 兼容"""
+        with self._lock:
+            hits = self.stats.hits
+            total = hits + self.stats.misses
+            return {
+                "hits": hits,
+                "misses": self.stats.misses,
+                "maxsize": self.max_size,
+                "currsize": len(self._memory),
+                "hit_rate": hits / total if total > 0 else 0,
+                "memory_hits": self.stats.memory_hits,
+                "disk_hits": self.stats.disk_hits,
+                "evictions": self.stats.evictions,
+                "expirations": self.stats.expirations,
+                "persistent": self._conn is not None,
+                "ttl": self.ttl,
+            }
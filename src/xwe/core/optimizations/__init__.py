@@ -3,7 +3,7 @@
 
 # 使用相对导入
 from .smart_cache import CacheableFunction, SmartCache
-from .expression_jit import ExpressionBenchmark, ExpressionJITCompiler
+from .expression_jit import BenchmarkResult, ExpressionBenchmark, ExpressionJITCompiler
 
 # 可选的异步事件系统
 try:
@@ -17,6 +17,7 @@ except ImportError:
 __all__ = [
     "ExpressionJITCompiler",
     "ExpressionBenchmark",
+    "BenchmarkResult",
     "SmartCache",
     "CacheableFunction",
     "AsyncEventSystem",
@@ -1,34 +1,76 @@
 """表达式 JIT 编译器和基准测试工具"""
 from __future__ import annotations
 
+import random
 import time
-from typing import Any, Callable, Dict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from ...engine.expression import ExpressionCompiler
+
+# 基准测试默认使用的公式（与 AttributeSystem 保持一致，另加条件和函数调用）
+DEFAULT_BENCHMARK_FORMULAS: Dict[str, str] = {
+    "max_health": "constitution * 10 + strength * 5 + level * 20",
+    "max_mana": "intelligence * 10 + willpower * 5 + level * 10",
+    "attack_power": "strength * 2 + agility * 0.5 + level * 3",
+    "defense": "constitution * 1.5 + strength * 0.5 + level * 2",
+    "crit_damage": "max(1.5, 1.5 + agility * 0.01) if level > 10 else 1.5",
+}
 
 
 class ExpressionJITCompiler:
-    """简单的表达式 JIT 编译器"""
+    """表达式 JIT 编译器，基于带缓存的 ExpressionCompiler"""
 
-    def __init__(self) -> None:
-        self._cache: Dict[str, Any] = {}
+    def __init__(self, compiler: Optional[ExpressionCompiler] = None) -> None:
+        self.compiler = compiler or ExpressionCompiler()
 
     def compile(self, expression: str) -> Callable[..., Any]:
-        """将表达式编译成可调用对象"""
-        if expression not in self._cache:
-            self._cache[expression] = compile(expression, "<expr>", "eval")
-
-        code = self._cache[expression]
+        """将表达式编译成以关键字参数传入变量的可调用对象"""
+        compiled = self.compiler.compile(expression)
 
         def func(**variables: Any) -> Any:
-            return eval(code, {"__builtins__": {}}, variables)
+            return compiled.evaluate(variables)
 
         return func
 
 
+@dataclass
+class BenchmarkResult:
+    """单个求值方式的基准结果"""
+
+    strategy: str
+    evaluations: int
+    seconds: float
+
+    @property
+    def per_eval_us(self) -> float:
+        return self.seconds / self.evaluations * 1e6 if self.evaluations else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "evaluations": self.evaluations,
+            "seconds": self.seconds,
+            "per_eval_us": self.per_eval_us,
+        }
+
+
 class ExpressionBenchmark:
-    """用于测试表达式执行效率的简单基准工具"""
+    """
+    表达式求值基准工具
+
+    ``compare``/``run_suite`` 对比以下求值方式：
 
-    def __init__(self, compiler: ExpressionJITCompiler) -> None:
-        self.compiler = compiler
+    - ``eval``: 每次对原始字符串调用 ``eval``，并重建变量字典（原 AttributeSystem 路径）
+    - ``eval_code``: 缓存 ``compile`` 得到的代码对象后 ``eval``（原 JIT 路径）
+    - ``compiled``: ExpressionCompiler 编译结果逐个求值
+    - ``compiled_batch``: ExpressionCompiler 的 ``evaluate_many`` 批量求值
+    """
+
+    STRATEGIES = ("eval", "eval_code", "compiled", "compiled_batch")
+
+    def __init__(self, compiler: Optional[ExpressionJITCompiler] = None) -> None:
+        self.compiler = compiler or ExpressionJITCompiler()
 
     def run(self, expression: str, iterations: int = 1000, **variables: Any) -> float:
         """执行基准测试并返回耗时"""
@@ -38,3 +80,105 @@ class ExpressionBenchmark:
             func(**variables)
         end = time.perf_counter()
         return end - start
+
+    def compare(
+        self,
+        expression: str,
+        contexts: Sequence[Mapping[str, Any]],
+        rounds: int = 5,
+    ) -> Dict[str, BenchmarkResult]:
+        """
+        用多种方式对同一组上下文求值并计时
+
+        Args:
+            expression: 表达式
+            contexts: 变量上下文列表
+            rounds: 重复轮数
+
+        Returns:
+            求值方式 -> 基准结果
+        """
+        contexts = list(contexts)
+        compiled = self.compiler.compiler.compile(expression)
+        code = compile(expression, "<expr>", "eval")
+        safe_globals = {"__builtins__": {}, "max": max, "min": min}
+
+        def run_eval() -> None:
+            for context in contexts:
+                allowed = {k: v for k, v in context.items() if isinstance(v, (int, float))}
+                eval(expression, safe_globals, allowed)
+
+        def run_eval_code() -> None:
+            for context in contexts:
+                eval(code, safe_globals, dict(context))
+
+        def run_compiled() -> None:
+            evaluate = compiled.evaluate
+            for context in contexts:
+                evaluate(context)
+
+        def run_batch() -> None:
+            compiled.evaluate_many(contexts)
+
+        runners = {
+            "eval": run_eval,
+            "eval_code": run_eval_code,
+            "compiled": run_compiled,
+            "compiled_batch": run_batch,
+        }
+        results = {}
+        for name, runner in runners.items():
+            start = time.perf_counter()
+            for _ in range(rounds):
+                runner()
+            results[name] = BenchmarkResult(name, len(contexts) * rounds, time.perf_counter() - start)
+        return results
+
+    def run_suite(
+        self,
+        formulas: Optional[Mapping[str, str]] = None,
+        contexts: Optional[Sequence[Mapping[str, Any]]] = None,
+        characters: int = 1000,
+        rounds: int = 5,
+    ) -> Dict[str, Dict[str, BenchmarkResult]]:
+        """
+        对一组公式运行 ``compare``
+
+        Args:
+            formulas: 公式名 -> 公式，默认使用属性系统公式
+            contexts: 变量上下文，默认随机生成 ``characters`` 个角色
+            characters: 生成的角色数量
+            rounds: 重复轮数
+
+        Returns:
+            公式名 -> 求值方式 -> 基准结果
+        """
+        formulas = formulas or DEFAULT_BENCHMARK_FORMULAS
+        if contexts is None:
+            contexts = self.generate_contexts(characters)
+        return {name: self.compare(formula, contexts, rounds) for name, formula in formulas.items()}
+
+    @staticmethod
+    def generate_contexts(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+        """生成固定随机种子的角色属性上下文"""
+        rng = random.Random(seed)
+        names = ("strength", "constitution", "agility", "intelligence", "willpower")
+        contexts = []
+        for _ in range(count):
+            context: Dict[str, Any] = {name: rng.randint(5, 50) for name in names}
+            context["level"] = rng.randint(1, 100)
+            context["realm_name"] = "筑基期"
+            contexts.append(context)
+        return contexts
+
+    @staticmethod
+    def format_report(suite: Mapping[str, Mapping[str, BenchmarkResult]]) -> str:
+        """把 ``run_suite`` 的结果格式化为文本表格"""
+        lines = [f"{'公式':<14}" + "".join(f"{name:>16}" for name in ExpressionBenchmark.STRATEGIES)]
+        for formula, results in suite.items():
+            row = f"{formula:<14}"
+            for name in ExpressionBenchmark.STRATEGIES:
+                result = results.get(name)
+                row += f"{result.per_eval_us:>13.2f} µs" if result else f"{'-':>16}"
+            lines.append(row)
+        return "\n".join(lines)
@@ -0,0 +1,573 @@
+"""
+修炼进度蒙特卡洛模拟器
+
+用于境界节奏的数值平衡：按 ``CharacterRoller`` 的开局分布批量生成角色，
+让他们从起始境界一路修炼、突破、渡劫，统计到达各境界所需时间的分位数、
+渡劫陨落率和灵石收支。
+
+每名角色的循环与玩家挂机修炼相同：每步修炼 ``step_hours`` 小时获得修为和
+灵石收入，修为与灵石都满足下一境界的要求时调用一次突破。修为与灵石在两次
+突破之间线性增长，批量模式直接算出每名角色下一次能突破的步数，整体跳过去
+再统一掷骰，循环次数只与突破次数有关，与模拟时长无关。
+
+每步修为、突破成功率、渡劫成功率都预先用 ``CultivationSystem`` 自身的方法
+按（悟性、灵根、状态）逐一算成查找表，公式只有一份。需要注意的几点：
+
+- 突破所需的丹药、材料在现有实现中只检查不消耗，模拟时视为已备好；
+- 修为不设上限，突破成功后也不清零（突破要求是累计修为）；
+- 突破失败后气血、灵力不满，此后的突破都没有状态加成，直到下一次成功；
+- ``attempt_breakthrough`` 渡劫失败时只返回失败，由 ``tribulation_failure``
+  决定如何处理：``death`` 视为陨落，``fall`` 跌回原境界。
+
+NumPy 为可选依赖，只有批量模式需要；``simulate_scalar`` 用真实的 ``Character``
+和 ``CultivationSystem`` 逐步运行，作为对照和基准。
+"""
+
+from __future__ import annotations
+
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from src.xwe.core.attributes import CharacterAttributes
+from src.xwe.core.character import Character
+from src.xwe.core.cultivation_system import CultivationRealm, CultivationSystem
+from src.xwe.core.roll_system import ROLL_DATA, CharacterRoller, RollResult
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Roll 出的灵根属性每点对应的灵根纯度（单灵根 10 点即纯度 100）
+ROOT_PURITY_PER_POINT = 10
+
+# 各境界每小时的灵石收入（下品），粗略估计，按需调整
+DEFAULT_STONE_INCOME = {
+    "凡人": 0.5,
+    "炼气期": 1,
+    "筑基期": 5,
+    "金丹期": 20,
+    "元婴期": 100,
+}
+
+# 分位数统计使用的百分位
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+TRIBULATION_POLICIES = ("death", "fall")
+
+
+@dataclass
+class ProgressionSettings:
+    """模拟参数"""
+
+    step_hours: float = 2.0  # 每步修炼时长，与 TimeSystem 的 cultivate_basic 一致
+    location_bonus: float = 1.0  # 地点加成
+    horizon_days: float = 20 * 365  # 模拟时长上限（游戏天）
+    start_realm: str = "炼气期"
+    target_realm: Optional[str] = None  # 默认为最后一个有突破要求的境界
+    start_stones: int = 200  # 与 Character 默认的 100 下品 + 1 中品一致
+    stone_income: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_STONE_INCOME))
+    technique: Optional[str] = None  # 全体角色修炼的功法ID
+    tribulation_failure: str = "death"  # 渡劫失败的处理：death 陨落，fall 跌回原境界
+
+
+@dataclass
+class ProgressionResult:
+    """
+    模拟结果
+
+    ``realms[0]`` 为起始境界，第 i 次突破从 ``realms[i]`` 到 ``realms[i + 1]``；
+    ``reach_steps[:, i]`` 为到达 ``realms[i]`` 时的步数，未到达为 -1。
+    按突破统计的数组形状均为（角色数, 突破数）。
+    """
+
+    realms: List[str]
+    reach_steps: Any
+    attempts: Any
+    successes: Any
+    tribulations: Any
+    tribulation_failures: Any
+    died: Any
+    stones_earned: Any
+    stones_spent: Any
+    root_types: Any  # 每名角色的灵根类型序号
+    root_type_names: List[str] = field(default_factory=list)
+    step_hours: float = 2.0
+    horizon_steps: int = 0
+    seed: Optional[int] = None
+
+    @property
+    def population(self) -> int:
+        return int(len(self.died))
+
+    def reached(self, realm: Optional[str] = None) -> Any:
+        """是否到达境界（默认目标境界）的布尔数组"""
+        index = self.realms.index(realm) if realm else len(self.realms) - 1
+        return self.reach_steps[:, index] >= 0
+
+    def time_to_realm(self, realm: Optional[str] = None) -> Dict[str, float]:
+        """到达境界所需游戏天数的统计，只统计到达的角色"""
+        index = self.realms.index(realm) if realm else len(self.realms) - 1
+        steps = self.reach_steps[:, index]
+        return _describe(steps[steps >= 0] * self.step_hours / 24)
+
+    def summary(self) -> Dict[str, Any]:
+        n = max(1, self.population)
+        realms: Dict[str, Any] = {}
+        for i, name in enumerate(self.realms[1:]):
+            attempts = int(self.attempts[:, i].sum())
+            tribulations = int(self.tribulations[:, i].sum())
+            stats = {
+                "reached_rate": float(np.count_nonzero(self.reached(name))) / n,
+                "days": self.time_to_realm(name),
+                "attempts_per_character": attempts / n,
+                "breakthrough_success_rate": int(self.successes[:, i].sum()) / max(1, attempts),
+            }
+            if tribulations:
+                stats["tribulation_failure_rate"] = int(self.tribulation_failures[:, i].sum()) / tribulations
+            realms[name] = stats
+
+        earned = float(self.stones_earned.sum())
+        by_root = {}
+        target = self.reached()
+        for index, name in enumerate(self.root_type_names):
+            mask = self.root_types == index
+            count = int(np.count_nonzero(mask))
+            if count:
+                steps = self.reach_steps[mask & target, -1]
+                by_root[name] = {
+                    "population": count,
+                    "reached_rate": float(np.count_nonzero(target[mask])) / count,
+                    "median_days": float(np.median(steps)) * self.step_hours / 24 if steps.size else None,
+                }
+
+        return {
+            "population": self.population,
+            "seed": self.seed,
+            "horizon_days": self.horizon_steps * self.step_hours / 24,
+            "start_realm": self.realms[0],
+            "target_realm": self.realms[-1],
+            "realms": realms,
+            "tribulation": {
+                "faced": int(self.tribulations.sum()),
+                "failed": int(self.tribulation_failures.sum()),
+                "death_rate": float(np.count_nonzero(self.died)) / n,
+            },
+            "economy": {
+                "earned": _describe(self.stones_earned),
+                "spent": _describe(self.stones_spent),
+                "drain_rate": float(self.stones_spent.sum()) / earned if earned else 0.0,
+            },
+            "by_spiritual_root": by_root,
+        }
+
+    @classmethod
+    def concat(cls, parts: List["ProgressionResult"], seed: Optional[int] = None) -> "ProgressionResult":
+        """按顺序拼接多段结果"""
+        first = parts[0]
+        arrays = {
+            name: np.concatenate([getattr(part, name) for part in parts])
+            for name in (
+                "reach_steps", "attempts", "successes", "tribulations", "tribulation_failures",
+                "died", "stones_earned", "stones_spent", "root_types",
+            )
+        }
+        return cls(
+            realms=first.realms,
+            root_type_names=first.root_type_names,
+            step_hours=first.step_hours,
+            horizon_steps=first.horizon_steps,
+            seed=seed,
+            **arrays,
+        )
+
+
+def _describe(values: Any) -> Dict[str, float]:
+    if not len(values):
+        return {"count": 0}
+    values = np.asarray(values, dtype=float)
+    stats = {"count": int(values.size), "mean": float(values.mean()), "min": float(values.min())}
+    for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats[f"p{p}"] = float(value)
+    stats["max"] = float(values.max())
+    return stats
+
+
+def _probe(comprehension: float, spiritual_root: Dict[str, float], full: bool, technique: Optional[str]) -> Any:
+    """只带查表所需字段的角色，用于调用 CultivationSystem 的计算方法"""
+    state = 1 if full else 0
+    attributes = SimpleNamespace(
+        comprehension=comprehension,
+        current_health=state,
+        max_health=1,
+        current_mana=state,
+        max_mana=1,
+    )
+    return SimpleNamespace(attributes=attributes, spiritual_root=spiritual_root, cultivation_technique=technique)
+
+
+def _run_chunk(simulator: "ProgressionSimulator", size: int, seed_seq: Any) -> ProgressionResult:
+    """进程池入口"""
+    return simulator._simulate_chunk(size, np.random.default_rng(seed_seq))
+
+
+class ProgressionSimulator:
+    """修炼进度蒙特卡洛模拟器"""
+
+    def __init__(
+        self,
+        settings: Optional[ProgressionSettings] = None,
+        cultivation_system: Optional[CultivationSystem] = None,
+        roller: Optional[CharacterRoller] = None,
+    ) -> None:
+        self.settings = settings or ProgressionSettings()
+        if self.settings.tribulation_failure not in TRIBULATION_POLICIES:
+            raise ValueError(f"未知的渡劫失败处理: {self.settings.tribulation_failure}")
+        self.cultivation_system = cultivation_system or CultivationSystem()
+
+        # 开局分布：悟性、灵根属性在配置范围内均匀分布，灵根类型从 ROLL_DATA 中均匀选取
+        roller = roller or CharacterRoller()
+        value_range = roller.attribute_config["range"]
+        self.attribute_min = int(value_range["min"])
+        self.attribute_max = int(value_range["max"])
+        self.root_types = [(root["type"], list(root["elements"])) for root in ROLL_DATA["spiritual_roots"]]
+
+        self.path = self._realm_path()
+        self.requirements = [
+            self.cultivation_system.realm_breakthroughs.get(realm.chinese_name, {}) for realm in self.path[1:]
+        ]
+        self.horizon_steps = int(self.settings.horizon_days * 24 // self.settings.step_hours)
+
+    @property
+    def realm_names(self) -> List[str]:
+        return [realm.chinese_name for realm in self.path]
+
+    def _realm_path(self) -> List[CultivationRealm]:
+        realms = list(CultivationRealm)
+        names = [realm.chinese_name for realm in realms]
+        breakthroughs = self.cultivation_system.realm_breakthroughs
+        target = self.settings.target_realm or [name for name in names if name in breakthroughs][-1]
+        for name in (self.settings.start_realm, target):
+            if name not in names:
+                raise ValueError(f"未知的境界: {name}")
+        start, end = names.index(self.settings.start_realm), names.index(target)
+        if end <= start:
+            raise ValueError(f"目标境界 {target} 不高于起始境界 {self.settings.start_realm}")
+        return realms[start:end + 1]
+
+    def _stone_income(self, realm: CultivationRealm) -> int:
+        """在该境界每步的灵石收入"""
+        return int(self.settings.stone_income.get(realm.chinese_name, 0) * self.settings.step_hours)
+
+    @staticmethod
+    def _spiritual_root(elements: List[str], value: int) -> Dict[str, float]:
+        return {element: value * ROOT_PURITY_PER_POINT for element in elements}
+
+    # ------------------------------------------------------------------
+    # 批量模拟
+    # ------------------------------------------------------------------
+
+    def _tables(self) -> Dict[str, Any]:
+        """把每步修为、突破/渡劫成功率按角色属性算成查找表"""
+        settings = self.settings
+        cultivation = self.cultivation_system
+        values = range(self.attribute_min, self.attribute_max + 1)
+
+        # gain[悟性, 灵根属性, 灵根类型]
+        gain = np.array([
+            [
+                [
+                    cultivation.calculate_cultivation_exp(
+                        _probe(float(comprehension), self._spiritual_root(elements, root), True, settings.technique),
+                        settings.step_hours,
+                        settings.location_bonus,
+                    )
+                    for _, elements in self.root_types
+                ]
+                for root in values
+            ]
+            for comprehension in values
+        ], dtype=np.int64)
+
+        # rate[突破, 悟性, 状态是否完满]
+        rate = np.array([
+            [
+                [
+                    cultivation._calculate_breakthrough_success_rate(
+                        _probe(float(comprehension), {}, full, settings.technique), requirements
+                    )
+                    for full in (False, True)
+                ]
+                for comprehension in values
+            ]
+            for requirements in self.requirements
+        ])
+
+        probe = _probe(float(self.attribute_min), {}, True, settings.technique)
+        tribulation_rate = np.array([
+            cultivation._calculate_tribulation_success_rate(probe, requirements.get("tribulation_difficulty", 1))
+            if requirements.get("tribulation", False) else 1.0
+            for requirements in self.requirements
+        ])
+
+        return {
+            "gain": gain,
+            "rate": rate,
+            "tribulation": np.array([r.get("tribulation", False) for r in self.requirements]),
+            "tribulation_rate": tribulation_rate,
+            "need": np.array([r.get("exp_required", 0) for r in self.requirements], dtype=np.int64),
+            "cost": np.array(
+                [r.get("resources", {}).get("spirit_stones", 0) for r in self.requirements], dtype=np.int64
+            ),
+            "income": np.array([self._stone_income(realm) for realm in self.path[:-1]], dtype=np.int64),
+        }
+
+    def simulate(
+        self,
+        population: int,
+        seed: Optional[int] = None,
+        workers: int = 1,
+        chunk_size: int = 50_000,
+    ) -> ProgressionResult:
+        """
+        批量模拟
+
+        Args:
+            population: 角色数
+            seed: 随机种子，相同种子得到相同结果
+            workers: 进程数，大于 1 时各分段在进程池中并行运行
+            chunk_size: 每段的角色数，每段使用由种子派生的独立随机流，
+                结果只与种子和分段有关，与进程数无关
+
+        Returns:
+            模拟结果
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("批量修炼模拟需要安装 numpy")
+
+        sizes = [min(chunk_size, population - start) for start in range(0, population, chunk_size)] or [0]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        if workers > 1 and len(sizes) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_run_chunk, [self] * len(sizes), sizes, seeds))
+        else:
+            parts = [_run_chunk(self, size, seq) for size, seq in zip(sizes, seeds)]
+        return ProgressionResult.concat(parts, seed=seed)
+
+    def _simulate_chunk(self, n: int, rng: Any) -> ProgressionResult:
+        tables = self._tables()
+        transitions = len(self.requirements)
+        horizon = self.horizon_steps
+        fall = self.settings.tribulation_failure == "fall"
+
+        # 开局 Roll
+        comprehension = rng.integers(0, self.attribute_max - self.attribute_min + 1, n)
+        root_value = rng.integers(0, self.attribute_max - self.attribute_min + 1, n)
+        root_types = rng.integers(0, len(self.root_types), n)
+        gain = tables["gain"][comprehension, root_value, root_types]
+
+        realm = np.zeros(n, dtype=np.int64)
+        exp = np.zeros(n, dtype=np.int64)
+        stones = np.full(n, self.settings.start_stones, dtype=np.int64)
+        step = np.zeros(n, dtype=np.int64)
+        full = np.ones(n, dtype=bool)
+        died = np.zeros(n, dtype=bool)
+        earned = np.zeros(n, dtype=np.int64)
+        spent = np.zeros(n, dtype=np.int64)
+        reach_steps = np.full((n, transitions + 1), -1, dtype=np.int64)
+        reach_steps[:, 0] = 0
+        counters = {
+            name: np.zeros((n, transitions), dtype=np.int64)
+            for name in ("attempts", "successes", "tribulations", "tribulation_failures")
+        }
+
+        active = np.arange(n)
+        while active.size:
+            # 修为与灵石都满足要求的最早一步（至少修炼一步）
+            r = realm[active]
+            g, income = gain[active], tables["income"][r]
+            exp_short = tables["need"][r] - exp[active]
+            stone_short = tables["cost"][r] - stones[active]
+            wait_exp = np.where(exp_short > 0, -(-exp_short // np.maximum(g, 1)), 1)
+            wait_exp[(exp_short > 0) & (g <= 0)] = horizon + 1
+            wait_stones = np.where(stone_short > 0, -(-stone_short // np.maximum(income, 1)), 1)
+            wait_stones[(stone_short > 0) & (income <= 0)] = horizon + 1
+            wait = np.maximum(np.maximum(wait_exp, wait_stones), 1)
+
+            remaining = horizon - step[active]
+            advance = np.minimum(wait, remaining)
+            exp[active] += advance * g
+            stones[active] += advance * income
+            earned[active] += advance * income
+            step[active] += advance
+
+            # 到时限仍未满足的角色结束模拟
+            idx = active[wait <= remaining]
+            if not idx.size:
+                break
+            r = realm[idx]
+            counters["attempts"][idx, r] += 1
+            rate = tables["rate"][r, comprehension[idx], full[idx].astype(np.int64)]
+            success = rng.random(idx.size) < rate
+
+            failed = idx[~success]
+            exp[failed] = (exp[failed] * 0.9).astype(np.int64)
+            full[failed] = False
+
+            won, r = idx[success], r[success]
+            counters["successes"][won, r] += 1
+            stones[won] -= tables["cost"][r]
+            spent[won] += tables["cost"][r]
+            full[won] = True
+            realm[won] += 1
+
+            tribulation = tables["tribulation"][r]
+            faced, level = won[tribulation], r[tribulation]
+            counters["tribulations"][faced, level] += 1
+            survived = rng.random(faced.size) < tables["tribulation_rate"][level]
+            lost = faced[~survived]
+            counters["tribulation_failures"][lost, level[~survived]] += 1
+            if fall:
+                realm[lost] -= 1
+            else:
+                died[lost] = True
+
+            ascended = won[(realm[won] > r) & ~died[won]]
+            first_time = reach_steps[ascended, realm[ascended]] < 0
+            reach_steps[ascended[first_time], realm[ascended[first_time]]] = step[ascended[first_time]]
+
+            active = idx[~died[idx] & (realm[idx] < transitions)]
+
+        return ProgressionResult(
+            realms=self.realm_names,
+            reach_steps=reach_steps,
+            died=died,
+            stones_earned=earned,
+            stones_spent=spent,
+            root_types=root_types,
+            root_type_names=[name for name, _ in self.root_types],
+            step_hours=self.settings.step_hours,
+            horizon_steps=horizon,
+            **counters,
+        )
+
+    # ------------------------------------------------------------------
+    # 逐个对照
+    # ------------------------------------------------------------------
+
+    def character_from_roll(self, roll: RollResult) -> Character:
+        """把 Roll 结果转成处于起始境界、备好突破材料的角色"""
+        attributes = CharacterAttributes()
+        attributes.comprehension = roll.attributes["comprehension"]
+        attributes.realm_name = self.path[0].chinese_name
+        character = Character(name=roll.name, attributes=attributes, level=self.path[0].min_level)
+        character.spiritual_root = self._spiritual_root(roll.spiritual_root_elements, roll.attributes["灵根"])
+        if self.settings.technique:
+            character.cultivation_technique = self.settings.technique
+        attributes.current_health = attributes.max_health
+        attributes.current_mana = attributes.max_mana
+
+        character.lingshi = {"low": 0, "mid": 0, "high": 0, "supreme": 0}
+        character.add_lingshi(self.settings.start_stones)
+        for requirements in self.requirements:
+            for resource, amount in requirements.get("resources", {}).items():
+                if resource != "spirit_stones":
+                    character.inventory.add(resource, amount)
+        return character
+
+    def simulate_scalar(self, population: int, seed: Optional[int] = None) -> ProgressionResult:
+        """
+        用 CharacterRoller 和 CultivationSystem 逐个角色、逐步运行，返回相同格式的结果
+
+        两者都使用全局 ``random``，运行期间临时以 seed 重新播种，结束后恢复。
+        速度远慢于 ``simulate``，用于校验和基准对比。
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("结果汇总需要安装 numpy")
+
+        settings = self.settings
+        system = self.cultivation_system
+        roller = CharacterRoller()
+        names = self.realm_names
+        transitions = len(self.requirements)
+        needs = [r.get("exp_required", 0) for r in self.requirements]
+        costs = [r.get("resources", {}).get("spirit_stones", 0) for r in self.requirements]
+        incomes = [self._stone_income(realm) for realm in self.path[:-1]]
+        root_index = {name: i for i, (name, _) in enumerate(self.root_types)}
+
+        reach_steps = np.full((population, transitions + 1), -1, dtype=np.int64)
+        reach_steps[:, 0] = 0
+        counters = {
+            name: np.zeros((population, transitions), dtype=np.int64)
+            for name in ("attempts", "successes", "tribulations", "tribulation_failures")
+        }
+        died = np.zeros(population, dtype=bool)
+        earned = np.zeros(population, dtype=np.int64)
+        spent = np.zeros(population, dtype=np.int64)
+        root_types = np.zeros(population, dtype=np.int64)
+
+        state = random.getstate()
+        random.seed(seed)
+        try:
+            for i in range(population):
+                roll = roller.roll()
+                root_types[i] = root_index[roll.spiritual_root_type]
+                character = self.character_from_roll(roll)
+                attrs = character.attributes
+                r = 0
+                for step in range(1, self.horizon_steps + 1):
+                    attrs.cultivation_exp += system.calculate_cultivation_exp(
+                        character, settings.step_hours, settings.location_bonus
+                    )
+                    if incomes[r]:
+                        character.add_lingshi(incomes[r])
+                        earned[i] += incomes[r]
+                    if attrs.cultivation_exp < needs[r]:
+                        continue
+
+                    before = character.get_total_lingshi()
+                    if before < costs[r]:
+                        continue  # 灵石不足，attempt_breakthrough 不会掷骰
+                    ok, _ = system.attempt_breakthrough(character)
+                    counters["attempts"][i, r] += 1
+                    spent[i] += before - character.get_total_lingshi()
+                    if attrs.realm_name != names[r + 1]:
+                        continue  # 突破失败
+
+                    counters["successes"][i, r] += 1
+                    if self.requirements[r].get("tribulation", False):
+                        counters["tribulations"][i, r] += 1
+                        if not ok:
+                            counters["tribulation_failures"][i, r] += 1
+                            if settings.tribulation_failure == "death":
+                                died[i] = True
+                                break
+                            attrs.cultivation_level = self.path[r].min_level
+                            attrs.realm_name = names[r]
+                            continue
+                    r += 1
+                    if reach_steps[i, r] < 0:
+                        reach_steps[i, r] = step
+                    if r == transitions:
+                        break
+        finally:
+            random.setstate(state)
+
+        return ProgressionResult(
+            realms=names,
+            reach_steps=reach_steps,
+            died=died,
+            stones_earned=earned,
+            stones_spent=spent,
+            root_types=root_types,
+            root_type_names=[name for name, _ in self.root_types],
+            step_hours=settings.step_hours,
+            horizon_steps=self.horizon_steps,
+            seed=seed,
+            **counters,
+        )
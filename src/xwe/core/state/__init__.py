@@ -5,5 +5,6 @@
 """
 
 from .game_state_manager import ContextInfo, GameContext, GameState, GameStateManager
+from .state_journal import StateJournal
 
-__all__ = ["GameStateManager", "GameState", "GameContext", "ContextInfo"]
+__all__ = ["GameStateManager", "GameState", "GameContext", "ContextInfo", "StateJournal"]
@@ -2,14 +2,13 @@
 
 from __future__ import annotations
 
-import json
 import logging
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, List, Optional, Sequence, Tuple
 
 from src.xwe.core.game_core import GameState
+from src.xwe.core.state.state_journal import MISSING, StateJournal
 
 
 logger = logging.getLogger(__name__)
@@ -30,29 +29,90 @@ class GameContext:
 class GameStateManager:
     """统一管理游戏状态并记录转移"""
 
-    def __init__(self, log_dir: str = "logs") -> None:
+    def __init__(
+        self,
+        log_dir: str = "logs",
+        snapshot_interval: int = 50,
+        segment_size: int = 1000,
+        max_segments: int = 10,
+    ) -> None:
         self._state: Optional[GameState] = None
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.logger = logger.getChild(self.__class__.__name__)
+        self.journal = StateJournal(
+            self.log_dir,
+            snapshot_interval=snapshot_interval,
+            segment_size=segment_size,
+            max_segments=max_segments,
+        )
 
     def set_state(self, state: GameState, action: str = "") -> None:
         self._state = state
         self._log_transition(action)
 
+    def update(self, path: str | Sequence[str], value: Any, action: str = "") -> Any:
+        """
+        修改当前状态的一个字段并记录这次变化
+
+        日志只记录该路径的旧值和新值，不再序列化、比较整份状态。
+
+        Args:
+            path: 与 ``GameState.to_dict()`` 结构一致的路径，如 ``"flags.boss_defeated"``；
+                每一级按字典键或同名属性查找
+            value: 新值
+            action: 触发修改的动作
+
+        Returns:
+            旧值（原先不存在时为 None）
+        """
+        return self.update_many([(path, value)], action)[0]
+
+    def update_many(self, updates: Sequence[Tuple[str | Sequence[str], Any]], action: str = "") -> List[Any]:
+        """一次记录多个字段的修改，返回各字段的旧值"""
+        if self._state is None:
+            raise RuntimeError("尚未设置游戏状态")
+        changes = []
+        previous = []
+        for path, value in updates:
+            keys = path.split(".") if isinstance(path, str) else list(path)
+            parent = self._state
+            for key in keys[:-1]:
+                parent = parent[key] if isinstance(parent, dict) else getattr(parent, key)
+            old = self._get(parent, keys[-1])
+            if isinstance(parent, dict):
+                parent[keys[-1]] = value
+            else:
+                setattr(parent, keys[-1], value)
+            previous.append(None if old is MISSING else old)
+            changes.append((keys, self._plain(old), self._plain(value)))
+
+        index = self.journal.record_changes(changes, action, snapshot=self._state.to_dict)
+        self.logger.debug("记录状态转移 #%d: %s", index, action)
+        return previous
+
+    @staticmethod
+    def _get(parent: Any, key: str) -> Any:
+        if isinstance(parent, dict):
+            return parent.get(key, MISSING)
+        return getattr(parent, key, MISSING)
+
+    @staticmethod
+    def _plain(value: Any) -> Any:
+        """带 ``to_dict`` 的对象按其字典形式写入日志"""
+        to_dict = getattr(value, "to_dict", None)
+        return to_dict() if callable(to_dict) else value
+
     def get_state(self) -> Optional[GameState]:
         return self._state
 
+    def replay(self, index: int) -> GameState:
+        """根据状态日志重建第 ``index`` 次转移后的游戏状态"""
+        return GameState.from_dict(self.journal.replay(index))
+
     def _log_transition(self, action: str) -> None:
         if not self._state:
             return
-        entry = {
-            "timestamp": datetime.now().isoformat(),
-            "action": action,
-            "state": self._state.to_dict(),
-        }
-        log_file = self.log_dir / "state_transitions.log"
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-        self.logger.debug("记录状态转移: %s", action)
+        index = self.journal.record(self._state.to_dict(), action)
+        self.logger.debug("记录状态转移 #%d: %s", index, action)
 
@@ -0,0 +1,365 @@
+"""状态转移增量日志
+
+按固定间隔写入完整快照，快照之间只记录发生变化的键。调用方在修改状态时
+直接提交 ``(路径, 旧值, 新值)``，日志无需序列化整份状态再逐键比较；只有到了
+写快照的时候才取完整状态。日志按段轮转，每段都以快照开头，因此删除旧段不会
+影响剩余段的回放。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 删除标记，区分“键被删除”和“值为 None”
+_MISSING = object()
+
+# 单个修改：(路径, 旧值, 新值)，新值为 MISSING 表示删除该键
+Change = Tuple[Sequence[str], Any, Any]
+MISSING = _MISSING
+
+
+def _normalize(value: Any) -> Any:
+    """规范化为 JSON 类型并与调用方断开引用，保证后续比较和回放一致"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+def diff_state(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """
+    计算两个状态字典之间的差异
+
+    只对嵌套字典逐键递归，其余类型（列表、标量）整体替换。
+
+    Args:
+        old: 旧状态
+        new: 新状态
+
+    Returns:
+        ``{"set": [[path, value], ...], "unset": [path, ...]}``
+    """
+    changes: Dict[str, List[Any]] = {"set": [], "unset": []}
+    _diff_into(old, new, [], changes)
+    return changes
+
+
+def _diff_into(old: Dict[str, Any], new: Dict[str, Any], path: List[str], out: Dict[str, List[Any]]) -> None:
+    for key, value in new.items():
+        previous = old.get(key, _MISSING)
+        if previous is _MISSING:
+            out["set"].append([path + [key], value])
+        elif isinstance(value, dict) and isinstance(previous, dict):
+            if value != previous:
+                _diff_into(previous, value, path + [key], out)
+        elif value != previous:
+            out["set"].append([path + [key], value])
+    for key in old:
+        if key not in new:
+            out["unset"].append(path + [key])
+
+
+def apply_delta(state: Dict[str, Any], delta: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """把 ``diff_state`` 生成的差异原地应用到状态字典上"""
+    for path, value in delta.get("set", []):
+        target = state
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    for path in delta.get("unset", []):
+        target = state
+        for key in path[:-1]:
+            target = target.get(key)
+            if not isinstance(target, dict):
+                break
+        else:
+            target.pop(path[-1], None)
+    return state
+
+
+class StateJournal:
+    """
+    快照 + 增量的状态日志
+
+    活动段固定为 ``<name>.log``，轮转后的段命名为 ``<name>.<起始序号>.log``。
+    """
+
+    def __init__(
+        self,
+        log_dir: str | Path,
+        name: str = "state_transitions",
+        snapshot_interval: int = 50,
+        segment_size: int = 1000,
+        max_segments: int = 10,
+    ) -> None:
+        """
+        Args:
+            log_dir: 日志目录
+            name: 日志文件名前缀
+            snapshot_interval: 每隔多少条记录写一次完整快照
+            segment_size: 单个日志段的最大记录数
+            max_segments: 保留的日志段数量（含活动段），超出后压缩删除最旧段
+        """
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.segment_size = max(1, segment_size)
+        self.max_segments = max(1, max_segments)
+
+        self._lock = threading.Lock()
+        self._last_state: Optional[Dict[str, Any]] = None
+        self._since_snapshot = 0
+        self._segment_entries = 0
+        self._segment_start = 0
+        self._next_index = 0
+        self._recover()
+
+    # ------------------------------------------------------------------
+    # 路径与恢复
+    # ------------------------------------------------------------------
+    @property
+    def active_path(self) -> Path:
+        return self.log_dir / f"{self.name}.log"
+
+    def _segment_path(self, start: int) -> Path:
+        return self.log_dir / f"{self.name}.{start:08d}.log"
+
+    def _archived_segments(self) -> List[Tuple[int, Path]]:
+        pattern = re.compile(rf"^{re.escape(self.name)}\.(\d+)\.log$")
+        segments = []
+        for path in self.log_dir.iterdir():
+            match = pattern.match(path.name)
+            if match:
+                segments.append((int(match.group(1)), path))
+        return sorted(segments)
+
+    def segments(self) -> List[Tuple[int, Path]]:
+        """返回 ``(起始序号, 路径)`` 列表，按序号升序，活动段在最后"""
+        segments = self._archived_segments()
+        if self.active_path.exists() and self._segment_entries:
+            segments.append((self._segment_start, self.active_path))
+        return segments
+
+    def _recover(self) -> None:
+        """从已有日志恢复序号，重启后的第一条记录总是快照"""
+        archived = self._archived_segments()
+        if not self.active_path.exists():
+            if archived:
+                last_start, last_path = archived[-1]
+                self._next_index = last_start + sum(1 for _ in self._iter_lines(last_path))
+            return
+
+        first = last = None
+        count = 0
+        for entry in self._iter_lines(self.active_path):
+            if first is None:
+                first = entry
+            last = entry
+            count += 1
+        if first is None:
+            return
+        self._segment_start = first.get("index", 0)
+        self._segment_entries = count
+        self._next_index = last.get("index", count - 1) + 1
+
+    @staticmethod
+    def _iter_lines(path: Path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("跳过损坏的状态日志行: %s", path)
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+    def record(self, state: Dict[str, Any], action: str = "") -> int:
+        """
+        记录一次状态转移
+
+        Args:
+            state: 当前状态（``GameState.to_dict()`` 的结果）
+            action: 触发转移的动作
+
+        Returns:
+            本次记录的序号
+        """
+        current = _normalize(state)
+
+        with self._lock:
+            index, entry = self._begin_entry(action)
+            if self._snapshot_due():
+                entry["state"] = current
+            else:
+                entry["delta"] = diff_state(self._last_state, current)
+            self._last_state = current
+            return self._write_entry(index, entry)
+
+    def record_changes(
+        self,
+        changes: Sequence[Change],
+        action: str = "",
+        snapshot: Optional[Callable[[], Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        记录在修改处捕获的状态变化
+
+        开销只与修改的值大小有关；到了写快照的时候才调用 ``snapshot``
+        取完整状态。
+
+        Args:
+            changes: ``(路径, 旧值, 新值)`` 列表，新值为 ``MISSING`` 表示删除
+            action: 触发转移的动作
+            snapshot: 返回完整状态的函数，需要写快照时调用
+
+        Returns:
+            本次记录的序号
+
+        Raises:
+            ValueError: 需要写快照但没有提供 ``snapshot``
+        """
+        delta: Dict[str, List[Any]] = {"set": [], "unset": [], "old": []}
+        for path, old, new in changes:
+            path = [str(key) for key in path]
+            if new is _MISSING:
+                delta["unset"].append(path)
+            else:
+                delta["set"].append([path, _normalize(new)])
+            if old is not _MISSING:
+                delta["old"].append([path, _normalize(old)])
+
+        with self._lock:
+            index, entry = self._begin_entry(action)
+            if self._snapshot_due():
+                if snapshot is None:
+                    raise ValueError("需要写入快照，但没有提供 snapshot")
+                entry["state"] = self._last_state = _normalize(snapshot())
+            else:
+                entry["delta"] = delta
+                # 日志行与内存中的上一状态不能共享可变对象
+                apply_delta(self._last_state, _normalize({"set": delta["set"], "unset": delta["unset"]}))
+            return self._write_entry(index, entry)
+
+    def _begin_entry(self, action: str) -> Tuple[int, Dict[str, Any]]:
+        if self._segment_entries >= self.segment_size:
+            self._rotate()
+        index = self._next_index
+        return index, {"index": index, "timestamp": datetime.now().isoformat(), "action": action}
+
+    def _snapshot_due(self) -> bool:
+        return (
+            self._last_state is None
+            or self._segment_entries == 0
+            or self._since_snapshot >= self.snapshot_interval
+        )
+
+    def _write_entry(self, index: int, entry: Dict[str, Any]) -> int:
+        if "state" in entry:
+            self._since_snapshot = 0
+        if self._segment_entries == 0:
+            self._segment_start = index
+        with open(self.active_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        self._since_snapshot += 1
+        self._segment_entries += 1
+        self._next_index = index + 1
+        return index
+
+    def _rotate(self) -> None:
+        """归档活动段并按保留数量压缩"""
+        if self.active_path.exists():
+            self.active_path.replace(self._segment_path(self._segment_start))
+        self._segment_entries = 0
+        self._since_snapshot = 0
+        # 紧接着会写入新的活动段，提前为它预留名额
+        self._compact_locked(reserve_active=True)
+
+    def compact(self, keep_segments: Optional[int] = None) -> int:
+        """
+        删除超出保留数量的最旧日志段
+
+        Args:
+            keep_segments: 保留段数（含活动段），默认使用 ``max_segments``
+
+        Returns:
+            删除的段数量
+        """
+        with self._lock:
+            return self._compact_locked(keep_segments)
+
+    def _compact_locked(self, keep_segments: Optional[int] = None, reserve_active: bool = False) -> int:
+        keep = max(1, keep_segments or self.max_segments)
+        archived = self._archived_segments()
+        active = 1 if (self._segment_entries or reserve_active) else 0
+        excess = len(archived) + active - keep
+        removed = 0
+        for _, path in archived[: max(0, excess)]:
+            try:
+                path.unlink()
+                removed += 1
+            except OSError as e:
+                logger.warning("删除状态日志段失败 %s: %s", path, e)
+        return removed
+
+    # ------------------------------------------------------------------
+    # 回放
+    # ------------------------------------------------------------------
+    @property
+    def last_index(self) -> int:
+        """最后一条记录的序号，没有记录时为 -1"""
+        return self._next_index - 1
+
+    @property
+    def first_index(self) -> Optional[int]:
+        """仍可回放的最早序号"""
+        segments = self.segments()
+        return segments[0][0] if segments else None
+
+    def replay(self, index: int) -> Dict[str, Any]:
+        """
+        重建指定序号时的状态
+
+        Args:
+            index: 状态转移序号，负数表示从末尾倒数
+
+        Returns:
+            状态字典
+
+        Raises:
+            IndexError: 序号超出日志保留范围
+        """
+        with self._lock:
+            if index < 0:
+                index = self._next_index + index
+            segments = self.segments()
+            if not segments or index < segments[0][0] or index >= self._next_index:
+                raise IndexError(f"状态序号 {index} 不在日志范围内")
+
+            segment_path = segments[0][1]
+            for start, path in segments:
+                if start > index:
+                    break
+                segment_path = path
+
+            state: Optional[Dict[str, Any]] = None
+            for entry in self._iter_lines(segment_path):
+                if "state" in entry:
+                    state = entry["state"]
+                elif state is not None:
+                    apply_delta(state, entry.get("delta", {}))
+                if entry.get("index") == index:
+                    if state is None:
+                        break
+                    return state
+        raise IndexError(f"状态序号 {index} 无法回放")
@@ -6,6 +6,7 @@ XWE表达式解析器模块
 
 主要组件:
 - ExpressionParser: 表达式解析器主类
+- ExpressionCompiler: 带 LRU 缓存的表达式编译器
 - ExpressionError: 异常基类
 - 各种具体异常类型
 
@@ -13,7 +14,9 @@ XWE表达式解析器模块
     >>> from src.xwe.engine.expression import ExpressionParser
     >>> parser = ExpressionParser()
     >>> result = parser.evaluate("2 + 3 * 4")
-    >>> print(result)  # 14.0
+    >>> print(result)  # 14
+    >>> parser.evaluate_many("strength * 2 + level", [{"strength": 10, "level": 1}])
+    [21]
 """
 
 from .exceptions import (
@@ -24,10 +27,14 @@ from .exceptions import (
     TokenizationError,
     ValidationError,
 )
+from .compiler import CompiledExpression, ExpressionCompiler, get_expression_compiler
 from .parser import ExpressionParser
 
 __all__ = [
     "ExpressionParser",
+    "ExpressionCompiler",
+    "CompiledExpression",
+    "get_expression_compiler",
     "ExpressionError",
     "TokenizationError",
     "ParseError",
@@ -0,0 +1,308 @@
+"""
+表达式编译器
+
+表达式只解析一次：先用 ``ast`` 解析并按白名单校验，再编译成以变量为参数的
+函数，编译结果按表达式文本放入 LRU 缓存。求值时不再重复解析字符串，
+也不会暴露任何内置对象。
+"""
+
+from __future__ import annotations
+
+import ast
+import math
+import operator
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .exceptions import (
+    EvaluationError,
+    FunctionNotFoundError,
+    ParseError,
+    ValidationError,
+    VariableNotFoundError,
+)
+
+# 表达式最大长度，防止构造超大表达式
+MAX_EXPRESSION_LENGTH = 2000
+
+# 可在表达式中调用的函数
+ALLOWED_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+    "int": int,
+    "float": float,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "sqrt": math.sqrt,
+    "log": math.log,
+    "log10": math.log10,
+    "exp": math.exp,
+    "pow": math.pow,
+    "clamp": lambda value, low, high: max(low, min(high, value)),
+}
+
+# 表达式中可用的常量
+ALLOWED_CONSTANTS: Dict[str, float] = {"pi": math.pi, "e": math.e}
+
+_ALLOWED_NODES: Tuple[type, ...] = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.IfExp,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    # 运算符
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub,
+    ast.Not,
+    ast.And,
+    ast.Or,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+)
+
+
+class _Validator(ast.NodeVisitor):
+    """按白名单校验语法树，并收集变量名"""
+
+    def __init__(self, functions: Mapping[str, Any]) -> None:
+        self.functions = functions
+        self.variables: List[str] = []
+
+    def generic_visit(self, node: ast.AST) -> None:
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValidationError(f"表达式中不允许使用 {type(node).__name__}")
+        super().generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant) -> None:
+        if not isinstance(node.value, (int, float)):
+            raise ValidationError(f"表达式中不允许使用常量 {node.value!r}")
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if not isinstance(node.func, ast.Name):
+            raise ValidationError("只能直接调用白名单中的函数")
+        if node.func.id not in self.functions:
+            raise FunctionNotFoundError(f"未知函数: {node.func.id}")
+        if node.keywords:
+            raise ValidationError("函数调用不支持关键字参数")
+        for arg in node.args:
+            self.visit(arg)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        name = node.id
+        if name.startswith("_"):
+            raise ValidationError(f"不允许的变量名: {name}")
+        if name in self.functions:
+            raise ValidationError(f"函数 {name} 不能作为变量使用")
+        if name not in ALLOWED_CONSTANTS and name not in self.variables:
+            self.variables.append(name)
+
+
+class CompiledExpression:
+    """
+    已编译的表达式
+
+    变量按名称排序后作为函数参数传入，求值时只做一次字典取值和一次函数调用。
+    """
+
+    __slots__ = ("expression", "variables", "_func", "_getter")
+
+    def __init__(self, expression: str, variables: Tuple[str, ...], func: Callable[..., Any]) -> None:
+        self.expression = expression
+        self.variables = variables
+        self._func = func
+        self._getter = operator.itemgetter(*variables) if len(variables) > 1 else None
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.expression!r})"
+
+    def __call__(self, context: Optional[Mapping[str, Any]] = None) -> Any:
+        return self.evaluate(context)
+
+    def evaluate(self, context: Optional[Mapping[str, Any]] = None) -> Any:
+        """在单个变量上下文中求值"""
+        variables = self.variables
+        try:
+            if not variables:
+                return self._func()
+            if self._getter is None:
+                return self._func(context[variables[0]])
+            return self._func(*self._getter(context))
+        except Exception as exc:
+            raise self._wrap_error(exc, context) from exc
+
+    def evaluate_many(self, contexts: Iterable[Mapping[str, Any]]) -> List[Any]:
+        """
+        对多个上下文批量求值
+
+        只在进入循环前解析一次参数布局，循环体内没有额外的分支判断。
+        """
+        func = self._func
+        variables = self.variables
+        contexts = contexts if isinstance(contexts, list) else list(contexts)
+        try:
+            if not variables:
+                value = func()
+                return [value] * len(contexts)
+            if self._getter is None:
+                key = variables[0]
+                return [func(context[key]) for context in contexts]
+            getter = self._getter
+            return [func(*getter(context)) for context in contexts]
+        except Exception as exc:
+            # 逐个重新求值，找出出错的上下文以给出准确的错误信息
+            for context in contexts:
+                self.evaluate(context)
+            raise EvaluationError(f"表达式 {self.expression!r} 求值失败: {exc}") from exc
+
+    def _wrap_error(self, exc: Exception, context: Optional[Mapping[str, Any]]) -> Exception:
+        if context is None:
+            return VariableNotFoundError(f"表达式 {self.expression!r} 需要变量上下文")
+        if isinstance(exc, KeyError):
+            missing = [name for name in self.variables if name not in context]
+            return VariableNotFoundError(f"表达式 {self.expression!r} 缺少变量: {', '.join(missing)}")
+        return EvaluationError(f"表达式 {self.expression!r} 求值失败: {exc}")
+
+
+@dataclass
+class CompilerStats:
+    """编译缓存统计"""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+    max_size: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class ExpressionCompiler:
+    """带 LRU 缓存的表达式编译器"""
+
+    def __init__(self, cache_size: int = 256, functions: Optional[Mapping[str, Callable[..., Any]]] = None) -> None:
+        """
+        Args:
+            cache_size: 缓存的已编译表达式数量上限
+            functions: 额外允许调用的函数
+        """
+        self.cache_size = max(1, cache_size)
+        self.functions: Dict[str, Callable[..., Any]] = dict(ALLOWED_FUNCTIONS)
+        if functions:
+            self.functions.update(functions)
+        self._globals: Dict[str, Any] = {"__builtins__": {}}
+        self._globals.update(ALLOWED_CONSTANTS)
+        self._globals.update(self.functions)
+        self._cache: "OrderedDict[str, CompiledExpression]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CompilerStats(max_size=self.cache_size)
+
+    def compile(self, expression: str) -> CompiledExpression:
+        """
+        编译表达式，命中缓存时直接返回
+
+        Raises:
+            ParseError: 语法错误
+            ValidationError: 使用了白名单以外的语法
+            FunctionNotFoundError: 调用了未注册的函数
+        """
+        if not isinstance(expression, str):
+            raise ValidationError(f"表达式必须是字符串: {type(expression).__name__}")
+        with self._lock:
+            compiled = self._cache.get(expression)
+            if compiled is not None:
+                self._cache.move_to_end(expression)
+                self._stats.hits += 1
+                return compiled
+            self._stats.misses += 1
+
+        compiled = self._build(expression)
+
+        with self._lock:
+            self._cache[expression] = compiled
+            self._cache.move_to_end(expression)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self._stats.evictions += 1
+        return compiled
+
+    def evaluate(self, expression: str, context: Optional[Mapping[str, Any]] = None) -> Any:
+        return self.compile(expression).evaluate(context)
+
+    def evaluate_many(self, expression: str, contexts: Iterable[Mapping[str, Any]]) -> List[Any]:
+        return self.compile(expression).evaluate_many(contexts)
+
+    def _build(self, expression: str) -> CompiledExpression:
+        if len(expression) > MAX_EXPRESSION_LENGTH:
+            raise ValidationError(f"表达式过长（{len(expression)} > {MAX_EXPRESSION_LENGTH}）")
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as exc:
+            raise ParseError(f"表达式语法错误: {expression!r}: {exc.msg}") from exc
+
+        validator = _Validator(self.functions)
+        validator.visit(tree)
+        variables = tuple(sorted(validator.variables))
+
+        # 把表达式包装成 lambda，变量作为局部参数访问
+        func_tree = ast.Expression(
+            body=ast.Lambda(
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=[ast.arg(arg=name) for name in variables],
+                    vararg=None,
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    kwarg=None,
+                    defaults=[],
+                ),
+                body=tree.body,
+            )
+        )
+        ast.fix_missing_locations(func_tree)
+        code = compile(func_tree, "<expression>", "eval")
+        func = eval(code, self._globals)  # noqa: S307 - 语法树已通过白名单校验
+        return CompiledExpression(expression, variables, func)
+
+    def cache_info(self) -> Dict[str, int]:
+        with self._lock:
+            self._stats.size = len(self._cache)
+            return self._stats.to_dict()
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+_default_compiler: Optional[ExpressionCompiler] = None
+_default_lock = threading.Lock()
+
+
+def get_expression_compiler() -> ExpressionCompiler:
+    """获取全局共享的表达式编译器"""
+    global _default_compiler
+    if _default_compiler is None:
+        with _default_lock:
+            if _default_compiler is None:
+                _default_compiler = ExpressionCompiler()
+    return _default_compiler
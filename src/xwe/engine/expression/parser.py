@@ -1,13 +1,41 @@
-"""表达式解析器 (简化版)"""
+"""表达式解析器"""
+
+from typing import Any, Iterable, List, Mapping, Optional
+
+from .compiler import CompiledExpression, ExpressionCompiler, get_expression_compiler
 
-from typing import Any
 
 class ExpressionParser:
-    """简易表达式解析器"""
-
-    def evaluate(self, expression: str) -> Any:
-        """评估一个数学表达式"""
-        try:
-            return eval(expression, {"__builtins__": {}})
-        except Exception as exc:
-            raise ValueError(str(exc))
+    """
+    表达式解析器
+
+    表达式首次使用时解析、校验并编译，之后直接复用编译结果。
+    """
+
+    def __init__(self, compiler: Optional[ExpressionCompiler] = None) -> None:
+        """
+        Args:
+            compiler: 使用的编译器，默认使用全局共享的编译器
+        """
+        self.compiler = compiler or get_expression_compiler()
+
+    def compile(self, expression: str) -> CompiledExpression:
+        """编译表达式（带缓存）"""
+        return self.compiler.compile(expression)
+
+    def evaluate(self, expression: str, context: Optional[Mapping[str, Any]] = None) -> Any:
+        """
+        评估一个数学表达式
+
+        Args:
+            expression: 表达式文本
+            context: 变量上下文
+
+        Raises:
+            ExpressionError: 解析、校验或求值失败
+        """
+        return self.compiler.compile(expression).evaluate(context)
+
+    def evaluate_many(self, expression: str, contexts: Iterable[Mapping[str, Any]]) -> List[Any]:
+        """用同一个表达式对多个上下文批量求值"""
+        return self.compiler.compile(expression).evaluate_many(contexts)
@@ -4,12 +4,23 @@
 """
 
 import logging
+import os
 import threading
 import time
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .dispatcher import (  # noqa: F401
+    AsyncioDispatcher,
+    EventDispatcher,
+    OverflowPolicy,
+    ThreadPoolDispatcher,
+    create_dispatcher,
+)
+from .spill_log import EventSpillLog
 
 logger = logging.getLogger(__name__)
 
@@ -126,11 +137,14 @@ class FunctionEventHandler(EventHandler):
 class EventBus:
     """事件总线"""
 
-    def __init__(self) -> None:
+    def __init__(self, dispatcher: Optional[EventDispatcher] = None) -> None:
         self._handlers: Dict[str, List[IEventHandler]] = defaultdict(list)
         self._async_handlers: Dict[str, List[IEventHandler]] = defaultdict(list)
         self._middleware: List[Callable] = []
         self._event_store: Optional["EventStore"] = None
+        # 异步分发器在第一次需要时创建
+        self._dispatcher: Optional[EventDispatcher] = dispatcher
+        self._dispatcher_lock = threading.Lock()
         self.logger = logger.getChild("EventBus")
 
     def subscribe(self, event_type: str, handler: IEventHandler) -> None:
@@ -171,7 +185,7 @@ class EventBus:
                 return  # 中间件取消了事件
 
         # 存储事件
-        if self._event_store:
+        if self._event_store is not None:
             self._event_store.append(event)
 
         # 同步处理
@@ -205,16 +219,36 @@ class EventBus:
         if not handlers:
             return
 
-        # 在新线程中处理异步事件
-        def run_async() -> None:
-            for handler in handlers:
-                try:
-                    handler.handle(event)
-                except Exception as e:
-                    self.logger.error("Error in async handler: %s", e, exc_info=True)
-
-        thread = threading.Thread(target=run_async, daemon=True)
-        thread.start()
+        self.get_dispatcher().submit(event, handlers)
+
+    def get_dispatcher(self) -> EventDispatcher:
+        """获取异步分发器，未设置时按默认配置创建线程池分发器"""
+        if self._dispatcher is None:
+            with self._dispatcher_lock:
+                if self._dispatcher is None:
+                    self._dispatcher = create_dispatcher(
+                        os.getenv("EVENT_BUS_DISPATCHER", "thread"),
+                        workers=int(os.getenv("EVENT_BUS_WORKERS", "4")),
+                        queue_size=int(os.getenv("EVENT_BUS_QUEUE_SIZE", "1000")),
+                        policy=os.getenv("EVENT_BUS_OVERFLOW", OverflowPolicy.BLOCK.value),
+                        block_timeout=float(os.getenv("EVENT_BUS_BLOCK_TIMEOUT", "1.0")),
+                        name="event-bus",
+                    )
+        return self._dispatcher
+
+    def set_dispatcher(self, dispatcher: EventDispatcher) -> None:
+        """替换异步分发器，旧分发器处理完已入队事件后关闭"""
+        with self._dispatcher_lock:
+            previous, self._dispatcher = self._dispatcher, dispatcher
+        if previous is not None and previous is not dispatcher:
+            previous.shutdown(wait=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭异步分发器"""
+        with self._dispatcher_lock:
+            dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is not None:
+            dispatcher.shutdown(wait=wait)
 
     def add_middleware(self, middleware: Callable[[DomainEvent], DomainEvent]) -> None:
         """添加中间件"""
@@ -225,22 +259,135 @@ class EventBus:
         self._event_store = event_store
 
 
+class _SeqIndex:
+    """按序号递增的索引，支持头部淘汰和按时间键二分查找"""
+
+    __slots__ = ("seqs", "keys", "head")
+
+    def __init__(self) -> None:
+        self.seqs: List[int] = []
+        self.keys: List[float] = []
+        self.head = 0
+
+    def append(self, seq: int, key: float) -> None:
+        self.seqs.append(seq)
+        self.keys.append(key)
+
+    def popleft(self) -> None:
+        self.head += 1
+        # 惰性压缩，均摊 O(1)
+        if self.head >= 1024 and self.head * 2 >= len(self.seqs):
+            del self.seqs[: self.head]
+            del self.keys[: self.head]
+            self.head = 0
+
+    def range(self, lo_key: float, hi_key: float) -> Tuple[int, int]:
+        return (
+            bisect_left(self.keys, lo_key, self.head),
+            bisect_right(self.keys, hi_key, self.head),
+        )
+
+    def __len__(self) -> int:
+        return len(self.seqs) - self.head
+
+
+_EVENT_CLASSES: Dict[str, type] = {}
+
+
+def _event_to_record(event: DomainEvent) -> Dict[str, Any]:
+    return {
+        "kind": event.__class__.__name__,
+        "type": event.type,
+        "data": event.data,
+        "timestamp": event.timestamp,
+        "source": event.source,
+        "correlation_id": event.correlation_id,
+    }
+
+
+def _event_from_record(record: Dict[str, Any]) -> DomainEvent:
+    if not _EVENT_CLASSES:
+        for cls in (DomainEvent, GameEvent, PlayerEvent, CombatEvent, WorldEvent, SystemEvent):
+            _EVENT_CLASSES[cls.__name__] = cls
+    cls = _EVENT_CLASSES.get(record.get("kind", ""), DomainEvent)
+    return cls(
+        type=record["type"],
+        data=record.get("data") or {},
+        timestamp=record["timestamp"],
+        source=record.get("source"),
+        correlation_id=record.get("correlation_id"),
+    )
+
+
 class EventStore:
-    """事件存储"""
+    """
+    事件存储
 
-    def __init__(self, max_size: int = 10000) -> None:
-        self._events: List[DomainEvent] = []
-        self._max_size = max_size
+    固定容量的环形缓冲区，超出 ``max_size`` 时淘汰最旧的事件。
+    全局和按类型的二级索引按时间键有序，类型/时间范围查询为 O(log n + k)。
+    指定 ``spill_path`` 后，被淘汰的事件会追加写入磁盘，可通过
+    ``get_spilled_events`` 或 ``get_events(include_spilled=True)`` 查询。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        spill_path: Optional[str] = None,
+        spill_segment_size: int = 1000,
+    ) -> None:
+        self._max_size = max(1, max_size)
+        self._ring: List[Optional[DomainEvent]] = [None] * self._max_size
+        self._all = _SeqIndex()
+        self._by_type: Dict[str, _SeqIndex] = {}
+        # 时间键单调不减；乱序事件的键被抬高到前一个键，最大抬高量用于修正查询上界
+        self._last_key = float("-inf")
+        self._max_regression = 0.0
         self._lock = threading.Lock()
+        self._spill: Optional[EventSpillLog] = (
+            EventSpillLog(spill_path, segment_size=spill_segment_size)
+            if spill_path
+            else None
+        )
+        # 重启后从溢出日志续编序号，新段不会与旧段同名
+        self._next_seq = self._spill.next_seq if self._spill is not None else 0
 
     def append(self, event: DomainEvent) -> None:
         """添加事件"""
+        evicted: Optional[DomainEvent] = None
         with self._lock:
-            self._events.append(event)
-
-            # 限制大小
-            if len(self._events) > self._max_size:
-                self._events = self._events[-self._max_size // 2 :]
+            seq = self._next_seq
+            slot = seq % self._max_size
+            if len(self._all) >= self._max_size:
+                evicted = self._ring[slot]
+                self._evict_locked(evicted)
+            self._ring[slot] = event
+
+            key = event.timestamp
+            if key < self._last_key:
+                self._max_regression = max(self._max_regression, self._last_key - key)
+                key = self._last_key
+            self._last_key = key
+
+            self._all.append(seq, key)
+            index = self._by_type.get(event.type)
+            if index is None:
+                index = self._by_type[event.type] = _SeqIndex()
+            index.append(seq, key)
+            self._next_seq = seq + 1
+
+            # 持锁交接，保证溢出日志按序号排列；写盘放到锁外
+            if evicted is not None and self._spill is not None:
+                self._spill.append(seq - self._max_size, _event_to_record(evicted), write=False)
+
+        if evicted is not None and self._spill is not None:
+            self._spill.write_sealed()
+
+    def _evict_locked(self, event: DomainEvent) -> None:
+        self._all.popleft()
+        index = self._by_type[event.type]
+        index.popleft()
+        if not index:
+            del self._by_type[event.type]
 
     def get_events(
         self,
@@ -248,42 +395,98 @@ class EventStore:
         start_time: Optional[float] = None,
         end_time: Optional[float] = None,
         limit: int = 100,
+        include_spilled: bool = False,
     ) -> List[DomainEvent]:
-        """查询事件"""
+        """
+        查询事件
+
+        Args:
+            event_type: 事件类型
+            start_time: 起始时间（含）
+            end_time: 结束时间（含）
+            limit: 返回最新的若干条，0 表示不限
+            include_spilled: 内存中不足 ``limit`` 条时继续查询溢出日志
+
+        Returns:
+            按发生顺序排列的事件列表
+        """
         with self._lock:
-            events = self._events
-
-            # 过滤事件类型
-            if event_type:
-                events = [e for e in events if e.type == event_type]
-
-            # 过滤时间范围
-            if start_time:
-                events = [e for e in events if e.timestamp >= start_time]
-
-            if end_time:
-                events = [e for e in events if e.timestamp <= end_time]
-
-            # 限制数量
-            if limit and len(events) > limit:
-                events = events[-limit:]
+            events = self._query_locked(event_type, start_time, end_time, limit)
+
+        if include_spilled and self._spill is not None and (not limit or len(events) < limit):
+            remaining = limit - len(events) if limit else 0
+            if events:
+                # 只补充比内存中最早结果更旧的事件
+                end_time = min(end_time or float("inf"), events[0].timestamp)
+            spilled = self.get_spilled_events(event_type, start_time, end_time, remaining)
+            events = spilled + events
+        return events
+
+    def _query_locked(
+        self,
+        event_type: Optional[str],
+        start_time: Optional[float],
+        end_time: Optional[float],
+        limit: int,
+    ) -> List[DomainEvent]:
+        index = self._by_type.get(event_type) if event_type else self._all
+        if not index:
+            return []
+
+        lo_key = start_time if start_time else float("-inf")
+        hi_key = end_time + self._max_regression if end_time else float("inf")
+        lo, hi = index.range(lo_key, hi_key)
+
+        result: List[DomainEvent] = []
+        seqs = index.seqs
+        for pos in range(hi - 1, lo - 1, -1):
+            event = self._ring[seqs[pos] % self._max_size]
+            if start_time and event.timestamp < start_time:
+                continue
+            if end_time and event.timestamp > end_time:
+                continue
+            result.append(event)
+            if limit and len(result) >= limit:
+                break
+        result.reverse()
+        return result
+
+    def get_spilled_events(
+        self,
+        event_type: Optional[str] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        limit: int = 100,
+    ) -> List[DomainEvent]:
+        """查询已淘汰并写入溢出日志的事件"""
+        if self._spill is None:
+            return []
+        records = self._spill.query(event_type, start_time, end_time, limit)
+        return [_event_from_record(r) for r in records]
 
-            return events
+    def flush_spill(self) -> None:
+        """把溢出缓冲区写入磁盘"""
+        if self._spill is not None:
+            self._spill.flush()
 
     def get_event_types(self) -> List[str]:
         """获取所有事件类型"""
         with self._lock:
-            types = set(e.type for e in self._events)
-            return sorted(list(types))
+            return sorted(self._by_type)
 
     def clear(self) -> None:
-        """清空事件"""
+        """清空事件（不影响溢出日志）"""
         with self._lock:
-            self._events.clear()
+            # 序号继续递增，保证溢出日志中的序号不重复
+            self._ring = [None] * self._max_size
+            self._all = _SeqIndex()
+            self._by_type.clear()
+            self._last_key = float("-inf")
+            self._max_regression = 0.0
 
     def __len__(self) -> int:
         """获取事件数量"""
-        return len(self._events)
+        return len(self._all)
 
 
 class EventAggregator:
@@ -0,0 +1,404 @@
+"""
+事件异步分发器
+
+EventBus 的异步订阅者由固定数量的工作者处理，不再为每个事件创建线程。
+事件按类型哈希到固定分片，同一类型的事件总由同一个工作者按发布顺序处理；
+每个分片的队列有上限，队列满时按溢出策略阻塞或丢弃。处理器在自己所在
+分片上发布事件且队列已满时不再等待（否则会等待自己腾出空位而死锁），直接丢弃。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import queue
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Deque, List, Optional, Sequence, Tuple
+
+# 导入 Prometheus 指标收集器
+try:
+    from ..metrics.prometheus_metrics import get_metrics_collector
+    PROMETHEUS_ENABLED = True
+except ImportError:  # pragma: no cover - 可选依赖
+    PROMETHEUS_ENABLED = False
+
+if TYPE_CHECKING:  # pragma: no cover
+    from . import DomainEvent, IEventHandler
+
+logger = logging.getLogger(__name__)
+
+# 关闭工作者的哨兵
+_STOP = object()
+
+
+class OverflowPolicy(str, Enum):
+    """队列满时的处理策略"""
+
+    BLOCK = "block"              # 阻塞发布者直到有空位，超时后丢弃
+    DROP_NEWEST = "drop_newest"  # 丢弃新事件
+    DROP_OLDEST = "drop_oldest"  # 丢弃队列中最旧的事件
+
+
+@dataclass
+class DispatchStats:
+    """分发统计"""
+
+    submitted: int = 0
+    processed: int = 0
+    dropped: int = 0
+    handler_errors: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+_Job = Tuple["DomainEvent", Sequence["IEventHandler"], float]
+
+
+class EventDispatcher(ABC):
+    """异步分发器基类"""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 1000,
+        policy: OverflowPolicy | str = OverflowPolicy.BLOCK,
+        block_timeout: Optional[float] = 1.0,
+        name: str = "event-dispatcher",
+    ) -> None:
+        """
+        Args:
+            workers: 工作者（分片）数量
+            queue_size: 每个分片的队列上限
+            policy: 队列满时的策略
+            block_timeout: BLOCK 策略的最长等待时间（秒），None 表示一直等待
+            name: 分发器名称，用作指标标签和线程名前缀
+        """
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.policy = OverflowPolicy(policy)
+        self.block_timeout = block_timeout
+        self.name = name
+        self.stats = DispatchStats()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        # 记录当前线程正在处理哪个分片的事件
+        self._local = threading.local()
+
+    def shard_for(self, event_type: str) -> int:
+        """同一事件类型总是映射到同一分片，从而保证类型内顺序"""
+        return zlib.crc32(event_type.encode("utf-8")) % self.workers
+
+    def _in_shard(self, shard: int) -> bool:
+        """当前线程是否正在处理该分片的事件"""
+        return getattr(self._local, "shard", None) == shard
+
+    @abstractmethod
+    def submit(self, event: "DomainEvent", handlers: Sequence["IEventHandler"]) -> bool:
+        """提交事件，返回是否入队（被丢弃时返回 False）"""
+
+    @abstractmethod
+    def queue_depth(self) -> int:
+        """当前排队的事件数"""
+
+    @abstractmethod
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = 5.0) -> None:
+        """停止分发器，wait 为 True 时先处理完已入队事件"""
+
+    # ------------------------------------------------------------------
+    # 统计与指标
+    # ------------------------------------------------------------------
+    def _count(self, field_name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self.stats, field_name, getattr(self.stats, field_name) + amount)
+
+    def _on_dropped(self, event: "DomainEvent") -> None:
+        self._count("dropped")
+        logger.warning(f"[{self.name}] 队列已满，丢弃事件 {event.type}")
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().record_event_dropped(self.name, event.type)
+
+    def _report_depth(self) -> None:
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().update_event_queue_depth(self.name, self.queue_depth())
+
+    def _run_handlers(self, job: _Job) -> List[Any]:
+        """依次执行处理器，返回其中的协程（由调用方等待）"""
+        event, handlers, _ = job
+        pending = []
+        for handler in handlers:
+            try:
+                result = handler.handle(event)
+                if inspect.isawaitable(result):
+                    pending.append(result)
+            except Exception as e:
+                self._count("handler_errors")
+                logger.error("Error in async handler: %s", e, exc_info=True)
+        return pending
+
+    def _finish(self, job: _Job, started: float) -> None:
+        event, _, enqueued = job
+        self._count("processed")
+        if PROMETHEUS_ENABLED:
+            collector = get_metrics_collector()
+            collector.record_event_dispatch(
+                self.name, event.type, time.perf_counter() - started, started - enqueued
+            )
+            collector.update_event_queue_depth(self.name, self.queue_depth())
+
+    def get_stats(self) -> dict:
+        stats = self.stats.to_dict()
+        stats["queue_depth"] = self.queue_depth()
+        stats["workers"] = self.workers
+        stats["policy"] = self.policy.value
+        return stats
+
+
+class ThreadPoolDispatcher(EventDispatcher):
+    """固定线程池分发器，每个分片一个线程和一个有界队列"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._queues: List["queue.Queue[Any]"] = [
+            queue.Queue(maxsize=self.queue_size) for _ in range(self.workers)
+        ]
+        self._threads = [
+            threading.Thread(
+                target=self._worker, args=(i,), name=f"{self.name}-{i}", daemon=True
+            )
+            for i, q in enumerate(self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, event: "DomainEvent", handlers: Sequence["IEventHandler"]) -> bool:
+        if self._closed:
+            return False
+        job: _Job = (event, tuple(handlers), time.perf_counter())
+        shard = self.shard_for(event.type)
+        q = self._queues[shard]
+        self._count("submitted")
+
+        if self.policy is OverflowPolicy.BLOCK:
+            try:
+                if self._in_shard(shard):
+                    q.put_nowait(job)
+                else:
+                    q.put(job, timeout=self.block_timeout)
+            except queue.Full:
+                self._on_dropped(event)
+                return False
+        elif self.policy is OverflowPolicy.DROP_NEWEST:
+            try:
+                q.put_nowait(job)
+            except queue.Full:
+                self._on_dropped(event)
+                return False
+        else:
+            while True:
+                try:
+                    q.put_nowait(job)
+                    break
+                except queue.Full:
+                    try:
+                        oldest = q.get_nowait()
+                        q.task_done()
+                        self._on_dropped(oldest[0])
+                    except queue.Empty:
+                        pass
+
+        self._report_depth()
+        return True
+
+    def _worker(self, shard: int) -> None:
+        q = self._queues[shard]
+        self._local.shard = shard
+        while True:
+            job = q.get()
+            try:
+                if job is _STOP:
+                    return
+                started = time.perf_counter()
+                for awaitable in self._run_handlers(job):
+                    try:
+                        asyncio.run(awaitable)
+                    except Exception as e:
+                        self._count("handler_errors")
+                        logger.error("Error in async handler: %s", e, exc_info=True)
+                self._finish(job, started)
+            finally:
+                q.task_done()
+
+    def queue_depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def join(self) -> None:
+        """等待已入队事件全部处理完"""
+        for q in self._queues:
+            q.join()
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = 5.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for q in self._queues:
+            if not wait:
+                while True:
+                    try:
+                        q.get_nowait()
+                        q.task_done()
+                    except queue.Empty:
+                        break
+            q.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+class AsyncioDispatcher(EventDispatcher):
+    """
+    asyncio 分发器
+
+    在后台线程中运行独立的事件循环，每个分片一个协程工作者。
+    同步的 ``handle`` 在线程池中执行，不阻塞事件循环；返回协程时回到
+    事件循环上等待，适合 I/O 型异步处理器。
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=f"{self.name}-handler")
+        # 每个分片的待处理队列；由锁保护，满时按策略处理
+        self._queues: List[Deque[Any]] = [deque() for _ in range(self.workers)]
+        self._cond = threading.Condition()
+        self._wakeups: List[asyncio.Event] = []
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name=f"{self.name}-loop", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._wakeups = [asyncio.Event() for _ in range(self.workers)]
+        self._tasks = [self._loop.create_task(self._worker(i)) for i in range(self.workers)]
+        self._ready.set()
+        try:
+            self._loop.run_until_complete(asyncio.gather(*self._tasks))
+        finally:
+            self._loop.close()
+
+    def submit(self, event: "DomainEvent", handlers: Sequence["IEventHandler"]) -> bool:
+        if self._closed:
+            return False
+        job: _Job = (event, tuple(handlers), time.perf_counter())
+        shard = self.shard_for(event.type)
+        q = self._queues[shard]
+        self._count("submitted")
+
+        # 在事件循环线程或本分片的处理器中等待空位会卡住分片自身
+        reentrant = self._in_shard(shard) or threading.current_thread() is self._thread
+        with self._cond:
+            if len(q) >= self.queue_size:
+                if self.policy is OverflowPolicy.BLOCK:
+                    if reentrant or not self._cond.wait_for(
+                        lambda: len(q) < self.queue_size or self._closed, self.block_timeout
+                    ) or self._closed:
+                        self._on_dropped(event)
+                        return False
+                elif self.policy is OverflowPolicy.DROP_NEWEST:
+                    self._on_dropped(event)
+                    return False
+                else:
+                    oldest = q.popleft()
+                    self._on_dropped(oldest[0])
+            q.append(job)
+
+        self._loop.call_soon_threadsafe(self._wakeups[shard].set)
+        self._report_depth()
+        return True
+
+    async def _worker(self, shard: int) -> None:
+        q = self._queues[shard]
+        wakeup = self._wakeups[shard]
+        while True:
+            with self._cond:
+                job = q.popleft() if q else None
+                if job is not None:
+                    self._cond.notify_all()
+            if job is None:
+                if self._closed:
+                    return
+                wakeup.clear()
+                if not q and not self._closed:
+                    await wakeup.wait()
+                continue
+            if job is _STOP:
+                return
+            started = time.perf_counter()
+            for handler in job[1]:
+                try:
+                    if inspect.iscoroutinefunction(handler.handle):
+                        result = handler.handle(job[0])
+                    else:
+                        result = await self._loop.run_in_executor(
+                            self._executor, self._call_handler, shard, handler, job[0]
+                        )
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    self._count("handler_errors")
+                    logger.error("Error in async handler: %s", e, exc_info=True)
+            self._finish(job, started)
+
+    def _call_handler(self, shard: int, handler: "IEventHandler", event: "DomainEvent") -> Any:
+        self._local.shard = shard
+        try:
+            return handler.handle(event)
+        finally:
+            self._local.shard = None
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._queues)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """等待已入队事件全部处理完"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue_depth() or self.stats.processed + self.stats.dropped < self.stats.submitted:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = 5.0) -> None:
+        if self._closed:
+            return
+        with self._cond:
+            if not wait:
+                for q in self._queues:
+                    q.clear()
+            else:
+                for q in self._queues:
+                    q.append(_STOP)
+            self._closed = True
+            self._cond.notify_all()
+        for event in self._wakeups:
+            self._loop.call_soon_threadsafe(event.set)
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False)
+
+
+def create_dispatcher(kind: str = "thread", **kwargs: Any) -> EventDispatcher:
+    """按类型创建分发器：``thread`` 或 ``asyncio``"""
+    if kind == "asyncio":
+        return AsyncioDispatcher(**kwargs)
+    if kind == "thread":
+        return ThreadPoolDispatcher(**kwargs)
+    raise ValueError(f"未知的分发器类型: {kind}")
@@ -0,0 +1,227 @@
+"""
+事件溢出日志
+
+EventStore 淘汰的事件按段追加写入磁盘，每个段是一个独立的 JSON Lines 文件，
+首行记录该段的时间范围和事件类型，查询时只需读取首行即可跳过无关段。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpillSegment:
+    """溢出段元数据"""
+
+    path: Path
+    first_seq: int
+    count: int
+    min_ts: float
+    max_ts: float
+    types: Set[str] = field(default_factory=set)
+
+    def may_contain(
+        self,
+        event_type: Optional[str],
+        start_time: Optional[float],
+        end_time: Optional[float],
+    ) -> bool:
+        if event_type and event_type not in self.types:
+            return False
+        if start_time and self.max_ts < start_time:
+            return False
+        if end_time and self.min_ts > end_time:
+            return False
+        return True
+
+
+class EventSpillLog:
+    """只追加的事件溢出日志"""
+
+    def __init__(self, directory: str | Path, segment_size: int = 1000) -> None:
+        """
+        Args:
+            directory: 溢出段存放目录
+            segment_size: 每个段包含的事件数量
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = max(1, segment_size)
+        self._buffer: List[Dict[str, Any]] = []
+        # 已凑满一段、等待写盘的批次，按序号排列
+        self._sealed: List[List[Dict[str, Any]]] = []
+        self._segments: List[SpillSegment] = []
+        self._lock = threading.Lock()
+        self._load_segments()
+
+    def _load_segments(self) -> None:
+        """启动时只读取每个段的首行重建索引"""
+        for path in sorted(self.directory.glob("segment_*.jsonl")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    meta = json.loads(f.readline())
+                self._segments.append(
+                    SpillSegment(
+                        path=path,
+                        first_seq=meta["first_seq"],
+                        count=meta["count"],
+                        min_ts=meta["min_ts"],
+                        max_ts=meta["max_ts"],
+                        types=set(meta["types"]),
+                    )
+                )
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"跳过无法识别的事件溢出段 {path.name}: {e}")
+        self._segments.sort(key=lambda s: s.first_seq)
+
+    @property
+    def next_seq(self) -> int:
+        """已记录事件之后的下一个序号，重启后据此续编，避免与旧段重名"""
+        with self._lock:
+            ends = [s.first_seq + s.count for s in self._segments]
+            ends.extend(batch[-1]["seq"] + 1 for batch in self._sealed)
+            if self._buffer:
+                ends.append(self._buffer[-1]["seq"] + 1)
+            return max(ends, default=0)
+
+    def append(self, seq: int, record: Dict[str, Any], write: bool = True) -> None:
+        """
+        追加一条被淘汰的事件，缓冲满一段后写盘
+
+        Args:
+            write: 为 False 时凑满的段只封存不写盘，由调用方在自己的锁外调用
+                ``write_sealed``，这样可以在持锁期间按序号交接事件
+        """
+        with self._lock:
+            self._buffer.append(dict(record, seq=seq))
+            if len(self._buffer) >= self.segment_size:
+                self._sealed.append(self._buffer)
+                self._buffer = []
+            if write:
+                self._write_sealed_locked()
+
+    def write_sealed(self) -> None:
+        """把已封存的段写盘"""
+        with self._lock:
+            self._write_sealed_locked()
+
+    def flush(self) -> None:
+        """把缓冲区中不足一段的事件也写成一个段"""
+        with self._lock:
+            if self._buffer:
+                self._sealed.append(self._buffer)
+                self._buffer = []
+            self._write_sealed_locked()
+
+    def _write_sealed_locked(self) -> None:
+        while self._sealed:
+            self._write_segment_locked(self._sealed[0])
+            self._sealed.pop(0)
+
+    def _segment_path(self, first_seq: int) -> Path:
+        """段文件名；同名文件已存在时换用带后缀的名字，绝不覆盖旧段"""
+        path = self.directory / f"segment_{first_seq:012d}.jsonl"
+        suffix = 1
+        while path.exists():
+            path = self.directory / f"segment_{first_seq:012d}_{suffix}.jsonl"
+            suffix += 1
+        return path
+
+    def _write_segment_locked(self, records: List[Dict[str, Any]]) -> None:
+        timestamps = [r["timestamp"] for r in records]
+        segment = SpillSegment(
+            path=self._segment_path(records[0]["seq"]),
+            first_seq=records[0]["seq"],
+            count=len(records),
+            min_ts=min(timestamps),
+            max_ts=max(timestamps),
+            types={r["type"] for r in records},
+        )
+        meta = {
+            "first_seq": segment.first_seq,
+            "count": segment.count,
+            "min_ts": segment.min_ts,
+            "max_ts": segment.max_ts,
+            "types": sorted(segment.types),
+        }
+        tmp_path = segment.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        if segment.path.name != f"segment_{segment.first_seq:012d}.jsonl":
+            logger.error(f"事件溢出段 segment_{segment.first_seq:012d}.jsonl 已存在，改写入 {segment.path.name}")
+        tmp_path.replace(segment.path)
+        self._segments.append(segment)
+        self._segments.sort(key=lambda s: s.first_seq)
+
+    @property
+    def segments(self) -> List[SpillSegment]:
+        with self._lock:
+            return list(self._segments)
+
+    def __len__(self) -> int:
+        with self._lock:
+            pending = sum(len(batch) for batch in self._sealed) + len(self._buffer)
+            return sum(s.count for s in self._segments) + pending
+
+    def _iter_segment(self, segment: SpillSegment) -> Iterator[Dict[str, Any]]:
+        with open(segment.path, "r", encoding="utf-8") as f:
+            f.readline()  # 跳过元数据行
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def query(
+        self,
+        event_type: Optional[str] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        查询溢出事件
+
+        从最新的段开始向前扫描，元数据不匹配的段直接跳过。
+
+        Returns:
+            按序号升序排列的事件记录（最多 ``limit`` 条最新记录）
+        """
+        with self._lock:
+            buffered = [r for batch in self._sealed for r in batch] + self._buffer
+            segments = list(self._segments)
+
+        def matches(record: Dict[str, Any]) -> bool:
+            if event_type and record["type"] != event_type:
+                return False
+            if start_time and record["timestamp"] < start_time:
+                return False
+            if end_time and record["timestamp"] > end_time:
+                return False
+            return True
+
+        result: List[Dict[str, Any]] = [r for r in reversed(buffered) if matches(r)]
+        for segment in reversed(segments):
+            if limit and len(result) >= limit:
+                break
+            if not segment.may_contain(event_type, start_time, end_time):
+                continue
+            try:
+                records = [r for r in self._iter_segment(segment) if matches(r)]
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取事件溢出段失败 {segment.path.name}: {e}")
+                continue
+            result.extend(reversed(records))
+
+        if limit:
+            result = result[:limit]
+        result.reverse()
+        return result
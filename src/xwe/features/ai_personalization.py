@@ -5,6 +5,7 @@ AI个性化系统
 """
 
 from typing import Dict, List, Any
+import copy
 import random
 
 
@@ -47,6 +48,14 @@ class AIPersonalization:
             }
         }
     
+    def to_dict(self) -> Dict[str, Any]:
+        """导出玩家画像"""
+        return {"player_profile": copy.deepcopy(self.player_profile)}
+
+    def load_from_dict(self, data: Dict[str, Any]) -> None:
+        """恢复 ``to_dict`` 导出的玩家画像"""
+        self.player_profile.update(copy.deepcopy(data.get("player_profile", {})))
+
     def analyze_player_action(self, action: str, context: Dict[str, Any]) -> None:
         """
         分析玩家行为
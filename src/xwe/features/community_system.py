@@ -4,7 +4,7 @@
 """
 
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 from datetime import datetime
 import json
@@ -127,6 +127,29 @@ class CommunitySystem:
         # 世界频道消息（简化版）
         self.world_chat: List[Dict[str, Any]] = []
         
+    def to_dict(self) -> Dict[str, Any]:
+        """导出好友、屏蔽名单和私信"""
+        return {
+            "friend_lists": {pid: list(ids) for pid, ids in self.friend_lists.items()},
+            "block_lists": {pid: list(ids) for pid, ids in self.block_lists.items()},
+            "messages": {
+                pid: [{**asdict(msg), "timestamp": msg.timestamp.isoformat()} for msg in msgs]
+                for pid, msgs in self.messages.items()
+            },
+        }
+
+    def load_from_dict(self, data: Dict[str, Any]) -> None:
+        """恢复 ``to_dict`` 导出的社交数据"""
+        for pid, ids in data.get("friend_lists", {}).items():
+            self.friend_lists[pid] = list(ids)
+        for pid, ids in data.get("block_lists", {}).items():
+            self.block_lists[pid] = list(ids)
+        for pid, msgs in data.get("messages", {}).items():
+            self.messages[pid] = [
+                Message(**{**msg, "timestamp": datetime.fromisoformat(msg["timestamp"])})
+                for msg in msgs
+            ]
+
     def create_guild(self, name: str, description: str, leader_id: str) -> Optional[Guild]:
         """
         创建门派
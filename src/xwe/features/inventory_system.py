@@ -3,14 +3,23 @@
 管理玩家的物品存储和同步
 """
 
+import atexit
 import json
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 import logging
 
 from src.xwe.core.inventory import Inventory
+from src.xwe.systems.persistence import WriteBehindQueue, atomic_write_json
 from flask import has_request_context, session
 
+# 导入 Prometheus 指标收集器
+try:
+    from src.xwe.metrics.prometheus_metrics import get_metrics_collector
+    PROMETHEUS_ENABLED = True
+except ImportError:  # pragma: no cover - 可选依赖
+    PROMETHEUS_ENABLED = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,15 +27,25 @@ class InventorySystem:
     """
     背包系统
     
-    提供物品管理、持久化等功能
+    提供物品管理、持久化等功能。开启 ``write_behind`` 后，物品变更只把背包
+    标记为脏数据，由后台线程按 ``flush_interval`` 或 ``max_pending`` 合并落盘。
     """
     
-    def __init__(self, save_path: Optional[Path] = None):
+    def __init__(
+        self,
+        save_path: Optional[Path] = None,
+        write_behind: bool = False,
+        flush_interval: float = 2.0,
+        max_pending: int = 64,
+    ):
         """
         初始化背包系统
         
         Args:
             save_path: 存档路径
+            write_behind: 是否启用写回模式
+            flush_interval: 写回模式的刷新间隔（秒）
+            max_pending: 脏背包数量达到该值时立即刷新
         """
         if save_path is None:
             self.save_path = Path("saves") / "inventory"
@@ -39,22 +58,46 @@ class InventorySystem:
         # 玩家背包缓存
         self.inventories: Dict[str, Inventory] = {}
 
+        # 写回队列
+        self.write_behind = write_behind
+        self._writer = WriteBehindQueue(
+            self._write_inventory,
+            flush_interval=flush_interval,
+            max_pending=max_pending,
+            name="inventory-flusher",
+            on_flush=self._record_flush,
+        )
+        if write_behind:
+            self._writer.start()
+            atexit.register(self.shutdown)
+
+    def _record_flush(self, writes: int, duration: float, pending: int) -> None:
+        """上报刷新指标"""
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().record_inventory_flush(writes, duration, pending)
+
+    def _commit(self, player_id: str) -> bool:
+        """
+        提交背包变更
+
+        写回模式下只入队，否则立即保存。
+        """
+        if self.write_behind:
+            self._writer.mark_dirty(player_id)
+            return True
+        return self.save(player_id)
+
     def _broadcast_change(self, player_id: str) -> None:
-        """更新 status_cache 以便通过 SSE 推送背包变化。"""
+        """通知状态通道背包已变化，由 SSE 流推送差量。"""
         try:
-            from src.app import build_status_data, status_cache
+            from src.app import status_channel
 
             session_id = (
-                session.get("session_id", player_id)
+                session.get("session_id", "default")
                 if has_request_context()
                 else player_id
             )
-            data = build_status_data()
-            subset = {
-                "player": data.get("player", {}),
-                "inventory": data.get("inventory", {}),
-            }
-            status_cache[session_id] = subset
+            status_channel.notify(session_id)
         except Exception as e:  # pragma: no cover - best effort
             logger.debug(f"广播背包变更失败: {e}")
         
@@ -90,6 +133,18 @@ class InventorySystem:
         Returns:
             是否成功添加
         """
+        success = self._add(player_id, item_data)
+
+        if success:
+            # 自动保存
+            save_success = self._commit(player_id)
+            self._broadcast_change(player_id)
+            logger.debug(f"[INVENTORY] 保存成功: {save_success}")
+
+        return success
+
+    def _add(self, player_id: str, item_data: Dict[str, Any]) -> bool:
+        """添加物品但不保存、不广播"""
         inventory = self.get_inventory(player_id)
         
         # 从item_data提取信息
@@ -99,24 +154,17 @@ class InventorySystem:
         # 添加到背包
         success = inventory.add(item_name, quantity)
 
-        # 记录当前数量
-        current_qty = inventory.get_quantity(item_name)
-        save_success = False
-
         if success:
             logger.info(
                 f"[INVENTORY] 玩家 {player_id} 获得物品: {item_name} x{quantity}"
             )
-            # 自动保存
-            save_success = self.save(player_id)
-            self._broadcast_change(player_id)
         else:
             logger.warning(
                 f"[INVENTORY] 玩家 {player_id} 添加物品失败: {item_name} x{quantity}"
             )
 
         logger.debug(
-            f"[INVENTORY] {item_name} 当前数量: {current_qty}, 保存成功: {save_success}"
+            f"[INVENTORY] {item_name} 当前数量: {inventory.get_quantity(item_name)}"
         )
 
         return success
@@ -124,6 +172,8 @@ class InventorySystem:
     def add_items(self, player_id: str, items: List[Dict[str, Any]]) -> Dict[str, int]:
         """
         批量添加物品
+
+        整批物品只保存和广播一次。
         
         Args:
             player_id: 玩家ID
@@ -135,13 +185,15 @@ class InventorySystem:
         added = {}
 
         for item_data in items:
-            if self.add_item(player_id, item_data):
+            if self._add(player_id, item_data):
                 item_name = item_data.get("name", "未知物品")
                 quantity = item_data.get("qty", 1)
                 added[item_name] = added.get(item_name, 0) + quantity
 
         total_qty = sum(added.values())
         if added:
+            self._commit(player_id)
+            self._broadcast_change(player_id)
             logger.info(f"[INVENTORY] 批量添加物品，总数: {total_qty}")
             for name, qty in added.items():
                 logger.debug(f"[INVENTORY] {name} x{qty}")
@@ -182,7 +234,7 @@ class InventorySystem:
         if success:
             logger.info(f"玩家 {player_id} 移除物品: {item_name} x{quantity}")
             # 自动保存
-            self.save(player_id)
+            self._commit(player_id)
             self._broadcast_change(player_id)
             
         return success
@@ -218,7 +270,7 @@ class InventorySystem:
     
     def save(self, player_id: str) -> bool:
         """
-        保存背包数据
+        立即保存背包数据
         
         Args:
             player_id: 玩家ID
@@ -226,18 +278,52 @@ class InventorySystem:
         Returns:
             是否成功保存
         """
+        # 立即保存后，队列中的同一背包无需再写
+        self._writer.discard(player_id)
         try:
-            inventory = self.get_inventory(player_id)
-            file_path = self.save_path / f"{player_id}_inventory.json"
-            
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(inventory.to_dict(), f, ensure_ascii=False, indent=2)
-                
-            logger.debug(f"保存玩家 {player_id} 的背包数据")
+            self._write_inventory(player_id)
             return True
         except Exception as e:
             logger.error(f"保存背包失败: {e}")
             return False
+
+    def _write_inventory(self, player_id: str) -> int:
+        """原子写入单个背包文件，返回写入字节数"""
+        inventory = self.get_inventory(player_id)
+        file_path = self.save_path / f"{player_id}_inventory.json"
+        # to_dict 在背包锁内复制，序列化与写盘不阻塞请求线程
+        size = atomic_write_json(file_path, inventory.to_dict(), indent=2)
+        logger.debug(f"保存玩家 {player_id} 的背包数据")
+        return size
+
+    def flush(self, player_id: Optional[str] = None) -> int:
+        """
+        立即写入写回队列中的背包
+        
+        Args:
+            player_id: 仅刷新指定玩家，默认全部
+            
+        Returns:
+            写入的背包数量
+        """
+        keys = None if player_id is None else {player_id}
+        return self._writer.flush(keys)
+
+    def shutdown(self) -> None:
+        """停止后台刷新线程并写入所有脏背包"""
+        self._writer.stop(flush=True)
+
+    def get_persistence_stats(self) -> Dict[str, Any]:
+        """
+        获取持久化统计
+        
+        Returns:
+            包含写入次数、合并次数、待写数量等信息的字典
+        """
+        stats = self._writer.stats.to_dict()
+        stats["pending"] = self._writer.pending()
+        stats["write_behind"] = self.write_behind
+        return stats
     
     def load(self, player_id: str) -> Optional[Inventory]:
         """
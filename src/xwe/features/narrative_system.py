@@ -4,7 +4,7 @@
 """
 
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 import random
 from datetime import datetime
@@ -51,6 +51,9 @@ class NarrativeSystem:
     
     管理游戏的故事线、任务生成和剧情发展
     """
+
+    # 类 → 事件模板
+    _shared_event_templates: Dict[type, List[Dict[str, Any]]] = {}
     
     def __init__(self):
         self.story_arcs: Dict[str, Dict[str, Any]] = {}
@@ -110,8 +113,16 @@ class NarrativeSystem:
         self.story_nodes["main_start"] = start_node
 
     def _init_event_templates(self) -> None:
-        """初始化事件模板库"""
-        self.event_templates = [
+        """初始化事件模板库，模板条目在实例之间共享，视为只读"""
+        shared = NarrativeSystem._shared_event_templates.get(type(self))
+        if shared is None:
+            shared = self._build_event_templates()
+            NarrativeSystem._shared_event_templates[type(self)] = shared
+        self.event_templates = list(shared)
+
+    def _build_event_templates(self) -> List[Dict[str, Any]]:
+        """构建事件模板"""
+        return [
             {
                 "id": "mysterious_stranger",
                 "name": "神秘来客",
@@ -314,6 +325,22 @@ class NarrativeSystem:
             
         return all_complete
     
+    def to_dict(self) -> Dict[str, Any]:
+        """导出会话相关的剧情进度（故事线与模板是静态数据，不导出）"""
+        return {
+            "active_stories": dict(self.active_stories),
+            "quests": {qid: asdict(quest) for qid, quest in self.quests.items()},
+            "player_choices": {pid: list(choices) for pid, choices in self.player_choices.items()},
+        }
+
+    def load_from_dict(self, data: Dict[str, Any]) -> None:
+        """恢复 ``to_dict`` 导出的剧情进度"""
+        self.active_stories.update(data.get("active_stories", {}))
+        for qid, quest in data.get("quests", {}).items():
+            self.quests[qid] = Quest(**quest)
+        for pid, choices in data.get("player_choices", {}).items():
+            self.player_choices[pid] = list(choices)
+
     def get_story_summary(self, player_id: str) -> Dict[str, Any]:
         """获取玩家的故事进展摘要"""
         choices = self.player_choices.get(player_id, [])
@@ -14,6 +14,9 @@ from pathlib import Path
 import gzip
 import pickle
 
+from src.xwe.core.game.state import GameState
+from src.xwe.systems.persistence.save_engine import SaveEngine, label_from_state
+
 
 class TechnicalOps:
     """
@@ -25,6 +28,7 @@ class TechnicalOps:
     def __init__(self, save_dir: str = "saves"):
         self.save_dir = Path(save_dir)
         self.save_dir.mkdir(exist_ok=True)
+        self.save_engine = SaveEngine(self.save_dir)
         
         # 性能监控数据
         self.performance_data = {
@@ -57,25 +61,15 @@ class TechnicalOps:
             if filename is None:
                 filename = f"save_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             
-            filepath = self.save_dir / f"{filename}.json"
-            
-            # 准备保存数据
-            save_data = {
-                "version": "1.0.0",
-                "timestamp": datetime.now().isoformat(),
-                "game_state": self._serialize_game_state(game_state)
-            }
-            
-            # 保存为JSON（可读格式）
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
+            state = self._serialize_game_state(game_state, lazy=True)
+            self.save_engine.save(
+                filename,
+                state,
+                game_version="1.0.0",
+                label=label_from_state(state),
+            )
             
-            # 同时保存压缩版本（节省空间）
-            compressed_path = self.save_dir / f"{filename}.gz"
-            with gzip.open(compressed_path, 'wb') as f:
-                pickle.dump(save_data, f)
-            
-            self.logger.info(f"游戏已保存到: {filepath}")
+            self.logger.info(f"游戏已保存到: {self.save_engine.path_for(filename)}")
             return True
             
         except Exception as e:
@@ -93,19 +87,22 @@ class TechnicalOps:
             游戏状态对象，如果失败返回None
         """
         try:
-            # 优先尝试加载压缩版本
-            compressed_path = self.save_dir / f"{filename}.gz"
-            if compressed_path.exists():
-                with gzip.open(compressed_path, 'rb') as f:
-                    save_data = pickle.load(f)
+            if self.save_engine.exists(filename):
+                state = self.save_engine.load(filename)
             else:
-                # 加载JSON版本
-                filepath = self.save_dir / f"{filename}.json"
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    save_data = json.load(f)
+                # 兼容旧版存档：优先压缩版本，其次JSON
+                compressed_path = self.save_dir / f"{filename}.gz"
+                if compressed_path.exists():
+                    with gzip.open(compressed_path, 'rb') as f:
+                        save_data = pickle.load(f)
+                else:
+                    filepath = self.save_dir / f"{filename}.json"
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        save_data = json.load(f)
+                state = save_data["game_state"]
             
             # 反序列化游戏状态
-            game_state = self._deserialize_game_state(save_data["game_state"])
+            game_state = self._deserialize_game_state(state)
             
             self.logger.info(f"游戏已加载: {filename}")
             return game_state
@@ -115,36 +112,43 @@ class TechnicalOps:
             return None
     
     def list_saves(self) -> List[Dict[str, Any]]:
-        """列出所有存档"""
-        saves = []
+        """列出所有存档（只读取文件头，未迁移的旧存档按文件信息列出）"""
+        saves = self.save_engine.list()
         
-        for filepath in self.save_dir.glob("*.json"):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                saves.append({
-                    "filename": filepath.stem,
-                    "timestamp": data.get("timestamp", "unknown"),
-                    "size": filepath.stat().st_size,
-                    "version": data.get("version", "unknown")
-                })
-            except:
-                pass
+        for name in self.save_engine.legacy_names():
+            for ext in (".json", ".gz"):
+                filepath = self.save_dir / f"{name}{ext}"
+                if filepath.exists():
+                    stat = filepath.stat()
+                    saves.append({
+                        "filename": name,
+                        "timestamp": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                        "size": stat.st_size,
+                        "version": "legacy"
+                    })
+                    break
         
         # 按时间排序
         saves.sort(key=lambda x: x["timestamp"], reverse=True)
         return saves
+
+    def migrate_legacy_saves(self, remove_legacy: bool = False) -> Dict[str, int]:
+        """把旧版 .json/.gz 存档迁移为单一的 .xws 格式"""
+        result = self.save_engine.migrate_all(remove_legacy=remove_legacy)
+        self.logger.info(f"存档迁移完成: {result}")
+        return result
     
     def delete_save(self, filename: str) -> bool:
         """删除存档"""
         try:
-            # 删除JSON文件
+            self.save_engine.delete(filename)
+            
+            # 删除旧版JSON文件
             json_path = self.save_dir / f"{filename}.json"
             if json_path.exists():
                 json_path.unlink()
             
-            # 删除压缩文件
+            # 删除旧版压缩文件
             gz_path = self.save_dir / f"{filename}.gz"
             if gz_path.exists():
                 gz_path.unlink()
@@ -257,9 +261,11 @@ class TechnicalOps:
             self.logger.error(f"导出数据失败: {e}")
             return None
     
-    def _serialize_game_state(self, game_state: Any) -> Dict[str, Any]:
-        """序列化游戏状态"""
+    def _serialize_game_state(self, game_state: Any, lazy: bool = False) -> Dict[str, Any]:
+        """序列化游戏状态，lazy 时角色留给存档引擎边编码边转换"""
         # 这里简化处理，实际应该根据具体的游戏状态结构来序列化
+        if lazy and isinstance(game_state, GameState):
+            return game_state.to_dict(lazy=True)
         if hasattr(game_state, 'to_dict'):
             return game_state.to_dict()
         elif hasattr(game_state, '__dict__'):
@@ -281,7 +287,7 @@ class TechnicalOps:
         diagnostics = {
             "save_dir_exists": self.save_dir.exists(),
             "save_dir_writable": os.access(self.save_dir, os.W_OK),
-            "save_count": len(list(self.save_dir.glob("*.json"))),
+            "save_count": len(self.list_saves()),
             "disk_space_mb": psutil.disk_usage(str(self.save_dir)).free / 1024 / 1024,
             "python_version": os.sys.version,
             "platform": os.sys.platform
@@ -12,8 +12,12 @@ try:
         nlp_request_seconds,
         nlp_token_count,
         nlp_cache_hit_total,
+        nlp_parse_cache_lookup_total,
+        nlp_intent_tier_total,
         context_compression_total,
         context_memory_blocks_gauge,
+        context_compression_seconds,
+        context_compression_queue_seconds,
         async_thread_pool_size,
         async_request_queue_size,
         nlp_error_total,
@@ -23,6 +27,26 @@ try:
         players_online_gauge,
         system_cpu_usage,
         system_memory_usage,
+        inventory_flush_seconds,
+        inventory_writes_total,
+        inventory_dirty_gauge,
+        event_queue_depth,
+        event_handler_seconds,
+        event_queue_wait_seconds,
+        event_dropped_total,
+        status_stream_connections,
+        llm_pool_in_use,
+        llm_pool_size,
+        llm_requests_total,
+        llm_retries_total,
+        game_instance_pool_requests_total,
+        game_instance_pool_size,
+        game_instance_build_seconds,
+        session_registry_sessions,
+        session_registry_memory_bytes,
+        session_evictions_total,
+        session_hibernate_seconds,
+        session_hydrate_seconds,
     )
     PROMETHEUS_METRICS_AVAILABLE = True
 except ImportError:
@@ -122,8 +146,12 @@ if PROMETHEUS_METRICS_AVAILABLE:
         "nlp_request_seconds",
         "nlp_token_count",
         "nlp_cache_hit_total",
+        "nlp_parse_cache_lookup_total",
+        "nlp_intent_tier_total",
         "context_compression_total",
         "context_memory_blocks_gauge",
+        "context_compression_seconds",
+        "context_compression_queue_seconds",
         "async_thread_pool_size",
         "async_request_queue_size",
         "nlp_error_total",
@@ -133,4 +161,24 @@ if PROMETHEUS_METRICS_AVAILABLE:
         "players_online_gauge",
         "system_cpu_usage",
         "system_memory_usage",
+        "inventory_flush_seconds",
+        "inventory_writes_total",
+        "inventory_dirty_gauge",
+        "event_queue_depth",
+        "event_handler_seconds",
+        "event_queue_wait_seconds",
+        "event_dropped_total",
+        "status_stream_connections",
+        "llm_pool_in_use",
+        "llm_pool_size",
+        "llm_requests_total",
+        "llm_retries_total",
+        "game_instance_pool_requests_total",
+        "game_instance_pool_size",
+        "game_instance_build_seconds",
+        "session_registry_sessions",
+        "session_registry_memory_bytes",
+        "session_evictions_total",
+        "session_hibernate_seconds",
+        "session_hydrate_seconds",
     ])
@@ -60,6 +60,22 @@ context_memory_blocks_gauge = Gauge(
     registry=REGISTRY
 )
 
+# 上下文摘要生成耗时
+context_compression_seconds = Histogram(
+    f'{METRIC_PREFIX}context_compression_seconds',
+    'Time spent summarizing a block of context messages',
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    registry=REGISTRY
+)
+
+# 后台压缩任务排队时间
+context_compression_queue_seconds = Histogram(
+    f'{METRIC_PREFIX}context_compression_queue_seconds',
+    'Time a background context compression job waited before starting',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+    registry=REGISTRY
+)
+
 # 异步线程池大小
 async_thread_pool_size = Gauge(
     f'{METRIC_PREFIX}async_thread_pool_size',
@@ -75,6 +91,20 @@ async_request_queue_size = Gauge(
 )
 
 # NLP 错误计数
+nlp_parse_cache_lookup_total = Counter(
+    f'{METRIC_PREFIX}nlp_parse_cache_lookup_total',
+    'Total number of NLP parse cache lookups by result (memory, disk, miss)',
+    labelnames=['result'],
+    registry=REGISTRY
+)
+
+nlp_intent_tier_total = Counter(
+    f'{METRIC_PREFIX}nlp_intent_tier_total',
+    'Total number of NLP parses by answering tier (local, llm, cache, fallback)',
+    labelnames=['tier'],
+    registry=REGISTRY
+)
+
 nlp_error_total = Counter(
     f'{METRIC_PREFIX}nlp_error_total',
     'Total number of NLP errors',
@@ -125,6 +155,152 @@ system_memory_usage = Gauge(
     registry=REGISTRY
 )
 
+# 背包写回持久化
+inventory_flush_seconds = Histogram(
+    f'{METRIC_PREFIX}inventory_flush_seconds',
+    'Inventory write-behind flush duration in seconds',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+    registry=REGISTRY
+)
+
+inventory_writes_total = Counter(
+    f'{METRIC_PREFIX}inventory_writes_total',
+    'Total number of inventory files written to disk',
+    registry=REGISTRY
+)
+
+inventory_dirty_gauge = Gauge(
+    f'{METRIC_PREFIX}inventory_dirty_gauge',
+    'Number of dirty inventories waiting to be flushed',
+    registry=REGISTRY
+)
+
+# 事件总线异步分发
+event_queue_depth = Gauge(
+    f'{METRIC_PREFIX}event_queue_depth',
+    'Number of events waiting in the async dispatcher queues',
+    labelnames=['dispatcher'],
+    registry=REGISTRY
+)
+
+event_handler_seconds = Histogram(
+    f'{METRIC_PREFIX}event_handler_seconds',
+    'Async event handler processing time in seconds',
+    labelnames=['dispatcher', 'event_type'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+    registry=REGISTRY
+)
+
+event_queue_wait_seconds = Histogram(
+    f'{METRIC_PREFIX}event_queue_wait_seconds',
+    'Time events spend queued before dispatch in seconds',
+    labelnames=['dispatcher'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+    registry=REGISTRY
+)
+
+event_dropped_total = Counter(
+    f'{METRIC_PREFIX}event_dropped_total',
+    'Total number of events dropped by the async dispatcher',
+    labelnames=['dispatcher', 'event_type'],
+    registry=REGISTRY
+)
+
+
+# 状态推送流
+status_stream_connections = Gauge(
+    f'{METRIC_PREFIX}status_stream_connections',
+    'Number of open status SSE streams',
+    registry=REGISTRY
+)
+
+# LLM HTTP 连接池
+llm_pool_in_use = Gauge(
+    f'{METRIC_PREFIX}llm_pool_in_use',
+    'Number of in-flight LLM HTTP requests holding a pooled connection',
+    labelnames=['transport', 'mode'],
+    registry=REGISTRY
+)
+
+llm_pool_size = Gauge(
+    f'{METRIC_PREFIX}llm_pool_size',
+    'Maximum number of pooled LLM HTTP connections',
+    labelnames=['transport'],
+    registry=REGISTRY
+)
+
+llm_requests_total = Counter(
+    f'{METRIC_PREFIX}llm_requests_total',
+    'Total number of LLM HTTP requests by outcome',
+    labelnames=['transport', 'mode', 'outcome'],
+    registry=REGISTRY
+)
+
+llm_retries_total = Counter(
+    f'{METRIC_PREFIX}llm_retries_total',
+    'Total number of LLM HTTP request retries',
+    labelnames=['transport', 'mode'],
+    registry=REGISTRY
+)
+
+# 游戏实例池
+game_instance_pool_requests_total = Counter(
+    f'{METRIC_PREFIX}game_instance_pool_requests_total',
+    'Total number of game instance acquisitions by pool result',
+    labelnames=['pool', 'result'],
+    registry=REGISTRY
+)
+
+game_instance_pool_size = Gauge(
+    f'{METRIC_PREFIX}game_instance_pool_size',
+    'Number of prewarmed idle game instances',
+    labelnames=['pool'],
+    registry=REGISTRY
+)
+
+game_instance_build_seconds = Histogram(
+    f'{METRIC_PREFIX}game_instance_build_seconds',
+    'Time spent building a game instance in seconds',
+    labelnames=['pool', 'source'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+    registry=REGISTRY
+)
+
+# 会话注册表
+session_registry_sessions = Gauge(
+    f'{METRIC_PREFIX}session_registry_sessions',
+    'Number of registered sessions by state',
+    labelnames=['state'],
+    registry=REGISTRY
+)
+
+session_registry_memory_bytes = Gauge(
+    f'{METRIC_PREFIX}session_registry_memory_bytes',
+    'Estimated memory held by live sessions in bytes',
+    registry=REGISTRY
+)
+
+session_evictions_total = Counter(
+    f'{METRIC_PREFIX}session_evictions_total',
+    'Total number of sessions hibernated by eviction reason',
+    labelnames=['reason'],
+    registry=REGISTRY
+)
+
+session_hibernate_seconds = Histogram(
+    f'{METRIC_PREFIX}session_hibernate_seconds',
+    'Time spent snapshotting and evicting a session in seconds',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+    registry=REGISTRY
+)
+
+session_hydrate_seconds = Histogram(
+    f'{METRIC_PREFIX}session_hydrate_seconds',
+    'Time spent restoring a hibernated session in seconds',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+    registry=REGISTRY
+)
+
 
 class MetricsCollector:
     """
@@ -222,10 +398,42 @@ class MetricsCollector:
             except Exception as e:
                 logger.error(f"Failed to record NLP metrics: {e}")
     
+    def record_nlp_cache_lookup(self, result: str):
+        """记录解析缓存查找结果（memory / disk / miss）"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                nlp_parse_cache_lookup_total.labels(result=result).inc()
+            except Exception as e:
+                logger.error(f"Failed to record NLP cache lookup: {e}")
+
+    def record_nlp_intent_tier(self, tier: str):
+        """记录一次解析由哪一层给出（local / llm / cache / fallback）"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                nlp_intent_tier_total.labels(tier=tier).inc()
+            except Exception as e:
+                logger.error(f"Failed to record NLP intent tier: {e}")
+
     def record_context_compression(self, 
                                  memory_blocks: int = 0,
-                                 compression_ratio: float = 1.0):
-        """记录上下文压缩指标"""
+                                 compression_ratio: float = 1.0,
+                                 duration: Optional[float] = None,
+                                 queue_wait: Optional[float] = None):
+        """
+        记录上下文压缩指标
+
+        Args:
+            memory_blocks: 当前记忆块数量，负数表示未知
+            compression_ratio: 压缩比
+            duration: 摘要生成耗时（秒）
+            queue_wait: 后台任务排队时间（秒），同步压缩时为 None
+        """
         if not self._enabled:
             return
             
@@ -234,6 +442,10 @@ class MetricsCollector:
                 context_compression_total.inc()
                 if memory_blocks >= 0:
                     context_memory_blocks_gauge.set(memory_blocks)
+                if duration is not None:
+                    context_compression_seconds.observe(duration)
+                if queue_wait is not None:
+                    context_compression_queue_seconds.observe(queue_wait)
             except Exception as e:
                 logger.error(f"Failed to record context compression metrics: {e}")
     
@@ -319,6 +531,176 @@ class MetricsCollector:
             except Exception as e:
                 logger.error(f"Failed to update system metrics: {e}")
 
+    def record_inventory_flush(self,
+                               writes: int,
+                               duration: float,
+                               pending: int = 0):
+        """记录背包写回刷新指标"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                inventory_flush_seconds.observe(duration)
+                if writes > 0:
+                    inventory_writes_total.inc(writes)
+                if pending >= 0:
+                    inventory_dirty_gauge.set(pending)
+            except Exception as e:
+                logger.error(f"Failed to record inventory flush metrics: {e}")
+
+    def record_event_dispatch(self,
+                              dispatcher: str,
+                              event_type: str,
+                              duration: float,
+                              queue_wait: float = 0.0):
+        """记录异步事件处理耗时"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                event_handler_seconds.labels(
+                    dispatcher=dispatcher,
+                    event_type=event_type
+                ).observe(duration)
+                if queue_wait >= 0:
+                    event_queue_wait_seconds.labels(dispatcher=dispatcher).observe(queue_wait)
+            except Exception as e:
+                logger.error(f"Failed to record event dispatch: {e}")
+
+    def update_event_queue_depth(self, dispatcher: str, depth: int):
+        """更新事件分发队列深度"""
+        if not self._enabled or self._degraded:
+            return
+
+        with self._lock:
+            try:
+                event_queue_depth.labels(dispatcher=dispatcher).set(depth)
+            except Exception as e:
+                logger.error(f"Failed to update event queue depth: {e}")
+
+    def record_event_dropped(self, dispatcher: str, event_type: str):
+        """记录被丢弃的事件"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                event_dropped_total.labels(
+                    dispatcher=dispatcher,
+                    event_type=event_type
+                ).inc()
+            except Exception as e:
+                logger.error(f"Failed to record dropped event: {e}")
+
+
+    def update_status_stream_connections(self, connections: int):
+        """更新打开的状态推送流数量"""
+        if not self._enabled or self._degraded:
+            return
+
+        with self._lock:
+            try:
+                status_stream_connections.set(connections)
+            except Exception as e:
+                logger.error(f"Failed to update status stream connections: {e}")
+
+    def update_llm_pool_metrics(self, transport: str, mode: str, in_use: int, size: int):
+        """更新 LLM 连接池使用情况"""
+        if not self._enabled or self._degraded:
+            return
+
+        with self._lock:
+            try:
+                llm_pool_in_use.labels(transport=transport, mode=mode).set(in_use)
+                llm_pool_size.labels(transport=transport).set(size)
+            except Exception as e:
+                logger.error(f"Failed to update LLM pool metrics: {e}")
+
+    def record_llm_request(self, transport: str, mode: str, outcome: str, retries: int = 0):
+        """记录 LLM 请求结果及重试次数"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                llm_requests_total.labels(transport=transport, mode=mode, outcome=outcome).inc()
+                if retries > 0:
+                    llm_retries_total.labels(transport=transport, mode=mode).inc(retries)
+            except Exception as e:
+                logger.error(f"Failed to record LLM request: {e}")
+
+    def record_game_instance_acquire(self, pool: str, result: str, size: int):
+        """记录一次实例池取用（hit / miss）及取用后的空闲数量"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                game_instance_pool_requests_total.labels(pool=pool, result=result).inc()
+                game_instance_pool_size.labels(pool=pool).set(size)
+            except Exception as e:
+                logger.error(f"Failed to record game instance acquire: {e}")
+
+    def update_game_instance_pool_size(self, pool: str, size: int):
+        """更新实例池空闲数量"""
+        if not self._enabled or self._degraded:
+            return
+
+        with self._lock:
+            try:
+                game_instance_pool_size.labels(pool=pool).set(size)
+            except Exception as e:
+                logger.error(f"Failed to update game instance pool size: {e}")
+
+    def record_game_instance_build(self, pool: str, source: str, duration: float):
+        """记录游戏实例构建耗时（source: prewarm / refill / miss）"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                game_instance_build_seconds.labels(pool=pool, source=source).observe(duration)
+            except Exception as e:
+                logger.error(f"Failed to record game instance build: {e}")
+
+    def update_session_registry_metrics(self, live: int, hibernated: int, memory_bytes: int):
+        """更新活跃/休眠会话数量及活跃会话内存估算"""
+        if not self._enabled or self._degraded:
+            return
+
+        with self._lock:
+            try:
+                session_registry_sessions.labels(state="live").set(live)
+                session_registry_sessions.labels(state="hibernated").set(hibernated)
+                session_registry_memory_bytes.set(memory_bytes)
+            except Exception as e:
+                logger.error(f"Failed to update session registry metrics: {e}")
+
+    def record_session_eviction(self, reason: str, duration: float):
+        """记录一次会话休眠（reason: lru / memory / idle / manual）"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                session_evictions_total.labels(reason=reason).inc()
+                session_hibernate_seconds.observe(duration)
+            except Exception as e:
+                logger.error(f"Failed to record session eviction: {e}")
+
+    def record_session_hydration(self, duration: float):
+        """记录一次休眠会话恢复耗时"""
+        if not self._enabled:
+            return
+
+        with self._lock:
+            try:
+                session_hydrate_seconds.observe(duration)
+            except Exception as e:
+                logger.error(f"Failed to record session hydration: {e}")
+
 
 # 全局指标收集器实例
 metrics_collector = MetricsCollector()
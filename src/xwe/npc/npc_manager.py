@@ -6,6 +6,7 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
 from src.xwe.core.character import Character
+from src.xwe.world.interest import EntityKind, InterestIndex
 from .dialogue_system import DialogueNode, DialogueSystem, DialogueTree
 
 
@@ -32,8 +33,17 @@ class NPCBehavior:
 class NPCManager:
     """Manager for NPC profiles and interactions."""
 
-    def __init__(self, dialogue_system: DialogueSystem) -> None:
+    def __init__(
+        self, dialogue_system: DialogueSystem, interest: Optional[InterestIndex] = None
+    ) -> None:
+        """
+        Args:
+            dialogue_system: Dialogue system used for NPC conversations.
+            interest: Area index shared with the ``LocationManager``; NPC
+                locations are registered there so area queries find them.
+        """
         self.dialogue_system = dialogue_system
+        self.interest = interest or InterestIndex()
         self.npc_profiles: Dict[str, NPCProfile] = {}
         self.npc_relationships: Dict[str, Dict[str, int]] = {}
         self.npc_locations: Dict[str, str] = {}
@@ -57,6 +67,7 @@ class NPCManager:
     def set_npc_location(self, npc_id: str, location: str) -> None:
         """Set the current location for an NPC."""
         self.npc_locations[npc_id] = location
+        self.interest.place(npc_id, location, EntityKind.NPC)
 
     def get_npc_profile(self, npc_id: str) -> Optional[NPCProfile]:
         """Retrieve an NPC profile by ID."""
@@ -65,8 +76,9 @@ class NPCManager:
     def get_available_npcs(self, location: str, player_id: str) -> List[Dict]:
         """List NPCs available at a location."""
         result = []
-        for npc_id, profile in self.npc_profiles.items():
-            if self.npc_locations.get(npc_id) == location:
+        for npc_id in self.interest.entities_in(location, EntityKind.NPC):
+            profile = self.npc_profiles.get(npc_id)
+            if profile is not None:
                 result.append(
                     {
                         "id": npc_id,
@@ -0,0 +1,323 @@
+"""
+游戏实例池
+
+新会话不再在请求线程里现场构建游戏核心：
+
+- 后台线程把池子补到目标数量，``acquire`` 直接取走预热好的实例；
+- 池子被取空时当场构建（记为未命中），同时唤醒后台线程补货；
+- 过期会话的实例经 ``release`` 交回，由后台线程 ``reset`` 后重新入池；
+- 请求处理期间用 ``borrow``/``give_back`` 登记借用，``release`` 会让实例换代，
+  旧代的借用不再成立，但要等已有借用全部归还后才会重置复用；
+- 命中率与构建耗时导出到 Prometheus。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+# 导入 Prometheus 指标收集器
+try:
+    from src.xwe.metrics.prometheus_metrics import get_metrics_collector
+    PROMETHEUS_ENABLED = True
+except ImportError:  # pragma: no cover - 可选依赖
+    PROMETHEUS_ENABLED = False
+
+logger = logging.getLogger(__name__)
+
+
+class InstanceRetiredError(RuntimeError):
+    """实例已交回实例池，不能再借用"""
+
+
+class GameInstancePool:
+    """预热并回收游戏实例的对象池"""
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        target_size: int = 4,
+        reset: Optional[Callable[[Any], Any]] = None,
+        max_size: Optional[int] = None,
+        name: str = "game",
+        retry_interval: float = 1.0,
+    ) -> None:
+        """
+        Args:
+            factory: 构建新实例的函数
+            target_size: 后台线程保持的空闲实例数量，0 表示不预热
+            reset: 回收实例时调用，清空会话状态；返回值不为 None 时用返回值入池。
+                未提供时回收的实例直接丢弃
+            max_size: 空闲实例上限（含回收的），默认等于 target_size 的两倍
+            name: 指标标签
+            retry_interval: 构建失败后后台线程的等待时间（秒）
+        """
+        self.factory = factory
+        self.target_size = max(0, target_size)
+        self.reset = reset
+        self.max_size = max(self.target_size, max_size if max_size is not None else self.target_size * 2)
+        self.name = name
+        self.retry_interval = retry_interval
+
+        self._idle: Deque[Any] = deque()
+        self._dirty: Deque[Any] = deque()
+        self._building = 0
+        # 按 id 记录实例的代数和进行中的借用数；已交回但仍有借用的实例暂存在 _retiring
+        self._generations: Dict[int, int] = {}
+        self._borrowers: Dict[int, int] = {}
+        self._retiring: Dict[int, Any] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "built": 0,
+            "recycled": 0,
+            "discarded": 0,
+            "deferred": 0,
+            "build_errors": 0,
+            "build_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # 取用与归还
+    # ------------------------------------------------------------------
+    @property
+    def size(self) -> int:
+        """当前空闲实例数量"""
+        return len(self._idle)
+
+    def acquire(self) -> Any:
+        """取出一个实例，池空时当场构建"""
+        if self._thread is None and self.target_size:
+            self.start()
+        with self._cond:
+            instance = self._idle.popleft() if self._idle else None
+            self.stats["hits" if instance is not None else "misses"] += 1
+            size = len(self._idle)
+            self._cond.notify()
+        self._report_acquire("hit" if instance is not None else "miss", size)
+        if instance is None:
+            instance = self._build("miss")
+        return instance
+
+    def generation(self, instance: Any) -> int:
+        """实例当前的代数，每次 ``release`` 加一"""
+        with self._cond:
+            return self._generations.get(id(instance), 0)
+
+    def borrow(self, instance: Any, generation: Optional[int] = None) -> bool:
+        """
+        登记一次借用，借用期间实例不会被重置
+
+        Args:
+            instance: 要借用的实例
+            generation: 取得实例时的代数；实例已换代（被交回过）时借用失败
+
+        Returns:
+            是否借用成功
+        """
+        key = id(instance)
+        with self._cond:
+            if key in self._retiring:
+                return False
+            if generation is not None and self._generations.get(key, 0) != generation:
+                return False
+            self._borrowers[key] = self._borrowers.get(key, 0) + 1
+            return True
+
+    def is_borrowed(self, instance: Any) -> bool:
+        """实例当前是否有进行中的借用"""
+        with self._cond:
+            return bool(self._borrowers.get(id(instance)))
+
+    def give_back(self, instance: Any) -> None:
+        """归还一次借用；实例已被交回且借用全部归还时进入重置流程"""
+        key = id(instance)
+        with self._cond:
+            count = self._borrowers.get(key, 0) - 1
+            if count > 0:
+                self._borrowers[key] = count
+                return
+            self._borrowers.pop(key, None)
+            retired = self._retiring.pop(key, None)
+        if retired is not None:
+            self._enqueue(retired)
+
+    @contextmanager
+    def lease(self, instance: Any, generation: Optional[int] = None) -> Iterator[Any]:
+        """在 with 块内借用实例，已换代时抛出 InstanceRetiredError"""
+        if not self.borrow(instance, generation):
+            raise InstanceRetiredError(f"{self.name} 实例已交回实例池")
+        try:
+            yield instance
+        finally:
+            self.give_back(instance)
+
+    def release(self, instance: Any) -> bool:
+        """
+        归还会话用完的实例，返回是否会被回收复用
+
+        实例立即换代；仍有借用时推迟到最后一次 ``give_back`` 再重置。
+        """
+        key = id(instance)
+        with self._cond:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if self.reset is not None and self._borrowers.get(key):
+                self._retiring[key] = instance
+                self.stats["deferred"] += 1
+                return True
+        return self._enqueue(instance)
+
+    def _enqueue(self, instance: Any) -> bool:
+        if self.reset is None:
+            self._discard(instance)
+            return False
+        with self._cond:
+            if len(self._idle) + len(self._dirty) >= self.max_size:
+                self.stats["discarded"] += 1
+                self._generations.pop(id(instance), None)
+                return False
+            if self._thread is not None:
+                self._dirty.append(instance)
+                self._cond.notify()
+                return True
+        # 没有后台线程时就地重置
+        return self._recycle(instance)
+
+    def prewarm(self, count: Optional[int] = None) -> int:
+        """同步构建实例直到空闲数量达到 count（默认 target_size），返回新建数量"""
+        count = self.target_size if count is None else min(count, self.max_size)
+        built = 0
+        while self.size < count:
+            instance = self._build("prewarm")
+            with self._cond:
+                self._idle.append(instance)
+            built += 1
+        self._report_size()
+        return built
+
+    # ------------------------------------------------------------------
+    # 后台补货
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """启动后台补货线程（重复调用无副作用）"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-instance-pool", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """停止后台线程，待重置的实例就地丢弃"""
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._dirty.clear()
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping and not self._dirty and (
+                    len(self._idle) + self._building >= self.target_size
+                ):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                instance = self._dirty.popleft() if self._dirty else None
+                if instance is None:
+                    self._building += 1
+            if instance is not None:
+                self._recycle(instance)
+                continue
+            try:
+                instance = self._build("refill")
+            except Exception:
+                logger.exception(f"[POOL] {self.name} 实例构建失败")
+                with self._cond:
+                    self._building -= 1
+                    self._cond.wait(self.retry_interval)
+                continue
+            with self._cond:
+                self._building -= 1
+                self._idle.append(instance)
+            self._report_size()
+
+    # ------------------------------------------------------------------
+    # 内部工具
+    # ------------------------------------------------------------------
+    def _build(self, source: str) -> Any:
+        start = time.perf_counter()
+        try:
+            instance = self.factory()
+        except Exception:
+            with self._cond:
+                self.stats["build_errors"] += 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            self.stats["built"] += 1
+            self.stats["build_seconds"] += elapsed
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().record_game_instance_build(self.name, source, elapsed)
+        return instance
+
+    def _recycle(self, instance: Any) -> bool:
+        key = id(instance)
+        with self._cond:
+            # 重置前再确认没有借用：换代后才登记的借用会被 borrow 拒绝，这里兜底
+            if self._borrowers.get(key):
+                self._retiring[key] = instance
+                return True
+        try:
+            result = self.reset(instance)
+        except Exception:
+            logger.exception(f"[POOL] {self.name} 实例重置失败，已丢弃")
+            self._discard(instance)
+            return False
+        with self._cond:
+            if len(self._idle) >= self.max_size:
+                self.stats["discarded"] += 1
+                self._generations.pop(key, None)
+                return False
+            if result is not None and result is not instance:
+                self._generations.pop(key, None)
+            self._idle.append(instance if result is None else result)
+            self.stats["recycled"] += 1
+        self._report_size()
+        return True
+
+    def _discard(self, instance: Any) -> None:
+        with self._cond:
+            self.stats["discarded"] += 1
+            self._generations.pop(id(instance), None)
+
+    def _report_acquire(self, result: str, size: int) -> None:
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().record_game_instance_acquire(self.name, result, size)
+
+    def _report_size(self) -> None:
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().update_game_instance_pool_size(self.name, self.size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取池统计：命中率、平均构建耗时等"""
+        with self._cond:
+            stats = dict(self.stats)
+            stats["size"] = len(self._idle)
+            stats["pending_reset"] = len(self._dirty)
+            stats["retiring"] = len(self._retiring)
+            stats["borrowed"] = sum(self._borrowers.values())
+        requests = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / requests if requests else 0.0
+        stats["avg_build_seconds"] = stats["build_seconds"] / stats["built"] if stats["built"] else 0.0
+        return stats
@@ -0,0 +1,502 @@
+"""
+会话注册表
+
+替代模块级 ``game_instances`` 字典：
+
+- 按会话 ID 哈希分片，每个分片一把锁、一条 LRU 链，请求线程只争用自己的分片；
+- 活跃会话数或估算内存超过分片配额时，最久未访问的会话转入休眠；
+- ``sweep`` 把闲置超时的会话转入休眠，并清理过期的休眠快照；
+- 休眠时把会话压缩成 ``.xws`` 快照写盘、释放游戏实例，下次访问时透明地恢复；
+- 生成快照、读写快照文件都在分片锁外进行，期间该会话标记为迁移中，
+  同一会话的其他请求等待迁移完成，同分片的其他会话不受影响；
+- 活跃/休眠数量、内存估算、休眠与恢复耗时导出到 Prometheus。
+
+``len``、迭代、``items``/``values`` 只覆盖活跃会话且不刷新访问时间；
+``in``、``[]`` 和 ``get`` 同时能看到休眠会话，取值时会先恢复。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.xwe.systems.persistence.save_engine import SAVE_EXTENSION, SaveEngine, SaveFormatError, read_header
+
+# 导入 Prometheus 指标收集器
+try:
+    from src.xwe.metrics.prometheus_metrics import get_metrics_collector
+    PROMETHEUS_ENABLED = True
+except ImportError:  # pragma: no cover - 可选依赖
+    PROMETHEUS_ENABLED = False
+
+logger = logging.getLogger(__name__)
+
+Instance = Dict[str, Any]
+
+
+class _Entry:
+    __slots__ = ("instance", "size", "last_access")
+
+    def __init__(self, instance: Instance, size: int, now: float) -> None:
+        self.instance = instance
+        self.size = size
+        self.last_access = now
+
+
+class _Shard:
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.live: "OrderedDict[str, _Entry]" = OrderedDict()
+        # 会话 ID → 休眠时间
+        self.hibernated: Dict[str, float] = {}
+        # 写盘失败的快照留在内存里，sweep 时重试
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        # 正在休眠或恢复的会话 → 迁移完成事件
+        self.transit: Dict[str, threading.Event] = {}
+        self.memory = 0
+
+
+# 锁外执行的休眠任务：(会话 ID, 会话, 原因, 迁移完成事件)
+_Job = Tuple[str, Instance, str, threading.Event]
+
+
+class SessionRegistry(MutableMapping):
+    """分片加锁、带 LRU 休眠的会话表"""
+
+    def __init__(
+        self,
+        snapshot_dir: str | Path,
+        hibernate: Callable[[str, Instance, str], Dict[str, Any]],
+        restore: Callable[[str, Dict[str, Any]], Instance],
+        shards: int = 16,
+        max_live: int = 0,
+        memory_limit: int = 0,
+        idle_timeout: float = 3600.0,
+        snapshot_ttl: Optional[float] = None,
+        size_of: Optional[Callable[[Instance], int]] = None,
+        in_use: Optional[Callable[[Instance], bool]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Args:
+            snapshot_dir: 休眠快照目录
+            hibernate: ``(session_id, instance, reason)`` → 可 JSON 序列化的快照，
+                负责释放实例占用的资源
+            restore: ``(session_id, snapshot)`` → 恢复出的会话
+            shards: 分片数量
+            max_live: 活跃会话上限，0 表示不限
+            memory_limit: 活跃会话估算内存上限（字节），0 表示不限
+            idle_timeout: 闲置多久（秒）后在 sweep 时转入休眠
+            snapshot_ttl: 休眠快照保留时长（秒），None 表示永久保留
+            size_of: 估算单个会话占用的字节数，默认 64KB
+            in_use: 判断会话是否正被请求使用；使用中的会话不会被自动休眠
+            clock: 时间函数，便于测试
+        """
+        self.shard_count = max(1, shards)
+        self._shards = [_Shard() for _ in range(self.shard_count)]
+        # 配额按分片平均分配，各分片独立淘汰
+        self.max_live = max_live
+        self.memory_limit = memory_limit
+        self._shard_max_live = -(-max_live // self.shard_count) if max_live else 0
+        self._shard_memory = -(-memory_limit // self.shard_count) if memory_limit else 0
+        self.idle_timeout = idle_timeout
+        self.snapshot_ttl = snapshot_ttl
+        self.engine = SaveEngine(snapshot_dir)
+        self.hibernate_fn = hibernate
+        self.restore_fn = restore
+        self.size_of = size_of or (lambda instance: 64 * 1024)
+        self.in_use = in_use or (lambda instance: False)
+        self.clock = clock
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "created": 0,
+            "hydrated": 0,
+            "expired": 0,
+            "hibernate_errors": 0,
+            "hydrate_errors": 0,
+            "hibernate_seconds": 0.0,
+            "hydrate_seconds": 0.0,
+            "evictions": {"lru": 0, "memory": 0, "idle": 0, "manual": 0},
+        }
+        self._recover_snapshots()
+
+    # ------------------------------------------------------------------
+    # 映射接口
+    # ------------------------------------------------------------------
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % self.shard_count]
+
+    def __getitem__(self, session_id: str) -> Instance:
+        instance = self.lookup(session_id)
+        if instance is None:
+            raise KeyError(session_id)
+        return instance
+
+    def __setitem__(self, session_id: str, instance: Instance) -> None:
+        shard = self._shard(session_id)
+        with self._settled(shard, session_id):
+            self._discard_snapshot(shard, session_id)
+            jobs = self._insert(shard, session_id, instance)
+        self._run_jobs(shard, jobs)
+
+    def __delitem__(self, session_id: str) -> None:
+        shard = self._shard(session_id)
+        with self._settled(shard, session_id):
+            entry = shard.live.pop(session_id, None)
+            if entry is not None:
+                shard.memory -= entry.size
+            elif not self._discard_snapshot(shard, session_id):
+                raise KeyError(session_id)
+        self._report()
+
+    def __contains__(self, session_id: object) -> bool:
+        shard = self._shard(session_id)  # type: ignore[arg-type]
+        with shard.lock:
+            return (
+                session_id in shard.live
+                or session_id in shard.hibernated
+                or session_id in shard.pending
+                or session_id in shard.transit
+            )
+
+    def __iter__(self) -> Iterator[str]:
+        for shard in self._shards:
+            with shard.lock:
+                keys = list(shard.live)
+            yield from keys
+
+    def __len__(self) -> int:
+        return sum(len(shard.live) for shard in self._shards)
+
+    def items(self):  # type: ignore[override]
+        """活跃会话快照，不刷新访问时间"""
+        result = []
+        for shard in self._shards:
+            with shard.lock:
+                result.extend((sid, entry.instance) for sid, entry in shard.live.items())
+        return result
+
+    def values(self):  # type: ignore[override]
+        """活跃会话快照，不刷新访问时间"""
+        return [instance for _, instance in self.items()]
+
+    @contextmanager
+    def _settled(self, shard: _Shard, session_id: str) -> Iterator[None]:
+        """等会话迁移结束后持有分片锁，供直接改写会话的操作使用"""
+        while True:
+            shard.lock.acquire()
+            waiter = shard.transit.get(session_id)
+            if waiter is None:
+                break
+            shard.lock.release()
+            waiter.wait()
+        try:
+            yield
+        finally:
+            shard.lock.release()
+
+    # ------------------------------------------------------------------
+    # 查找、创建与恢复
+    # ------------------------------------------------------------------
+    def lookup(self, session_id: str) -> Optional[Instance]:
+        """获取会话并刷新访问时间，休眠中的会话会先恢复；不存在时返回 None"""
+        shard = self._shard(session_id)
+        while True:
+            with shard.lock:
+                entry = shard.live.get(session_id)
+                if entry is not None:
+                    shard.live.move_to_end(session_id)
+                    entry.last_access = self.clock()
+                    return entry.instance
+                waiter = shard.transit.get(session_id)
+                if waiter is None:
+                    if session_id not in shard.pending and session_id not in shard.hibernated:
+                        return None
+                    # 写盘失败的快照直接从内存恢复，否则到锁外读文件
+                    snapshot = shard.pending.pop(session_id, None)
+                    done = shard.transit[session_id] = threading.Event()
+            if waiter is not None:
+                waiter.wait()
+                continue
+            return self._hydrate(shard, session_id, snapshot, done)
+
+    def get_or_create(self, session_id: str, factory: Callable[[], Instance]) -> Tuple[Instance, bool]:
+        """
+        获取会话，不存在时在分片锁内调用 factory 创建，避免并发请求重复创建
+
+        Returns:
+            (会话, 是否新建)；从休眠恢复的会话不算新建
+        """
+        shard = self._shard(session_id)
+        while True:
+            instance = self.lookup(session_id)
+            if instance is not None:
+                return instance, False
+            with shard.lock:
+                # 锁外查找期间别的请求可能已经创建或休眠了它
+                if session_id in shard.live or session_id in shard.transit or (
+                    session_id in shard.pending or session_id in shard.hibernated
+                ):
+                    continue
+                instance = factory()
+                jobs = self._insert(shard, session_id, instance)
+            break
+        self._run_jobs(shard, jobs)
+        with self._stats_lock:
+            self.stats["created"] += 1
+        return instance, True
+
+    def is_hibernated(self, session_id: str) -> bool:
+        shard = self._shard(session_id)
+        with shard.lock:
+            return session_id in shard.hibernated or session_id in shard.pending
+
+    def _insert(self, shard: _Shard, session_id: str, instance: Instance) -> List[_Job]:
+        """在分片锁内插入会话，返回超出配额需要锁外执行的休眠任务"""
+        old = shard.live.pop(session_id, None)
+        if old is not None:
+            shard.memory -= old.size
+        entry = _Entry(instance, self.size_of(instance), self.clock())
+        shard.live[session_id] = entry
+        shard.memory += entry.size
+        jobs = self._enforce_quota(shard)
+        self._report()
+        return jobs
+
+    def _hydrate(
+        self, shard: _Shard, session_id: str, snapshot: Optional[Dict[str, Any]], done: threading.Event
+    ) -> Optional[Instance]:
+        """在分片锁外读取快照并恢复会话；调用前会话已标记为迁移中"""
+        start = time.perf_counter()
+        jobs: List[_Job] = []
+        instance = None
+        try:
+            try:
+                if snapshot is None:
+                    snapshot = self.engine.load(self._snapshot_name(session_id))
+                instance = self.restore_fn(session_id, snapshot)
+            except Exception:
+                logger.exception(f"[SESSION] 会话 {session_id} 恢复失败，快照已丢弃")
+                with self._stats_lock:
+                    self.stats["hydrate_errors"] += 1
+            # 迁移期间只有本线程处理该会话，删文件不会误删新快照
+            with shard.lock:
+                on_disk = shard.hibernated.pop(session_id, None) is not None
+            if on_disk:
+                self.engine.delete(self._snapshot_name(session_id))
+            if instance is not None:
+                with shard.lock:
+                    jobs = self._insert(shard, session_id, instance)
+        finally:
+            with shard.lock:
+                shard.transit.pop(session_id, None)
+            done.set()
+        self._run_jobs(shard, jobs)
+        if instance is None:
+            self._report()
+            return None
+
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.stats["hydrated"] += 1
+            self.stats["hydrate_seconds"] += elapsed
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().record_session_hydration(elapsed)
+        logger.debug(f"[SESSION] 会话 {session_id} 已恢复 ({elapsed * 1000:.1f} ms)")
+        return instance
+
+    # ------------------------------------------------------------------
+    # 休眠与淘汰
+    # ------------------------------------------------------------------
+    def _enforce_quota(self, shard: _Shard) -> List[_Job]:
+        jobs: List[_Job] = []
+        while len(shard.live) > 1:
+            if self._shard_max_live and len(shard.live) > self._shard_max_live:
+                reason = "lru"
+            elif self._shard_memory and shard.memory > self._shard_memory:
+                reason = "memory"
+            else:
+                break
+            # 刚插入的会话在链尾，从链头找最久未访问且没在使用的会话
+            victim = next(
+                (sid for sid, entry in shard.live.items() if not self.in_use(entry.instance)), None
+            )
+            if victim is None:
+                break
+            jobs.append(self._detach(shard, victim, reason))
+        return jobs
+
+    def _detach(self, shard: _Shard, session_id: str, reason: str) -> _Job:
+        """在分片锁内把会话移出活跃表并标记为迁移中，快照留到锁外生成"""
+        entry = shard.live.pop(session_id)
+        shard.memory -= entry.size
+        done = shard.transit[session_id] = threading.Event()
+        return session_id, entry.instance, reason, done
+
+    def _run_jobs(self, shard: _Shard, jobs: List[_Job]) -> None:
+        for job in jobs:
+            self._hibernate(shard, *job)
+        if jobs:
+            self._report()
+
+    def _hibernate(
+        self, shard: _Shard, session_id: str, instance: Instance, reason: str, done: threading.Event
+    ) -> None:
+        """在分片锁外生成快照并写盘"""
+        start = time.perf_counter()
+        try:
+            try:
+                snapshot = self.hibernate_fn(session_id, instance, reason)
+            except Exception:
+                logger.exception(f"[SESSION] 会话 {session_id} 生成快照失败，已丢弃")
+                with self._stats_lock:
+                    self.stats["hibernate_errors"] += 1
+                return
+            self._write_snapshot(shard, session_id, snapshot)
+        finally:
+            with shard.lock:
+                shard.transit.pop(session_id, None)
+            done.set()
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self.stats["evictions"][reason] += 1
+            self.stats["hibernate_seconds"] += elapsed
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().record_session_eviction(reason, elapsed)
+        logger.debug(f"[SESSION] 会话 {session_id} 转入休眠 ({reason}, {elapsed * 1000:.1f} ms)")
+
+    def _write_snapshot(self, shard: _Shard, session_id: str, snapshot: Dict[str, Any]) -> bool:
+        """写快照文件；调用方保证会话处于迁移中，写盘失败时快照暂存内存"""
+        now = self.clock()
+        try:
+            self.engine.save(self._snapshot_name(session_id), snapshot, label=session_id, timestamp=now)
+        except Exception as e:
+            logger.error(f"[SESSION] 会话 {session_id} 快照写盘失败，暂存内存: {e}")
+            with self._stats_lock:
+                self.stats["hibernate_errors"] += 1
+            with shard.lock:
+                shard.pending[session_id] = snapshot
+            return False
+        with shard.lock:
+            shard.hibernated[session_id] = now
+        return True
+
+    def _discard_snapshot(self, shard: _Shard, session_id: str) -> bool:
+        found = shard.pending.pop(session_id, None) is not None
+        if shard.hibernated.pop(session_id, None) is not None:
+            self.engine.delete(self._snapshot_name(session_id))
+            found = True
+        return found
+
+    def hibernate(self, session_id: str) -> bool:
+        """立即让指定会话转入休眠（使用中的会话也会休眠，实例由实例池等借用归还后再回收）"""
+        shard = self._shard(session_id)
+        with shard.lock:
+            if session_id not in shard.live:
+                return False
+            job = self._detach(shard, session_id, "manual")
+        self._run_jobs(shard, [job])
+        return True
+
+    def sweep(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        闲置超时的会话转入休眠，删除过期快照，重试写盘失败的快照
+
+        Returns:
+            本次休眠、过期的数量
+        """
+        now = self.clock() if now is None else now
+        hibernated = expired = 0
+        for shard in self._shards:
+            with shard.lock:
+                jobs = [
+                    self._detach(shard, sid, "idle")
+                    for sid, entry in list(shard.live.items())
+                    if now - entry.last_access > self.idle_timeout and not self.in_use(entry.instance)
+                ]
+                retries = []
+                for sid in list(shard.pending):
+                    retries.append((sid, shard.pending.pop(sid), threading.Event()))
+                    shard.transit[sid] = retries[-1][2]
+
+                if self.snapshot_ttl is not None:
+                    stale = [sid for sid, ts in shard.hibernated.items() if now - ts > self.snapshot_ttl]
+                    for sid in stale:
+                        self._discard_snapshot(shard, sid)
+                    expired += len(stale)
+            self._run_jobs(shard, jobs)
+            hibernated += len(jobs)
+
+            for sid, snapshot, done in retries:
+                try:
+                    self._write_snapshot(shard, sid, snapshot)
+                finally:
+                    with shard.lock:
+                        shard.transit.pop(sid, None)
+                    done.set()
+        if expired:
+            with self._stats_lock:
+                self.stats["expired"] += expired
+        self._report()
+        return {"hibernated": hibernated, "expired": expired}
+
+    # ------------------------------------------------------------------
+    # 快照文件
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _snapshot_name(session_id: str) -> str:
+        # 会话 ID 来自客户端，不直接用作文件名
+        return hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+
+    def _recover_snapshots(self) -> None:
+        """进程重启后从快照目录找回休眠会话（会话 ID 记在文件头标签里）"""
+        for path in self.engine.save_dir.glob(f"*{SAVE_EXTENSION}"):
+            try:
+                header = read_header(path)
+            except (OSError, SaveFormatError):
+                continue
+            session_id = header.label
+            if session_id and self._snapshot_name(session_id) == path.stem:
+                self._shard(session_id).hibernated[session_id] = header.timestamp
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+    @property
+    def memory_estimate(self) -> int:
+        """活跃会话的估算内存（字节）"""
+        return sum(shard.memory for shard in self._shards)
+
+    @property
+    def hibernated_count(self) -> int:
+        return sum(len(shard.hibernated) + len(shard.pending) for shard in self._shards)
+
+    def _report(self) -> None:
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().update_session_registry_metrics(
+                len(self), self.hibernated_count, self.memory_estimate
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取注册表统计"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            stats["evictions"] = dict(self.stats["evictions"])
+        stats["live"] = len(self)
+        stats["hibernated"] = self.hibernated_count
+        stats["memory_bytes"] = self.memory_estimate
+        stats["shards"] = self.shard_count
+        stats["largest_shard"] = max(len(shard.live) for shard in self._shards)
+        hibernations = sum(stats["evictions"].values())
+        stats["avg_hibernate_seconds"] = stats["hibernate_seconds"] / hibernations if hibernations else 0.0
+        stats["avg_hydrate_seconds"] = stats["hydrate_seconds"] / stats["hydrated"] if stats["hydrated"] else 0.0
+        return stats
@@ -0,0 +1,428 @@
+"""
+推送式状态通道
+
+替代 SSE 路由里 ``while True: build_status_data(); time.sleep()`` 的轮询：
+
+- 状态变更（背包、属性、位置）时调用 ``notify(session_id)``，只唤醒该会话的流；
+- 流被唤醒后重建一次状态，与上一版本比较，生成 RFC 6902 JSON Patch 并递增版本号；
+- 事件 id 为 ``<epoch>:<version>``，客户端重连时携带 ``Last-Event-ID`` 即可从历史中补发差量；
+- 空闲时按间隔发送心跳注释，并限制同时打开的连接数。
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 导入 Prometheus 指标收集器
+try:
+    from src.xwe.metrics.prometheus_metrics import get_metrics_collector
+    PROMETHEUS_ENABLED = True
+except ImportError:  # pragma: no cover - 可选依赖
+    PROMETHEUS_ENABLED = False
+
+logger = logging.getLogger(__name__)
+
+Patch = List[Dict[str, Any]]
+
+
+# ---------------------------------------------------------------------------
+# RFC 6902 JSON Patch
+# ---------------------------------------------------------------------------
+
+
+def _escape(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> Patch:
+    """
+    生成把 ``old`` 变为 ``new`` 的 JSON Patch
+
+    字典逐键递归；长度相同的列表逐项递归，长度不同时整体替换。
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: Patch = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, child))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (a, b) in enumerate(zip(old, new)):
+            ops.extend(json_diff(a, b, f"{path}/{index}"))
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document: Any, patch: Patch) -> Any:
+    """把 JSON Patch 应用到文档副本上（支持 add / remove / replace）"""
+    document = copy.deepcopy(document)
+    for op in patch:
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        if not tokens:
+            document = copy.deepcopy(op.get("value"))
+            continue
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            index = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(index, copy.deepcopy(op["value"]))
+            elif op["op"] == "remove":
+                del parent[index]
+            else:
+                parent[index] = copy.deepcopy(op["value"])
+        else:
+            if op["op"] == "remove":
+                del parent[last]
+            else:
+                parent[last] = copy.deepcopy(op["value"])
+    return document
+
+
+def _filter_patch(patch: Patch, fields: Optional[Sequence[str]]) -> Patch:
+    """只保留顶层字段在 ``fields`` 中的操作"""
+    if fields is None:
+        return patch
+    return [op for op in patch if _unescape(op["path"].split("/")[1]) in fields]
+
+
+def _project(snapshot: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return snapshot
+    return {f: snapshot.get(f) for f in fields}
+
+
+def _format_event(event: str, data: Any, event_id: Optional[str] = None, retry: Optional[int] = None) -> str:
+    lines = []
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+# ---------------------------------------------------------------------------
+# 会话主题
+# ---------------------------------------------------------------------------
+
+
+class StatusTopic:
+    """单个会话的状态主题"""
+
+    def __init__(self, history_size: int) -> None:
+        self.version = 0
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.history: Deque[Tuple[int, Patch]] = deque(maxlen=history_size)
+        # 每次 notify 递增，流通过比较它判断是否需要重建状态
+        self.change_seq = 0
+        self.published_seq = -1
+        self.condition = threading.Condition()
+        self.subscribers = 0
+        self.last_active = time.time()
+
+    def patches_since(self, version: int) -> Optional[List[Tuple[int, Patch]]]:
+        """返回 ``version`` 之后的全部差量；历史不足时返回 None"""
+        if version == self.version:
+            return []
+        if version > self.version or not self.history:
+            return None
+        oldest = self.history[0][0]
+        if version < oldest - 1:
+            return None
+        return [(v, p) for v, p in self.history if v > version]
+
+
+class StatusChannel:
+    """按会话推送状态差量的通道"""
+
+    def __init__(
+        self,
+        max_connections: int = 200,
+        heartbeat_interval: float = 15.0,
+        history_size: int = 64,
+        retry_ms: int = 3000,
+        max_stream_seconds: Optional[float] = None,
+        retained_topics: int = 256,
+    ) -> None:
+        """
+        Args:
+            max_connections: 同时打开的流上限
+            heartbeat_interval: 空闲时发送心跳的间隔（秒）
+            history_size: 每个会话保留的差量数量，用于断线续传
+            retry_ms: 建议客户端的重连间隔（毫秒）
+            max_stream_seconds: 单个流的最长存活时间，到期后由客户端带 Last-Event-ID 重连
+            retained_topics: 无订阅者的主题最多保留多少个（供短暂断线后续传）
+        """
+        self.max_connections = max_connections
+        self.heartbeat_interval = heartbeat_interval
+        self.history_size = history_size
+        self.retry_ms = retry_ms
+        self.max_stream_seconds = max_stream_seconds
+        self.retained_topics = retained_topics
+        # 每次进程启动不同，旧进程的事件 id 不会被误用
+        self.epoch = uuid.uuid4().hex[:8]
+
+        self._lock = threading.Lock()
+        self._topics: Dict[str, StatusTopic] = {}
+        # 订阅者归零的主题移到这里，按 LRU 淘汰
+        self._retired: OrderedDict[str, StatusTopic] = OrderedDict()
+        self._connections = 0
+        self.stats = {"published": 0, "notifications": 0, "rejected": 0, "resumed": 0}
+
+    # ------------------------------------------------------------------
+    # 主题与连接
+    # ------------------------------------------------------------------
+    def topic(self, session_id: str) -> StatusTopic:
+        with self._lock:
+            return self._topic_locked(session_id)
+
+    def _topic_locked(self, session_id: str) -> StatusTopic:
+        topic = self._topics.get(session_id)
+        if topic is None:
+            topic = self._retired.pop(session_id, None) or StatusTopic(self.history_size)
+            self._topics[session_id] = topic
+        return topic
+
+    def _subscribe(self, session_id: str) -> StatusTopic:
+        with self._lock:
+            topic = self._topic_locked(session_id)
+            topic.subscribers += 1
+            return topic
+
+    def _unsubscribe(self, session_id: str, topic: StatusTopic) -> None:
+        """订阅者归零时把主题移出活跃表，只保留有限个用于断线续传"""
+        with self._lock:
+            topic.subscribers -= 1
+            if topic.subscribers > 0 or self._topics.get(session_id) is not topic:
+                return
+            del self._topics[session_id]
+            self._retired[session_id] = topic
+            while len(self._retired) > self.retained_topics:
+                self._retired.popitem(last=False)
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    def has_capacity(self) -> bool:
+        """是否还能接受新连接（供路由提前返回 503）"""
+        return self._connections < self.max_connections
+
+    def acquire(self) -> bool:
+        """占用一个连接名额，已满时返回 False"""
+        with self._lock:
+            if self._connections >= self.max_connections:
+                self.stats["rejected"] += 1
+                return False
+            self._connections += 1
+            connections = self._connections
+        self._report(connections)
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._connections = max(0, self._connections - 1)
+            connections = self._connections
+        self._report(connections)
+
+    def _report(self, connections: int) -> None:
+        if PROMETHEUS_ENABLED:
+            get_metrics_collector().update_status_stream_connections(connections)
+
+    def drop_session(self, session_id: str) -> None:
+        """移除会话主题并唤醒其上的流"""
+        with self._lock:
+            topic = self._topics.pop(session_id, None)
+            self._retired.pop(session_id, None)
+        if topic is not None:
+            with topic.condition:
+                topic.condition.notify_all()
+
+    # ------------------------------------------------------------------
+    # 发布
+    # ------------------------------------------------------------------
+    def notify(self, session_id: str) -> None:
+        """标记会话状态已变化，唤醒等待中的流（没有主题的会话无需记录）"""
+        with self._lock:
+            topic = self._topics.get(session_id) or self._retired.get(session_id)
+        if topic is None:
+            return
+        with topic.condition:
+            topic.change_seq += 1
+            topic.condition.notify_all()
+        self.stats["notifications"] += 1
+
+    def publish(self, session_id: str, snapshot: Dict[str, Any]) -> int:
+        """
+        发布新的状态快照
+
+        与上一版本相同时不递增版本号。
+
+        Returns:
+            当前版本号
+        """
+        topic = self.topic(session_id)
+        with topic.condition:
+            self._publish_locked(topic, snapshot)
+            topic.published_seq = topic.change_seq
+            return topic.version
+
+    def _publish_locked(self, topic: StatusTopic, snapshot: Dict[str, Any]) -> None:
+        topic.last_active = time.time()
+        if topic.snapshot is None:
+            topic.version += 1
+            topic.snapshot = copy.deepcopy(snapshot)
+            topic.history.clear()
+            topic.condition.notify_all()
+            return
+        patch = json_diff(topic.snapshot, snapshot)
+        if not patch:
+            return
+        topic.version += 1
+        topic.snapshot = copy.deepcopy(snapshot)
+        topic.history.append((topic.version, patch))
+        self.stats["published"] += 1
+        topic.condition.notify_all()
+
+    def _refresh(self, topic: StatusTopic, build: Callable[[], Dict[str, Any]]) -> None:
+        """有未处理的变更通知时重建状态（同一会话的多个流只重建一次）"""
+        with topic.condition:
+            if topic.snapshot is not None and topic.published_seq == topic.change_seq:
+                return
+            seq = topic.change_seq
+        snapshot = build()
+        with topic.condition:
+            self._publish_locked(topic, snapshot)
+            topic.published_seq = max(topic.published_seq, seq)
+
+    # ------------------------------------------------------------------
+    # 订阅
+    # ------------------------------------------------------------------
+    def parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        """解析 ``Last-Event-ID``；来自其它进程实例的 id 视为无效"""
+        if not event_id:
+            return None
+        epoch, _, version = event_id.partition(":")
+        if epoch != self.epoch:
+            return None
+        try:
+            return int(version)
+        except ValueError:
+            return None
+
+    def event_id(self, version: int) -> str:
+        return f"{self.epoch}:{version}"
+
+    def stream(
+        self,
+        session_id: str,
+        build: Callable[[], Dict[str, Any]],
+        last_event_id: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Iterator[str]:
+        """
+        生成 SSE 文本流
+
+        Args:
+            session_id: 会话 id
+            build: 构建完整状态快照的函数（在流所在的请求上下文中调用）
+            last_event_id: 客户端的 ``Last-Event-ID``
+            fields: 只推送这些顶层字段
+        """
+        # 连接名额在生成器内部占用，保证客户端断开时 finally 一定会释放
+        if not self.acquire():
+            yield _format_event("error", {"error": "too_many_connections"}, retry=self.retry_ms * 10)
+            return
+
+        topic = self._subscribe(session_id)
+        started = time.monotonic()
+        try:
+            self._refresh(topic, build)
+            resume_from = self.parse_event_id(last_event_id)
+            with topic.condition:
+                pending = topic.patches_since(resume_from) if resume_from is not None else None
+                if pending is None:
+                    sent_version = topic.version
+                    first = _format_event(
+                        "snapshot", _project(topic.snapshot, fields),
+                        self.event_id(sent_version), retry=self.retry_ms,
+                    )
+                else:
+                    self.stats["resumed"] += 1
+                    sent_version = resume_from
+                    first = None
+
+            if first is not None:
+                yield first
+
+            while True:
+                if pending:
+                    for version, patch in pending:
+                        ops = _filter_patch(patch, fields)
+                        sent_version = version
+                        if ops:
+                            yield _format_event("patch", ops, self.event_id(version))
+
+                if self.max_stream_seconds is not None and \
+                        time.monotonic() - started >= self.max_stream_seconds:
+                    return
+
+                with topic.condition:
+                    if topic.version == sent_version and topic.published_seq == topic.change_seq:
+                        topic.condition.wait(self.heartbeat_interval)
+                    notified = topic.published_seq != topic.change_seq
+                    if self._topics.get(session_id) is not topic:
+                        return
+
+                if notified:
+                    self._refresh(topic, build)
+
+                with topic.condition:
+                    pending = topic.patches_since(sent_version)
+                    if pending is None:
+                        sent_version = topic.version
+                        snapshot = _project(topic.snapshot, fields)
+                    elif not pending:
+                        snapshot = None
+
+                if pending is None:
+                    yield _format_event("snapshot", snapshot, self.event_id(sent_version))
+                elif not pending and not notified:
+                    yield ": heartbeat\n\n"
+        finally:
+            self._unsubscribe(session_id, topic)
+            self.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connections": self._connections,
+                "max_connections": self.max_connections,
+                "topics": len(self._topics),
+                "retained_topics": len(self._retired),
+                **self.stats,
+            }
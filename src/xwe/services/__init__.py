@@ -3,10 +3,14 @@
 提供服务的基类、接口和生命周期管理
 """
 
+import inspect
 import logging
+import threading
+import typing
 from abc import ABC, abstractmethod
+from contextvars import ContextVar
 from enum import Enum
-from typing import Any, Dict, Generic, Optional, Type, TypeVar
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, Type, TypeVar
 
 logger = logging.getLogger(__name__)
 
@@ -105,13 +109,67 @@ class ServiceNotFoundError(Exception):
     pass
 
 
+class ServiceCycleError(Exception):
+    """服务依赖存在循环"""
+
+    pass
+
+
+# 构造计划中表示"注入容器自身"的依赖
+_CONTAINER = object()
+_MISSING = object()
+
+
+def _type_name(service_type: Any) -> str:
+    return getattr(service_type, "__name__", repr(service_type))
+
+
+class _ServicePlan:
+    """
+    编译后的构造计划
+
+    ``dependencies`` 为 (参数名, 依赖类型) 列表，依赖类型为 ``_CONTAINER`` 时注入容器；
+    ``create`` 创建一个新实例，``get`` 按生命周期返回实例。
+    """
+
+    __slots__ = ("descriptor", "dependencies", "create", "get")
+
+    def __init__(
+        self,
+        descriptor: ServiceDescriptor,
+        dependencies: List[Tuple[str, Any]],
+        create: Callable[[], Any],
+        get: Callable[[], Any],
+    ) -> None:
+        self.descriptor = descriptor
+        self.dependencies = dependencies
+        self.create = create
+        self.get = get
+
+
 class ServiceContainer:
-    """服务容器 - 依赖注入容器"""
+    """
+    服务容器 - 依赖注入容器
+
+    每个服务类型第一次解析时（或 ``validate`` 时）编译一份构造计划：构造函数签名
+    只分析一次，依赖直接指向被依赖服务的计划，解析时不再反射。注册新服务会作废
+    已编译的计划，已创建的单例不受影响。
+
+    单例用双重检查锁保证并发首次解析只创建一个实例；作用域实例按当前
+    ``contextvars`` 上下文中激活的 ``ServiceScope`` 隔离，线程和 asyncio 任务
+    各自进入的作用域互不影响，未进入作用域时使用容器的根作用域。
+    """
 
     def __init__(self) -> None:
         self._descriptors: Dict[Type, ServiceDescriptor] = {}
         self._singletons: Dict[Type, Any] = {}
         self._scoped_instances: Dict[Type, Any] = {}
+        self._plans: Dict[Type, _ServicePlan] = {}
+        # 可重入：创建单例时会在同一线程内解析它依赖的单例
+        self._lock = threading.RLock()
+        self._current_scope: ContextVar[Optional["ServiceScope"]] = ContextVar(
+            f"xwe_service_scope_{id(self)}", default=None
+        )
         self.logger = logger.getChild("ServiceContainer")
 
     def register(
@@ -143,7 +201,9 @@ class ServiceContainer:
             factory=factory,
         )
 
-        self._descriptors[service_type] = descriptor
+        with self._lock:
+            self._descriptors[service_type] = descriptor
+            self._plans = {}
         self.logger.debug(f"Registered service: {descriptor}")
 
         return self
@@ -159,12 +219,14 @@ class ServiceContainer:
         Returns:
             self
         """
-        self._singletons[service_type] = instance
-        self._descriptors[service_type] = ServiceDescriptor(
-            service_type=service_type,
-            implementation=type(instance),
-            lifetime=ServiceLifetime.SINGLETON,
-        )
+        with self._lock:
+            self._singletons[service_type] = instance
+            self._descriptors[service_type] = ServiceDescriptor(
+                service_type=service_type,
+                implementation=type(instance),
+                lifetime=ServiceLifetime.SINGLETON,
+            )
+            self._plans = {}
         self.logger.debug(f"Registered singleton instance: {service_type.__name__}")
 
         return self
@@ -180,83 +242,183 @@ class ServiceContainer:
             服务实例
 
         Raises:
-            ServiceNotFoundError: 服务未注册
+            ServiceNotFoundError: 服务或其必需的依赖未注册
+            ServiceCycleError: 服务依赖存在循环
         """
-        # 检查是否已注册
-        if service_type not in self._descriptors:
-            raise ServiceNotFoundError(f"Service {service_type.__name__} is not registered")
-
-        descriptor = self._descriptors[service_type]
+        plan = self._plans.get(service_type)
+        if plan is None:
+            plan = self._compile(service_type)
+        return plan.get()
 
-        # 根据生命周期返回实例
-        if descriptor.lifetime == ServiceLifetime.SINGLETON:
-            return self._resolve_singleton(descriptor)
-        elif descriptor.lifetime == ServiceLifetime.SCOPED:
-            return self._resolve_scoped(descriptor)
-        else:  # TRANSIENT
-            return self._create_instance(descriptor)
-
-    def _resolve_singleton(self, descriptor: ServiceDescriptor) -> Any:
-        """解析单例服务"""
-        if descriptor.service_type not in self._singletons:
-            instance = self._create_instance(descriptor)
-            self._singletons[descriptor.service_type] = instance
-
-        return self._singletons[descriptor.service_type]
-
-    def _resolve_scoped(self, descriptor: ServiceDescriptor) -> Any:
-        """解析作用域服务"""
-        if descriptor.service_type not in self._scoped_instances:
-            instance = self._create_instance(descriptor)
-            self._scoped_instances[descriptor.service_type] = instance
-
-        return self._scoped_instances[descriptor.service_type]
-
-    def _create_instance(self, descriptor: ServiceDescriptor) -> Any:
-        """创建服务实例"""
-        if descriptor.factory:
-            # 使用自定义工厂
-            instance = descriptor.factory(self)
-        else:
-            # 使用构造函数注入
-            instance = self._construct_instance(descriptor.implementation)
+    def validate(self) -> List[Type]:
+        """
+        编译所有已注册服务的构造计划，提前发现缺失的依赖和循环依赖
 
-        # 如果是服务基类，初始化
-        if isinstance(instance, IService):
-            instance.initialize()
+        使用自定义工厂的服务在工厂内部取依赖，无法静态分析。
 
-        return instance
+        Returns:
+            按依赖顺序排列的服务类型（被依赖者在前）
 
-    def _construct_instance(self, implementation: Type) -> Any:
-        """
-        通过构造函数创建实例
-        自动注入依赖
+        Raises:
+            ServiceNotFoundError: 有必需的依赖未注册
+            ServiceCycleError: 服务依赖存在循环
         """
-        # 获取构造函数参数
-        import inspect
+        order: List[Type] = []
+        visited = set()
+
+        def visit(service_type: Type) -> None:
+            if service_type in visited:
+                return
+            visited.add(service_type)
+            for _, dependency in self._compile(service_type).dependencies:
+                if dependency is not _CONTAINER:
+                    visit(dependency)
+            order.append(service_type)
+
+        for service_type in list(self._descriptors):
+            visit(service_type)
+        return order
+
+    # ------------------------------------------------------------------
+    # 构造计划
+    # ------------------------------------------------------------------
+
+    def _compile(self, service_type: Type, path: Tuple[Type, ...] = ()) -> _ServicePlan:
+        """编译服务及其依赖的构造计划，依赖的计划先于自身编译"""
+        plans = self._plans
+        plan = plans.get(service_type)
+        if plan is not None:
+            return plan
+
+        if service_type in path:
+            cycle = path[path.index(service_type):] + (service_type,)
+            raise ServiceCycleError(
+                "Service dependency cycle: " + " -> ".join(_type_name(t) for t in cycle)
+            )
+
+        descriptor = self._descriptors.get(service_type)
+        if descriptor is None:
+            raise ServiceNotFoundError(f"Service {_type_name(service_type)} is not registered")
+
+        if descriptor.factory or service_type in self._singletons:
+            # 工厂自行取依赖；已有实例（register_singleton 注册或已创建）无需构造
+            dependencies = []
+        else:
+            dependencies = self._analyze(descriptor.implementation)
+        path = path + (service_type,)
+        getters = [
+            (name, self._get_container if dependency is _CONTAINER else self._compile(dependency, path).get)
+            for name, dependency in dependencies
+        ]
+        create = self._make_factory(descriptor, getters)
+        plan = _ServicePlan(descriptor, dependencies, create, self._make_getter(descriptor, create))
+        # 编译期间若有新注册，计划表已被替换，这份计划只用于本次解析
+        plans[service_type] = plan
+        return plan
+
+    def _get_container(self) -> "ServiceContainer":
+        return self
 
-        sig = inspect.signature(implementation.__init__)
-        params = sig.parameters
+    def _analyze(self, implementation: Type) -> List[Tuple[str, Any]]:
+        """
+        分析构造函数，确定需要注入的依赖
 
-        # 准备参数
-        kwargs: Dict[str, Any] = {}
-        for param_name, param in params.items():
-            if param_name == "self":
+        标注为 ServiceContainer 的参数注入容器自身；标注类型已注册的参数从容器解析；
+        其余参数有默认值时使用默认值，否则视为缺少依赖。
+        """
+        init = implementation.__init__
+        try:
+            hints = typing.get_type_hints(init)
+        except Exception:
+            # 无法求值的字符串标注，按原样比较
+            hints = {}
+
+        dependencies: List[Tuple[str, Any]] = []
+        for param_name, param in inspect.signature(init).parameters.items():
+            if param_name == "self" or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            annotation = hints.get(param_name, param.annotation)
+            if annotation is param.empty:
                 continue
 
-            # 如果参数是container类型，注入自己
-            if param.annotation == ServiceContainer or param.annotation == "ServiceContainer":
-                kwargs[param_name] = self
-            # 尝试从容器解析参数类型
-            elif param.annotation != param.empty:
-                try:
-                    kwargs[param_name] = self.resolve(param.annotation)
-                except ServiceNotFoundError:
-                    # 如果有默认值，跳过
-                    if param.default == param.empty:
-                        raise
+            if annotation is ServiceContainer or annotation == "ServiceContainer":
+                dependencies.append((param_name, _CONTAINER))
+            elif self._is_registered(annotation):
+                dependencies.append((param_name, annotation))
+            elif param.default is param.empty:
+                raise ServiceNotFoundError(
+                    f"Service {_type_name(annotation)} is not registered "
+                    f"(required by {_type_name(implementation)}.{param_name})"
+                )
+        return dependencies
+
+    def _is_registered(self, annotation: Any) -> bool:
+        try:
+            return annotation in self._descriptors
+        except TypeError:  # 不可哈希的标注
+            return False
+
+    def _make_factory(
+        self, descriptor: ServiceDescriptor, getters: List[Tuple[str, Callable[[], Any]]]
+    ) -> Callable[[], Any]:
+        """生成创建新实例的闭包"""
+        factory = descriptor.factory
+        implementation = descriptor.implementation
+
+        def create() -> Any:
+            if factory:
+                # 使用自定义工厂
+                instance = factory(self)
+            else:
+                # 使用构造函数注入
+                instance = implementation(**{name: get() for name, get in getters})
+
+            # 如果是服务基类，初始化
+            if isinstance(instance, IService):
+                instance.initialize()
+
+            return instance
+
+        return create
+
+    def _make_getter(self, descriptor: ServiceDescriptor, create: Callable[[], Any]) -> Callable[[], Any]:
+        """按生命周期生成返回实例的闭包"""
+        if descriptor.lifetime == ServiceLifetime.TRANSIENT:
+            return create
+
+        service_type = descriptor.service_type
+        lock = self._lock
 
-        return implementation(**kwargs)
+        if descriptor.lifetime == ServiceLifetime.SINGLETON:
+            singletons = self._singletons
+
+            def get_singleton() -> Any:
+                instance = singletons.get(service_type, _MISSING)
+                if instance is _MISSING:
+                    with lock:
+                        instance = singletons.get(service_type, _MISSING)
+                        if instance is _MISSING:
+                            instance = create()
+                            singletons[service_type] = instance
+                return instance
+
+            return get_singleton
+
+        current_scope = self._current_scope
+
+        def get_scoped() -> Any:
+            scope = current_scope.get()
+            instances = self._scoped_instances if scope is None else scope._instances
+            instance = instances.get(service_type, _MISSING)
+            if instance is _MISSING:
+                with lock:
+                    instance = instances.get(service_type, _MISSING)
+                    if instance is _MISSING:
+                        instance = create()
+                        instances[service_type] = instance
+            return instance
+
+        return get_scoped
 
     def create_scope(self) -> "ServiceScope":
         """创建新的服务作用域"""
@@ -282,18 +444,48 @@ class ServiceContainer:
 
 
 class ServiceScope:
-    """服务作用域"""
+    """
+    服务作用域
+
+    进入后，当前上下文（线程或 asyncio 任务）中解析的作用域服务都属于本作用域；
+    退出时关闭本作用域创建的服务并恢复外层作用域。在作用域内创建的 asyncio 任务
+    继承同一个作用域。
+    """
 
     def __init__(self, container: ServiceContainer) -> None:
         self.container = container
-        self._original_scoped = dict(container._scoped_instances)
+        self._instances: Dict[Type, Any] = {}
+        self._token = None
 
-    def __enter__(self) -> Any:
+    def resolve(self, service_type: Type[T]) -> T:
+        """在本作用域中解析服务"""
+        token = self.container._current_scope.set(self)
+        try:
+            return self.container.resolve(service_type)
+        finally:
+            self.container._current_scope.reset(token)
+
+    def __enter__(self) -> "ServiceScope":
+        self._token = self.container._current_scope.set(self)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
-        # 恢复原始作用域实例
-        self.container._scoped_instances = self._original_scoped
+        self.container._current_scope.reset(self._token)
+        self._token = None
+        self.close()
+
+    async def __aenter__(self) -> "ServiceScope":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.__exit__(exc_type, exc_val, exc_tb)
+
+    def close(self) -> None:
+        """关闭本作用域创建的服务"""
+        instances, self._instances = self._instances, {}
+        for service in instances.values():
+            if isinstance(service, IService):
+                service.shutdown()
 
 
 # 全局服务容器实例
@@ -355,6 +547,7 @@ __all__ = [
     "ServiceBase",
     "ServiceDescriptor",
     "ServiceNotFoundError",
+    "ServiceCycleError",
     "ServiceContainer",
     "ServiceScope",
     "get_service_container",
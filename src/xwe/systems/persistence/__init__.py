@@ -1,3 +1,31 @@
 """
 持久化系统模块
 """
+
+from .save_engine import (
+    HEADER_SIZE,
+    SAVE_EXTENSION,
+    SaveEngine,
+    SaveFormatError,
+    SaveHeader,
+    read_header,
+)
+from .write_behind import (
+    WriteBehindQueue,
+    WriteBehindStats,
+    atomic_write_bytes,
+    atomic_write_json,
+)
+
+__all__ = [
+    "HEADER_SIZE",
+    "SAVE_EXTENSION",
+    "SaveEngine",
+    "SaveFormatError",
+    "SaveHeader",
+    "read_header",
+    "WriteBehindQueue",
+    "WriteBehindStats",
+    "atomic_write_bytes",
+    "atomic_write_json",
+]
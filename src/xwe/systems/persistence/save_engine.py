@@ -0,0 +1,500 @@
+"""
+二进制存档引擎
+
+存档文件（``.xws``）由固定 128 字节的文件头和压缩后的 JSON 负载组成。
+文件头保存时间戳、版本、标签等元数据，列出存档时只需读取文件头；
+负载在保存时边编码边压缩写入，加载时边解压边解码，不再生成中间文件格式。
+
+负载按行排列（紧凑 JSON 内不会出现原始换行，空白也不影响 JSON 的合法性），
+展开的字典边界独占一行，读取时逐行重建对象，不必先拼出整份负载。
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import pickle
+import struct
+import tempfile
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SAVE_EXTENSION = ".xws"
+SAVE_MAGIC = b"XWSV"
+SAVE_FORMAT_VERSION = 1
+
+# magic, 格式版本, 编码, 保留位, 时间戳, 负载字节数, 原始字节数, CRC32, 游戏版本, 标签
+_HEADER_STRUCT = struct.Struct("<4sHBBdQQI16s76s")
+HEADER_SIZE = 128
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class SaveFormatError(ValueError):
+    """存档文件格式错误"""
+
+
+def _pack_text(text: str, size: int) -> bytes:
+    data = text.encode("utf-8")[:size]
+    # 截断时避免留下半个多字节字符
+    return data.decode("utf-8", "ignore").encode("utf-8").ljust(size, b"\0")
+
+
+def _unpack_text(data: bytes) -> str:
+    return data.rstrip(b"\0").decode("utf-8", "ignore")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+
+def iter_json_chunks(value: Any, depth: int = 2, _prefix: str = ""):
+    """
+    分块生成紧凑 JSON
+
+    前 ``depth`` 层字典逐键展开，更深的值交给 C 实现的 ``json.dumps`` 一次编码，
+    既不必拼出整份 JSON 字符串，也避免纯 Python ``iterencode`` 的开销。
+    带 ``to_dict`` 的对象（如角色）在编码到它时才转换，同一时刻只存在一个实体的字典。
+    每块为 ``{``、``}``、``"键":{`` 或 ``"键":值``（非首个成员带前导逗号）之一。
+    """
+    if not isinstance(value, dict) and callable(getattr(value, "to_dict", None)):
+        value = value.to_dict()
+    if depth <= 0 or not isinstance(value, dict) or not value:
+        yield _prefix + _dumps(value)
+        return
+    yield _prefix + "{"
+    first = True
+    for key, item in value.items():
+        member = ("" if first else ",") + _dumps(str(key)) + ":"
+        first = False
+        yield from iter_json_chunks(item, depth - 1, member)
+    yield "}"
+
+
+# 同层连续的叶子成员最多合并成这么多字节一行，兼顾解码开销与内存占用
+_DECODE_BATCH = 1 << 20
+
+
+def iter_json_lines(value: Any, depth: int = 2):
+    """
+    把 ``iter_json_chunks`` 的块排成以换行结尾的行
+
+    ``{``、``}``、``"键":{`` 独占一行，同层连续的 ``"键":值`` 合并成一行，
+    读取时按行解码，每行只需调用一次解码器。
+    """
+    run: List[bytes] = []
+    size = 0
+    for chunk in iter_json_chunks(value, depth):
+        data = chunk.encode("utf-8")
+        if data == b"}" or data.endswith(b"{"):
+            if run:
+                yield b"".join(run) + b"\n"
+                run, size = [], 0
+            yield data + b"\n"
+            continue
+        run.append(data)
+        size += len(data)
+        if size >= _DECODE_BATCH:
+            yield b"".join(run) + b"\n"
+            run, size = [], 0
+    if run:
+        yield b"".join(run) + b"\n"
+
+
+def decode_json_lines(lines: Iterable[bytes]) -> Any:
+    """
+    逐行重建 ``iter_json_lines`` 写出的 JSON
+
+    同一层连续的成员行拼成一个对象交给解码器一次解析，
+    展开的字典在遇到 ``}`` 时挂回上一层；没有换行的旧负载整行就是一个值。
+    """
+    stack: List[List[Any]] = []  # [字典, 在上一层中的键, 待解码的成员行, 字节数]
+    result: Any = None
+
+    def _flush(frame: List[Any]) -> None:
+        if frame[2]:
+            joined = frame[2][0] if len(frame[2]) == 1 else b"".join(frame[2])
+            if joined.startswith(b","):
+                joined = joined[1:]
+            frame[0].update(_loads(b"{" + joined + b"}"))
+            frame[2] = []
+            frame[3] = 0
+
+    for line in lines:
+        if not line:
+            continue
+        if line.endswith(b"{"):
+            key = None
+            if stack:
+                _flush(stack[-1])
+                key = _loads(line[1:-2] if line.startswith(b",") else line[:-2])
+            stack.append([{}, key, [], 0])
+        elif line == b"}":
+            frame = stack.pop()
+            _flush(frame)
+            if stack:
+                stack[-1][0][frame[1]] = frame[0]
+            else:
+                result = frame[0]
+        elif stack:
+            frame = stack[-1]
+            frame[2].append(line)
+            frame[3] += len(line)
+            if frame[3] >= _DECODE_BATCH:
+                _flush(frame)
+        else:
+            result = _loads(line)
+    if stack:
+        raise ValueError("JSON 负载不完整")
+    return result
+
+
+@dataclass
+class SaveHeader:
+    """存档文件头"""
+
+    timestamp: float
+    payload_size: int = 0
+    raw_size: int = 0
+    crc32: int = 0
+    game_version: str = "1.0.0"
+    label: str = ""
+    codec: int = CODEC_ZLIB
+    format_version: int = SAVE_FORMAT_VERSION
+
+    def pack(self) -> bytes:
+        packed = _HEADER_STRUCT.pack(
+            SAVE_MAGIC,
+            self.format_version,
+            self.codec,
+            0,
+            self.timestamp,
+            self.payload_size,
+            self.raw_size,
+            self.crc32,
+            _pack_text(self.game_version, 16),
+            _pack_text(self.label, 76),
+        )
+        return packed.ljust(HEADER_SIZE, b"\0")
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "SaveHeader":
+        if len(data) < HEADER_SIZE:
+            raise SaveFormatError("存档文件头不完整")
+        (
+            magic,
+            format_version,
+            codec,
+            _reserved,
+            timestamp,
+            payload_size,
+            raw_size,
+            crc32,
+            game_version,
+            label,
+        ) = _HEADER_STRUCT.unpack_from(data)
+        if magic != SAVE_MAGIC:
+            raise SaveFormatError("不是有效的存档文件")
+        if format_version > SAVE_FORMAT_VERSION:
+            raise SaveFormatError(f"不支持的存档格式版本: {format_version}")
+        return cls(
+            timestamp=timestamp,
+            payload_size=payload_size,
+            raw_size=raw_size,
+            crc32=crc32,
+            game_version=_unpack_text(game_version),
+            label=_unpack_text(label),
+            codec=codec,
+            format_version=format_version,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["timestamp"] = datetime.fromtimestamp(self.timestamp).isoformat()
+        return data
+
+
+def read_header(path: Path) -> SaveHeader:
+    """只读取存档文件头"""
+    with open(path, "rb") as f:
+        return SaveHeader.unpack(f.read(HEADER_SIZE))
+
+
+class SaveEngine:
+    """
+    存档引擎
+
+    负责 ``.xws`` 存档的读写、列举、删除，以及旧版 ``.json``/``.gz`` 存档的迁移。
+    """
+
+    def __init__(self, save_dir: str | Path = "saves", compression_level: int = 6):
+        self.save_dir = Path(save_dir)
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+
+    def path_for(self, name: str) -> Path:
+        return self.save_dir / f"{name}{SAVE_EXTENSION}"
+
+    def exists(self, name: str) -> bool:
+        return self.path_for(name).exists()
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+    def save(
+        self,
+        name: str,
+        state: Dict[str, Any],
+        game_version: str = "1.0.0",
+        label: str = "",
+        timestamp: Optional[float] = None,
+    ) -> SaveHeader:
+        """
+        保存存档
+
+        JSON 通过 ``iter_json_chunks`` 分块生成并直接送入压缩器，写入临时文件后
+        回填文件头，再原子替换目标文件。
+
+        Args:
+            name: 存档名（不含扩展名）
+            state: 可 JSON 序列化的游戏状态
+            game_version: 游戏版本
+            label: 存档标签（如玩家名），超长会被截断
+            timestamp: 存档时间，默认当前时间
+
+        Returns:
+            写入的文件头
+        """
+        path = self.path_for(name)
+        header = SaveHeader(
+            timestamp=time.time() if timestamp is None else timestamp,
+            game_version=game_version,
+            label=label,
+        )
+        compressor = zlib.compressobj(self.compression_level)
+
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=self.save_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(b"\0" * HEADER_SIZE)
+                pending: List[bytes] = []
+                pending_size = 0
+
+                def _emit(data: bytes) -> None:
+                    if data:
+                        header.crc32 = zlib.crc32(data, header.crc32)
+                        header.payload_size += len(data)
+                        f.write(data)
+
+                for data in iter_json_lines(state):
+                    header.raw_size += len(data)
+                    pending.append(data)
+                    pending_size += len(data)
+                    if pending_size >= _CHUNK_SIZE:
+                        _emit(compressor.compress(b"".join(pending)))
+                        pending, pending_size = [], 0
+                if pending:
+                    _emit(compressor.compress(b"".join(pending)))
+                _emit(compressor.flush())
+
+                f.seek(0)
+                f.write(header.pack())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        return header
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+    def load(self, name: str) -> Dict[str, Any]:
+        """
+        加载存档
+
+        Raises:
+            FileNotFoundError: 存档不存在
+            SaveFormatError: 文件头或校验和错误
+        """
+        state, _ = self.load_with_header(name)
+        return state
+
+    def load_with_header(self, name: str) -> tuple[Dict[str, Any], SaveHeader]:
+        """边解压边解码，内存中只保留当前数据块和已重建的对象"""
+        with open(self.path_for(name), "rb") as f:
+            header = SaveHeader.unpack(f.read(HEADER_SIZE))
+            crc = [0]
+
+            def _lines():
+                decompressor = zlib.decompressobj() if header.codec == CODEC_ZLIB else None
+                partial: List[bytes] = []
+                while True:
+                    chunk = f.read(_CHUNK_SIZE)
+                    if chunk:
+                        crc[0] = zlib.crc32(chunk, crc[0])
+                        data = decompressor.decompress(chunk) if decompressor else chunk
+                    elif decompressor:
+                        data, decompressor = decompressor.flush(), None
+                    else:
+                        break
+                    if b"\n" not in data:
+                        partial.append(data)
+                        continue
+                    lines = data.split(b"\n")
+                    partial.append(lines[0])
+                    yield b"".join(partial)
+                    yield from lines[1:-1]
+                    partial = [lines[-1]]
+                yield b"".join(partial)
+
+            try:
+                state = decode_json_lines(_lines())
+            except zlib.error as e:
+                raise SaveFormatError(f"存档解压失败: {name}: {e}") from e
+            except (ValueError, IndexError, TypeError) as e:
+                # 负载损坏时先报告校验失败，其余情况报告解码失败
+                remaining = f.read()
+                if zlib.crc32(remaining, crc[0]) != header.crc32:
+                    raise SaveFormatError(f"存档校验失败: {name}") from e
+                raise SaveFormatError(f"存档解码失败: {name}: {e}") from e
+        if crc[0] != header.crc32:
+            raise SaveFormatError(f"存档校验失败: {name}")
+        return state, header
+
+    def list(self) -> List[Dict[str, Any]]:
+        """列出全部存档，只读取文件头，按时间倒序"""
+        saves = []
+        for path in self.save_dir.glob(f"*{SAVE_EXTENSION}"):
+            try:
+                header = read_header(path)
+            except (OSError, SaveFormatError) as e:
+                logger.warning(f"跳过无法识别的存档 {path.name}: {e}")
+                continue
+            saves.append(
+                {
+                    "filename": path.stem,
+                    "timestamp": datetime.fromtimestamp(header.timestamp).isoformat(),
+                    "size": header.payload_size + HEADER_SIZE,
+                    "version": header.game_version,
+                    "label": header.label,
+                }
+            )
+        saves.sort(key=lambda x: x["timestamp"], reverse=True)
+        return saves
+
+    def delete(self, name: str) -> bool:
+        path = self.path_for(name)
+        if path.exists():
+            path.unlink()
+            return True
+        return False
+
+    # ------------------------------------------------------------------
+    # 旧存档迁移
+    # ------------------------------------------------------------------
+    def migrate_legacy(self, name: str, remove_legacy: bool = False) -> bool:
+        """
+        把单个旧版存档（``.gz`` pickle 或 ``.json``）迁移为 ``.xws``
+
+        旧版 ``.gz`` 是本目录内由 ``TechnicalOps`` 写入的 pickle，只应迁移
+        自己生成的存档目录。
+
+        Returns:
+            是否完成迁移
+        """
+        json_path = self.save_dir / f"{name}.json"
+        gz_path = self.save_dir / f"{name}.gz"
+
+        save_data = None
+        source = None
+        if gz_path.exists():
+            try:
+                with gzip.open(gz_path, "rb") as f:
+                    save_data = pickle.load(f)
+                source = gz_path
+            except Exception as e:
+                logger.warning(f"读取旧版压缩存档失败 {gz_path.name}: {e}")
+        if save_data is None and json_path.exists():
+            with open(json_path, "r", encoding="utf-8") as f:
+                save_data = json.load(f)
+            source = json_path
+        if not isinstance(save_data, dict) or "game_state" not in save_data:
+            return False
+
+        timestamp = source.stat().st_mtime
+        raw_ts = save_data.get("timestamp")
+        if isinstance(raw_ts, str):
+            try:
+                timestamp = datetime.fromisoformat(raw_ts).timestamp()
+            except ValueError:
+                pass
+
+        self.save(
+            name,
+            save_data["game_state"],
+            game_version=str(save_data.get("version", "1.0.0")),
+            label=label_from_state(save_data["game_state"]),
+            timestamp=timestamp,
+        )
+        if remove_legacy:
+            for path in (json_path, gz_path):
+                if path.exists():
+                    path.unlink()
+        return True
+
+    def legacy_names(self) -> List[str]:
+        """尚未迁移的旧版存档名"""
+        names = {p.stem for p in self.save_dir.glob("*.json")}
+        names.update(p.stem for p in self.save_dir.glob("*.gz"))
+        return sorted(n for n in names if not self.exists(n) and not n.startswith("export_"))
+
+    def migrate_all(self, remove_legacy: bool = False) -> Dict[str, int]:
+        """迁移目录下全部旧版存档"""
+        result = {"migrated": 0, "skipped": 0, "failed": 0}
+        for name in self.legacy_names():
+            try:
+                if self.migrate_legacy(name, remove_legacy=remove_legacy):
+                    result["migrated"] += 1
+                else:
+                    result["skipped"] += 1
+            except Exception as e:
+                logger.error(f"迁移存档 {name} 失败: {e}")
+                result["failed"] += 1
+        return result
+
+
+def label_from_state(state: Any) -> str:
+    """从游戏状态中提取存档标签（玩家名）"""
+    if isinstance(state, dict):
+        player = state.get("player")
+        if isinstance(player, dict):
+            return str(player.get("name", ""))
+        if player is not None:
+            return str(getattr(player, "name", ""))
+    return ""
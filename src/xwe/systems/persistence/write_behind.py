@@ -0,0 +1,236 @@
+"""
+写回（write-behind）持久化队列
+
+脏数据先记录在内存队列中，由后台线程按时间间隔或数量阈值合并写入，
+同一个键在一个刷新窗口内无论被修改多少次都只写一次。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> int:
+    """
+    原子写入文件
+
+    先写入同目录下的临时文件并 fsync，再通过 ``os.replace`` 覆盖目标文件，
+    进程在写入中途崩溃时不会留下半截文件。
+
+    Args:
+        path: 目标文件路径
+        data: 文件内容
+
+    Returns:
+        写入的字节数
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def atomic_write_json(path: Path, payload: Any, indent: Optional[int] = None) -> int:
+    """以 UTF-8 JSON 原子写入文件，返回写入的字节数。"""
+    data = json.dumps(payload, ensure_ascii=False, indent=indent).encode("utf-8")
+    return atomic_write_bytes(path, data)
+
+
+@dataclass
+class WriteBehindStats:
+    """写回队列统计"""
+
+    marked: int = 0          # mark_dirty 调用次数
+    coalesced: int = 0       # 被合并掉的重复标记次数
+    writes: int = 0          # 实际落盘次数
+    failures: int = 0        # 写入失败次数
+    flushes: int = 0         # 刷新批次数
+    bytes_written: int = 0   # 累计写入字节
+    last_flush_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class WriteBehindQueue:
+    """
+    合并写入队列
+
+    调用 ``mark_dirty(key)`` 只记录键，真正的写入由 ``writer(key)`` 完成，
+    writer 需要返回写入的字节数（或 ``None``），抛出异常视为写入失败，
+    失败的键会重新放回队列等待下一次刷新。
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[Hashable], Optional[int]],
+        flush_interval: float = 2.0,
+        max_pending: int = 64,
+        name: str = "write-behind",
+        on_flush: Optional[Callable[[int, float, int], None]] = None,
+    ):
+        """
+        初始化写回队列
+
+        Args:
+            writer: 单个键的写入函数
+            flush_interval: 刷新间隔（秒）
+            max_pending: 待写键数量达到该阈值时立即刷新
+            name: 后台线程名称
+            on_flush: 每批刷新后的回调 ``(writes, duration, pending)``
+        """
+        self._writer = writer
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        self.name = name
+        self._on_flush = on_flush
+
+        self._dirty: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        # 串行化刷新，保证同一个键不会被并发写入
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = WriteBehindStats()
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """启动后台刷新线程（重复调用无副作用）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True, timeout: float = 5.0) -> None:
+        """停止后台线程，默认在退出前刷新全部脏数据"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+        if flush:
+            self.flush()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    # ------------------------------------------------------------------
+    # 队列操作
+    # ------------------------------------------------------------------
+    def mark_dirty(self, key: Hashable) -> None:
+        """标记一个键需要写入"""
+        with self._lock:
+            self.stats.marked += 1
+            if key in self._dirty:
+                self.stats.coalesced += 1
+            else:
+                self._dirty.add(key)
+            pending = len(self._dirty)
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def discard(self, key: Hashable) -> None:
+        """从队列中移除一个键（不写入）"""
+        with self._lock:
+            self._dirty.discard(key)
+
+    def is_dirty(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._dirty
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._dirty)
+
+    def flush(self, keys: Optional[Set[Hashable]] = None) -> int:
+        """
+        立即写入脏数据
+
+        Args:
+            keys: 仅刷新指定的键，默认刷新全部
+
+        Returns:
+            成功写入的键数量
+        """
+        with self._flush_lock:
+            with self._lock:
+                if keys is None:
+                    batch = self._dirty
+                    self._dirty = set()
+                else:
+                    batch = self._dirty & set(keys)
+                    self._dirty -= batch
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            written = 0
+            failed = []
+            bytes_written = 0
+            for key in batch:
+                try:
+                    size = self._writer(key)
+                    bytes_written += size or 0
+                    written += 1
+                except Exception as e:
+                    logger.error(f"[{self.name}] 写入 {key} 失败: {e}")
+                    failed.append(key)
+            duration = time.perf_counter() - start
+
+            with self._lock:
+                # 失败的键重新入队，若期间又被标记则自然合并
+                self._dirty.update(failed)
+                pending = len(self._dirty)
+                self.stats.writes += written
+                self.stats.failures += len(failed)
+                self.stats.flushes += 1
+                self.stats.bytes_written += bytes_written
+                self.stats.last_flush_seconds = duration
+
+        if self._on_flush:
+            try:
+                self._on_flush(written, duration, pending)
+            except Exception as e:  # pragma: no cover - 指标回调不影响写入
+                logger.debug(f"[{self.name}] flush 回调失败: {e}")
+        return written
+
+    # ------------------------------------------------------------------
+    # 后台线程
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:  # pragma: no cover - 防御性保护
+                logger.error(f"[{self.name}] 后台刷新失败: {e}")
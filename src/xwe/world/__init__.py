@@ -5,9 +5,12 @@
 管理游戏世界的地图、区域、事件等。
 """
 
-from .event_system import EventSystem, WorldEvent
-from .location_manager import LocationManager
+from .event_system import EventDefinition, EventSystem, WorldEvent
+from .interest import AreaChange, EntityKind, InterestIndex
+from .location_manager import LocationManager, TravelInfo
+from .routing import Route, RouteCostModel, RouteTable
 from .time_system import TimeSystem
+from .trigger_index import TriggerIndex
 from .world_map import Area, AreaType, Region, WorldMap
 from .laws import WorldLaw, load_world_laws
 
@@ -17,7 +20,16 @@ __all__ = [
     "Region",
     "AreaType",
     "LocationManager",
+    "TravelInfo",
+    "InterestIndex",
+    "EntityKind",
+    "AreaChange",
+    "Route",
+    "RouteCostModel",
+    "RouteTable",
     "EventSystem",
+    "EventDefinition",
+    "TriggerIndex",
     "WorldEvent",
     "TimeSystem",
     "WorldLaw",
@@ -8,10 +8,17 @@ from typing import Any, Dict, List, Optional
 
 from src.xwe.events import WorldEvent
 
+from .trigger_index import TriggerIndex
+
 
 @dataclass
 class EventDefinition:
-    """事件定义"""
+    """
+    事件定义
+
+    ``trigger`` 的每个键对应上下文中的一个键：普通取值要求相等，
+    ``{"min": a, "max": b}`` 要求落在闭区间内（可只给一端）。
+    """
 
     id: str
     name: str
@@ -20,30 +27,39 @@ class EventDefinition:
 
 
 class EventSystem:
-    """管理世界事件"""
+    """
+    管理世界事件
+
+    触发条件编入 ``TriggerIndex``，每次检查只重新评估取值变化了的键所涉及的事件。
+    事件请通过 ``add_event`` / ``remove_event`` 增删。
+    """
 
     def __init__(self) -> None:
         self.events: Dict[str, EventDefinition] = {}
+        self._index = TriggerIndex()
 
     def add_event(self, event: EventDefinition) -> None:
         self.events[event.id] = event
+        self._index.add(event.id, event.trigger)
+
+    def remove_event(self, event_id: str) -> bool:
+        """删除事件，返回事件是否存在"""
+        if self.events.pop(event_id, None) is None:
+            return False
+        self._index.remove(event_id)
+        return True
 
     def check_triggers(self, context: Dict[str, Any]) -> List[WorldEvent]:
-        triggered: List[WorldEvent] = []
-        for evt in self.events.values():
-            if self._matches(evt.trigger, context):
-                triggered.append(WorldEvent(type="world", data={"id": evt.id}))
-        return triggered
+        return [
+            WorldEvent(type="world", data={"id": event_id})
+            for event_id in self._index.evaluate(context)
+        ]
+
+    def get_stats(self) -> Dict[str, int]:
+        return self._index.get_stats()
 
     def trigger_event(self, event_id: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         evt = self.events.get(event_id)
         if not evt:
             return None
         return {"id": evt.id, "intro_text": evt.intro_text}
-
-    @staticmethod
-    def _matches(cond: Dict[str, Any], ctx: Dict[str, Any]) -> bool:
-        for key, value in cond.items():
-            if key not in ctx or ctx[key] != value:
-                return False
-        return True
@@ -0,0 +1,273 @@
+# world/interest.py
+"""
+区域兴趣管理索引
+
+按 区域 → 实体类型 → 实体 维护位置索引，回答“这里有谁”“附近有谁”：
+
+- ``entities_in`` 返回字典键视图，不复制集合，计数为 O(1)；
+- ``entities_near`` 沿 ``connected_areas`` 按环（距离 0、1、2……）展开，
+  可按类型过滤并限制数量，人多的集散地也只遍历需要的那部分；
+- ``subscribe`` 订阅区域，实体进入或离开时回调。
+
+返回的视图与索引共享数据，遍历期间请勿移动实体。
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    KeysView,
+    List,
+    Optional,
+    Tuple,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .world_map import WorldMap
+
+logger = logging.getLogger(__name__)
+
+
+class EntityKind(Enum):
+    """实体类型"""
+
+    PLAYER = "player"
+    NPC = "npc"
+    MONSTER = "monster"
+
+
+@dataclass(frozen=True)
+class AreaChange:
+    """实体进出区域的通知"""
+
+    entity_id: str
+    kind: EntityKind
+    area_id: str
+    entered: bool  # True 为进入，False 为离开
+
+
+AreaCallback = Callable[[AreaChange], None]
+
+_EMPTY: Dict[str, None] = {}
+
+
+class _AreaBucket:
+    """单个区域内的实体，按类型分桶"""
+
+    __slots__ = ("members", "by_kind")
+
+    def __init__(self) -> None:
+        self.members: Dict[str, EntityKind] = {}
+        self.by_kind: Dict[EntityKind, Dict[str, None]] = {kind: {} for kind in EntityKind}
+
+
+class InterestIndex:
+    """区域兴趣管理索引"""
+
+    def __init__(self, world_map: Optional["WorldMap"] = None) -> None:
+        """
+        Args:
+            world_map: 世界地图，邻近查询沿其区域连接展开；为 None 时只支持单区域查询
+        """
+        self.world_map = world_map
+        self._where: Dict[str, Tuple[str, EntityKind]] = {}
+        self._areas: Dict[str, _AreaBucket] = {}
+        self._subscribers: Dict[str, Dict[int, Tuple[AreaCallback, Optional[EntityKind]]]] = {}
+        self._tokens: Dict[int, List[str]] = {}
+        self._next_token = itertools.count(1)
+
+    # ------------------------------------------------------------------
+    # 位置更新
+    # ------------------------------------------------------------------
+    def place(self, entity_id: str, area_id: str, kind: Optional[EntityKind] = None) -> Optional[str]:
+        """
+        放置或移动实体
+
+        Args:
+            entity_id: 实体ID
+            area_id: 区域ID
+            kind: 实体类型，None 时沿用已登记的类型（新实体视为玩家）
+
+        Returns:
+            原来所在的区域ID
+        """
+        previous = self._where.get(entity_id)
+        if kind is None:
+            kind = previous[1] if previous else EntityKind.PLAYER
+        if previous == (area_id, kind):
+            return area_id
+
+        old_area = None
+        if previous:
+            old_area = previous[0]
+            self._detach(entity_id, old_area, previous[1], notify=old_area != area_id)
+
+        bucket = self._areas.get(area_id)
+        if bucket is None:
+            bucket = self._areas[area_id] = _AreaBucket()
+        bucket.members[entity_id] = kind
+        bucket.by_kind[kind][entity_id] = None
+        self._where[entity_id] = (area_id, kind)
+
+        if old_area != area_id:
+            self._notify(area_id, AreaChange(entity_id, kind, area_id, entered=True))
+        return old_area
+
+    def remove(self, entity_id: str) -> bool:
+        """移除实体，返回实体是否存在"""
+        previous = self._where.pop(entity_id, None)
+        if previous is None:
+            return False
+        self._detach(entity_id, *previous, notify=True)
+        return True
+
+    def _detach(self, entity_id: str, area_id: str, kind: EntityKind, notify: bool) -> None:
+        bucket = self._areas[area_id]
+        del bucket.members[entity_id]
+        del bucket.by_kind[kind][entity_id]
+        if not bucket.members:
+            del self._areas[area_id]
+        if notify:
+            self._notify(area_id, AreaChange(entity_id, kind, area_id, entered=False))
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def locate(self, entity_id: str) -> Optional[str]:
+        """实体所在的区域ID"""
+        entry = self._where.get(entity_id)
+        return entry[0] if entry else None
+
+    def kind_of(self, entity_id: str) -> Optional[EntityKind]:
+        """实体类型"""
+        entry = self._where.get(entity_id)
+        return entry[1] if entry else None
+
+    def entities_in(self, area_id: str, kind: Optional[EntityKind] = None) -> KeysView[str]:
+        """区域内的实体（只读视图，不复制）"""
+        bucket = self._areas.get(area_id)
+        if bucket is None:
+            return _EMPTY.keys()
+        if kind is None:
+            return bucket.members.keys()
+        return bucket.by_kind[kind].keys()
+
+    def count(self, area_id: str, kind: Optional[EntityKind] = None) -> int:
+        """区域内的实体数量"""
+        return len(self.entities_in(area_id, kind))
+
+    def areas_within(self, area_id: str, radius: int = 1) -> Iterator[Tuple[str, int]]:
+        """按距离由近到远列出 radius 步以内的区域，产出 (区域ID, 距离)"""
+        yield area_id, 0
+        if self.world_map is None or radius <= 0:
+            return
+        areas = self.world_map.areas
+        seen = {area_id}
+        queue = deque([(area_id, 0)])
+        while queue:
+            current, distance = queue.popleft()
+            area = areas.get(current)
+            if area is None or distance >= radius:
+                continue
+            for nxt in area.connected_areas:
+                if nxt not in seen and nxt in areas:
+                    seen.add(nxt)
+                    yield nxt, distance + 1
+                    queue.append((nxt, distance + 1))
+
+    def entities_near(
+        self,
+        area_id: str,
+        radius: int = 1,
+        kind: Optional[EntityKind] = None,
+        exclude: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Tuple[str, str, int]]:
+        """
+        由近到远列出附近的实体
+
+        Args:
+            area_id: 中心区域ID
+            radius: 沿区域连接展开的步数
+            kind: 只列出该类型
+            exclude: 排除的实体ID（通常是查询者自己）
+            limit: 最多列出的数量
+
+        Returns:
+            产出 (实体ID, 所在区域ID, 距离) 的迭代器
+        """
+        found = self._iter_near(area_id, radius, kind, exclude)
+        return itertools.islice(found, limit) if limit is not None else found
+
+    def _iter_near(
+        self, area_id: str, radius: int, kind: Optional[EntityKind], exclude: Optional[str]
+    ) -> Iterator[Tuple[str, str, int]]:
+        for ring_area, distance in self.areas_within(area_id, radius):
+            for entity_id in self.entities_in(ring_area, kind):
+                if entity_id != exclude:
+                    yield entity_id, ring_area, distance
+
+    # ------------------------------------------------------------------
+    # 订阅
+    # ------------------------------------------------------------------
+    def subscribe(
+        self,
+        area_ids: Iterable[str] | str,
+        callback: AreaCallback,
+        kind: Optional[EntityKind] = None,
+    ) -> int:
+        """
+        订阅区域的进出通知
+
+        Args:
+            area_ids: 一个或多个区域ID
+            callback: 回调，参数为 ``AreaChange``
+            kind: 只通知该类型的实体
+
+        Returns:
+            订阅令牌，用于 ``unsubscribe``
+        """
+        token = next(self._next_token)
+        area_ids = [area_ids] if isinstance(area_ids, str) else list(area_ids)
+        for area_id in area_ids:
+            self._subscribers.setdefault(area_id, {})[token] = (callback, kind)
+        self._tokens[token] = area_ids
+        return token
+
+    def unsubscribe(self, token: int) -> None:
+        """取消订阅"""
+        for area_id in self._tokens.pop(token, []):
+            subs = self._subscribers.get(area_id)
+            if subs is None:
+                continue
+            subs.pop(token, None)
+            if not subs:
+                del self._subscribers[area_id]
+
+    def _notify(self, area_id: str, change: AreaChange) -> None:
+        subs = self._subscribers.get(area_id)
+        if not subs:
+            return
+        for callback, kind in tuple(subs.values()):
+            if kind is not None and kind != change.kind:
+                continue
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error(f"区域订阅回调失败: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "entities": len(self._where),
+            "occupied_areas": len(self._areas),
+            "subscriptions": len(self._tokens),
+        }
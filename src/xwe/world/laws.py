@@ -4,21 +4,47 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 import json
 import pathlib
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional
+
+DEFAULT_LAWS_PATH = "data/world_laws.json"
 
 
 @dataclass
 class WorldLaw:
-    """Represents a single world law/rule."""
+    """Represents a single world law/rule.
+
+    ``triggers`` lists the action types the law applies to, ``conditions``
+    the checks that must all hold (``{"fact": ..., "op": ..., "value": ...}``,
+    where a ``"$name"`` value refers to ``params[name]``), and ``effect`` the
+    name of the handler applied when they do.
+    """
     
     code: str
     name: str = ""
     description: str = ""
     enabled: bool = True
     params: Dict[str, Any] = field(default_factory=dict)
+    triggers: List[str] = field(default_factory=list)
+    conditions: List[Dict[str, Any]] = field(default_factory=list)
+    effect: Optional[str] = None
 
 
-def load_world_laws(path: str | pathlib.Path = "data/world_laws.json") -> Dict[str, WorldLaw]:
+def resolve_laws_path(path: str | pathlib.Path = DEFAULT_LAWS_PATH) -> Optional[pathlib.Path]:
+    """Locate a world laws file, trying the project root for relative paths.
+
+    Returns:
+        The existing path, or None if the file cannot be found
+    """
+    path = pathlib.Path(path)
+    if path.exists():
+        return path
+    # Try relative to project root
+    project_root = pathlib.Path(__file__).parent.parent.parent
+    path = project_root / path
+    return path if path.exists() else None
+
+
+def load_world_laws(path: str | pathlib.Path = DEFAULT_LAWS_PATH) -> Dict[str, WorldLaw]:
     """Load world laws from JSON file.
     
     Args:
@@ -27,16 +53,9 @@ def load_world_laws(path: str | pathlib.Path = "data/world_laws.json") -> Dict[s
     Returns:
         Dictionary mapping law codes to WorldLaw instances
     """
-    path = pathlib.Path(path)
-    
-    # Try multiple possible locations
-    if not path.exists():
-        # Try relative to project root
-        from pathlib import Path
-        project_root = Path(__file__).parent.parent.parent
-        path = project_root / path
+    path = resolve_laws_path(path)
     
-    if not path.exists():
+    if path is None:
         # Return default laws if file not found
         return {
             "CROSS_REALM_KILL": WorldLaw(
@@ -44,7 +63,10 @@ def load_world_laws(path: str | pathlib.Path = "data/world_laws.json") -> Dict[s
                 name="跨境界斩杀限制",
                 description="高境界修士不可随意斩杀低境界修士",
                 enabled=True,
-                params={"max_gap": 2}
+                params={"max_gap": 2},
+                triggers=["attack"],
+                conditions=[{"fact": "realm_gap", "op": ">=", "value": "$max_gap"}],
+                effect="thunder_tribulation",
             )
         }
     
@@ -8,9 +8,11 @@
 import logging
 import random
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from .world_map import AreaType, WorldMap
+from .interest import EntityKind, InterestIndex
+from .routing import RouteCostModel, RouteTable
+from .world_map import WorldMap
 
 logger = logging.getLogger(__name__)
 
@@ -32,29 +34,34 @@ class LocationManager:
     """
     位置管理器
 
-    管理所有实体的位置和移动。
+    管理所有实体的位置和移动。位置保存在 ``interest`` 兴趣管理索引中，
+    可按实体类型查询区域内和邻近区域的实体，或订阅区域的进出通知。
     """
 
-    def __init__(self, world_map: WorldMap) -> None:
+    def __init__(self, world_map: WorldMap, cost_model: Optional[RouteCostModel] = None) -> None:
         """
         初始化位置管理器
 
         Args:
             world_map: 世界地图实例
+            cost_model: 旅行路线的代价模型，默认按地形体力消耗
         """
         self.world_map = world_map
-        self.entity_locations: Dict[str, str] = {}  # 实体ID -> 区域ID
-        self.area_entities: Dict[str, Set[str]] = {}  # 区域ID -> 实体ID集合
+        self.routes = RouteTable(world_map, cost_model or RouteCostModel())
+        self.interest = InterestIndex(world_map)
 
         logger.info("位置管理器初始化")
 
-    def set_location(self, entity_id: str, area_id: str) -> None:
+    def set_location(
+        self, entity_id: str, area_id: str, kind: Optional[EntityKind] = None
+    ) -> None:
         """
         设置实体位置
 
         Args:
             entity_id: 实体ID（玩家或NPC）
             area_id: 区域ID
+            kind: 实体类型，None 时沿用已登记的类型（新实体视为玩家）
         """
         # 检查区域是否存在
         area = self.world_map.get_area(area_id)
@@ -62,36 +69,61 @@ class LocationManager:
             logger.error(f"尝试设置到不存在的区域: {area_id}")
             return
 
-        # 移除旧位置
-        old_location = self.entity_locations.get(entity_id)
-        if old_location and old_location in self.area_entities:
-            self.area_entities[old_location].discard(entity_id)
-
-        # 设置新位置
-        self.entity_locations[entity_id] = area_id
-
-        # 更新区域实体列表
-        if area_id not in self.area_entities:
-            self.area_entities[area_id] = set()
-        self.area_entities[area_id].add(entity_id)
-
+        self.interest.place(entity_id, area_id, kind)
         logger.debug(f"实体 {entity_id} 移动到 {area.name}")
 
+    def remove_entity(self, entity_id: str) -> bool:
+        """从地图上移除实体"""
+        return self.interest.remove(entity_id)
+
     def get_location(self, entity_id: str) -> Optional[str]:
         """获取实体当前位置"""
-        return self.entity_locations.get(entity_id)
+        return self.interest.locate(entity_id)
+
+    def get_entities_in_area(self, area_id: str, kind: Optional[EntityKind] = None) -> List[str]:
+        """获取区域内的实体（列表副本；只需遍历时用 ``interest.entities_in``）"""
+        return list(self.interest.entities_in(area_id, kind))
+
+    def get_nearby_entities(
+        self,
+        entity_id: str,
+        radius: int = 1,
+        kind: Optional[EntityKind] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, str, int]]:
+        """
+        获取实体附近的其他实体
 
-    def get_entities_in_area(self, area_id: str) -> List[str]:
-        """获取区域内的所有实体"""
-        return list(self.area_entities.get(area_id, set()))
+        Args:
+            entity_id: 实体ID
+            radius: 沿区域连接展开的步数，0 表示只看当前区域
+            kind: 只列出该类型
+            limit: 最多列出的数量，由近到远截取
+
+        Returns:
+            (实体ID, 所在区域ID, 距离) 列表
+        """
+        current_area_id = self.get_location(entity_id)
+        if not current_area_id:
+            return []
+        return list(
+            self.interest.entities_near(
+                current_area_id, radius, kind, exclude=entity_id, limit=limit
+            )
+        )
 
-    def plan_travel(self, entity_id: str, target_area_id: str) -> Optional[TravelInfo]:
+    def plan_travel(
+        self, entity_id: str, target_area_id: str, player_level: Optional[int] = None
+    ) -> Optional[TravelInfo]:
         """
         规划旅行路线
 
+        路线按代价模型（默认地形体力消耗）取代价最小者，查的是路由表缓存的最短路径树。
+
         Args:
             entity_id: 实体ID
             target_area_id: 目标区域ID
+            player_level: 玩家等级，给出时避开修为不足的区域
 
         Returns:
             旅行信息，如果无法到达则返回None
@@ -101,43 +133,20 @@ class LocationManager:
             return None
 
         # 查找路径
-        path = self.world_map.find_path(current_area_id, target_area_id)
-        if not path:
+        route = self.routes.route(current_area_id, target_area_id, player_level)
+        if not route:
             return None
 
-        # 计算旅行信息
-        distance = len(path) - 1
-
-        # 基础旅行时间（每个区域1回合）
-        travel_time = distance
-
-        # 计算体力消耗
-        stamina_cost = 0
-        for i in range(len(path) - 1):
-            area = self.world_map.get_area(path[i + 1])
-            if area:
-                # 根据地形类型计算体力消耗
-                terrain_cost = {
-                    AreaType.CITY: 5,
-                    AreaType.MARKET: 5,
-                    AreaType.WILDERNESS: 10,
-                    AreaType.FOREST: 15,
-                    AreaType.MOUNTAIN: 20,
-                    AreaType.CAVE: 15,
-                    AreaType.RUINS: 10,
-                }
-                stamina_cost += terrain_cost.get(area.type, 10)
-
         # 生成可能的遭遇
-        encounters = self._generate_travel_encounters(path)
+        encounters = self._generate_travel_encounters(route.path)
 
         return TravelInfo(
             from_area=current_area_id,
             to_area=target_area_id,
-            path=path,
-            distance=distance,
-            travel_time=travel_time,
-            stamina_cost=stamina_cost,
+            path=route.path,
+            distance=route.distance,
+            travel_time=route.distance,  # 基础旅行时间（每个区域1回合）
+            stamina_cost=route.stamina_cost,
             encounters=encounters,
         )
 
@@ -264,8 +273,7 @@ class LocationManager:
                     result["discovered_features"].append(feature)
 
         # 遭遇NPC
-        area_entities = self.get_entities_in_area(current_area_id)
-        for entity in area_entities:
+        for entity in self.interest.entities_in(current_area_id):
             if entity != entity_id and random.random() < 0.5:  # 50%概率遇到
                 result["found_npcs"].append(entity)
 
@@ -326,9 +334,9 @@ class LocationManager:
             description += f"\n这里有：{', '.join(area.features)}"
 
         # 添加其他实体
-        other_entities = [e for e in self.get_entities_in_area(current_area_id) if e != entity_id]
-        if other_entities:
-            description += f"\n\n你看到这里还有{len(other_entities)}个人。"
+        others = self.interest.count(current_area_id) - 1  # 不含自己
+        if others > 0:
+            description += f"\n\n你看到这里还有{others}个人。"
 
         # 添加可去的地方
         connected_areas = self.world_map.get_connected_areas(current_area_id)
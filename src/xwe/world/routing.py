@@ -0,0 +1,395 @@
+# world/routing.py
+"""
+地图路由表
+
+地图是静态的（只会增加区域、发现区域或调整通行状态），因此最短路径按起点
+预先计算成最短路径树并缓存，之后的寻路只是沿前驱数组回溯的查表操作。
+
+- 不带代价模型时按步数计算（广度优先），用于 ``WorldMap.find_path``；
+- 带 ``RouteCostModel`` 时用 Dijkstra 按地形体力、危险等级等加权，并遵守
+  区域的通行状态和修为要求，用于 ``LocationManager.plan_travel``。
+
+区域以整数下标存储，每棵最短路径树只占两个定长数组。地图变化时只丢弃
+真正受影响的树：新增区域或区域变得更容易通过时，只有能到达其入口的树
+才可能变短；区域变得更难通过时，只有经过它的树需要重算。
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .world_map import Area, AreaType
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .world_map import WorldMap
+
+logger = logging.getLogger(__name__)
+
+INF = float("inf")
+
+# 进入各类地形消耗的体力
+DEFAULT_TERRAIN_STAMINA: Dict[AreaType, int] = {
+    AreaType.CITY: 5,
+    AreaType.MARKET: 5,
+    AreaType.WILDERNESS: 10,
+    AreaType.FOREST: 15,
+    AreaType.MOUNTAIN: 20,
+    AreaType.CAVE: 15,
+    AreaType.RUINS: 10,
+}
+
+
+@dataclass
+class RouteCostModel:
+    """
+    加权路由的代价模型
+
+    进入一个区域的代价 = 地形体力 × stamina_weight + 危险等级 × danger_weight
+    + hop_weight + （未发现时）undiscovered_weight。
+    """
+
+    terrain_stamina: Dict[AreaType, int] = field(
+        default_factory=lambda: dict(DEFAULT_TERRAIN_STAMINA)
+    )
+    default_stamina: int = 10
+    stamina_weight: float = 1.0
+    danger_weight: float = 0.0
+    hop_weight: float = 0.0
+    undiscovered_weight: float = 0.0
+
+    def stamina(self, area: Area) -> int:
+        """进入区域消耗的体力"""
+        return self.terrain_stamina.get(area.type, self.default_stamina)
+
+    def step_cost(self, area: Area) -> float:
+        """进入区域的路由代价，无法进入时为无穷大"""
+        if not area.is_accessible:
+            return INF
+        cost = self.stamina(area) * self.stamina_weight
+        cost += area.danger_level * self.danger_weight + self.hop_weight
+        if not area.is_discovered:
+            cost += self.undiscovered_weight
+        return cost
+
+
+@dataclass
+class Route:
+    """一条路线"""
+
+    path: List[str]
+    cost: float
+    stamina_cost: int
+
+    @property
+    def distance(self) -> int:
+        return len(self.path) - 1
+
+
+class _PathTree:
+    """单个起点的最短路径树"""
+
+    __slots__ = ("source", "threshold", "dist", "prev")
+
+    def __init__(self, source: int, threshold: Optional[int], size: int) -> None:
+        self.source = source
+        self.threshold = threshold
+        self.dist = array("d", [INF]) * size
+        self.prev = array("i", [-1]) * size
+
+    def reaches(self, node: int) -> bool:
+        return node < len(self.dist) and self.dist[node] < INF
+
+
+class RouteTable:
+    """按起点缓存最短路径树的路由表"""
+
+    def __init__(
+        self,
+        world_map: "WorldMap",
+        cost_model: Optional[RouteCostModel] = None,
+        max_trees: int = 256,
+        eager_limit: int = 256,
+    ) -> None:
+        """
+        Args:
+            world_map: 世界地图，路由表会注册到地图上以接收变更通知
+            cost_model: 代价模型，None 表示按步数计算且忽略通行限制
+            max_trees: 最多缓存的最短路径树数量（LRU），每棵树每个区域占 12 字节
+            eager_limit: 区域数不超过该值时 ``precompute`` 为所有起点建树
+        """
+        self.world_map = world_map
+        self.cost_model = cost_model
+        self.max_trees = max(1, max_trees)
+        self.eager_limit = eager_limit
+
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._out: List[List[int]] = []
+        self._in: List[List[int]] = []
+        # 指向尚未加入地图的区域的连接：目标ID -> 起点下标
+        self._dangling: Dict[str, List[int]] = {}
+        self._cost = array("d")
+        self._stamina = array("l")
+        self._requirement = array("l")
+        self._levels: List[int] = []
+        self._trees: "OrderedDict[Tuple[int, Optional[int]], _PathTree]" = OrderedDict()
+        self.stats = {"lookups": 0, "tree_builds": 0, "invalidations": 0}
+
+        self.rebuild()
+        world_map.attach_route_table(self)
+
+    # ------------------------------------------------------------------
+    # 图结构
+    # ------------------------------------------------------------------
+    def rebuild(self) -> None:
+        """根据地图当前状态重建整张图，清空全部缓存"""
+        self._index.clear()
+        self._ids.clear()
+        self._out.clear()
+        self._in.clear()
+        self._dangling.clear()
+        self._cost = array("d")
+        self._stamina = array("l")
+        self._requirement = array("l")
+        self._trees.clear()
+
+        for area_id in self.world_map.areas:
+            self._add_node(area_id)
+        for area_id, area in self.world_map.areas.items():
+            self._link(self._index[area_id], area)
+        self._levels = sorted(set(self._requirement))
+
+    def _add_node(self, area_id: str) -> int:
+        node = len(self._ids)
+        self._index[area_id] = node
+        self._ids.append(area_id)
+        self._out.append([])
+        self._in.append([])
+        self._cost.append(0.0)
+        self._stamina.append(0)
+        self._requirement.append(0)
+        self._update_weights(node)
+        return node
+
+    def _link(self, node: int, area: Area) -> None:
+        for target_id in area.connected_areas:
+            target = self._index.get(target_id)
+            if target is None:
+                self._dangling.setdefault(target_id, []).append(node)
+            else:
+                self._out[node].append(target)
+                self._in[target].append(node)
+
+    def _update_weights(self, node: int) -> None:
+        area = self.world_map.areas[self._ids[node]]
+        if self.cost_model is None:
+            self._cost[node] = 1.0
+            self._stamina[node] = 0
+        else:
+            self._cost[node] = self.cost_model.step_cost(area)
+            self._stamina[node] = self.cost_model.stamina(area)
+        self._requirement[node] = area.level_requirement
+
+    # ------------------------------------------------------------------
+    # 地图变更通知（由 WorldMap 调用）
+    # ------------------------------------------------------------------
+    def on_area_added(self, area_id: str) -> None:
+        """新增区域：只丢弃能到达该区域入口的树"""
+        if area_id in self._index:
+            # 覆盖已有区域，连接关系可能整体变化
+            self.rebuild()
+            return
+
+        node = self._add_node(area_id)
+        self._link(node, self.world_map.areas[area_id])
+        for source in self._dangling.pop(area_id, []):
+            self._out[source].append(node)
+            self._in[node].append(source)
+        requirement = self._requirement[node]
+        if requirement not in self._levels:
+            self._levels.insert(bisect_right(self._levels, requirement), requirement)
+
+        self._drop_trees(lambda tree: any(tree.reaches(u) for u in self._in[node]))
+
+    def on_edge_added(self, from_id: str, to_id: str) -> None:
+        """新增连接：只丢弃经由这条连接会变短的树"""
+        source, target = self._index.get(from_id), self._index.get(to_id)
+        if source is None or target is None:
+            return
+        self._out[source].append(target)
+        self._in[target].append(source)
+        self._drop_trees(lambda tree: self._improves(tree, source, target))
+
+    def on_area_changed(self, area_id: str) -> None:
+        """区域的通行状态、发现状态或修为要求变化"""
+        node = self._index.get(area_id)
+        if node is None:
+            return
+        old_cost, old_requirement = self._cost[node], self._requirement[node]
+        self._update_weights(node)
+        new_cost, new_requirement = self._cost[node], self._requirement[node]
+        if new_requirement not in self._levels:
+            self._levels.insert(bisect_right(self._levels, new_requirement), new_requirement)
+
+        if new_cost > old_cost or new_requirement > old_requirement:
+            # 变得更难进入：经过它的树都要重算
+            self._drop_trees(lambda tree: tree.reaches(node) and tree.source != node)
+        if new_cost < old_cost or new_requirement < old_requirement:
+            # 变得更容易进入：只有能借此变短的树需要重算
+            self._drop_trees(
+                lambda tree: any(self._improves(tree, u, node) for u in self._in[node])
+            )
+
+    def _improves(self, tree: _PathTree, source: int, target: int) -> bool:
+        if not tree.reaches(source) or not self._passable(target, tree.threshold):
+            return False
+        current = tree.dist[target] if target < len(tree.dist) else INF
+        return tree.dist[source] + self._cost[target] < current
+
+    def _drop_trees(self, predicate) -> None:
+        stale = [key for key, tree in self._trees.items() if predicate(tree)]
+        for key in stale:
+            del self._trees[key]
+        self.stats["invalidations"] += len(stale)
+
+    def invalidate(self) -> None:
+        """清空全部缓存的最短路径树"""
+        self.stats["invalidations"] += len(self._trees)
+        self._trees.clear()
+
+    # ------------------------------------------------------------------
+    # 最短路径树
+    # ------------------------------------------------------------------
+    def _threshold(self, player_level: Optional[int]) -> Optional[int]:
+        """把玩家等级折算成不超过它的最高修为要求，使等级相近的查询共用一棵树"""
+        if self.cost_model is None or player_level is None:
+            return None
+        if not self._levels or player_level >= self._levels[-1]:
+            return None
+        position = bisect_right(self._levels, player_level)
+        return self._levels[position - 1] if position else -1
+
+    def _passable(self, node: int, threshold: Optional[int]) -> bool:
+        if self._cost[node] == INF:
+            return False
+        return threshold is None or self._requirement[node] <= threshold
+
+    def _tree(self, source: int, threshold: Optional[int]) -> _PathTree:
+        key = (source, threshold)
+        tree = self._trees.get(key)
+        if tree is not None:
+            self._trees.move_to_end(key)
+            return tree
+
+        tree = self._build_tree(source, threshold)
+        self._trees[key] = tree
+        while len(self._trees) > self.max_trees:
+            self._trees.popitem(last=False)
+        return tree
+
+    def _build_tree(self, source: int, threshold: Optional[int]) -> _PathTree:
+        self.stats["tree_builds"] += 1
+        tree = _PathTree(source, threshold, len(self._ids))
+        dist, prev, out = tree.dist, tree.prev, self._out
+        dist[source] = 0.0
+
+        if self.cost_model is None:
+            # 等权图：广度优先，邻居按连接顺序展开
+            queue = deque([source])
+            while queue:
+                node = queue.popleft()
+                next_dist = dist[node] + 1.0
+                for nxt in out[node]:
+                    if dist[nxt] == INF:
+                        dist[nxt] = next_dist
+                        prev[nxt] = node
+                        queue.append(nxt)
+            return tree
+
+        cost, requirement = self._cost, self._requirement
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for nxt in out[node]:
+                step = cost[nxt]
+                if step == INF or (threshold is not None and requirement[nxt] > threshold):
+                    continue
+                nd = d + step
+                if nd < dist[nxt]:
+                    dist[nxt] = nd
+                    prev[nxt] = node
+                    heapq.heappush(heap, (nd, nxt))
+        return tree
+
+    def precompute(self) -> int:
+        """
+        为所有起点预先建树（区域数超过 ``eager_limit`` 时跳过，按需建树）
+
+        Returns:
+            新建的树数量
+        """
+        if len(self._ids) > self.eager_limit:
+            logger.debug(f"区域数 {len(self._ids)} 超过预计算上限，改为按需建树")
+            return 0
+        built = 0
+        for source in range(min(len(self._ids), self.max_trees)):
+            if (source, None) not in self._trees:
+                self._tree(source, None)
+                built += 1
+        return built
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def route(self, start_id: str, end_id: str, player_level: Optional[int] = None) -> Optional[Route]:
+        """
+        查询路线
+
+        Args:
+            start_id: 起点区域ID
+            end_id: 终点区域ID
+            player_level: 玩家等级，None 表示忽略修为要求
+
+        Returns:
+            路线；无法到达时返回 None
+        """
+        source, target = self._index.get(start_id), self._index.get(end_id)
+        if source is None or target is None:
+            return None
+        self.stats["lookups"] += 1
+        if source == target:
+            return Route(path=[start_id], cost=0.0, stamina_cost=0)
+
+        tree = self._tree(source, self._threshold(player_level))
+        if not tree.reaches(target):
+            return None
+
+        nodes = []
+        node = target
+        while node != source:
+            nodes.append(node)
+            node = tree.prev[node]
+        nodes.reverse()
+        return Route(
+            path=[start_id] + [self._ids[n] for n in nodes],
+            cost=tree.dist[target],
+            stamina_cost=sum(self._stamina[n] for n in nodes),
+        )
+
+    def next_hop(self, start_id: str, end_id: str, player_level: Optional[int] = None) -> Optional[str]:
+        """下一步应前往的区域，已在终点或无法到达时返回 None"""
+        route = self.route(start_id, end_id, player_level)
+        if route is None or len(route.path) < 2:
+            return None
+        return route.path[1]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "areas": len(self._ids), "cached_trees": len(self._trees)}
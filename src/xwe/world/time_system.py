@@ -33,3 +33,7 @@ class TimeSystem:
                 pass
         game_state.game_time += hours
         game_state.active_hours += hours
+
+    def advance_idle(self, game_state: "GameState", hours: float) -> None:
+        """推进离线/挂机期间的时间，不计入活跃时长"""
+        game_state.game_time += hours
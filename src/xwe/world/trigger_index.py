@@ -0,0 +1,382 @@
+# world/trigger_index.py
+"""
+事件触发条件索引
+
+简化的判别网络（Rete-lite）：把每个事件的触发条件拆成按键的单条条件，
+
+- 等值条件按 键 → 取值 → 事件 分桶；
+- 范围条件（``{"min": a, "max": b}``，闭区间，可只给一端）按键各维护
+  下界、上界两个有序列表；
+- 其余条件（取值不可哈希等）按键逐条比较。
+
+索引记住上一次求值的上下文和每个事件已满足的条件数。再次求值时只处理
+取值发生变化的键：等值条件只看旧值和新值两个桶，数值范围条件只看端点
+落在新旧值之间的那些，因此每次只触及真正可能改变结果的事件。
+
+带等值条件的事件还会按其中取值最分散的键（如地点）分组，每组是一个
+独立的子索引，只有上下文取值与之相等的那一组参与求值；其余组保持
+上次的状态，重新激活时同样只处理变化的键。
+"""
+
+from __future__ import annotations
+
+import numbers
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+_MISSING = object()
+_RANGE_KEYS = frozenset({"min", "max"})
+_INF = float("inf")
+
+
+def is_range(value: Any) -> bool:
+    """触发条件取值是否为范围条件"""
+    return isinstance(value, dict) and bool(value) and value.keys() <= _RANGE_KEYS
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _in_range(value: Any, low: Any, high: Any) -> bool:
+    if value is _MISSING or value is None:
+        return False
+    try:
+        return low <= value <= high
+    except TypeError:
+        return False
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class _RangeBucket:
+    """同一个键上的范围条件"""
+
+    __slots__ = ("conditions", "by_low", "by_high")
+
+    def __init__(self) -> None:
+        # 事件下标 -> (下界, 上界, 当前是否满足)
+        self.conditions: Dict[int, List[Any]] = {}
+        # 数值端点的有序列表，用于找出端点落在新旧值之间的条件
+        self.by_low: List[Tuple[Any, int]] = []
+        self.by_high: List[Tuple[Any, int]] = []
+
+    def add(self, idx: int, low: Any, high: Any, state: bool) -> None:
+        self.conditions[idx] = [low, high, state]
+        if _is_number(low):
+            insort(self.by_low, (low, idx))
+        if _is_number(high):
+            insort(self.by_high, (high, idx))
+
+    def remove(self, idx: int) -> None:
+        low, high, _ = self.conditions.pop(idx)
+        if _is_number(low):
+            del self.by_low[bisect_left(self.by_low, (low, idx))]
+        if _is_number(high):
+            del self.by_high[bisect_left(self.by_high, (high, idx))]
+
+    def candidates(self, old: Any, new: Any) -> Iterable[int]:
+        """取值从 old 变为 new 时，结果可能改变的条件"""
+        if not (_is_number(old) and _is_number(new)):
+            return list(self.conditions)
+        low, high = (old, new) if old <= new else (new, old)
+        # 下界落在 (low, high] 或上界落在 [low, high) 的条件才可能翻转
+        found = {
+            idx
+            for _, idx in self.by_low[
+                bisect_right(self.by_low, (low, _INF)) : bisect_right(self.by_low, (high, _INF))
+            ]
+        }
+        found.update(
+            idx
+            for _, idx in self.by_high[
+                bisect_left(self.by_high, (low, -_INF)) : bisect_left(self.by_high, (high, -_INF))
+            ]
+        )
+        return found
+
+
+class _AlphaIndex:
+    """不分组的增量匹配索引：按键拆分条件，记录每个事件已满足的条件数"""
+
+    def __init__(self) -> None:
+        self._ids: List[Optional[str]] = []  # 事件下标 -> 事件ID（已删除为 None）
+        self._slots: Dict[str, int] = {}
+        self._triggers: List[Optional[Dict[str, Any]]] = []
+        self._required: List[int] = []
+        self._satisfied: List[int] = []
+        self._free: List[int] = []
+
+        self._equality: Dict[str, Dict[Hashable, Set[int]]] = {}
+        self._ranges: Dict[str, _RangeBucket] = {}
+        self._generic: Dict[str, Dict[int, Any]] = {}
+        self._key_refs: Dict[str, int] = {}
+
+        self._last: Dict[str, Any] = {}
+        self._matched: Set[int] = set()
+        self.stats = {"evaluations": 0, "changed_keys": 0, "touched_events": 0}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    # ------------------------------------------------------------------
+    # 增删事件
+    # ------------------------------------------------------------------
+    def add(self, event_id: str, trigger: Mapping[str, Any]) -> None:
+        """加入事件；同ID的事件会被替换。初始状态按上一次求值的上下文计算"""
+        if event_id in self._slots:
+            self.remove(event_id)
+
+        idx = self._free.pop() if self._free else len(self._ids)
+        if idx == len(self._ids):
+            self._ids.append(None)
+            self._triggers.append(None)
+            self._required.append(0)
+            self._satisfied.append(0)
+        trigger = dict(trigger)
+        self._ids[idx] = event_id
+        self._slots[event_id] = idx
+        self._triggers[idx] = trigger
+        self._required[idx] = len(trigger)
+
+        satisfied = 0
+        for key, expected in trigger.items():
+            current = self._last.get(key, _MISSING)
+            self._key_refs[key] = self._key_refs.get(key, 0) + 1
+            if is_range(expected):
+                low, high = expected.get("min", -_INF), expected.get("max", _INF)
+                state = _in_range(current, low, high)
+                self._ranges.setdefault(key, _RangeBucket()).add(idx, low, high, state)
+            elif _hashable(expected):
+                self._equality.setdefault(key, {}).setdefault(expected, set()).add(idx)
+                state = current is not _MISSING and current == expected
+            else:
+                self._generic.setdefault(key, {})[idx] = expected
+                state = current is not _MISSING and current == expected
+            satisfied += state
+        self._satisfied[idx] = satisfied
+        if satisfied == len(trigger):
+            self._matched.add(idx)
+
+    def remove(self, event_id: str) -> bool:
+        """删除事件，返回事件是否存在"""
+        idx = self._slots.pop(event_id, None)
+        if idx is None:
+            return False
+        for key, expected in self._triggers[idx].items():
+            if is_range(expected):
+                bucket = self._ranges[key]
+                bucket.remove(idx)
+                if not bucket.conditions:
+                    del self._ranges[key]
+            elif _hashable(expected):
+                buckets = self._equality[key]
+                buckets[expected].discard(idx)
+                if not buckets[expected]:
+                    del buckets[expected]
+                if not buckets:
+                    del self._equality[key]
+            else:
+                conditions = self._generic[key]
+                del conditions[idx]
+                if not conditions:
+                    del self._generic[key]
+            self._key_refs[key] -= 1
+            if not self._key_refs[key]:
+                del self._key_refs[key]
+        self._matched.discard(idx)
+        self._ids[idx] = None
+        self._triggers[idx] = None
+        self._free.append(idx)
+        return True
+
+    # ------------------------------------------------------------------
+    # 求值
+    # ------------------------------------------------------------------
+    def evaluate(self, context: Mapping[str, Any]) -> List[str]:
+        """按新的上下文更新匹配状态，返回触发条件全部满足的事件ID（无序）"""
+        self.stats["evaluations"] += 1
+        last = self._last
+        key_refs = self._key_refs
+        changes: List[Tuple[str, Any, Any]] = []
+        for key, value in context.items():
+            if key in key_refs:
+                old = last.get(key, _MISSING)
+                if old is _MISSING or old != value:
+                    changes.append((key, old, value))
+        for key in [key for key in last if key not in context]:
+            changes.append((key, last[key], _MISSING))
+
+        if changes:
+            touched: Set[int] = set()
+            for key, old, new in changes:
+                self._apply_change(key, old, new, touched)
+                if new is _MISSING:
+                    del last[key]
+                else:
+                    last[key] = new
+            required, satisfied, matched = self._required, self._satisfied, self._matched
+            for idx in touched:
+                if satisfied[idx] == required[idx]:
+                    matched.add(idx)
+                else:
+                    matched.discard(idx)
+            self.stats["changed_keys"] += len(changes)
+            self.stats["touched_events"] += len(touched)
+
+        ids = self._ids
+        return [ids[idx] for idx in self._matched]
+
+    def _apply_change(self, key: str, old: Any, new: Any, touched: Set[int]) -> None:
+        satisfied = self._satisfied
+
+        buckets = self._equality.get(key)
+        if buckets:
+            for value, delta in ((old, -1), (new, 1)):
+                if value is _MISSING or not _hashable(value):
+                    continue
+                for idx in buckets.get(value, ()):
+                    satisfied[idx] += delta
+                    touched.add(idx)
+
+        bucket = self._ranges.get(key)
+        if bucket:
+            conditions = bucket.conditions
+            for idx in bucket.candidates(old, new):
+                condition = conditions[idx]
+                state = _in_range(new, condition[0], condition[1])
+                if state != condition[2]:
+                    condition[2] = state
+                    satisfied[idx] += 1 if state else -1
+                    touched.add(idx)
+
+        generic = self._generic.get(key)
+        if generic:
+            for idx, expected in generic.items():
+                was = old is not _MISSING and old == expected
+                now = new is not _MISSING and new == expected
+                if was != now:
+                    satisfied[idx] += 1 if now else -1
+                    touched.add(idx)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            **self.stats,
+            "events": len(self._slots),
+            "indexed_keys": len(self._key_refs),
+            "matched": len(self._matched),
+        }
+
+
+class TriggerIndex:
+    """事件触发条件的增量匹配索引"""
+
+    def __init__(self) -> None:
+        self._root = _AlphaIndex()  # 没有可分组等值条件的事件
+        self._groups: Dict[str, Dict[Hashable, _AlphaIndex]] = {}
+        self._group_of: Dict[str, Tuple[str, Hashable]] = {}
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        # 键 -> 取值 -> 使用该等值条件的事件数，用于挑选分组键
+        self._value_counts: Dict[str, Dict[Hashable, int]] = {}
+        self._last_groups: Dict[str, Hashable] = {}
+        self.stats = {"evaluations": 0}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, event_id: str, trigger: Mapping[str, Any]) -> None:
+        """加入事件；同ID的事件会被替换。初始状态按上一次求值的上下文计算"""
+        if event_id in self._order:
+            self.remove(event_id)
+        self._order[event_id] = self._next_order
+        self._next_order += 1
+
+        trigger = dict(trigger)
+        gate = self._choose_group_key(trigger)
+        if gate is None:
+            self._root.add(event_id, trigger)
+            return
+
+        value = trigger.pop(gate)
+        counts = self._value_counts.setdefault(gate, {})
+        counts[value] = counts.get(value, 0) + 1
+        groups = self._groups.setdefault(gate, {})
+        group = groups.get(value)
+        if group is None:
+            group = groups[value] = _AlphaIndex()
+        group.add(event_id, trigger)
+        self._group_of[event_id] = (gate, value)
+
+    def _choose_group_key(self, trigger: Mapping[str, Any]) -> Optional[str]:
+        best, best_spread = None, -1
+        for key, value in trigger.items():
+            if is_range(value) or not _hashable(value):
+                continue
+            spread = len(self._value_counts.get(key, ()))
+            if spread > best_spread:
+                best, best_spread = key, spread
+        return best
+
+    def remove(self, event_id: str) -> bool:
+        """删除事件，返回事件是否存在"""
+        if self._order.pop(event_id, None) is None:
+            return False
+        group_key = self._group_of.pop(event_id, None)
+        if group_key is None:
+            return self._root.remove(event_id)
+
+        gate, value = group_key
+        groups = self._groups[gate]
+        groups[value].remove(event_id)
+        if not len(groups[value]):
+            del groups[value]
+            if not groups:
+                del self._groups[gate]
+        counts = self._value_counts[gate]
+        counts[value] -= 1
+        if not counts[value]:
+            del counts[value]
+        return True
+
+    def evaluate(self, context: Mapping[str, Any]) -> List[str]:
+        """
+        按新的上下文更新匹配状态
+
+        Returns:
+            触发条件全部满足的事件ID，按加入顺序排列
+        """
+        self.stats["evaluations"] += 1
+        matched = self._root.evaluate(context)
+        for gate, groups in self._groups.items():
+            value = context.get(gate, _MISSING)
+            if value is _MISSING or not _hashable(value):
+                continue
+            group = groups.get(value)
+            if group is not None:
+                matched.extend(group.evaluate(context))
+        matched.sort(key=self._order.__getitem__)
+        return matched
+
+    def reset(self) -> None:
+        """忘记上一次的上下文，所有事件回到未满足状态（空触发条件除外）"""
+        self._root.evaluate({})
+        for groups in self._groups.values():
+            for group in groups.values():
+                group.evaluate({})
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = {"evaluations": self.stats["evaluations"], "changed_keys": 0, "touched_events": 0}
+        alphas = [self._root] + [g for groups in self._groups.values() for g in groups.values()]
+        for alpha in alphas:
+            stats["changed_keys"] += alpha.stats["changed_keys"]
+            stats["touched_events"] += alpha.stats["touched_events"]
+        stats["events"] = len(self._order)
+        stats["groups"] = len(alphas) - 1
+        return stats
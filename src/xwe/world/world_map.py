@@ -3,9 +3,13 @@
 
 from __future__ import annotations
 
+import weakref
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .routing import RouteTable
 
 
 class AreaType(Enum):
@@ -71,11 +75,44 @@ class Area:
 
 
 class WorldMap:
-    """世界地图管理器"""
+    """
+    世界地图管理器
+
+    区域和连接请通过 ``add_area``、``connect_areas``、``discover_area`` 和
+    ``set_area_accessible`` 修改，已注册的路由表会据此增量失效。
+    """
 
     def __init__(self) -> None:
         self.areas: Dict[str, Area] = {}
         self.regions: Dict[str, Region] = {}
+        self._route_tables: "weakref.WeakSet[RouteTable]" = weakref.WeakSet()
+        self._hop_routes: Optional["RouteTable"] = None
+
+    def load_from_dict(self, data: Dict[str, Any]) -> None:
+        """从地图数据（格式同 ``DEFAULT_MAP_DATA``）加载区域，并预先计算路由"""
+        for region_data in data.get("regions", []):
+            self.add_region(Region.from_dict(region_data))
+        for area_data in data.get("areas", []):
+            area = Area.from_dict(area_data)
+            self.areas[area.id] = area
+        self.routes  # 确保按步数的路由表存在
+        for table in list(self._route_tables):
+            table.rebuild()
+            table.precompute()
+
+    # 路由
+    def attach_route_table(self, table: "RouteTable") -> None:
+        """注册路由表，地图变化时通知它"""
+        self._route_tables.add(table)
+
+    @property
+    def routes(self) -> "RouteTable":
+        """按步数计算的路由表"""
+        if self._hop_routes is None:
+            from .routing import RouteTable
+
+            self._hop_routes = RouteTable(self)
+        return self._hop_routes
 
     # 基本增删查
     def add_region(self, region: Region) -> None:
@@ -83,6 +120,19 @@ class WorldMap:
 
     def add_area(self, area: Area) -> None:
         self.areas[area.id] = area
+        for table in list(self._route_tables):
+            table.on_area_added(area.id)
+
+    def connect_areas(self, from_id: str, to_id: str, bidirectional: bool = True) -> None:
+        """连接两个区域"""
+        pairs = [(from_id, to_id), (to_id, from_id)] if bidirectional else [(from_id, to_id)]
+        for a, b in pairs:
+            area = self.areas.get(a)
+            if area is None or b in area.connected_areas:
+                continue
+            area.connected_areas.append(b)
+            for table in list(self._route_tables):
+                table.on_edge_added(a, b)
 
     def get_area(self, area_id: str) -> Optional[Area]:
         return self.areas.get(area_id)
@@ -93,26 +143,12 @@ class WorldMap:
             return []
         return [self.areas[a] for a in area.connected_areas if a in self.areas]
 
-    # 路径查找 - 简单广度优先
+    # 路径查找 - 步数最少，查缓存的广度优先树
     def find_path(self, start_id: str, end_id: str) -> Optional[List[str]]:
         if start_id == end_id:
             return [start_id]
-        if start_id not in self.areas or end_id not in self.areas:
-            return None
-        from collections import deque
-
-        queue = deque([[start_id]])
-        visited = {start_id}
-        while queue:
-            path = queue.popleft()
-            current = path[-1]
-            if current == end_id:
-                return path
-            for nxt in self.areas[current].connected_areas:
-                if nxt not in visited and nxt in self.areas:
-                    visited.add(nxt)
-                    queue.append(path + [nxt])
-        return None
+        route = self.routes.route(start_id, end_id)
+        return route.path if route else None
 
     def can_move_to(self, current_area_id: str, target_area_id: str, player_level: int) -> tuple[bool, str]:
         current = self.get_area(current_area_id)
@@ -129,8 +165,20 @@ class WorldMap:
 
     def discover_area(self, area_id: str) -> None:
         area = self.get_area(area_id)
-        if area:
+        if area and not area.is_discovered:
             area.is_discovered = True
+            self._notify_area_changed(area_id)
+
+    def set_area_accessible(self, area_id: str, accessible: bool) -> None:
+        """开放或封闭区域"""
+        area = self.get_area(area_id)
+        if area and area.is_accessible != accessible:
+            area.is_accessible = accessible
+            self._notify_area_changed(area_id)
+
+    def _notify_area_changed(self, area_id: str) -> None:
+        for table in list(self._route_tables):
+            table.on_area_changed(area_id)
 
     def get_regions_info(self) -> List[Dict[str, any]]:
         info: List[Dict[str, any]] = []
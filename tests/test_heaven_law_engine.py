@@ -276,5 +276,102 @@ def test_full_integration(mock_game):
     assert any(isinstance(e, ThunderTribulation) for e in ctx2.events)
 
 
+def _write_laws(path, laws):
+    import json
+    path.write_text(json.dumps({"laws": laws}, ensure_ascii=False), encoding="utf-8")
+
+
+class TestDataDrivenLaws:
+    """Test compiled, action-indexed laws loaded from data."""
+
+    def test_only_triggered_laws_evaluated(self):
+        engine = HeavenLawEngine()
+        engine.enforce(create_character("a", "金丹期"), create_character("b", "炼气期"), ActionContext())
+        engine.check_forbidden_art(create_character("c", "金丹期"), "火球术", ActionContext())
+
+        stats = engine.get_law_stats()
+        assert stats["CROSS_REALM_KILL"] == {"evaluations": 1, "matches": 1}
+        assert stats["FORBIDDEN_ARTS"] == {"evaluations": 1, "matches": 0}
+        assert stats["REALM_BREAKTHROUGH"]["evaluations"] == 0
+        assert "KARMA_BALANCE" not in stats  # no triggers, never indexed
+
+    def test_custom_law_and_effect(self, tmp_path):
+        path = tmp_path / "laws.json"
+        _write_laws(path, [{
+            "code": "NO_THEFT_IN_CITY",
+            "triggers": ["steal"],
+            "conditions": [
+                {"fact": "location", "op": "in", "value": "$protected"},
+                {"fact": "actor_realm", "op": "!=", "value": "渡劫期"},
+            ],
+            "effect": "city_guard",
+            "params": {"protected": ["青云城"]},
+        }])
+        engine = HeavenLawEngine(path=path)
+        assert engine.get_law_stats() == {}  # unknown effect: law skipped
+
+        def city_guard(law, actor, target, extra, ctx):
+            ctx.cancelled = True
+            ctx.reason = f"{extra['location']}禁止偷盗"
+
+        engine.register_effect("city_guard", city_guard)
+        ctx = ActionContext()
+        engine.check("steal", create_character("thief", "炼气期"), ctx, location="青云城")
+        assert ctx.cancelled and ctx.reason == "青云城禁止偷盗"
+
+        ctx = ActionContext()
+        engine.check("steal", create_character("thief", "炼气期"), ctx, location="荒野")
+        assert not ctx.cancelled
+
+    def test_legacy_law_file_uses_builtin_rules(self, tmp_path):
+        path = tmp_path / "laws.json"
+        _write_laws(path, [{"code": "CROSS_REALM_KILL", "params": {"max_gap": 4}}])
+        engine = HeavenLawEngine(path=path)
+
+        ctx = ActionContext()
+        engine.enforce(create_character("a", "元婴期"), create_character("b", "炼气期"), ctx)
+        assert not ctx.cancelled  # gap 3 < 4
+        engine.enforce(create_character("a", "化神期"), create_character("b", "炼气期"), ctx)
+        assert ctx.cancelled
+
+    def test_hot_reload(self, tmp_path):
+        import os
+
+        path = tmp_path / "laws.json"
+        law = {
+            "code": "CROSS_REALM_KILL",
+            "triggers": ["attack"],
+            "conditions": [{"fact": "realm_gap", "op": ">=", "value": "$max_gap"}],
+            "effect": "thunder_tribulation",
+            "params": {"max_gap": 2},
+        }
+        _write_laws(path, [law])
+        engine = HeavenLawEngine(path=path, auto_reload=True, reload_interval=0)
+        attacker, target = create_character("a", "金丹期"), create_character("b", "炼气期")
+
+        ctx = ActionContext()
+        engine.enforce(attacker, target, ctx)
+        assert ctx.cancelled
+
+        law["params"]["max_gap"] = 5
+        _write_laws(path, [law])
+        os.utime(path, (1, 1))
+        ctx = ActionContext()
+        engine.enforce(attacker, target, ctx)
+        assert not ctx.cancelled
+
+        # A broken edit keeps the previous laws
+        path.write_text("{not json", encoding="utf-8")
+        os.utime(path, (2, 2))
+        assert engine.reload_if_changed() is False
+        assert engine.laws["CROSS_REALM_KILL"].params["max_gap"] == 5
+
+    def test_missing_target_does_not_match(self):
+        engine = HeavenLawEngine()
+        ctx = ActionContext()
+        engine.enforce(create_character("a", "大乘期"), None, ctx)
+        assert not ctx.cancelled
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
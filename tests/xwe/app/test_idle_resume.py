@@ -0,0 +1,36 @@
+import os
+
+os.environ['ENABLE_PROMETHEUS'] = 'false'
+from src.app import config, get_game_instance, resume_idle_progress
+
+
+def test_resume_fast_forwards_offline_span(monkeypatch):
+    monkeypatch.setattr(config, "offline_progress_enabled", True)
+    instance = get_game_instance("idle_resume_session")
+    player = instance["game"].game_state.player
+    player.attributes.current_mana = 0
+    game_time = instance["game"].game_state.game_time
+
+    # 在线期间的请求间隔很短，不补算
+    assert resume_idle_progress(instance, now=instance["last_seen"] + 60) is None
+
+    # 离线再久也只补算到上限
+    result = resume_idle_progress(instance, now=instance["last_seen"] + 30 * 24 * 3600)
+    assert result.hours == config.offline_progress_max_hours
+    assert result.exp_gained > 0
+    assert player.attributes.cultivation_exp == result.exp_gained
+    assert player.attributes.current_mana == player.attributes.max_mana
+    assert instance["game"].game_state.game_time == game_time + result.hours
+    assert instance["offline_progress"]["can_breakthrough"] == result.can_breakthrough
+
+
+def test_offline_progress_is_opt_in_and_scaled(monkeypatch):
+    instance = get_game_instance("idle_scale_session")
+    assert not config.offline_progress_enabled
+    assert resume_idle_progress(instance, now=instance["last_seen"] + 24 * 3600) is None
+
+    # 离线 1 小时折算 4 个游戏小时
+    monkeypatch.setattr(config, "offline_progress_enabled", True)
+    monkeypatch.setattr(config, "offline_progress_time_scale", 4.0)
+    result = resume_idle_progress(instance, now=instance["last_seen"] + 3600)
+    assert result.hours == 4
@@ -0,0 +1,77 @@
+import json
+import os
+
+os.environ['ENABLE_PROMETHEUS'] = 'false'
+from src.app import create_app, get_game_instance, status_channel
+from src.xwe.server.status_channel import apply_patch
+
+app = create_app()
+
+
+def _event(chunk):
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+def _open(client, path, session_id, **kwargs):
+    with client.session_transaction() as sess:
+        sess["session_id"] = session_id
+    return client.get(path, buffered=False, **kwargs)
+
+
+def test_status_stream_pushes_patch_on_change():
+    with app.test_client() as client:
+        resp = _open(client, "/status/stream", "stream_session")
+        assert resp.mimetype == "text/event-stream"
+        stream = iter(resp.response)
+        snapshot = _event(next(stream))
+        assert snapshot["event"] == "snapshot"
+
+        game = get_game_instance("stream_session")["game"]
+        game.game_state.current_location = "丹药铺"
+        status_channel.notify("stream_session")
+
+        patch = _event(next(stream))
+        assert patch["event"] == "patch"
+        assert {"op": "replace", "path": "/location", "value": "丹药铺"} in patch["data"]
+        assert apply_patch(snapshot["data"], patch["data"])["location"] == "丹药铺"
+        resp.close()
+
+
+def test_events_stream_only_player_and_inventory():
+    with app.test_client() as client:
+        resp = _open(client, "/events", "events_session")
+        event = _event(next(iter(resp.response)))
+        assert set(event["data"]) == {"player", "inventory"}
+        resp.close()
+
+
+def test_stream_resumes_from_last_event_id():
+    with app.test_client() as client:
+        resp = _open(client, "/status/stream", "resume_session")
+        snapshot = _event(next(iter(resp.response)))
+        resp.close()
+
+        game = get_game_instance("resume_session")["game"]
+        game.game_state.player.attributes.current_health = 42
+        status_channel.notify("resume_session")
+
+        resp = client.get(
+            "/status/stream", buffered=False, headers={"Last-Event-ID": snapshot["id"]}
+        )
+        patch = _event(next(iter(resp.response)))
+        assert patch["event"] == "patch"
+        doc = apply_patch(snapshot["data"], patch["data"])
+        assert doc["player"]["attributes"]["current_health"] == 42
+        resp.close()
+
+
+def test_stream_rejected_when_full(monkeypatch):
+    monkeypatch.setattr(status_channel, "max_connections", 0)
+    with app.test_client() as client:
+        resp = _open(client, "/status/stream", "full_session")
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"]
@@ -0,0 +1,142 @@
+"""
+上下文后台压缩测试
+验证 append 不被摘要生成阻塞，以及同一压缩器的任务去重和顺序
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.xwe.core.context.compressor import ContextCompressor
+
+
+class _BlockingSummarizer:
+    """可控的摘要桩：在 release 之前阻塞，并记录并发度和调用顺序"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.batches = []
+
+    def summarize(self, messages, structured=False, max_tokens=150):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.batches.append(list(messages))
+        try:
+            self.release.wait(5)
+            return f"摘要:{messages[0]}..{messages[-1]}"
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def calculate_importance(self, messages):
+        return 0.5
+
+
+@pytest.fixture
+def summarizer():
+    stub = _BlockingSummarizer()
+    yield stub
+    stub.release.set()
+
+
+def _compressor(summarizer, **kwargs):
+    kwargs.setdefault("window_size", 2)
+    kwargs.setdefault("block_size", 4)
+    compressor = ContextCompressor(llm_client=MagicMock(), **kwargs)
+    compressor.summarizer = summarizer
+    return compressor
+
+
+class TestBackgroundCompression:
+    """后台压缩测试"""
+
+    def test_append_does_not_wait_for_summary(self, summarizer):
+        compressor = _compressor(summarizer)
+
+        started = time.monotonic()
+        for i in range(4):
+            compressor.append(f"m{i}")
+        assert time.monotonic() - started < 1.0
+        assert compressor.compression_in_progress
+
+        # 摘要落地前，滑出窗口的消息以原文提供
+        context = compressor.get_context()
+        assert "=== 待整理对话 ===" in context
+        assert "m0" in context and "m1" in context
+        assert "历史记忆" not in context
+
+        summarizer.release.set()
+        assert compressor.flush(timeout=5)
+        assert len(compressor.memory_blocks) == 1
+        assert compressor.pending_messages == []
+        context = compressor.get_context()
+        assert "摘要:m0..m3" in context
+        assert "待整理对话" not in context
+
+    def test_jobs_deduplicated_and_ordered(self, summarizer):
+        compressor = _compressor(summarizer)
+
+        for i in range(12):
+            compressor.append(f"m{i}")
+        summarizer.release.set()
+        assert compressor.flush(timeout=5)
+
+        assert summarizer.max_active == 1
+        assert summarizer.batches == [
+            ["m0", "m1", "m2", "m3"],
+            ["m4", "m5", "m6", "m7"],
+            ["m8", "m9", "m10", "m11"],
+        ]
+        assert [b.summary for b in compressor.memory_blocks] == [
+            "摘要:m0..m3", "摘要:m4..m7", "摘要:m8..m11",
+        ]
+        assert compressor.get_stats()["total_compressions"] == 3
+
+    def test_messages_appended_during_summary_kept(self, summarizer):
+        compressor = _compressor(summarizer, block_size=4)
+        for i in range(4):
+            compressor.append(f"m{i}")
+        compressor.append("late")
+
+        summarizer.release.set()
+        assert compressor.flush(timeout=5)
+        assert compressor.pending_messages == ["late"]
+
+    def test_clear_discards_in_flight_result(self, summarizer):
+        compressor = _compressor(summarizer)
+        for i in range(4):
+            compressor.append(f"m{i}")
+        compressor.clear()
+
+        summarizer.release.set()
+        assert compressor.flush(timeout=5)
+        assert len(compressor.memory_blocks) == 0
+        assert compressor.get_stats()["total_compressions"] == 0
+
+    def test_synchronous_mode(self, summarizer):
+        summarizer.release.set()
+        compressor = _compressor(summarizer, background=False)
+        for i in range(4):
+            compressor.append(f"m{i}")
+        assert not compressor.compression_in_progress
+        assert len(compressor.memory_blocks) == 1
+
+    def test_latency_metrics_recorded(self, summarizer):
+        summarizer.release.set()
+        collector = MagicMock()
+        with patch("src.xwe.core.context.compressor.get_metrics_collector", return_value=collector):
+            compressor = _compressor(summarizer)
+            for i in range(4):
+                compressor.append(f"m{i}")
+            assert compressor.flush(timeout=5)
+
+        kwargs = collector.record_context_compression.call_args.kwargs
+        assert kwargs["memory_blocks"] == 1
+        assert kwargs["duration"] >= 0
+        assert kwargs["queue_wait"] >= 0
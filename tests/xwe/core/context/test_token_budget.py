@@ -0,0 +1,154 @@
+"""
+上下文 token 计数与预算测试
+验证每条消息只计数一次、运行总数与逐条重算一致，以及按预算组装上下文
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.xwe.core.context.compressor import ContextCompressor
+from src.xwe.core.context.context_compressor import ContextCompressor as LegacyContextCompressor
+from src.xwe.core.context.memory_block import MemoryBlock
+from src.xwe.core.context.token_counter import (
+    TIKTOKEN_AVAILABLE,
+    CallableTokenCounter,
+    HeuristicTokenCounter,
+    create_token_counter,
+)
+
+
+class _StubSummarizer:
+    def summarize(self, messages, structured=False, max_tokens=150):
+        return "摘要" * 4
+
+    def calculate_importance(self, messages):
+        return 0.9 if any("突破" in m for m in messages) else 0.5
+
+
+class _CountingCounter(CallableTokenCounter):
+    """按字符数计数，并记录调用次数"""
+
+    def __init__(self):
+        super().__init__(len)
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return super().count(text)
+
+
+def _compressor(**kwargs):
+    kwargs.setdefault("background", False)
+    compressor = ContextCompressor(llm_client=MagicMock(), **kwargs)
+    compressor.summarizer = _StubSummarizer()
+    return compressor
+
+
+def _recount(compressor):
+    total = sum(block.token_estimate for block in compressor.memory_blocks)
+    total += sum(compressor._estimate_tokens(m) for m in compressor.recent_messages)
+    total += sum(compressor._estimate_tokens(m) for m in compressor.pending_messages)
+    return total
+
+
+class TestTokenCounter:
+    """计数器测试"""
+
+    @pytest.mark.parametrize("text", ["", "look around", "这是一段中文文本", "混合 text 文本！", "ＡＢＣ全角"])
+    def test_heuristic_matches_character_scan(self, text):
+        chinese = sum(1 for c in text if "一" <= c <= "鿿")
+        expected = chinese // 2 + (len(text) - chinese) // 4
+        assert HeuristicTokenCounter().count(text) == expected
+
+    def test_callable_spec(self):
+        assert create_token_counter(len).count("abc") == 3
+
+    def test_unknown_spec_falls_back(self):
+        assert isinstance(create_token_counter("nope"), HeuristicTokenCounter)
+
+    @pytest.mark.skipif(TIKTOKEN_AVAILABLE, reason="tiktoken 已安装")
+    def test_missing_tokenizer_falls_back(self):
+        assert isinstance(create_token_counter("tiktoken"), HeuristicTokenCounter)
+
+    def test_env_default(self, monkeypatch):
+        monkeypatch.setenv("XWE_CONTEXT_TOKENIZER", "heuristic")
+        assert isinstance(create_token_counter(), HeuristicTokenCounter)
+
+
+class TestIncrementalAccounting:
+    """运行总数测试"""
+
+    def test_each_message_counted_once(self):
+        counter = _CountingCounter()
+        compressor = _compressor(token_counter=counter, enable_compression=False)
+        calls_after_init = counter.calls
+
+        for i in range(50):
+            compressor.append(f"消息{i}")
+            compressor.get_stats()
+        assert counter.calls - calls_after_init == 50
+
+    def test_totals_match_recount(self):
+        compressor = _compressor(window_size=5, block_size=4, max_memory_blocks=2)
+        for i in range(23):
+            compressor.append(f"第{i}条消息 with some text")
+            assert compressor._estimate_total_tokens() == _recount(compressor)
+
+        assert len(compressor.memory_blocks) == 2
+        compressor.clear()
+        assert compressor._estimate_total_tokens() == 0
+
+    def test_import_memory_updates_totals(self):
+        compressor = _compressor()
+        compressor.import_memory([MemoryBlock(summary="一段很长的记忆" * 3, message_count=3).to_dict()])
+        assert compressor._estimate_total_tokens() == _recount(compressor)
+
+    def test_legacy_compressor_cached_total(self):
+        compressor = LegacyContextCompressor(window_size=3, token_counter=len)
+        for message in ["aa", "bbb", "cccc", "ddddd"]:
+            compressor.append(message)
+        assert compressor.get_stats()["estimated_total_tokens"] == 3 + 4 + 5
+
+
+class TestContextBudget:
+    """预算组装测试"""
+
+    def test_under_budget_unchanged(self):
+        compressor = _compressor(enable_compression=False)
+        for i in range(3):
+            compressor.append(f"消息{i}")
+        assert compressor.get_context(max_tokens=10_000) == compressor.get_context()
+
+    def test_lowest_importance_evicted_first(self):
+        compressor = _compressor(token_counter=len, window_size=10, enable_compression=False)
+        compressor.append("普通消息A")
+        compressor.append("修为突破了")
+        compressor.append("普通消息B")
+        compressor.append("最新消息")
+
+        # 标题 + 三条消息 + 换行，再留 1 个字符的余量
+        budget = len("=== 最近对话 ===\n修为突破了\n普通消息B\n最新消息") + 1
+        context = compressor.get_context(max_tokens=budget)
+        assert "修为突破了" in context
+        assert "普通消息B" in context
+        assert "普通消息A" not in context
+        assert "最新消息" in context
+        assert len(context) <= budget
+        assert compressor.stats["budget_evictions"] == 1
+
+    def test_newest_message_always_kept(self):
+        compressor = _compressor(token_counter=len, enable_compression=False)
+        for i in range(5):
+            compressor.append(f"消息{i}")
+        context = compressor.get_context(max_tokens=1)
+        assert context.endswith("消息4")
+        assert "消息3" not in context
+
+    def test_budget_is_hard_limit(self):
+        compressor = _compressor(window_size=8, block_size=6, max_context_tokens=60)
+        for i in range(40):
+            compressor.append(f"玩家在第{i}天修炼，look around carefully")
+        context = compressor.get_context()
+        assert compressor._estimate_tokens(context) <= 60
+        assert "第39天" in context
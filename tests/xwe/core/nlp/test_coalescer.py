@@ -0,0 +1,262 @@
+"""
+LLM 请求合并测试
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from src.xwe.core.nlp.coalescer import MicroBatcher, SingleFlight
+from src.xwe.core.nlp.monitor import reset_nlp_monitor
+from src.xwe.core.nlp.nlp_processor import DeepSeekNLPProcessor
+
+
+def test_single_flight_shares_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(1)
+        return "结果"
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "键", slow) for _ in range(4)]
+        while flight.get_stats()["shared"] < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {value for value, _ in results} == {"结果"}
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_propagates_error():
+    flight = SingleFlight()
+    with pytest.raises(RuntimeError):
+        flight.do("键", lambda: (_ for _ in ()).throw(RuntimeError("失败")))
+    # 失败后不残留，下一次重新执行
+    assert flight.do("键", lambda: 1) == (1, False)
+
+
+def test_micro_batcher_packs_while_busy():
+    batches = []
+    first_started = threading.Event()
+    release = threading.Event()
+
+    def batch_fn(items):
+        batches.append(list(items))
+        if len(batches) == 1:
+            first_started.set()
+            release.wait(1)
+        return [item * 2 if item >= 0 else ValueError(item) for item in items]
+
+    batcher = MicroBatcher(batch_fn, window=0.5, max_batch_size=3)
+    with ThreadPoolExecutor(5) as pool:
+        # 空闲时立即执行
+        first = pool.submit(batcher.submit, 0)
+        first_started.wait(1)
+        # 在途期间到达的请求攒满 3 条就打包
+        rest = [pool.submit(batcher.submit, i) for i in (1, 2, -3)]
+        release.set()
+        assert first.result() == 0
+        assert [f.result() for f in rest[:2]] == [2, 4]
+        with pytest.raises(ValueError):
+            rest[2].result()
+
+    assert batches[0] == [0]
+    assert sorted(batches[1]) == [-3, 1, 2]
+    assert batcher.get_stats()["batches"] == 2
+
+
+def test_micro_batcher_failure_fails_whole_batch():
+    batcher = MicroBatcher(lambda items: [1], window=0)
+    assert batcher.submit("a") == 1
+    with pytest.raises(RuntimeError):
+        MicroBatcher(lambda items: (_ for _ in ()).throw(RuntimeError())).submit("a")
+
+
+class TestProcessorBatching:
+    """处理器集成测试"""
+
+    @pytest.fixture
+    def processor(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XWE_NLP_CACHE_DB", str(tmp_path / "parse_cache.db"))
+        reset_nlp_monitor()
+        processor = DeepSeekNLPProcessor(api_key="test")
+        processor.context_compressor = None
+        processor.set_intent_classifier(None)
+        yield processor
+        processor.parse_cache.close()
+        processor.llm.cleanup()
+        reset_nlp_monitor()
+
+    @staticmethod
+    def _item(command, intent="check", **extra):
+        return {"normalized_command": command, "intent": intent, "args": {}, **extra}
+
+    def test_identical_inputs_share_one_call(self, processor):
+        release = threading.Event()
+
+        def chat(prompt, **kwargs):
+            release.wait(1)
+            return json.dumps(self._item("打开背包"))
+
+        with patch.object(processor.llm, "chat", side_effect=chat) as mock_chat:
+            with ThreadPoolExecutor(4) as pool:
+                futures = [pool.submit(processor.parse, text) for text in ("打开背包", "打开 背包", "打开背包！", "打开背包")]
+                while processor.get_batching_stats()["coalesce"]["shared"] < 3:
+                    time.sleep(0.001)
+                release.set()
+                results = [f.result() for f in futures]
+
+        assert mock_chat.call_count == 1
+        assert {r.normalized_command for r in results} == {"打开背包"}
+
+    def test_split_batch_response(self, processor):
+        response = "```json\n" + json.dumps([
+            self._item("修炼", "train", id=2),
+            self._item("探索", "action", id="1"),
+            {"id": 3, "intent": "check"},
+        ], ensure_ascii=False) + "\n```"
+        results = processor._split_batch_response(response, 4)
+        assert json.loads(results[0])["normalized_command"] == "探索"
+        assert json.loads(results[1]) == self._item("修炼", "train")
+        assert results[2:] == [None, None]
+        assert processor._split_batch_response("不是 JSON", 2) == [None, None]
+
+    def test_batch_call_retries_missing_items(self, processor):
+        prompts = []
+
+        def chat(prompt, **kwargs):
+            prompts.append(prompt)
+            if len(prompts) == 1:
+                assert '1. 输入: "探索"' in prompt and '2. 输入: "修炼"' in prompt
+                return json.dumps([self._item("探索", "action", id=1)], ensure_ascii=False)
+            return json.dumps(self._item("修炼", "train"), ensure_ascii=False)
+
+        with patch.object(processor.llm, "chat", side_effect=chat):
+            results = processor._call_deepseek_batch([
+                ("探索", processor.build_prompt("探索")),
+                ("修炼", processor.build_prompt("修炼")),
+            ])
+
+        assert [json.loads(r)["normalized_command"] for r in results] == ["探索", "修炼"]
+        assert len(prompts) == 2 and prompts[1].rstrip().endswith('输入: "修炼"\n输出:')
+
+    def test_concurrent_distinct_inputs_are_batched(self, processor):
+        first_started = threading.Event()
+        release = threading.Event()
+        prompts = []
+
+        def chat(prompt, **kwargs):
+            prompts.append(prompt)
+            if len(prompts) == 1:
+                first_started.set()
+                release.wait(1)
+                return json.dumps(self._item("探索", "action"), ensure_ascii=False)
+            return json.dumps([
+                self._item("修炼", "train", id=1),
+                self._item("查看状态", "check", id=2),
+            ], ensure_ascii=False)
+
+        processor._batcher.window = 0.5
+        processor._batcher.max_batch_size = 2
+        with patch.object(processor.llm, "chat", side_effect=chat):
+            with ThreadPoolExecutor(3) as pool:
+                first = pool.submit(processor.parse, "探索")
+                first_started.wait(1)
+                second = pool.submit(processor.parse, "修炼")
+                while processor._batcher._open is None:
+                    time.sleep(0.001)
+                third = pool.submit(processor.parse, "状态")
+                release.set()
+                results = [f.result() for f in (first, second, third)]
+
+        assert [r.normalized_command for r in results] == ["探索", "修炼", "查看状态"]
+        assert len(prompts) == 2
+        assert processor.get_batching_stats()["batching"]["items"] == 3
+
+    def test_batches_only_inputs_sharing_context(self, processor):
+        prompts = []
+
+        def chat(prompt, **kwargs):
+            prompts.append(prompt)
+            if "1. 输入:" in prompt:
+                return json.dumps([
+                    self._item("探索", "action", id=1), self._item("修炼", "train", id=2),
+                ], ensure_ascii=False)
+            return json.dumps(self._item("查看状态"), ensure_ascii=False)
+
+        def with_context(context, text):
+            return f'=== 对话上下文 ===\n{context}\n\n输入: "{text}"\n输出:\n'
+
+        with patch.object(processor.llm, "chat", side_effect=chat):
+            results = processor._call_deepseek_batch([
+                ("探索", with_context("用户: 去青云山", "探索")),
+                ("状态", with_context("用户: 打开背包", "状态")),
+                ("修炼", with_context("用户: 去青云山", "修炼")),
+            ])
+
+        assert [json.loads(r)["normalized_command"] for r in results] == ["探索", "查看状态", "修炼"]
+        assert len(prompts) == 2
+        # 批量 prompt 保留这批输入共同的对话上下文
+        assert "用户: 去青云山" in prompts[0] and '2. 输入: "修炼"' in prompts[0]
+        assert prompts[1] == with_context("用户: 打开背包", "状态")
+
+    def test_concurrent_inputs_with_compressed_context_share_one_batch(self, processor):
+        from src.xwe.core.context import ContextCompressor
+
+        processor.context_compressor = ContextCompressor()
+        processor.context_compressor.append("用户: 去青云山")
+        first_started = threading.Event()
+        release = threading.Event()
+        prompts = []
+
+        def chat(prompt, **kwargs):
+            prompts.append(prompt)
+            if "1. 输入:" not in prompt:
+                first_started.set()
+                release.wait(1)
+                return json.dumps(self._item("查看状态"), ensure_ascii=False)
+            return json.dumps([
+                self._item("探索", "action", id=1), self._item("修炼", "train", id=2),
+            ], ensure_ascii=False)
+
+        processor._batcher.window = 0.5
+        processor._batcher.max_batch_size = 2
+        with patch.object(processor.llm, "chat", side_effect=chat):
+            with ThreadPoolExecutor(3) as pool:
+                first = pool.submit(processor.parse, "状态")
+                first_started.wait(1)
+                second = pool.submit(processor.parse, "探索")
+                while processor._batcher._open is None:
+                    time.sleep(0.001)
+                third = pool.submit(processor.parse, "修炼")
+                release.set()
+                results = [f.result() for f in (first, second, third)]
+
+        # 经由真实的 build_prompt 构建，两条并发输入仍合并为一次批量调用
+        assert [r.normalized_command for r in results] == ["查看状态", "探索", "修炼"]
+        assert len(prompts) == 2
+        assert "用户: 去青云山" in prompts[1] and '2. 输入: "修炼"' in prompts[1]
+        # 解析完成后才记入上下文
+        context = processor.context_compressor.get_context()
+        assert all(f"用户: {text}" in context for text in ("状态", "探索", "修炼"))
+
+    def test_cache_key_depends_on_context(self, processor):
+        from src.xwe.core.context import ContextCompressor
+
+        processor.context_compressor = ContextCompressor()
+        first = processor._cache_key("探索", processor.build_prompt("探索"))
+        processor.context_compressor.append("用户: 进入洞穴")
+        second = processor._cache_key("探索", processor.build_prompt("探索"))
+        assert first != second
+        assert first.split("#")[0] == second.split("#")[0] == processor._cache_key("探索")
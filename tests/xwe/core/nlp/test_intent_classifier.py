@@ -0,0 +1,133 @@
+"""
+本地意图分类层测试
+"""
+
+import json
+import random
+from unittest.mock import patch
+
+import pytest
+
+from src.xwe.core.nlp.intent_classifier import IntentClassifier
+from src.xwe.core.nlp.monitor import get_nlp_monitor, reset_nlp_monitor
+from src.xwe.core.nlp.nlp_processor import DeepSeekNLPProcessor
+
+PLACES = ["丹药铺", "坊市", "青云山", "藏经阁", "后山", "天南城"]
+ITEMS = ["回春丹", "聚气丹", "筑基丹", "灵石"]
+
+
+def _records(count=300, seed=0):
+    """模拟 LLM 记录下来的解析结果"""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.3:
+            text, command, intent, args = rng.choice(["探索", "四处看看", "随便走走", "到处逛逛"]), "探索", "action", {}
+        elif roll < 0.5:
+            text, command, intent, args = rng.choice(["修炼", "打坐", "闭关修炼", "练功"]), "修炼", "train", {}
+        elif roll < 0.75:
+            place = rng.choice(PLACES)
+            text = rng.choice(["去{}", "前往{}", "去{}看看"]).format(place)
+            command, intent, args = "前往", "move", {"location": place}
+        else:
+            item = rng.choice(ITEMS)
+            text = rng.choice(["使用{}", "服用{}", "吃{}"]).format(item)
+            command, intent, args = "使用物品", "use", {"item": item}
+        records.append({"text": text, "command": command, "intent": intent, "args": args})
+    return records
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    classifier = IntentClassifier()
+    assert classifier.fit(_records()) == 300
+    return classifier
+
+
+class TestIntentClassifier:
+    """分类器测试"""
+
+    def test_confident_on_game_commands(self, classifier):
+        prediction = classifier.predict("打坐")
+        assert (prediction.command, prediction.intent, prediction.args) == ("修炼", "train", {})
+        assert prediction.confidence > 0.8
+
+    def test_args_from_learned_templates(self, classifier):
+        assert classifier.predict("去藏经阁").args == {"location": "藏经阁"}
+        assert classifier.predict("去后山看看").args == {"location": "后山"}
+        assert classifier.predict("服用 筑基丹").args == {"item": "筑基丹"}
+        # 需要参数却套不上模板
+        assert classifier.predict("前往") is None
+
+    def test_unrelated_input_has_low_confidence(self, classifier):
+        for text in ["今天天气真好", "帮我写一首诗", "攻击妖狼"]:
+            prediction = classifier.predict(text)
+            assert prediction is None or prediction.confidence < 0.5
+
+    def test_ignores_unknown_and_sequences(self):
+        classifier = IntentClassifier()
+        assert not classifier.add_example("啊啊啊", "未知", "unknown")
+        assert not classifier.add_example("先探索再修炼", ["探索", "修炼"], "action_sequence")
+        assert classifier.predict("探索") is None
+
+    def test_save_and_load(self, classifier, tmp_path):
+        path = tmp_path / "intent.json"
+        classifier.save(str(path))
+        loaded = IntentClassifier.load(str(path))
+        assert loaded.predict("前往坊市") == classifier.predict("前往坊市")
+
+
+class TestProcessorLocalTier:
+    """处理器接入测试"""
+
+    @pytest.fixture
+    def processor(self, tmp_path, monkeypatch, classifier):
+        monkeypatch.setenv("XWE_NLP_CACHE_DB", str(tmp_path / "parse_cache.db"))
+        path = tmp_path / "intent.json"
+        classifier.save(str(path))
+        monkeypatch.setenv("XWE_INTENT_MODEL", str(path))
+        reset_nlp_monitor()
+        processor = DeepSeekNLPProcessor(api_key="test")
+        processor.context_compressor = None
+        yield processor
+        processor.parse_cache.close()
+        processor.llm.cleanup()
+        reset_nlp_monitor()
+
+    @staticmethod
+    def _response(command="交易", intent="trade"):
+        return json.dumps({"normalized_command": command, "intent": intent, "args": {}})
+
+    def test_confident_parse_skips_llm(self, processor):
+        with patch.object(processor.llm, "chat", return_value=self._response()) as chat:
+            local = processor.parse("去天南城")
+            remote = processor.parse("我要和掌柜做笔买卖")
+        assert chat.call_count == 1
+        assert (local.normalized_command, local.args) == ("前往", {"location": "天南城"})
+        assert local.explanation == "本地意图分类"
+        assert remote.normalized_command == "交易"
+
+        tiers = get_nlp_monitor().get_intent_tier_stats()
+        assert tiers["local"] == 1 and tiers["llm"] == 1
+        assert tiers["local_hit_rate"] == 50.0
+
+    def test_threshold_sends_everything_to_llm(self, processor):
+        processor.local_intent_threshold = 1.01
+        with patch.object(processor.llm, "chat", return_value=self._response("修炼", "train")) as chat:
+            processor.parse("打坐")
+        assert chat.call_count == 1
+
+    def test_train_from_monitor_history(self, processor):
+        processor.set_intent_classifier(None)
+        with patch.object(processor.llm, "chat", return_value=self._response()) as chat:
+            for text in ["交易", "我要交易", "和掌柜交易", "交易一下"]:
+                processor.parse(text, use_cache=False)
+        assert chat.call_count == 4
+
+        assert processor.train_local_intent() == 4
+        with patch.object(processor.llm, "chat") as chat:
+            assert processor.parse("和掌柜交易", use_cache=False).normalized_command == "交易"
+        chat.assert_not_called()
+        # 本地层自己的输出不会回流成训练样本
+        assert len(get_nlp_monitor().get_labeled_parses()) == 4
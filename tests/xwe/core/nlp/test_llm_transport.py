@@ -0,0 +1,242 @@
+"""
+LLM HTTP 传输层测试
+使用本地桩服务器验证连接复用、重试和原生异步路径
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.xwe.core.nlp.async_utils import AsyncHelper
+from src.xwe.core.nlp.http_transport import LLMHttpTransport, RetryPolicy, TransportError
+from src.xwe.core.nlp.llm_client import LLMClient
+
+
+class _StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.closed = 0
+        self.requests = 0
+        self.failures_left = 0
+        self.fail_status = 503
+        self.payloads = []
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+
+    def finish(self):
+        super().finish()
+        with self.server.state.lock:
+            self.server.state.closed += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        state = self.server.state
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        with state.lock:
+            state.requests += 1
+            state.payloads.append(payload)
+            fail = state.failures_left > 0
+            if fail:
+                state.failures_left -= 1
+
+        if fail:
+            status, body = state.fail_status, {"error": "unavailable"}
+        else:
+            content = payload["messages"][-1]["content"]
+            status, body = 200, {"choices": [{"message": {"content": f"echo:{content}"}}]}
+
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.state = _StubState()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def _client(server, **kwargs):
+    kwargs.setdefault("retry_policy", RetryPolicy(max_tries=3, base_delay=0.01, jitter=False))
+    return LLMClient(api_key="test", api_url=_url(server), **kwargs)
+
+
+class TestRetryPolicy:
+    """重试策略测试"""
+
+    def test_exponential_delay(self):
+        policy = RetryPolicy(max_tries=5, base_delay=0.1, max_delay=0.3, jitter=False)
+        error = TransportError("boom")
+        delays = [policy.next_delay(i, time.monotonic(), error) for i in range(1, 5)]
+        assert delays[:3] == [0.1, 0.2, 0.3]
+
+    def test_stops_after_max_tries(self):
+        policy = RetryPolicy(max_tries=2, base_delay=0.1, jitter=False)
+        assert policy.next_delay(1, time.monotonic(), TransportError("x")) == 0.1
+        assert policy.next_delay(2, time.monotonic(), TransportError("x")) is None
+
+    def test_non_retryable_error(self):
+        policy = RetryPolicy()
+        error = TransportError("bad request", status_code=400, retryable=False)
+        assert policy.next_delay(1, time.monotonic(), error) is None
+
+
+class TestLLMTransportSync:
+    """同步路径测试"""
+
+    def test_chat_reuses_connection(self, stub_server):
+        client = _client(stub_server)
+        try:
+            for i in range(5):
+                assert client.chat(f"msg{i}") == f"echo:msg{i}"
+            assert stub_server.state.requests == 5
+            assert stub_server.state.connections == 1
+        finally:
+            client.cleanup()
+
+    def test_retry_on_503(self, stub_server):
+        stub_server.state.failures_left = 2
+        client = _client(stub_server)
+        try:
+            assert client.chat("hello") == "echo:hello"
+            assert stub_server.state.requests == 3
+            assert client.get_pool_stats()["retries"] == 2
+        finally:
+            client.cleanup()
+
+    def test_gives_up_after_max_tries(self, stub_server):
+        stub_server.state.failures_left = 10
+        client = _client(stub_server)
+        try:
+            with pytest.raises(TransportError) as exc_info:
+                client.chat("hello")
+            assert exc_info.value.status_code == 503
+            assert stub_server.state.requests == 3
+        finally:
+            client.cleanup()
+
+    def test_client_error_not_retried(self, stub_server):
+        stub_server.state.failures_left = 1
+        stub_server.state.fail_status = 400
+        client = _client(stub_server)
+        try:
+            with pytest.raises(TransportError):
+                client.chat("hello")
+            assert stub_server.state.requests == 1
+        finally:
+            client.cleanup()
+
+    def test_pool_stats(self, stub_server):
+        client = _client(stub_server, pool_size=4)
+        try:
+            client.chat("hello")
+            stats = client.get_pool_stats()
+            assert stats["pool_size"] == 4
+            assert stats["in_flight_sync"] == 0
+            assert stats["requests"] == 1
+        finally:
+            client.cleanup()
+
+    def test_closed_client_rejects_requests(self, stub_server):
+        client = _client(stub_server)
+        client.cleanup()
+        with pytest.raises(RuntimeError):
+            client.chat("hello")
+
+
+class TestLLMTransportAsync:
+    """异步路径测试"""
+
+    async def test_chat_async_without_executor(self, stub_server):
+        client = _client(stub_server)
+        try:
+            results = [await client.chat_async(f"msg{i}") for i in range(3)]
+            assert results == ["echo:msg0", "echo:msg1", "echo:msg2"]
+            assert stub_server.state.connections == 1
+            assert client._executor is None
+        finally:
+            await client.aclose()
+
+    async def test_concurrent_requests_bounded_by_pool(self, stub_server):
+        client = _client(stub_server, pool_size=2)
+        try:
+            results = await asyncio.gather(*(client.chat_async(f"m{i}") for i in range(8)))
+            assert sorted(results) == sorted(f"echo:m{i}" for i in range(8))
+            assert stub_server.state.connections <= 2
+        finally:
+            await client.aclose()
+
+    async def test_async_retry_shares_policy(self, stub_server):
+        stub_server.state.failures_left = 1
+        client = _client(stub_server)
+        try:
+            messages = [{"role": "user", "content": "ctx"}]
+            assert await client.chat_with_context_async(messages) == "echo:ctx"
+            assert stub_server.state.requests == 2
+            assert client.get_pool_stats()["retries"] == 1
+        finally:
+            await client.aclose()
+
+    def test_async_client_recreated_per_loop(self, stub_server):
+        transport = LLMHttpTransport(
+            pool_size=2, retry_policy=RetryPolicy(max_tries=1)
+        )
+        payload = {"messages": [{"role": "user", "content": "x"}]}
+        try:
+            for _ in range(2):
+                result = asyncio.run(transport.post_json_async(_url(stub_server), payload))
+                assert result["choices"][0]["message"]["content"] == "echo:x"
+            # 上一个事件循环的客户端已被关闭，只保留当前的
+            assert len(transport._async_clients) == 1
+            _wait_for(lambda: stub_server.state.closed >= 1)
+        finally:
+            transport.close()
+        assert not transport._async_clients
+        _wait_for(lambda: stub_server.state.closed == stub_server.state.connections)
+
+    def test_run_async_in_sync_reuses_shared_loop(self, stub_server):
+        transport = LLMHttpTransport(pool_size=2, retry_policy=RetryPolicy(max_tries=1))
+        payload = {"messages": [{"role": "user", "content": "y"}]}
+        try:
+            for _ in range(3):
+                AsyncHelper.run_async_in_sync(transport.post_json_async(_url(stub_server), payload))
+            assert stub_server.state.connections == 1
+            assert len(transport._async_clients) == 1
+        finally:
+            transport.close()
+        _wait_for(lambda: stub_server.state.closed == 1)
@@ -0,0 +1,178 @@
+"""
+NLP 解析缓存测试
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.xwe.core.nlp.monitor import reset_nlp_monitor, get_nlp_monitor
+from src.xwe.core.nlp.nlp_processor import DeepSeekNLPProcessor
+from src.xwe.core.nlp.parse_cache import (
+    TIER_DISK,
+    TIER_MEMORY,
+    ParseCache,
+    normalize_command,
+)
+
+
+class TestNormalizeCommand:
+    """输入规范化测试"""
+
+    @pytest.mark.parametrize("text", ["打开背包", "打开 背包 ", " 打开背包！", "打开，背包。", "打开背包!!"])
+    def test_whitespace_and_punctuation_folded(self, text):
+        assert normalize_command(text) == "打开背包"
+
+    def test_fullwidth_and_case(self):
+        assert normalize_command("ＬＯＯＫ  Around") == "look around"
+
+    def test_ascii_words_keep_single_space(self):
+        assert normalize_command("go   north") == "go north"
+
+    def test_default_synonyms(self):
+        assert normalize_command("瞧瞧状态") == normalize_command("看看状态")
+
+    def test_custom_synonyms_longest_first(self):
+        synonyms = {"储物袋": "背包", "袋": "包"}
+        assert normalize_command("打开储物袋", synonyms) == "打开背包"
+
+    def test_empty_synonyms_disable_folding(self):
+        assert normalize_command("瞧瞧状态", {}) == "瞧瞧状态"
+
+
+class TestParseCache:
+    """两级缓存测试"""
+
+    def test_memory_hit(self):
+        cache = ParseCache(max_size=4)
+        assert cache.lookup("a") == (None, None)
+        cache.set("a", "1")
+        assert cache.lookup("a") == ("1", TIER_MEMORY)
+        info = cache.info()
+        assert info["hits"] == 1 and info["misses"] == 1
+
+    def test_lru_eviction(self):
+        cache = ParseCache(max_size=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.stats.evictions == 1
+
+    def test_ttl_expiry(self):
+        cache = ParseCache(ttl=10)
+        with patch("src.xwe.core.nlp.parse_cache.time.time", return_value=1000.0):
+            cache.set("a", "1")
+        with patch("src.xwe.core.nlp.parse_cache.time.time", return_value=1011.0):
+            assert cache.get("a") is None
+        assert cache.stats.expirations == 1
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        db = str(tmp_path / "cache.db")
+        first = ParseCache(db_path=db, namespace="ns")
+        first.set("打开背包", '{"intent": "check"}')
+        first.close()
+
+        second = ParseCache(db_path=db, namespace="ns")
+        assert second.lookup("打开背包") == ('{"intent": "check"}', TIER_DISK)
+        # 磁盘命中后提升到内存层
+        assert second.lookup("打开背包")[1] == TIER_MEMORY
+        second.close()
+
+    def test_disk_tier_shared_between_instances(self, tmp_path):
+        db = str(tmp_path / "cache.db")
+        a = ParseCache(db_path=db, namespace="ns")
+        b = ParseCache(db_path=db, namespace="ns")
+        a.set("k", "v")
+        assert b.lookup("k") == ("v", TIER_DISK)
+        a.close()
+        b.close()
+
+    def test_namespace_isolation(self, tmp_path):
+        db = str(tmp_path / "cache.db")
+        a = ParseCache(db_path=db, namespace="prompt-v1")
+        b = ParseCache(db_path=db, namespace="prompt-v2")
+        a.set("k", "v")
+        assert b.get("k") is None
+        a.clear()
+        assert ParseCache(db_path=db, namespace="prompt-v1").get("k") is None
+
+    def test_disk_ttl_expiry(self, tmp_path):
+        db = str(tmp_path / "cache.db")
+        with patch("src.xwe.core.nlp.parse_cache.time.time", return_value=1000.0):
+            ParseCache(db_path=db, ttl=10).set("k", "v")
+        with patch("src.xwe.core.nlp.parse_cache.time.time", return_value=1011.0):
+            assert ParseCache(db_path=db, ttl=10).get("k") is None
+
+
+class TestProcessorParseCache:
+    """处理器集成测试"""
+
+    @pytest.fixture
+    def processor(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XWE_NLP_CACHE_DB", str(tmp_path / "parse_cache.db"))
+        reset_nlp_monitor()
+        processor = DeepSeekNLPProcessor(api_key="test")
+        processor.context_compressor = None
+        yield processor
+        processor.parse_cache.close()
+        processor.llm.cleanup()
+        reset_nlp_monitor()
+
+    @staticmethod
+    def _response(command="打开背包", intent="check"):
+        return json.dumps({"normalized_command": command, "intent": intent, "args": {}})
+
+    def test_normalized_inputs_share_entry(self, processor):
+        with patch.object(processor.llm, "chat", return_value=self._response()) as chat:
+            first = processor.parse("打开背包")
+            second = processor.parse("打开 背包 ")
+            third = processor.parse("打开背包！")
+
+        assert chat.call_count == 1
+        assert first.normalized_command == second.normalized_command == third.normalized_command
+        assert second.raw == "打开 背包 "
+
+        cache_stats = get_nlp_monitor().get_cache_stats()
+        assert cache_stats["misses"] == 1
+        assert cache_stats["memory_hits"] == 2
+        assert cache_stats["llm_calls_saved"] == 2
+
+    def test_persistent_tier_used_by_new_processor(self, processor):
+        with patch.object(processor.llm, "chat", return_value=self._response()):
+            processor.parse("打开背包")
+
+        other = DeepSeekNLPProcessor(api_key="test")
+        other.context_compressor = None
+        try:
+            with patch.object(other.llm, "chat") as chat:
+                result = other.parse("打开背包")
+            chat.assert_not_called()
+            assert result.normalized_command == "打开背包"
+            assert get_nlp_monitor().get_cache_stats()["disk_hits"] == 1
+        finally:
+            other.parse_cache.close()
+            other.llm.cleanup()
+
+    def test_unknown_results_not_cached(self, processor):
+        with patch.object(processor.llm, "chat", return_value=self._response("未知", "unknown")) as chat:
+            processor.parse("啊啊啊")
+            processor.parse("啊啊啊")
+        assert chat.call_count == 2
+
+    def test_use_cache_false_bypasses_cache(self, processor):
+        with patch.object(processor.llm, "chat", return_value=self._response()) as chat:
+            processor.parse("打开背包", use_cache=False)
+            processor.parse("打开背包", use_cache=False)
+        assert chat.call_count == 2
+        assert processor.get_cache_info()["currsize"] == 0
+
+    def test_clear_cache(self, processor):
+        with patch.object(processor.llm, "chat", return_value=self._response()) as chat:
+            processor.parse("打开背包")
+            processor.clear_cache()
+            processor.parse("打开背包")
+        assert chat.call_count == 2
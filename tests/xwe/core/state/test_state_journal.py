@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from src.xwe.core.state.state_journal import MISSING, StateJournal, apply_delta, diff_state
+
+
+def _state(step: int) -> dict:
+    return {
+        "game_time": float(step),
+        "flags": {"step": step, "even": step % 2 == 0} if step % 3 else {"step": step},
+        "npcs": {f"npc_{i}": {"hp": 100 - (step if i == step % 4 else 0)} for i in range(4)},
+    }
+
+
+def test_diff_roundtrip():
+    old, new = _state(1), _state(3)
+    delta = diff_state(old, new)
+    assert apply_delta(_state(1), delta) == new
+    assert ["flags", "even"] in delta["unset"]
+
+
+def test_periodic_snapshots_and_replay(tmp_path):
+    journal = StateJournal(tmp_path, snapshot_interval=4, segment_size=100)
+    for step in range(10):
+        assert journal.record(_state(step), action=f"step{step}") == step
+
+    snapshots = [i for i, line in enumerate(journal.active_path.read_text(encoding="utf-8").splitlines()) if '"state"' in line]
+    assert snapshots == [0, 4, 8]
+
+    for step in range(10):
+        assert journal.replay(step) == _state(step)
+    assert journal.replay(-1) == _state(9)
+
+
+def test_rotation_and_compaction(tmp_path):
+    journal = StateJournal(tmp_path, snapshot_interval=50, segment_size=5, max_segments=2)
+    for step in range(23):
+        journal.record(_state(step))
+
+    assert len(journal.segments()) == 2
+    assert journal.first_index == 15
+    assert journal.replay(17) == _state(17)
+    assert journal.replay(22) == _state(22)
+    with pytest.raises(IndexError):
+        journal.replay(3)
+
+
+def test_recovers_index_after_restart(tmp_path):
+    journal = StateJournal(tmp_path, segment_size=4)
+    for step in range(6):
+        journal.record(_state(step))
+
+    reopened = StateJournal(tmp_path, segment_size=4)
+    assert reopened.last_index == 5
+    assert reopened.record(_state(6)) == 6
+    assert reopened.replay(6) == _state(6)
+    assert reopened.replay(2) == _state(2)
+
+
+def test_record_changes_only_snapshots_when_due(tmp_path):
+    journal = StateJournal(tmp_path, snapshot_interval=4)
+    state = _state(0)
+    snapshots = []
+
+    def snapshot():
+        snapshots.append(True)
+        return state
+
+    for step in range(1, 7):
+        old = state["flags"].get("step")
+        state["flags"]["step"] = step
+        state["game_time"] = float(step)
+        journal.record_changes(
+            [(["flags", "step"], old, step), (["game_time"], float(step - 1), float(step))],
+            action=f"step{step}",
+            snapshot=snapshot,
+        )
+
+    assert len(snapshots) == 2
+    entry = json.loads(journal.active_path.read_text(encoding="utf-8").splitlines()[1])
+    assert entry["delta"]["set"] == [[["flags", "step"], 2], [["game_time"], 2.0]]
+    assert entry["delta"]["old"] == [[["flags", "step"], 1], [["game_time"], 1.0]]
+    assert journal.replay(4)["flags"]["step"] == 5
+    assert journal.replay(-1) == state
+
+    # 删除键与整份记录混用时仍能正确回放
+    del state["flags"]["step"]
+    journal.record_changes([(["flags", "step"], 6, MISSING)], snapshot=snapshot)
+    state["game_time"] = 7.0
+    journal.record(state)
+    assert "step" not in journal.replay(-2)["flags"]
+    assert journal.replay(-1) == state
@@ -24,8 +24,27 @@ def test_state_manager(tmp_path):
     assert entry1["state"] == state1.to_dict()
     assert "timestamp" in entry1
 
+    # 第二条只记录变化的键
     entry2 = json.loads(lines[1])
     assert entry2["action"] == "progress"
-    assert entry2["state"] == state2.to_dict()
+    assert "state" not in entry2
+    assert entry2["delta"] == {"set": [[["game_time"], 1.0]], "unset": []}
     assert "timestamp" in entry2
 
+    assert mgr.replay(0).to_dict() == state1.to_dict()
+    assert mgr.replay(1).to_dict() == state2.to_dict()
+
+
+def test_update_records_change_at_mutation(tmp_path):
+    mgr = GameStateManager(log_dir=tmp_path)
+    state = GameState()
+    mgr.set_state(state, action="start")
+
+    assert mgr.update("game_time", 5.0, action="rest") == 0.0
+    assert mgr.update("flags.boss_defeated", True, action="fight") is None
+    assert state.game_time == 5.0 and state.flags["boss_defeated"] is True
+
+    lines = (tmp_path / "state_transitions.log").read_text(encoding="utf-8").splitlines()
+    entry = json.loads(lines[2])
+    assert entry["delta"] == {"set": [[["flags", "boss_defeated"], True]], "unset": [], "old": []}
+    assert mgr.replay(-1).to_dict() == state.to_dict()
@@ -0,0 +1,142 @@
+import copy
+import threading
+
+import pytest
+
+from src.xwe.core.attribute_store import NUMPY_AVAILABLE, AttributeTable
+from src.xwe.core.attributes import AttributeSystem, CharacterAttributes
+from src.xwe.core.character import Character
+from src.xwe.core.game.state import GameState
+
+BACKENDS = [False] + ([True] if NUMPY_AVAILABLE else [])
+
+
+def _snapshot(attrs):
+    data = attrs.to_dict()
+    data.pop("elemental_resistance")
+    return data
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_view_matches_character_attributes(use_numpy):
+    table = AttributeTable(capacity=2, use_numpy=use_numpy)
+    view = table.create()
+    reference = CharacterAttributes()
+    assert _snapshot(view) == pytest.approx(_snapshot(reference))
+
+    for attrs in (view, reference):
+        attrs.strength = 18
+        attrs.agility = 30
+        attrs.cultivation_level = 7
+        attrs.luck = 200
+    # 修改只做标记，读取衍生属性时才重算
+    assert table.is_dirty(view.row)
+    assert _snapshot(view) == pytest.approx(_snapshot(reference))
+    assert not table.is_dirty(view.row)
+    assert view.critical_rate == 0.5
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_recalculate_all_batches_dirty_rows(use_numpy):
+    table = AttributeTable(capacity=4, use_numpy=use_numpy)
+    views = [table.create(strength=10 + i, cultivation_level=i) for i in range(50)]
+    assert table.capacity >= 50
+    assert table.dirty_count() == 50
+
+    assert table.recalculate_all() == 50
+    assert table.dirty_count() == 0
+    for i, view in enumerate(views):
+        expected = CharacterAttributes(strength_base=10 + i, cultivation_level_base=i)
+        assert view.max_health == pytest.approx(expected.max_health)
+        assert view.attack_power == pytest.approx(expected.attack_power)
+
+    views[3].strength = 99
+    assert table.recalculate_all() == 1
+    assert table.recalculate_all(dirty_only=False) == 50
+
+
+def test_manual_derived_override_keeps_assignment_order():
+    table = AttributeTable()
+    view = table.create()
+    view.strength = 20
+    view.max_health = 999
+    assert view.max_health == 999
+
+
+def test_buffs_and_character_integration():
+    table = AttributeTable()
+    npc = Character(name="守卫", attributes=table.create(), level=5)
+    assert npc.attributes.cultivation_level == 5
+    assert npc.health == npc.max_health
+
+    AttributeSystem().apply_buff(npc.attributes, "strength", 50, is_percentage=True)
+    assert npc.attributes.strength == 15
+    assert npc.attributes.attack_power == pytest.approx(15 * 2 + 10 * 0.5 + 5 * 3)
+
+    before = npc.attributes.current_health
+    npc.take_damage(10)
+    assert npc.attributes.current_health == before - 10
+
+    clone = copy.deepcopy(npc)
+    assert clone.attributes.row != npc.attributes.row
+    clone.attributes.strength = 1
+    assert npc.attributes.strength == 15
+
+
+def test_release_reuses_rows_and_elemental_is_lazy():
+    table = AttributeTable()
+    first = table.create()
+    assert table._elemental[first.row] is None
+    first.elemental_resistance["fire"] = 5
+    row = first.row
+    first.release()
+    assert len(table) == 0
+
+    second = table.create(realm_name="筑基期")
+    assert second.row == row
+    assert second.elemental_resistance["fire"] == 0
+    assert second.realm_name == "筑基期"
+
+
+
+def test_adopt_writes_columns_under_table_lock():
+    table = AttributeTable()
+    held = []
+
+    def probe():
+        # 在另一线程尝试取锁：adopt 写列期间应当失败
+        acquired = table._lock.acquire(blocking=False)
+        if acquired:
+            table._lock.release()
+        held.append(not acquired)
+
+    class Source:
+        def __init__(self, attributes):
+            self._attributes = attributes
+
+        def __getattr__(self, name):
+            if name == "max_health_base":
+                worker = threading.Thread(target=probe)
+                worker.start()
+                worker.join()
+            return getattr(self._attributes, name)
+
+    attributes = CharacterAttributes()
+    attributes.max_health = 500
+    view = table.adopt(Source(attributes))
+    assert held == [True]
+    assert view.max_health == 500
+
+
+def test_game_state_compacts_npc_attributes():
+    state = GameState(npcs={f"npc_{i}": Character(name=f"NPC{i}", level=i + 1) for i in range(10)})
+    before = {nid: npc.attributes.to_dict() for nid, npc in state.npcs.items()}
+
+    table = state.compact_npc_attributes()
+    assert len(table) == 10
+    assert {nid: npc.attributes.to_dict() for nid, npc in state.npcs.items()} == before
+
+    shared = AttributeTable()
+    restored = GameState.from_dict(state.to_dict(), attribute_table=shared)
+    assert len(shared) == 10
+    assert restored.npcs["npc_3"].attributes.to_dict() == before["npc_3"]
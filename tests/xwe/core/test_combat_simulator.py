@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.xwe.core.combat import CombatSystem
+from src.xwe.core.combat_simulator import (
+    DRAW,
+    WINNER_A,
+    BatchCombatSimulator,
+    CombatantTemplate,
+)
+
+SWORD = CombatantTemplate("剑修", level=3, strength=14, agility=12)
+BODY = CombatantTemplate("体修", level=3, constitution=16, agility=8, luck=14)
+
+
+def test_same_seed_reproduces_results():
+    simulator = BatchCombatSimulator()
+    first = simulator.simulate(SWORD, BODY, fights=2000, seed=7)
+    second = simulator.simulate(SWORD, BODY, fights=2000, seed=7)
+    other = simulator.simulate(SWORD, BODY, fights=2000, seed=8)
+
+    assert np.array_equal(first.winners, second.winners)
+    assert np.array_equal(first.damage_dealt_a, second.damage_dealt_a)
+    assert not np.array_equal(first.damage_dealt_a, other.damage_dealt_a)
+
+
+@pytest.mark.parametrize("damage_type", ["physical", "magical"])
+def test_batch_matches_scalar_combat_system(damage_type):
+    simulator = BatchCombatSimulator(damage_type=damage_type)
+    batch = simulator.simulate(SWORD, BODY, fights=20000, seed=1).summary()
+    scalar = simulator.simulate_scalar(SWORD, BODY, fights=600, seed=1).summary()
+
+    assert batch["win_rates"]["a"] == pytest.approx(scalar["win_rates"]["a"], abs=0.06)
+    assert batch["time_to_kill"]["mean"] == pytest.approx(scalar["time_to_kill"]["mean"], rel=0.05)
+    for side in ("a", "b"):
+        hit_batch = batch[side]["damage_per_hit"]
+        hit_scalar = scalar[side]["damage_per_hit"]
+        assert hit_batch["mean"] == pytest.approx(hit_scalar["mean"], rel=0.03)
+        assert batch[side]["critical_rate"] == pytest.approx(scalar[side]["critical_rate"], abs=0.03)
+
+
+def test_matchup_lists_and_outcomes():
+    weak = CombatantTemplate("凡人", level=1, strength=5, constitution=5)
+    strong = CombatantTemplate("金丹", level=30, strength=40, constitution=40, agility=30)
+    simulator = BatchCombatSimulator()
+
+    result = simulator.simulate([strong, weak], [weak, strong], seed=3)
+    assert result.fights == 2
+    assert result.winners.tolist() == [WINNER_A, 1]
+
+    capped = BatchCombatSimulator(max_rounds=1).simulate(SWORD, BODY, fights=100, seed=3)
+    assert (capped.winners == DRAW).all()
+    assert capped.win_rates()["draw"] == 1.0
+
+    with pytest.raises(ValueError):
+        simulator.simulate([SWORD, BODY], [SWORD, BODY, SWORD])
+
+
+def test_distributions_summary():
+    result = BatchCombatSimulator().simulate({"strength": 12, "level": 2}, BODY, fights=500, seed=11)
+    dist = result.damage_distribution("a", bins=5)
+    assert dist["count"] == result.hit_damage_a.size
+    assert sum(dist["histogram"]["counts"]) == dist["count"]
+    assert result.summary()["a"]["critical_rate"] > 0
+
+
+def test_combat_system_accepts_seeded_rng():
+    attacker = SWORD.to_character()
+    defender = BODY.to_character()
+    first = CombatSystem(rng=random.Random(5))._calculate_damage(attacker, defender)
+    second = CombatSystem(rng=random.Random(5))._calculate_damage(attacker, defender)
+    assert first == second
@@ -0,0 +1,136 @@
+"""
+命令匹配测试
+验证前缀树、关键词自动机，以及编译后的命令解析器、命令路由器与逐条匹配结果一致
+"""
+
+import random
+import re
+
+from src.xwe.core.command_parser import CommandParser, CommandType, literal_prefixes
+from src.xwe.core.command_router import CommandPriority, CommandRouter
+from src.xwe.core.command_trie import KeywordAutomaton, PrefixTrie
+
+
+def naive_normalize(parser, text):
+    text = text.strip().lower()
+    for key, synonyms in parser.synonyms.items():
+        for synonym in synonyms:
+            if synonym in text:
+                text = text.replace(synonym, key)
+                break
+    return text
+
+
+def naive_parse(parser, text):
+    """逐条比较别名和模式的参考实现，返回 (命令类型, 目标, 参数)"""
+    text = text.strip().lower()
+    normalized = naive_normalize(parser, text)
+    if not text:
+        return CommandType.UNKNOWN, None, {}
+    for alias, cmd_type in parser.command_aliases.items():
+        if normalized == alias:
+            return cmd_type, None, {}
+    for pattern, cmd_type, names in parser.command_patterns:
+        match = re.match(pattern, normalized, re.IGNORECASE)
+        if match:
+            if isinstance(names, str):
+                params = {names: match.group(1).strip()}
+                return cmd_type, params.get("target") or params[names], params
+            params = {name: match.group(i + 1).strip() for i, name in enumerate(names)}
+            return cmd_type, params.get("target"), params
+    words = text.split()
+    if words:
+        for alias, cmd_type in parser.command_aliases.items():
+            if words[0] in alias:
+                return cmd_type, " ".join(words[1:]) if len(words) > 1 else None, {}
+    return CommandType.UNKNOWN, None, {}
+
+
+def test_prefix_trie():
+    trie = PrefixTrie([("攻击", 1), ("攻", 2), ("attack", 3)])
+    assert list(trie.prefixes("攻击妖狼")) == [(1, 2), (2, 1)]
+    assert trie.longest_prefix("攻击妖狼") == (2, 1)
+    assert trie.longest_prefix("防御") is None
+    assert sorted(trie.items_with_prefix("攻")) == [("攻", 2), ("攻击", 1)]
+    trie.insert("", 0)
+    assert next(trie.prefixes("防御")) == (0, 0)
+    assert len(trie) == 4 and "attack" in trie and "att" not in trie
+
+
+def test_keyword_automaton():
+    automaton = KeywordAutomaton([("he", "he"), ("she", "she"), ("his", "his"), ("hers", "hers")])
+    assert sorted((start, value) for start, _, value in automaton.find("ushers")) == [
+        (1, "she"), (2, "he"), (2, "hers"),
+    ]
+    automaton.add("us", "us")
+    assert [value for _, _, value in automaton.find("us")] == ["us"]
+
+
+def test_literal_prefixes():
+    assert literal_prefixes(r"^(?:去|前往|移动到?)\s*(.+)$") == ["去", "前往", "移动"]
+    assert literal_prefixes(r"^move\s+(?:to\s+)?(.+)$") == ["move"]
+    assert literal_prefixes(r"^(?:和|与|跟)?\s*(.+?)\s*(?:对话)$") is None
+    assert literal_prefixes(r"(.+)对话$") is None
+
+
+def test_parser_matches_naive_scan():
+    parser = CommandParser()
+    pieces = list(parser.command_aliases) + [s for group in parser.synonyms.values() for s in group]
+    pieces += ["和", "跟", "使用", "释放", "给", "到", "to", "item", "use", "move", "talk", "give",
+               " ", "妖狼", "王长老", "丹药铺", "MOVE", "技能", "对话"]
+    rng = random.Random(7)
+    for _ in range(20_000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 4)))
+        parsed = parser.parse(text)
+        assert (parsed.command_type, parsed.target, parsed.parameters) == naive_parse(parser, text), text
+        assert parser.normalize_command(text) == naive_normalize(parser, text), text
+
+
+def test_parser_updates():
+    parser = CommandParser()
+    assert parser.parse("炼丹").command_type is CommandType.UNKNOWN
+
+    parser.add_alias("炼丹", CommandType.CULTIVATE)
+    parser.add_pattern(r"^学习\s*(.+)$", CommandType.LEARN, "skill")
+    parser.add_synonyms("炼丹", ["开炉"])
+    assert parser.parse("开炉").command_type is CommandType.CULTIVATE
+    learn = parser.parse("学习 御剑术")
+    assert learn.command_type is CommandType.LEARN and learn.parameters == {"skill": "御剑术"}
+    assert "炼丹" in parser.get_command_suggestions("炼")
+
+    parser.add_alias("hit", CommandType.DEFEND)  # 覆盖已有别名
+    assert parser.parse("hit").command_type is CommandType.DEFEND
+    assert parser.parse("hi 妖狼").command_type is CommandType.DEFEND
+
+
+def test_parsers_share_compiled_tables_until_modified():
+    first, second = CommandParser(), CommandParser()
+    assert first._synonym_matcher is second._synonym_matcher
+    assert first._pattern_trie is second._pattern_trie
+
+    first.add_alias("遁走", CommandType.FLEE)
+    first.add_synonyms("炼丹", ["开炉"])
+    assert first.parse("遁走").command_type is CommandType.FLEE
+    assert first._synonym_matcher is not second._synonym_matcher
+    assert second.parse("遁走").command_type is CommandType.UNKNOWN
+    assert second.parse("开炉").command_type is CommandType.UNKNOWN
+    assert CommandParser().parse("遁走").command_type is CommandType.UNKNOWN
+
+def test_router_context_and_priority():
+    router = CommandRouter(use_nlp=False)
+    router.set_context("battle")
+    assert router.route_command("逃跑吧")[0] == "flee"
+    assert router.route_command("移动 北")[0] == "unknown"
+
+    # 已构建的前缀树随 add_route 增量更新，同一前缀优先级高的胜出
+    router.add_route("逃", "surrender", CommandPriority.LOW, ["battle"])
+    router.add_route("逃跑吧", "panic", CommandPriority.CRITICAL, ["battle"])
+    assert router.route_command("逃跑吧")[0] == "flee"
+    router.add_route("逃跑吧", "vanish", CommandPriority.CRITICAL, ["*"])
+    router.add_route("GO", "move", CommandPriority.HIGH)
+    assert router.route_command("逃")[0] == "flee"
+    assert router.route_command("go north") == ("move", {"target": "north", "raw_text": "go north"})
+
+    router.set_context("exploration")
+    assert router.route_command("逃跑吧")[0] == "vanish"
+    assert router.route_command("移动 北")[1]["target"] == "北"
@@ -0,0 +1,101 @@
+"""
+挂机修炼快进测试
+随机生成角色、状态效果和挂机时长，验证一次算出的结果与逐步模拟完全一致
+"""
+
+import copy
+import random
+
+from src.xwe.core.attributes import CharacterAttributes
+from src.xwe.core.character import Character, CharacterType
+from src.xwe.core.cultivation_fastforward import CultivationFastForward, IdleSettings
+from src.xwe.core.status import StatusEffect, StatusType
+
+START = 1_000_000.0
+
+
+def _character(rng):
+    attrs = CharacterAttributes()
+    attrs.comprehension = rng.randint(1, 60)
+    attrs.realm_name, need = rng.choice([("凡人", 100), ("炼气期", 1000), ("筑基期", 10000), ("金丹期", 100000)])
+    player = Character(id="player", character_type=CharacterType.PLAYER, attributes=attrs)
+    player.spiritual_root = {"火": rng.randint(0, 100), "水": rng.randint(0, 40)}
+    if rng.random() < 0.5:
+        player.cultivation_technique = rng.choice(["basic_qi_refining", "fire_technique"])
+    attrs.cultivation_exp = rng.randint(0, need * 11 // 10)
+    attrs.current_health = rng.randint(0, int(attrs.max_health) + 20)
+    attrs.current_mana = rng.randint(0, int(attrs.max_mana)) + rng.choice([0, 0.5])
+    attrs.current_stamina = rng.randint(0, int(attrs.max_stamina))
+    for i in range(rng.randint(0, 4)):
+        player.status_effects.effects[f"effect{i}"] = StatusEffect(
+            id=f"effect{i}",
+            name=f"效果{i}",
+            description="",
+            status_type=StatusType.BUFF,
+            duration=rng.choice([-1, rng.uniform(0, 200) * 3600]),
+            stack_count=rng.randint(1, 3),
+            modifiers={"cultivation_speed": rng.choice([0.1, 0.25, 0.5])} if rng.random() < 0.8 else {},
+            start_time=START - rng.uniform(0, 50) * 3600,
+        )
+    return player
+
+
+def _snapshot(character):
+    attrs = character.attributes
+    return (
+        attrs.cultivation_exp,
+        attrs.realm_progress,
+        attrs.current_health,
+        attrs.current_mana,
+        attrs.current_stamina,
+        sorted(character.status_effects.effects),
+    )
+
+
+def test_fast_forward_matches_step_through():
+    rng = random.Random(2024)
+    for _ in range(400):
+        settings = IdleSettings(
+            step_hours=rng.choice([0.5, 1.0, 2.0, 3.0]),
+            location_bonus=rng.choice([1.0, 1.2]),
+            regen_rates={"health": rng.choice([0, 0.03]), "mana": 0.1, "stamina": rng.choice([0, 0.2])},
+            cultivate=rng.random() < 0.9,
+        )
+        engine = CultivationFastForward(settings=settings)
+        character = _character(rng)
+        hours = rng.uniform(0, 24 * 40)
+
+        fast, slow = copy.deepcopy(character), copy.deepcopy(character)
+        assert engine.fast_forward(fast, hours, START) == engine.step_through(slow, hours, START)
+        assert _snapshot(fast) == _snapshot(slow)
+
+
+def test_bottleneck_and_effect_expiry():
+    engine = CultivationFastForward()
+    attrs = CharacterAttributes()
+    attrs.comprehension = 10
+    attrs.realm_name = "炼气期"  # 瓶颈 1000 修为
+    player = Character(id="player", character_type=CharacterType.PLAYER, attributes=attrs)
+    player.spiritual_root = {}
+    attrs.current_mana = 0
+    player.status_effects.effects["spirit_array"] = StatusEffect(
+        id="spirit_array",
+        name="聚灵阵",
+        description="",
+        status_type=StatusType.BUFF,
+        duration=4 * 3600,
+        modifiers={"cultivation_speed": 0.5},
+        start_time=START,
+    )
+
+    # 前两步 300 修为/步，之后 200 修为/步：300+300+200+200 = 1000，第 8 小时到瓶颈
+    result = engine.fast_forward(player, 30 * 24 + 1, START)
+    assert result.steps == 360 and result.remaining_hours == 1
+    assert result.exp_gained == 1000 and result.can_breakthrough
+    assert result.breakthrough_ready_at == 8
+    assert result.expired_effects == ["spirit_array"]
+    assert attrs.realm_progress == 100 and attrs.current_mana == attrs.max_mana
+    assert not player.status_effects.effects
+
+    # 已到瓶颈后不再积累修为
+    assert engine.fast_forward(player, 48, START).exp_gained == 0
@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.xwe.core.progression_simulator import ProgressionSettings, ProgressionSimulator
+
+QUICK = ProgressionSettings(target_realm="金丹期", horizon_days=365)
+
+
+def test_same_seed_reproduces_results_across_workers():
+    simulator = ProgressionSimulator(QUICK)
+    first = simulator.simulate(3000, seed=7, chunk_size=1000)
+    parallel = simulator.simulate(3000, seed=7, chunk_size=1000, workers=2)
+    other = simulator.simulate(3000, seed=8, chunk_size=1000)
+
+    assert first.population == 3000
+    assert np.array_equal(first.reach_steps, parallel.reach_steps)
+    assert np.array_equal(first.stones_spent, parallel.stones_spent)
+    assert not np.array_equal(first.reach_steps, other.reach_steps)
+
+
+def test_batch_matches_scalar_cultivation_system():
+    simulator = ProgressionSimulator(QUICK)
+    batch = simulator.simulate(30000, seed=1).summary()
+    scalar = simulator.simulate_scalar(400, seed=1).summary()
+
+    for realm in ("筑基期", "金丹期"):
+        b, s = batch["realms"][realm], scalar["realms"][realm]
+        assert b["reached_rate"] == pytest.approx(s["reached_rate"], abs=0.07)
+        assert b["days"]["p50"] == pytest.approx(s["days"]["p50"], rel=0.15)
+        assert b["breakthrough_success_rate"] == pytest.approx(s["breakthrough_success_rate"], abs=0.07)
+    assert batch["tribulation"]["death_rate"] == pytest.approx(scalar["tribulation"]["death_rate"], abs=0.07)
+    assert batch["economy"]["earned"]["mean"] == pytest.approx(scalar["economy"]["earned"]["mean"], rel=0.1)
+    assert batch["economy"]["drain_rate"] == pytest.approx(scalar["economy"]["drain_rate"], rel=0.1)
+
+
+def test_tribulation_policies_and_economy():
+    # 金丹期突破必有天劫：death 策略下失败即陨落，fall 策略下跌回后可以再次尝试
+    death = ProgressionSimulator(QUICK).simulate(5000, seed=3)
+    fall = ProgressionSimulator(
+        ProgressionSettings(target_realm="金丹期", horizon_days=365, tribulation_failure="fall")
+    ).simulate(5000, seed=3)
+
+    assert np.array_equal(death.died, death.tribulation_failures[:, 1] > 0)
+    assert not fall.died.any()
+    assert fall.reached().mean() > death.reached().mean()
+    assert (fall.tribulation_failures.sum(axis=1) > 1).any()
+
+    # 每次成功突破都扣除对应灵石
+    costs = np.array([100, 1000])
+    assert np.array_equal(death.stones_spent, death.successes @ costs)
+    assert (death.stones_spent <= death.stones_earned + 200).all()
+
+    summary = death.summary()
+    assert summary["tribulation"]["death_rate"] == pytest.approx(death.died.mean())
+    assert set(summary["by_spiritual_root"]) == {"普通灵根", "天灵根"}
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        ProgressionSimulator(ProgressionSettings(target_realm="炼气期"))
+    with pytest.raises(ValueError):
+        ProgressionSimulator(ProgressionSettings(tribulation_failure="ignore"))
@@ -0,0 +1,83 @@
+import pytest
+
+from src.xwe.core.attributes import AttributeSystem
+from src.xwe.engine.expression import (
+    EvaluationError,
+    ExpressionCompiler,
+    ExpressionParser,
+    ParseError,
+    ValidationError,
+)
+from src.xwe.engine.expression.exceptions import FunctionNotFoundError, VariableNotFoundError
+
+
+def test_evaluate_with_context_and_functions():
+    parser = ExpressionParser(ExpressionCompiler())
+    assert parser.evaluate("2 + 3 * 4") == 14
+    assert parser.evaluate("max(a, b) * 2", {"a": 3, "b": 5}) == 10
+    assert parser.evaluate("a if a > 0 else -a", {"a": -4}) == 4
+    assert parser.evaluate("floor(x / 2) + pi * 0", {"x": 7}) == 3
+
+
+@pytest.mark.parametrize(
+    "expression, error",
+    [
+        ("__import__('os')", FunctionNotFoundError),
+        ("a.__class__", ValidationError),
+        ("[1, 2]", ValidationError),
+        ("'text'", ValidationError),
+        ("(lambda: 1)()", ValidationError),
+        ("_secret + 1", ValidationError),
+        ("1 +", ParseError),
+    ],
+)
+def test_rejects_unsafe_or_invalid_expressions(expression, error):
+    with pytest.raises(error):
+        ExpressionCompiler().compile(expression)
+
+
+def test_evaluation_errors():
+    compiler = ExpressionCompiler()
+    with pytest.raises(VariableNotFoundError):
+        compiler.evaluate("a + b", {"a": 1})
+    with pytest.raises(EvaluationError):
+        compiler.evaluate("a / b", {"a": 1, "b": 0})
+
+
+def test_lru_cache_reuses_and_evicts():
+    compiler = ExpressionCompiler(cache_size=2)
+    first = compiler.compile("a + 1")
+    assert compiler.compile("a + 1") is first
+    compiler.compile("a + 2")
+    compiler.compile("a + 3")
+    assert compiler.compile("a + 1") is not first
+
+    info = compiler.cache_info()
+    assert info["hits"] == 1
+    assert info["evictions"] == 2
+    assert info["size"] == 2
+
+
+def test_evaluate_many_matches_single_evaluation():
+    compiler = ExpressionCompiler()
+    contexts = [{"strength": s, "agility": s + 1, "level": s * 2} for s in range(20)]
+    formula = "strength * 2 + agility * 0.5 + level * 3"
+    assert compiler.evaluate_many(formula, contexts) == [compiler.evaluate(formula, c) for c in contexts]
+    assert compiler.evaluate_many("strength", contexts[:3]) == [0, 1, 2]
+    assert compiler.evaluate_many("1 + 1", contexts[:2]) == [2, 2]
+
+    with pytest.raises(VariableNotFoundError):
+        compiler.evaluate_many(formula, contexts + [{"strength": 1}])
+
+
+def test_attribute_system_uses_compiled_formulas():
+    system = AttributeSystem()
+    formula = system.attribute_formulas["max_health"]
+    context = {"constitution": 10, "strength": 5, "level": 2}
+    assert system.calculate_attribute(formula, context) == 165
+    # 缺少变量时保持原有的返回0行为
+    assert system.calculate_attribute(formula, {"constitution": 1}) == 0
+    assert system.calculate_attribute_many(formula, [context, {}]) == [165, 0]
+
+    with_parser = AttributeSystem(ExpressionParser())
+    assert with_parser.calculate_attribute_many(formula, [context]) == [165]
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.xwe.events import (
+    AsyncioDispatcher,
+    DomainEvent,
+    EventBus,
+    FunctionEventHandler,
+    OverflowPolicy,
+    ThreadPoolDispatcher,
+)
+
+
+def _events(event_type: str, count: int):
+    return [DomainEvent(type=event_type, data={"i": i}) for i in range(count)]
+
+
+@pytest.mark.parametrize("cls", [ThreadPoolDispatcher, AsyncioDispatcher])
+def test_per_type_ordering(cls):
+    seen = {"a": [], "b": []}
+    handler = FunctionEventHandler(lambda e: seen[e.type].append(e.data["i"]))
+    dispatcher = cls(workers=3, queue_size=1000)
+    try:
+        for a, b in zip(_events("a", 200), _events("b", 200)):
+            dispatcher.submit(a, [handler])
+            dispatcher.submit(b, [handler])
+        dispatcher.shutdown(wait=True)
+        assert seen["a"] == list(range(200))
+        assert seen["b"] == list(range(200))
+        assert dispatcher.stats.processed == 400
+    finally:
+        dispatcher.shutdown()
+
+
+@pytest.mark.parametrize("cls", [ThreadPoolDispatcher, AsyncioDispatcher])
+@pytest.mark.parametrize(
+    "policy,expected",
+    [(OverflowPolicy.DROP_NEWEST, [0, 1]), (OverflowPolicy.DROP_OLDEST, [0, 4])],
+)
+def test_drop_policies(cls, policy, expected):
+    gate = threading.Event()
+    started = threading.Event()
+    seen = []
+
+    def slow(event):
+        started.set()
+        gate.wait(5)
+        seen.append(event.data["i"])
+
+    dispatcher = cls(workers=1, queue_size=1, policy=policy)
+    handler = FunctionEventHandler(slow)
+    try:
+        events = _events("x", 5)
+        dispatcher.submit(events[0], [handler])
+        assert started.wait(5)
+        for event in events[1:]:
+            dispatcher.submit(event, [handler])
+        assert dispatcher.stats.dropped == 3
+        gate.set()
+        dispatcher.shutdown(wait=True)
+        assert seen == expected
+    finally:
+        gate.set()
+        dispatcher.shutdown()
+
+
+def test_block_policy_applies_back_pressure():
+    gate = threading.Event()
+    dispatcher = ThreadPoolDispatcher(workers=1, queue_size=1, block_timeout=0.05)
+    handler = FunctionEventHandler(lambda e: gate.wait(5))
+    try:
+        dispatcher.submit(DomainEvent(type="x", data={}), [handler])
+        time.sleep(0.05)
+        assert dispatcher.submit(DomainEvent(type="x", data={}), [handler])
+        start = time.perf_counter()
+        assert not dispatcher.submit(DomainEvent(type="x", data={}), [handler])
+        assert time.perf_counter() - start >= 0.04
+    finally:
+        gate.set()
+        dispatcher.shutdown()
+
+
+def test_asyncio_dispatcher_awaits_coroutine_handlers():
+    seen = []
+
+    class AsyncHandler(FunctionEventHandler):
+        def handle(self, event):
+            async def _run():
+                await asyncio.sleep(0)
+                seen.append(event.data["i"])
+
+            return _run()
+
+    dispatcher = AsyncioDispatcher(workers=2)
+    handler = AsyncHandler(lambda e: None)
+    for event in _events("co", 10):
+        dispatcher.submit(event, [handler])
+    dispatcher.shutdown(wait=True)
+    assert seen == list(range(10))
+
+
+def test_event_bus_uses_pooled_dispatcher():
+    bus = EventBus(dispatcher=ThreadPoolDispatcher(workers=2))
+    received = []
+    bus.subscribe_async("ping", FunctionEventHandler(lambda e: received.append(e.data["i"])))
+
+    threads_before = threading.active_count()
+    for event in _events("ping", 100):
+        bus.publish(event)
+    assert threading.active_count() <= threads_before
+    bus.shutdown(wait=True)
+    assert received == list(range(100))
+
+
+@pytest.mark.parametrize("cls", [ThreadPoolDispatcher, AsyncioDispatcher])
+def test_handler_publishing_into_own_full_shard_does_not_deadlock(cls):
+    dispatcher = cls(workers=1, queue_size=1, block_timeout=None)
+    results = []
+    done = threading.Event()
+
+    def fan_out(event):
+        if event.data.get("root"):
+            for i in range(3):
+                results.append(dispatcher.submit(DomainEvent(type="x", data={"i": i}), [handler]))
+            done.set()
+
+    handler = FunctionEventHandler(fan_out)
+    try:
+        assert dispatcher.submit(DomainEvent(type="x", data={"root": True}), [handler])
+        assert done.wait(5)
+        assert results == [True, False, False]
+        assert dispatcher.stats.dropped == 2
+    finally:
+        dispatcher.shutdown()
+
+
+def test_asyncio_dispatcher_runs_sync_handlers_off_loop():
+    threads = []
+    dispatcher = AsyncioDispatcher(workers=1)
+    handler = FunctionEventHandler(lambda e: threads.append(threading.current_thread()))
+    dispatcher.submit(DomainEvent(type="x", data={}), [handler])
+    dispatcher.shutdown(wait=True)
+    assert threads and threads[0] is not dispatcher._thread
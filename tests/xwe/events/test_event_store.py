@@ -0,0 +1,122 @@
+from src.xwe.events import CombatEvent, DomainEvent, EventBus, EventStore, GameEvent
+
+
+def _fill(store: EventStore, count: int) -> None:
+    for i in range(count):
+        event_type = "combat" if i % 2 else "world"
+        store.append(DomainEvent(type=event_type, data={"i": i}, timestamp=float(i)))
+
+
+def test_ring_buffer_keeps_latest_events():
+    store = EventStore(max_size=10)
+    _fill(store, 25)
+
+    assert len(store) == 10
+    events = store.get_events(limit=0)
+    assert [e.data["i"] for e in events] == list(range(15, 25))
+
+
+def test_type_and_time_range_queries():
+    store = EventStore(max_size=100)
+    _fill(store, 50)
+
+    combat = store.get_events(event_type="combat", start_time=10, end_time=20, limit=0)
+    assert [e.data["i"] for e in combat] == [11, 13, 15, 17, 19]
+
+    latest = store.get_events(event_type="world", limit=3)
+    assert [e.data["i"] for e in latest] == [44, 46, 48]
+    assert store.get_events(event_type="missing") == []
+
+
+def test_event_types_follow_eviction():
+    store = EventStore(max_size=3)
+    store.append(DomainEvent(type="rare", data={}, timestamp=0.0))
+    _fill(store, 3)
+    assert store.get_event_types() == ["combat", "world"]
+
+
+def test_out_of_order_timestamps():
+    store = EventStore(max_size=10)
+    for ts in [1.0, 5.0, 2.0, 6.0, 3.0]:
+        store.append(DomainEvent(type="t", data={"ts": ts}, timestamp=ts))
+
+    events = store.get_events(start_time=1.5, end_time=3.5, limit=0)
+    assert sorted(e.timestamp for e in events) == [2.0, 3.0]
+
+
+def test_spill_to_disk(tmp_path):
+    store = EventStore(max_size=10, spill_path=str(tmp_path), spill_segment_size=4)
+    for i in range(30):
+        cls = CombatEvent if i % 2 else GameEvent
+        store.append(cls(type="combat" if i % 2 else "world", data={"i": i}, timestamp=float(i)))
+    store.flush_spill()
+
+    spilled = store.get_spilled_events(event_type="combat", limit=0)
+    assert [e.data["i"] for e in spilled] == list(range(1, 20, 2))
+    assert all(isinstance(e, CombatEvent) for e in spilled)
+
+    merged = store.get_events(event_type="world", limit=8, include_spilled=True)
+    assert [e.data["i"] for e in merged] == list(range(14, 30, 2))
+
+    # 重新打开后仍可查询
+    reopened = EventStore(max_size=10, spill_path=str(tmp_path))
+    assert [e.data["i"] for e in reopened.get_spilled_events(start_time=5, end_time=8, limit=0)] == [5, 6, 7, 8]
+
+
+def test_spill_continues_sequence_after_restart(tmp_path):
+    store = EventStore(max_size=10, spill_path=str(tmp_path), spill_segment_size=2)
+    _fill(store, 12)
+    store.flush_spill()
+    assert [e.data["i"] for e in store.get_spilled_events(limit=0)] == [0, 1]
+
+    restarted = EventStore(max_size=10, spill_path=str(tmp_path), spill_segment_size=2)
+    for i in range(10, 22):
+        restarted.append(DomainEvent(type="world", data={"i": i}, timestamp=float(i)))
+    restarted.flush_spill()
+
+    # 续编序号，新段不会覆盖重启前的段
+    assert [e.data["i"] for e in restarted.get_spilled_events(limit=0)] == [0, 1, 10, 11]
+    assert len(list(tmp_path.glob("segment_*.jsonl"))) == 2
+
+
+def test_spill_never_overwrites_existing_segment(tmp_path):
+    from src.xwe.events.spill_log import EventSpillLog
+
+    log = EventSpillLog(tmp_path, segment_size=1)
+    record = {"type": "world", "timestamp": 1.0, "data": {}}
+    log.append(0, dict(record, data={"i": "old"}))
+    log.append(0, dict(record, data={"i": "new"}))
+    assert len(list(tmp_path.glob("segment_*.jsonl"))) == 2
+    assert [r["data"]["i"] for r in log.query(limit=0)] == ["old", "new"]
+
+
+def test_concurrent_spills_stay_in_order(tmp_path):
+    import threading
+
+    store = EventStore(max_size=5, spill_path=str(tmp_path), spill_segment_size=3)
+    barrier = threading.Barrier(4)
+
+    def worker(offset):
+        barrier.wait()
+        for i in range(50):
+            store.append(DomainEvent(type="world", data={"i": offset + i}, timestamp=float(i)))
+
+    threads = [threading.Thread(target=worker, args=(n * 100,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush_spill()
+
+    seqs = [r["seq"] for r in store._spill.query(limit=0)]
+    assert seqs == list(range(195))
+    firsts = [segment.first_seq for segment in store._spill.segments]
+    assert firsts == sorted(firsts)
+
+
+def test_event_bus_stores_published_events():
+    bus = EventBus()
+    store = EventStore(max_size=5)
+    bus.set_event_store(store)
+    bus.publish(DomainEvent(type="ping", data={}))
+    assert store.get_event_types() == ["ping"]
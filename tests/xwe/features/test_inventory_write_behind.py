@@ -0,0 +1,100 @@
+import copy
+import json
+import threading
+import time
+
+from src.xwe.features.inventory_system import InventorySystem
+
+
+def test_write_behind_coalesces_writes(tmp_path):
+    system = InventorySystem(save_path=tmp_path, write_behind=True, flush_interval=60)
+    try:
+        for _ in range(5):
+            system.add_item("p1", {"name": "灵草", "qty": 1})
+
+        file_path = tmp_path / "p1_inventory.json"
+        assert not file_path.exists()
+        assert system.get_persistence_stats()["pending"] == 1
+
+        assert system.flush() == 1
+        data = json.loads(file_path.read_text(encoding="utf-8"))
+        assert data["items"]["灵草"] == 5
+
+        stats = system.get_persistence_stats()
+        assert stats["writes"] == 1
+        assert stats["coalesced"] == 4
+        assert stats["pending"] == 0
+    finally:
+        system.shutdown()
+
+
+def test_add_items_commits_once(tmp_path):
+    system = InventorySystem(save_path=tmp_path, write_behind=True, flush_interval=60)
+    try:
+        system.add_items("p1", [{"name": "灵草", "qty": 2}, {"name": "铁矿", "qty": 1}])
+        assert system.get_persistence_stats()["marked"] == 1
+    finally:
+        system.shutdown()
+
+
+def test_shutdown_flushes_pending(tmp_path):
+    system = InventorySystem(save_path=tmp_path, write_behind=True, flush_interval=60)
+    system.add_item("p2", {"name": "灵石", "qty": 3})
+    system.shutdown()
+
+    reloaded = InventorySystem(save_path=tmp_path)
+    assert reloaded.get_inventory("p2").get_quantity("灵石") == 3
+
+
+def test_size_threshold_triggers_background_flush(tmp_path):
+    system = InventorySystem(
+        save_path=tmp_path, write_behind=True, flush_interval=60, max_pending=2
+    )
+    try:
+        system.add_item("a", {"name": "灵草", "qty": 1})
+        system.add_item("b", {"name": "灵草", "qty": 1})
+        for _ in range(100):
+            if system.get_persistence_stats()["writes"] == 2:
+                break
+            time.sleep(0.02)
+        assert (tmp_path / "a_inventory.json").exists()
+        assert (tmp_path / "b_inventory.json").exists()
+    finally:
+        system.shutdown()
+
+
+def test_synchronous_mode_saves_immediately(tmp_path):
+    system = InventorySystem(save_path=tmp_path)
+    system.add_item("p3", {"name": "灵草", "qty": 1})
+    assert (tmp_path / "p3_inventory.json").exists()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_flush_snapshots_inventory_while_it_changes(tmp_path):
+    system = InventorySystem(save_path=tmp_path, write_behind=True, flush_interval=60)
+    inventory = system.get_inventory("p4")
+    stop = threading.Event()
+
+    def mutate():
+        i = 0
+        while not stop.is_set():
+            inventory.add(f"物品{i % 40}")
+            inventory.remove(f"物品{(i + 20) % 40}")
+            i += 1
+
+    writer = threading.Thread(target=mutate)
+    writer.start()
+    try:
+        for _ in range(50):
+            system._writer.mark_dirty("p4")
+            assert system.flush() == 1
+    finally:
+        stop.set()
+        writer.join()
+        system.shutdown()
+
+    # 保持原有的缩进格式
+    text = (tmp_path / "p4_inventory.json").read_text(encoding="utf-8")
+    assert text.startswith('{\n  "capacity"')
+    assert json.loads(text)["capacity"] == inventory.capacity
+    assert copy.deepcopy(inventory).to_dict() == inventory.to_dict()
@@ -0,0 +1,121 @@
+import gzip
+import json
+import pickle
+
+import pytest
+
+from src.xwe.core.character import Character
+from src.xwe.core.game_core import GameState
+from src.xwe.systems.persistence import save_engine as save_engine_module
+from src.xwe.features.technical_ops import TechnicalOps
+from src.xwe.systems.persistence.save_engine import (
+    HEADER_SIZE,
+    SaveEngine,
+    SaveFormatError,
+    read_header,
+)
+
+
+def _state(n_npcs: int = 20) -> dict:
+    return {
+        "player": {"name": "无名侠客", "attributes": {"level": 3}},
+        "current_location": "青云城",
+        "npcs": {f"npc_{i}": {"name": f"弟子{i}", "hp": i} for i in range(n_npcs)},
+    }
+
+
+def test_save_engine_roundtrip_and_header(tmp_path):
+    engine = SaveEngine(tmp_path)
+    header = engine.save("slot1", _state(), game_version="1.2.3", label="无名侠客")
+
+    path = engine.path_for("slot1")
+    assert path.stat().st_size == HEADER_SIZE + header.payload_size
+    assert engine.load("slot1") == _state()
+
+    on_disk = read_header(path)
+    assert on_disk.game_version == "1.2.3"
+    assert on_disk.label == "无名侠客"
+    assert on_disk.raw_size > on_disk.payload_size
+
+
+def test_save_engine_detects_corruption(tmp_path):
+    engine = SaveEngine(tmp_path)
+    engine.save("slot1", _state())
+    path = engine.path_for("slot1")
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(SaveFormatError):
+        engine.load("slot1")
+
+
+def test_label_truncation_keeps_valid_utf8(tmp_path):
+    engine = SaveEngine(tmp_path)
+    engine.save("slot1", {}, label="修" * 40)
+    assert read_header(engine.path_for("slot1")).label == "修" * 25
+
+
+def test_save_engine_decodes_in_small_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(save_engine_module, "_DECODE_BATCH", 64)
+    engine = SaveEngine(tmp_path)
+    state = {**_state(200), "flags": {}, "nested": {"a": {"b": [1, 2]}, "c": "x{"}}
+    engine.save("slot1", state)
+    assert engine.load("slot1") == state
+
+
+def test_save_engine_reads_single_line_payload(tmp_path):
+    engine = SaveEngine(tmp_path)
+    header = engine.save("slot1", _state())
+    path = engine.path_for("slot1")
+    raw = json.dumps(_state(), ensure_ascii=False).encode("utf-8")
+    payload = save_engine_module.zlib.compress(raw)
+    header.crc32 = save_engine_module.zlib.crc32(payload)
+    header.payload_size, header.raw_size = len(payload), len(raw)
+    path.write_bytes(header.pack() + payload)
+    assert engine.load("slot1") == _state()
+
+
+def test_technical_ops_encodes_characters_lazily(tmp_path):
+    ops = TechnicalOps(save_dir=str(tmp_path))
+    player = Character(name="无名侠客", level=3)
+    state = GameState(player=player, npcs={f"npc_{i}": Character(name=f"弟子{i}") for i in range(5)})
+    assert ops.save_game(state, "slot1")
+
+    assert ops.list_saves()[0]["label"] == "无名侠客"
+    assert ops.load_game("slot1") == json.loads(json.dumps(state.to_dict(), default=str))
+
+
+def test_technical_ops_writes_single_file(tmp_path):
+    ops = TechnicalOps(save_dir=str(tmp_path))
+    state = GameState(game_time=12.5, flags={"tutorial": True})
+    assert ops.save_game(state, "autosave")
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["autosave.xws"]
+    assert ops.load_game("autosave") == state.to_dict()
+
+    saves = ops.list_saves()
+    assert saves[0]["filename"] == "autosave"
+    assert saves[0]["version"] == "1.0.0"
+
+    assert ops.delete_save("autosave")
+    assert ops.list_saves() == []
+
+
+def test_migrate_legacy_saves(tmp_path):
+    legacy = {"version": "0.9.0", "timestamp": "2025-01-01T00:00:00", "game_state": _state()}
+    (tmp_path / "old_json.json").write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+    with gzip.open(tmp_path / "old_gz.gz", "wb") as f:
+        pickle.dump(legacy, f)
+
+    ops = TechnicalOps(save_dir=str(tmp_path))
+    assert {s["version"] for s in ops.list_saves()} == {"legacy"}
+    assert ops.load_game("old_json") == _state()
+
+    result = ops.migrate_legacy_saves(remove_legacy=True)
+    assert result == {"migrated": 2, "skipped": 0, "failed": 0}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["old_gz.xws", "old_json.xws"]
+
+    saves = ops.list_saves()
+    assert {s["version"] for s in saves} == {"0.9.0"}
+    assert saves[0]["timestamp"].startswith("2025-01-01")
+    assert ops.load_game("old_gz") == _state()
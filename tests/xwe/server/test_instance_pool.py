@@ -0,0 +1,202 @@
+"""
+游戏实例池测试
+"""
+
+import os
+import threading
+import time
+
+os.environ['ENABLE_PROMETHEUS'] = 'false'
+
+from src.xwe.core.cultivation_system import CultivationSystem
+from src.xwe.core.game_core import create_enhanced_game
+import pytest
+
+from src.xwe.server.instance_pool import GameInstancePool, InstanceRetiredError
+
+
+class _Game:
+    def __init__(self, serial):
+        self.serial = serial
+        self.state = {}
+
+
+def _counting_factory():
+    built = []
+
+    def factory():
+        game = _Game(len(built))
+        built.append(game)
+        return game
+
+    return factory, built
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_prewarm_hits_and_misses():
+    factory, built = _counting_factory()
+    pool = GameInstancePool(factory, target_size=2)
+    assert pool.prewarm() == 2 and pool.size == 2
+
+    pool.target_size = 0  # 不启动后台线程，观察取空后的未命中
+    first, second, third = pool.acquire(), pool.acquire(), pool.acquire()
+    assert [first.serial, second.serial, third.serial] == [0, 1, 2]
+
+    stats = pool.get_stats()
+    assert (stats["hits"], stats["misses"], stats["built"]) == (2, 1, 3)
+    assert stats["hit_rate"] == 2 / 3
+    assert stats["avg_build_seconds"] >= 0
+
+
+def test_background_refill_and_recycle():
+    factory, built = _counting_factory()
+
+    def reset(game):
+        game.state.clear()
+
+    pool = GameInstancePool(factory, target_size=3, reset=reset, max_size=4)
+    try:
+        game = pool.acquire()  # 首次取用启动后台线程
+        _wait_for(lambda: pool.size == 3)
+        assert len(built) == 4
+
+        game.state["player"] = "旧会话"
+        assert pool.release(game)
+        _wait_for(lambda: pool.size == 4)
+        assert pool.get_stats()["recycled"] == 1
+        assert not game.state
+
+        # 空闲实例已满，再归还的直接丢弃
+        assert not pool.release(_Game(-1))
+        assert pool.get_stats()["discarded"] == 1
+    finally:
+        pool.stop(timeout=5)
+    assert len(built) == 4
+
+
+def test_concurrent_acquire_hands_out_distinct_instances():
+    factory, built = _counting_factory()
+    pool = GameInstancePool(factory, target_size=4)
+    pool.prewarm()
+    barrier = threading.Barrier(8)
+    got = []
+
+    def worker():
+        barrier.wait()
+        got.append(pool.acquire())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.stop(timeout=5)
+
+    assert len({id(game) for game in got}) == 8
+    stats = pool.get_stats()
+    assert stats["hits"] + stats["misses"] == 8
+
+
+def test_failed_reset_discards_instance():
+    def reset(game):
+        raise RuntimeError("boom")
+
+    pool = GameInstancePool(lambda: _Game(0), target_size=0, reset=reset)
+    assert not pool.release(_Game(1))
+    assert pool.size == 0 and pool.get_stats()["discarded"] == 1
+
+
+def test_release_waits_for_borrowers_before_reset():
+    resets = []
+    pool = GameInstancePool(lambda: _Game(0), target_size=0, reset=resets.append, max_size=2)
+    game = pool.acquire()
+    generation = pool.generation(game)
+    assert pool.borrow(game, generation)
+
+    # 交回后立即换代，旧代借用失败，但已有借用归还前不会重置或再次发出
+    assert pool.release(game)
+    assert pool.generation(game) == generation + 1
+    assert not pool.borrow(game, generation)
+    with pytest.raises(InstanceRetiredError):
+        with pool.lease(game):
+            pass
+    assert resets == [] and pool.size == 0
+    assert pool.get_stats()["retiring"] == 1
+
+    pool.give_back(game)
+    assert resets == [game] and pool.size == 1
+    assert pool.acquire() is game
+    with pool.lease(game, pool.generation(game)):
+        assert pool.get_stats()["borrowed"] == 1
+    assert pool.get_stats()["borrowed"] == 0
+
+
+def test_game_core_reset_keeps_shared_systems():
+    game = create_enhanced_game()
+    loader, rules = game.data_loader, game.heaven_law_engine
+    game.game_state.current_location = "天南山"
+    game.output("旧会话输出")
+    game.stats["gold"] = 99
+
+    game.reset_session("dev")
+    assert game.data_loader is loader and game.heaven_law_engine is rules
+    assert game.combat_system.heaven_law_engine is rules
+    assert game.game_mode == "dev" and game.game_state.game_mode == "dev"
+    assert game.game_state.current_location != "天南山"
+    assert game.get_output() == [] and game.stats["gold"] == 0
+
+
+def test_cultivation_tables_are_shared_but_per_instance_dicts():
+    first, second = CultivationSystem(), CultivationSystem()
+    assert first.techniques is not second.techniques
+    assert first.techniques["basic_qi_refining"] is second.techniques["basic_qi_refining"]
+
+    first.techniques.pop("fire_technique")
+    assert "fire_technique" in second.techniques
+    assert "fire_technique" in CultivationSystem().techniques
+
+
+def test_app_recycles_hibernated_instances():
+    import src.app as app_module
+
+    pool = app_module.game_pool
+    app_module.game_instances.pop("pool_session", None)
+    instance = app_module.get_game_instance("pool_session")
+    game = instance["game"]
+    game.game_state.player.name = "旧会话"
+
+    pool.stop(timeout=5)  # 无后台线程时 release 就地重置，便于断言
+    assert app_module.game_instances.hibernate("pool_session")
+    assert game.game_state.player is None
+
+    reused = None
+    for _ in range(pool.size):
+        candidate = pool.acquire()
+        if candidate is game:
+            reused = candidate
+    assert reused is game
+    del app_module.game_instances["pool_session"]
+
+
+def test_app_request_lease_defers_reset_until_teardown():
+    import src.app as app_module
+
+    flask_app = app_module.app or app_module.create_app()
+    pool = app_module.game_pool
+    app_module.game_instances.pop("lease_session", None)
+    with flask_app.test_request_context("/"):
+        game = app_module.get_game_instance("lease_session")["game"]
+        game.game_state.player.name = "请求中"
+        assert app_module.game_instances.hibernate("lease_session")
+        # 请求仍在使用实例，休眠只换代不重置
+        assert game.game_state.player.name == "请求中"
+        assert game not in pool._idle
+    _wait_for(lambda: game in pool._idle)
+    assert game.game_state.player is None
+    del app_module.game_instances["lease_session"]
@@ -0,0 +1,249 @@
+"""
+会话注册表测试
+"""
+
+import os
+import threading
+import time
+
+os.environ['ENABLE_PROMETHEUS'] = 'false'
+
+from src.xwe.server.session_registry import SessionRegistry
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _registry(tmp_path, clock=None, **kwargs):
+    released = []
+
+    def hibernate(session_id, instance, reason):
+        released.append((session_id, reason))
+        return {"hp": instance["hp"], "last_update": instance["last_update"]}
+
+    def restore(session_id, snapshot):
+        return {"hp": snapshot["hp"], "last_update": snapshot["last_update"], "restored": True}
+
+    registry = SessionRegistry(
+        tmp_path, hibernate=hibernate, restore=restore, clock=clock or _Clock(), **kwargs
+    )
+    return registry, released
+
+
+def test_lru_and_memory_limits_hibernate_oldest(tmp_path):
+    clock = _Clock()
+    registry, released = _registry(tmp_path, clock, shards=1, max_live=3)
+    for i in range(3):
+        registry[f"s{i}"] = {"hp": i, "last_update": 0}
+        clock.now += 1
+    registry["s0"]  # 访问后 s1 成为最久未访问的会话
+    registry["s3"] = {"hp": 3, "last_update": 0}
+
+    assert released == [("s1", "lru")]
+    assert len(registry) == 3 and "s1" in registry and registry.is_hibernated("s1")
+    assert sorted(registry) == ["s0", "s2", "s3"]
+    assert len(list(tmp_path.glob("*.xws"))) == 1
+
+    # 取值时透明恢复，并把当前最久未访问的会话挤出去
+    assert registry["s1"] == {"hp": 1, "last_update": 0, "restored": True}
+    assert not registry.is_hibernated("s1") and registry.is_hibernated("s2")
+    assert released[-1] == ("s2", "lru")
+    assert len(list(tmp_path.glob("*.xws"))) == 1
+
+    sized, released = _registry(tmp_path / "mem", shards=1, memory_limit=250, size_of=lambda inst: 100)
+    for i in range(4):
+        sized[f"m{i}"] = {"hp": i, "last_update": 0}
+    assert [reason for _, reason in released] == ["memory", "memory"]
+    assert sized.memory_estimate == 200
+    stats = sized.get_stats()
+    assert stats["live"] == 2 and stats["hibernated"] == 2 and stats["evictions"]["memory"] == 2
+
+
+def test_sweep_hibernates_idle_sessions_and_expires_snapshots(tmp_path):
+    clock = _Clock()
+    registry, released = _registry(tmp_path, clock, shards=4, idle_timeout=60, snapshot_ttl=600)
+    registry["idle"] = {"hp": 1, "last_update": 0}
+    registry["busy"] = {"hp": 2, "last_update": 0}
+    clock.now += 50
+    registry["busy"]
+    clock.now += 20
+
+    assert registry.sweep() == {"hibernated": 1, "expired": 0}
+    assert released == [("idle", "idle")]
+    assert list(registry) == ["busy"] and "idle" in registry
+
+    clock.now += 601
+    assert registry.sweep() == {"hibernated": 1, "expired": 1}
+    assert "idle" not in registry and registry.get("idle") is None
+    assert registry.get("busy")["restored"]
+
+
+def test_snapshots_survive_restart_and_write_failures_stay_in_memory(tmp_path):
+    registry, _ = _registry(tmp_path)
+    registry["keep"] = {"hp": 7, "last_update": 0}
+    assert registry.hibernate("keep")
+
+    restarted, _ = _registry(tmp_path)
+    assert len(restarted) == 0 and "keep" in restarted
+    assert restarted["keep"]["hp"] == 7
+
+    def broken_save(*args, **kwargs):
+        raise OSError("disk full")
+
+    registry, _ = _registry(tmp_path / "broken")
+    registry.engine.save = broken_save
+    registry["s"] = {"hp": 3, "last_update": 0}
+    registry.hibernate("s")
+    assert registry.is_hibernated("s") and registry.get_stats()["hibernate_errors"] == 1
+    assert registry["s"]["hp"] == 3
+
+
+def test_snapshot_io_runs_outside_shard_lock(tmp_path):
+    registry, _ = _registry(tmp_path, shards=1)
+    registry["slow"] = {"hp": 1, "last_update": 0}
+    registry["other"] = {"hp": 2, "last_update": 0}
+    writing, proceed = threading.Event(), threading.Event()
+    save = registry.engine.save
+
+    def slow_save(*args, **kwargs):
+        writing.set()
+        proceed.wait(5)
+        return save(*args, **kwargs)
+
+    registry.engine.save = slow_save
+    worker = threading.Thread(target=registry.hibernate, args=("slow",))
+    worker.start()
+    assert writing.wait(5)
+    # 写盘期间同分片的其他会话照常访问，同一会话的请求等待迁移完成
+    assert registry["other"]["hp"] == 2
+    waiter = threading.Thread(target=lambda: registry["slow"])
+    waiter.start()
+    waiter.join(0.05)
+    assert waiter.is_alive()
+    proceed.set()
+    worker.join(5)
+    waiter.join(5)
+    assert registry["slow"] == {"hp": 1, "last_update": 0, "restored": True}
+
+
+def test_sessions_in_use_are_not_evicted(tmp_path):
+    clock = _Clock()
+    busy = set()
+    registry, released = _registry(
+        tmp_path, clock, shards=1, max_live=2, idle_timeout=60,
+        in_use=lambda instance: instance["hp"] in busy,
+    )
+    for i in range(2):
+        registry[f"s{i}"] = {"hp": i, "last_update": 0}
+        clock.now += 1
+    busy.add(0)
+    registry["s2"] = {"hp": 2, "last_update": 0}
+    assert released == [("s1", "lru")]
+
+    clock.now += 120
+    assert registry.sweep()["hibernated"] == 1
+    assert released[-1] == ("s2", "idle") and list(registry) == ["s0"]
+
+
+def test_get_or_create_builds_once_under_contention(tmp_path):
+    registry, _ = _registry(tmp_path, shards=8)
+    built = []
+    barrier = threading.Barrier(16)
+    results = []
+
+    def factory():
+        time.sleep(0.01)
+        built.append(1)
+        return {"hp": 1, "last_update": 0}
+
+    def worker(i):
+        barrier.wait()
+        results.append(registry.get_or_create(f"user{i % 2}", factory))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 2
+    assert sum(created for _, created in results) == 2
+    assert len({id(instance) for instance, _ in results}) == 2
+
+
+def test_app_session_hibernates_and_rehydrates(monkeypatch):
+    import src.app as app_module
+
+    monkeypatch.setattr(app_module.config, "offline_progress_enabled", True)
+    sessions = app_module.game_instances
+    sessions.pop("hibernate_session", None)
+    instance = app_module.get_game_instance("hibernate_session")
+    player = instance["game"].game_state.player
+    player.name = "韩立"
+    player.attributes.cultivation_exp = 100
+    player.attributes.cultivation_level = 55
+    player.attributes.max_cultivation = 900
+    player.attributes.max_health = 1250
+    player.attributes.max_mana = 640
+    player.attributes.attack_power = 77
+    player.attributes.strength_buff = 3
+    player.attributes.faction = "魔道"
+    instance["game"].game_state.current_location = "天南山"
+    instance["game"].game_state.logs.append("踏入仙途")
+    instance["last_seen"] -= 24 * 3600
+
+    assert sessions.hibernate("hibernate_session")
+    assert sessions.is_hibernated("hibernate_session")
+
+    restored = app_module.get_game_instance("hibernate_session")
+    state = restored["game"].game_state
+    assert state.player.name == "韩立"
+    assert state.current_location == "天南山"
+    assert state.logs == ["踏入仙途"]
+    attrs = state.player.attributes
+    assert (attrs.cultivation_level, attrs.max_cultivation) == (55, 900)
+    assert (attrs.max_health, attrs.max_mana, attrs.attack_power) == (1250, 640, 77)
+    assert attrs.strength_buff == 3 and attrs.faction == "魔道" and attrs.level == 1
+
+    # 没有离线间隔时修炼进度原样保留
+    attrs.realm_progress = 42.5
+    assert sessions.hibernate("hibernate_session")
+    again = app_module.get_game_instance("hibernate_session")["game"].game_state.player.attributes
+    assert again.realm_progress == 42.5 and again.cultivation_level == 55
+    # 恢复后补算离线期间的挂机修炼
+    assert restored["offline_progress"]["hours"] > 0
+    assert state.player.attributes.cultivation_exp == 100 + restored["offline_progress"]["exp_gained"]
+    del sessions["hibernate_session"]
+
+
+def test_app_snapshot_keeps_feature_systems():
+    import src.app as app_module
+
+    sessions = app_module.game_instances
+    sessions.pop("feature_session", None)
+    game = app_module.get_game_instance("feature_session")["game"]
+    game.narrative_system.start_story_arc("player", "main_cultivation")
+    game.narrative_system.make_choice("player", 0)
+    quest = game.narrative_system.generate_dynamic_quest(3, "青云城")
+    game.achievement_system.check_achievement("first_step")
+    game.community_system.add_friend("player", "南宫婉")
+    game.community_system.send_message("南宫婉", "player", "道友安好")
+    game.ai_personalization.player_profile["play_style"] = "explorer"
+    expected = {
+        key: getattr(game, attr).to_dict()
+        for key, attr in app_module._SESSION_FEATURES.items()
+    }
+
+    assert sessions.hibernate("feature_session")
+    restored = app_module.get_game_instance("feature_session")["game"]
+    for key, attr in app_module._SESSION_FEATURES.items():
+        assert getattr(restored, attr).to_dict() == expected[key], key
+    assert restored.narrative_system.quests[quest.id].name == quest.name
+    assert restored.achievement_system.player_progress["first_step"].completed
+    assert restored.community_system.get_unread_messages("player")[0].content == "道友安好"
+    del sessions["feature_session"]
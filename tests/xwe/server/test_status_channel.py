@@ -0,0 +1,241 @@
+"""
+推送式状态通道测试
+"""
+
+import json
+import threading
+
+import pytest
+
+from src.xwe.server.status_channel import StatusChannel, apply_patch, json_diff
+
+
+def _parse(chunk):
+    """解析单个 SSE 事件"""
+    event = {"comment": chunk.startswith(":")}
+    for line in chunk.strip().splitlines():
+        field, _, value = line.partition(": ")
+        if field == "data":
+            event["data"] = json.loads(value)
+        elif field in ("id", "event", "retry"):
+            event[field] = value
+    return event
+
+
+class _State:
+    def __init__(self):
+        self.doc = {"player": {"hp": 100}, "inventory": {"items": []}, "location": "青云城"}
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return json.loads(json.dumps(self.doc))
+
+
+class TestJsonPatch:
+    """JSON Patch 测试"""
+
+    @pytest.mark.parametrize("old, new", [
+        ({"a": 1}, {"a": 2}),
+        ({"a": 1, "b": 2}, {"a": 1}),
+        ({"a": {"x/y": 1}}, {"a": {"x/y": 2, "~": 3}}),
+        ({"l": [1, 2, 3]}, {"l": [1, 5, 3]}),
+        ({"l": [1, 2]}, {"l": [1, 2, 3]}),
+        ({"a": 1}, {"a": "1"}),
+        ({"a": None}, {"a": {"b": [1]}}),
+    ])
+    def test_round_trip(self, old, new):
+        assert apply_patch(old, json_diff(old, new)) == new
+
+    def test_no_changes(self):
+        assert json_diff({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]}) == []
+
+    def test_minimal_ops(self):
+        ops = json_diff({"player": {"hp": 100, "mp": 50}}, {"player": {"hp": 90, "mp": 50}})
+        assert ops == [{"op": "replace", "path": "/player/hp", "value": 90}]
+
+
+class TestStatusChannel:
+    """状态通道测试"""
+
+    def test_first_event_is_snapshot(self):
+        channel = StatusChannel(heartbeat_interval=0.01)
+        state = _State()
+        stream = channel.stream("s1", state.build)
+        event = _parse(next(stream))
+        assert event["event"] == "snapshot"
+        assert event["data"] == state.doc
+        assert event["id"] == channel.event_id(1)
+        stream.close()
+
+    def test_heartbeat_without_rebuild(self):
+        channel = StatusChannel(heartbeat_interval=0.01)
+        state = _State()
+        stream = channel.stream("s1", state.build)
+        next(stream)
+        assert next(stream).startswith(": heartbeat")
+        assert next(stream).startswith(": heartbeat")
+        assert state.builds == 1
+        stream.close()
+
+    def test_notify_sends_patch(self):
+        channel = StatusChannel(heartbeat_interval=5)
+        state = _State()
+        stream = channel.stream("s1", state.build)
+        first = _parse(next(stream))
+
+        state.doc["player"]["hp"] = 80
+        channel.notify("s1")
+        event = _parse(next(stream))
+        assert event["event"] == "patch"
+        assert event["id"] == channel.event_id(2)
+        assert apply_patch(first["data"], event["data"]) == state.doc
+        stream.close()
+
+    def test_notify_wakes_blocked_stream(self):
+        channel = StatusChannel(heartbeat_interval=5)
+        state = _State()
+        stream = channel.stream("s1", state.build)
+        next(stream)
+        received = []
+        reader = threading.Thread(target=lambda: received.append(_parse(next(stream))))
+        reader.start()
+
+        state.doc["location"] = "城外"
+        channel.notify("s1")
+        reader.join(timeout=2)
+        assert received and received[0]["data"] == [
+            {"op": "replace", "path": "/location", "value": "城外"}
+        ]
+        stream.close()
+
+    def test_other_session_not_woken(self):
+        channel = StatusChannel(heartbeat_interval=0.05)
+        state = _State()
+        stream = channel.stream("s1", state.build)
+        next(stream)
+        channel.notify("s2")
+        assert next(stream).startswith(": heartbeat")
+        assert state.builds == 1
+        stream.close()
+
+    def test_streams_share_rebuild(self):
+        channel = StatusChannel(heartbeat_interval=5)
+        state = _State()
+        a = channel.stream("s1", state.build)
+        b = channel.stream("s1", state.build)
+        next(a)
+        next(b)
+        state.doc["player"]["hp"] = 1
+        channel.notify("s1")
+        assert _parse(next(a))["event"] == "patch"
+        assert _parse(next(b))["event"] == "patch"
+        assert state.builds == 2
+        a.close()
+        b.close()
+
+    def test_resume_with_last_event_id(self):
+        channel = StatusChannel(heartbeat_interval=5)
+        state = _State()
+        stream = channel.stream("s1", state.build)
+        snapshot = _parse(next(stream))
+        stream.close()
+
+        # 断线期间发生两次变更
+        for hp in (90, 80):
+            state.doc["player"]["hp"] = hp
+            channel.publish("s1", state.build())
+
+        resumed = channel.stream("s1", state.build, last_event_id=snapshot["id"])
+        doc = snapshot["data"]
+        for version in (2, 3):
+            event = _parse(next(resumed))
+            assert event["event"] == "patch"
+            assert event["id"] == channel.event_id(version)
+            doc = apply_patch(doc, event["data"])
+        assert doc == state.doc
+        assert channel.stats["resumed"] == 1
+        resumed.close()
+
+    @pytest.mark.parametrize("event_id", ["other:1", "garbage", None])
+    def test_unknown_event_id_gets_snapshot(self, event_id):
+        channel = StatusChannel(heartbeat_interval=5)
+        stream = channel.stream("s1", _State().build, last_event_id=event_id)
+        assert _parse(next(stream))["event"] == "snapshot"
+        stream.close()
+
+    def test_history_overflow_falls_back_to_snapshot(self):
+        channel = StatusChannel(heartbeat_interval=5, history_size=2)
+        state = _State()
+        channel.publish("s1", state.build())
+        old_id = channel.event_id(1)
+        for hp in (1, 2, 3):
+            state.doc["player"]["hp"] = hp
+            channel.publish("s1", state.build())
+        stream = channel.stream("s1", state.build, last_event_id=old_id)
+        event = _parse(next(stream))
+        assert event["event"] == "snapshot"
+        assert event["data"] == state.doc
+        stream.close()
+
+    def test_field_projection(self):
+        channel = StatusChannel(heartbeat_interval=5)
+        state = _State()
+        stream = channel.stream("s1", state.build, fields=("player", "inventory"))
+        assert set(_parse(next(stream))["data"]) == {"player", "inventory"}
+
+        # 只变更未订阅字段时不推送
+        state.doc["location"] = "城外"
+        state.doc["player"]["hp"] = 5
+        channel.notify("s1")
+        event = _parse(next(stream))
+        assert event["data"] == [{"op": "replace", "path": "/player/hp", "value": 5}]
+        stream.close()
+
+    def test_connection_cap(self):
+        channel = StatusChannel(max_connections=1, heartbeat_interval=5)
+        state = _State()
+        first = channel.stream("s1", state.build)
+        next(first)
+        assert not channel.has_capacity()
+
+        rejected = channel.stream("s2", state.build)
+        assert _parse(next(rejected))["event"] == "error"
+        assert channel.stats["rejected"] == 1
+
+        first.close()
+        assert channel.connections == 0
+        assert channel.has_capacity()
+
+    def test_drop_session_ends_stream(self):
+        channel = StatusChannel(heartbeat_interval=0.01)
+        stream = channel.stream("s1", _State().build)
+        next(stream)
+        channel.drop_session("s1")
+        assert list(stream) == []
+        assert channel.connections == 0
+
+    def test_failed_build_keeps_subscriber_count(self):
+        channel = StatusChannel(heartbeat_interval=5)
+
+        def broken():
+            raise RuntimeError("build failed")
+
+        with pytest.raises(RuntimeError):
+            next(channel.stream("s1", broken))
+        assert channel.topic("s1").subscribers == 0
+        assert channel.connections == 0
+
+    def test_idle_topics_are_retired_and_bounded(self):
+        channel = StatusChannel(heartbeat_interval=5, retained_topics=1)
+        state = _State()
+        for sid in ("s1", "s2"):
+            stream = channel.stream(sid, state.build)
+            next(stream)
+            stream.close()
+
+        stats = channel.get_stats()
+        assert stats["topics"] == 0 and stats["retained_topics"] == 1
+        # 没有主题的会话收到通知不会重新创建主题
+        channel.notify("s1")
+        assert channel.get_stats()["retained_topics"] == 1
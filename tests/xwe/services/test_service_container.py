@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import src.xwe.services as services
+from src.xwe.services import (
+    ServiceBase,
+    ServiceContainer,
+    ServiceCycleError,
+    ServiceLifetime,
+    ServiceNotFoundError,
+)
+
+
+class Repository:
+    pass
+
+
+class Cache:
+    def __init__(self, container: ServiceContainer) -> None:
+        self.container = container
+
+
+class Handler:
+    def __init__(self, repository: Repository, cache: Cache, retries: int = 3) -> None:
+        self.repository = repository
+        self.cache = cache
+        self.retries = retries
+
+
+class Session(ServiceBase["Session"]):
+    pass
+
+
+class Left:
+    def __init__(self, right: "Right") -> None:
+        self.right = right
+
+
+class Right:
+    def __init__(self, left: Left) -> None:
+        self.left = left
+
+
+def test_plan_is_compiled_once_per_type(monkeypatch):
+    container = ServiceContainer()
+    container.register(Repository, lifetime=ServiceLifetime.SINGLETON)
+    container.register(Cache)
+    container.register(Handler)
+
+    calls = []
+    signature = services.inspect.signature
+    monkeypatch.setattr(services.inspect, "signature", lambda obj: calls.append(obj) or signature(obj))
+
+    handlers = [container.resolve(Handler) for _ in range(50)]
+    assert len(calls) == 3  # Handler、Repository、Cache 各分析一次
+    assert handlers[0] is not handlers[1]
+    assert handlers[0].repository is handlers[1].repository
+    assert handlers[0].cache is not handlers[1].cache
+    assert handlers[0].cache.container is container
+    assert handlers[0].retries == 3
+
+
+def test_register_invalidates_compiled_plans():
+    class Consumer:
+        def __init__(self, repository: Repository = None) -> None:
+            self.repository = repository
+
+    container = ServiceContainer()
+    container.register(Consumer)
+    assert container.resolve(Consumer).repository is None
+
+    container.register(Repository, lifetime=ServiceLifetime.SINGLETON)
+    assert isinstance(container.resolve(Consumer).repository, Repository)
+
+
+def test_concurrent_first_resolve_builds_one_singleton():
+    created = []
+
+    class Slow:
+        def __init__(self) -> None:
+            time.sleep(0.01)
+            created.append(self)
+
+    container = ServiceContainer()
+    container.register(Slow, lifetime=ServiceLifetime.SINGLETON)
+    barrier = threading.Barrier(16)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(container.resolve(Slow))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
+
+
+def test_scopes_are_isolated_per_context():
+    container = ServiceContainer()
+    container.register(Session, lifetime=ServiceLifetime.SCOPED)
+
+    root = container.resolve(Session)
+    assert container.resolve(Session) is root
+
+    with container.create_scope() as scope:
+        scoped = container.resolve(Session)
+        assert scoped is not root and scoped is scope.resolve(Session)
+        with container.create_scope():
+            assert container.resolve(Session) is not scoped
+        assert container.resolve(Session) is scoped
+    assert not scoped._initialized  # 退出作用域时关闭
+    assert container.resolve(Session) is root
+
+    # 其他线程不会看到本线程进入的作用域
+    seen = {}
+    with container.create_scope():
+        inner = container.resolve(Session)
+        thread = threading.Thread(target=lambda: seen.update(session=container.resolve(Session)))
+        thread.start()
+        thread.join()
+    assert seen["session"] is root and inner is not root
+
+    async def request():
+        async with container.create_scope():
+            first = container.resolve(Session)
+            await asyncio.sleep(0)
+            assert container.resolve(Session) is first
+            return first
+
+    async def main():
+        return await asyncio.gather(*(request() for _ in range(5)))
+
+    sessions = asyncio.run(main())
+    assert len({id(session) for session in sessions}) == 5
+    assert root not in sessions
+
+
+def test_validate_reports_cycles_and_missing_dependencies():
+    container = ServiceContainer()
+    container.register(Left)
+    container.register(Right)
+    with pytest.raises(ServiceCycleError, match="Left -> Right -> Left"):
+        container.validate()
+
+    container = ServiceContainer()
+    container.register(Handler)
+    container.register(Cache)
+    with pytest.raises(ServiceNotFoundError, match="Repository"):
+        container.validate()
+
+    container.register(Repository)
+    assert container.validate() == [Repository, Cache, Handler]
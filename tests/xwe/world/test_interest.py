@@ -0,0 +1,149 @@
+"""
+区域兴趣管理索引测试
+验证按类型分桶的区域查询、邻近环查询、进出订阅，以及位置管理器和 NPC 管理器的接入
+"""
+
+import pytest
+
+from src.xwe.npc import DialogueSystem, NPCManager, NPCProfile
+from src.xwe.world import EntityKind, InterestIndex, LocationManager, WorldMap
+from src.xwe.world.world_map import Area, AreaType
+
+
+@pytest.fixture
+def world_map():
+    """a - b - c - d 一条线"""
+    world_map = WorldMap()
+    chain = ["a", "b", "c", "d"]
+    for i, area_id in enumerate(chain):
+        neighbours = [chain[j] for j in (i - 1, i + 1) if 0 <= j < len(chain)]
+        world_map.add_area(Area(id=area_id, name=area_id, type=AreaType.CITY, connected_areas=neighbours))
+    return world_map
+
+
+@pytest.fixture
+def index(world_map):
+    return InterestIndex(world_map)
+
+
+class TestAreaQueries:
+    """区域查询测试"""
+
+    def test_kind_buckets(self, index):
+        index.place("hero", "a")
+        index.place("elder", "a", EntityKind.NPC)
+        index.place("wolf", "a", EntityKind.MONSTER)
+
+        assert set(index.entities_in("a")) == {"hero", "elder", "wolf"}
+        assert list(index.entities_in("a", EntityKind.NPC)) == ["elder"]
+        assert index.count("a", EntityKind.PLAYER) == 1
+        assert index.count("b") == 0
+        assert index.kind_of("wolf") is EntityKind.MONSTER
+
+    def test_move_and_remove(self, index):
+        index.place("wolf", "a", EntityKind.MONSTER)
+        assert index.place("wolf", "b") == "a"
+        assert index.kind_of("wolf") is EntityKind.MONSTER
+        assert index.count("a") == 0
+        assert index.locate("wolf") == "b"
+
+        assert index.remove("wolf")
+        assert not index.remove("wolf")
+        assert index.locate("wolf") is None
+        assert index.get_stats()["occupied_areas"] == 0
+
+    def test_view_is_not_a_copy(self, index):
+        view = index.entities_in("a")
+        index.place("hero", "a")
+        assert "hero" in index.entities_in("a")
+        live = index.entities_in("a")
+        index.place("elder", "a", EntityKind.NPC)
+        assert "elder" in live
+        assert len(view) == 0  # 区域为空时返回的是共享的空视图
+
+    def test_ring_query(self, index):
+        index.place("hero", "a")
+        index.place("elder", "b", EntityKind.NPC)
+        index.place("wolf", "c", EntityKind.MONSTER)
+        index.place("tiger", "d", EntityKind.MONSTER)
+
+        assert list(index.areas_within("b", 1)) == [("b", 0), ("a", 1), ("c", 1)]
+        near = list(index.entities_near("a", radius=2, exclude="hero"))
+        assert near == [("elder", "b", 1), ("wolf", "c", 2)]
+        assert list(index.entities_near("a", radius=3, kind=EntityKind.MONSTER, limit=1)) == [
+            ("wolf", "c", 2)
+        ]
+
+    def test_crowded_hub(self, index):
+        for i in range(20_000):
+            index.place(f"p{i}", "a")
+        index.place("merchant", "a", EntityKind.NPC)
+
+        assert index.count("a") == 20_001
+        assert list(index.entities_in("a", EntityKind.NPC)) == ["merchant"]
+        assert len(list(index.entities_near("a", radius=1, limit=5))) == 5
+
+
+class TestSubscriptions:
+    """订阅测试"""
+
+    def test_enter_and_leave(self, index):
+        changes = []
+        token = index.subscribe(["a", "b"], changes.append)
+
+        index.place("hero", "a")
+        index.place("hero", "b")
+        index.place("hero", "b")  # 原地不动不通知
+        index.remove("hero")
+        assert [(c.area_id, c.entered) for c in changes] == [
+            ("a", True), ("a", False), ("b", True), ("b", False),
+        ]
+
+        index.unsubscribe(token)
+        index.place("hero", "a")
+        assert len(changes) == 4
+        assert index.get_stats()["subscriptions"] == 0
+
+    def test_kind_filter_and_failing_callback(self, index):
+        seen = []
+
+        def broken(change):
+            raise RuntimeError("boom")
+
+        index.subscribe("a", broken)
+        index.subscribe("a", seen.append, kind=EntityKind.MONSTER)
+        index.place("hero", "a")
+        index.place("wolf", "a", EntityKind.MONSTER)
+        assert [c.entity_id for c in seen] == ["wolf"]
+
+
+class TestIntegration:
+    """接入测试"""
+
+    def test_location_manager(self, world_map):
+        manager = LocationManager(world_map)
+        manager.set_location("hero", "a")
+        manager.set_location("elder", "a", EntityKind.NPC)
+        manager.set_location("wolf", "b", EntityKind.MONSTER)
+
+        assert manager.get_entities_in_area("a", EntityKind.NPC) == ["elder"]
+        assert manager.get_nearby_entities("hero", radius=1) == [("elder", "a", 0), ("wolf", "b", 1)]
+        assert "还有1个人" in manager.get_area_description("hero")
+
+        assert manager.remove_entity("wolf")
+        assert manager.get_location("wolf") is None
+
+    def test_npc_manager_shares_index(self, world_map):
+        manager = LocationManager(world_map)
+        npcs = NPCManager(DialogueSystem(), manager.interest)
+        npcs.add_profile(NPCProfile(id="elder", name="长老"))
+        npcs.set_npc_location("elder", "a")
+        npcs.set_npc_location("ghost", "a")  # 没有档案的 NPC 不列出
+        manager.set_location("hero", "a")
+
+        available = npcs.get_available_npcs("a", "hero")
+        assert [npc["id"] for npc in available] == ["elder"]
+        assert manager.get_entities_in_area("a", EntityKind.NPC) == ["elder", "ghost"]
+
+        npcs.set_npc_location("elder", "b")
+        assert npcs.get_available_npcs("a", "hero") == []
@@ -0,0 +1,171 @@
+"""
+地图路由表测试
+验证缓存的最短路径与逐次搜索一致、加权路线，以及地图变化时的增量失效
+"""
+
+import random
+from collections import deque
+
+import pytest
+
+from src.xwe.world import LocationManager, RouteCostModel, RouteTable, WorldMap
+from src.xwe.world.world_map import Area, AreaType
+
+
+def _area(area_id, area_type=AreaType.WILDERNESS, connections=(), **kwargs):
+    return Area(id=area_id, name=area_id, type=area_type, connected_areas=list(connections), **kwargs)
+
+
+def _bfs_length(world_map, start, end):
+    """逐次广度优先搜索，作为对照"""
+    seen = {start: 0}
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        if current == end:
+            return seen[current]
+        for nxt in world_map.areas[current].connected_areas:
+            if nxt in world_map.areas and nxt not in seen:
+                seen[nxt] = seen[current] + 1
+                queue.append(nxt)
+    return None
+
+
+@pytest.fixture
+def diamond():
+    """
+    start 经 mountain 或 forest+city 两条路到 end：
+    步数最少走山路，体力最少绕城
+    """
+    world_map = WorldMap()
+    world_map.add_area(_area("start", AreaType.CITY, ["mountain", "forest"]))
+    world_map.add_area(_area("mountain", AreaType.MOUNTAIN, ["end"]))
+    world_map.add_area(_area("forest", AreaType.WILDERNESS, ["city"]))
+    world_map.add_area(_area("city", AreaType.CITY, ["end"]))
+    world_map.add_area(_area("end", AreaType.CITY))
+    return world_map
+
+
+class TestHopRouting:
+    """按步数寻路测试"""
+
+    def test_random_graph_matches_bfs(self):
+        rng = random.Random(7)
+        world_map = WorldMap()
+        ids = [f"a{i}" for i in range(60)]
+        for area_id in ids:
+            world_map.add_area(_area(area_id, connections=rng.sample(ids, 3)))
+
+        for _ in range(200):
+            start, end = rng.choice(ids), rng.choice(ids)
+            path = world_map.find_path(start, end)
+            expected = _bfs_length(world_map, start, end)
+            if expected is None:
+                assert path is None
+                continue
+            assert len(path) - 1 == expected
+            assert path[0] == start and path[-1] == end
+            for a, b in zip(path, path[1:]):
+                assert b in world_map.areas[a].connected_areas
+
+    def test_same_area_and_unknown(self, diamond):
+        assert diamond.find_path("start", "start") == ["start"]
+        assert diamond.find_path("start", "nowhere") is None
+        assert diamond.find_path("end", "start") is None
+
+    def test_dangling_connection_resolved(self):
+        world_map = WorldMap()
+        world_map.add_area(_area("a", connections=["b"]))
+        assert world_map.find_path("a", "b") is None
+        world_map.add_area(_area("b"))
+        assert world_map.find_path("a", "b") == ["a", "b"]
+
+    def test_lookups_reuse_tree(self, diamond):
+        for _ in range(5):
+            diamond.find_path("start", "end")
+        assert diamond.routes.get_stats()["tree_builds"] == 1
+
+    def test_default_map_precomputed(self):
+        from src.xwe.world.world_map import DEFAULT_MAP_DATA
+
+        world_map = WorldMap()
+        world_map.load_from_dict(DEFAULT_MAP_DATA)
+        builds = world_map.routes.stats["tree_builds"]
+        assert builds == len(world_map.areas)
+        for start in world_map.areas:
+            for end in world_map.areas:
+                world_map.find_path(start, end)
+        assert world_map.routes.stats["tree_builds"] == builds
+
+
+class TestWeightedRouting:
+    """加权寻路测试"""
+
+    def test_prefers_lower_stamina(self, diamond):
+        assert diamond.find_path("start", "end") == ["start", "mountain", "end"]
+
+        route = RouteTable(diamond, RouteCostModel()).route("start", "end")
+        assert route.path == ["start", "forest", "city", "end"]
+        assert route.stamina_cost == 10 + 5 + 5
+
+    def test_level_requirement(self, diamond):
+        diamond.areas["city"].level_requirement = 10
+        table = RouteTable(diamond, RouteCostModel())
+        assert table.route("start", "end", player_level=5).path == ["start", "mountain", "end"]
+        assert table.route("start", "end", player_level=10).path == ["start", "forest", "city", "end"]
+        assert table.route("start", "city", player_level=5) is None
+
+    def test_inaccessible_area_avoided(self, diamond):
+        table = RouteTable(diamond, RouteCostModel())
+        table.route("start", "end")
+        diamond.set_area_accessible("city", False)
+        assert table.route("start", "end").path == ["start", "mountain", "end"]
+        diamond.set_area_accessible("mountain", False)
+        assert table.route("start", "end") is None
+        diamond.set_area_accessible("city", True)
+        assert table.route("start", "end").path == ["start", "forest", "city", "end"]
+
+    def test_undiscovered_weight(self, diamond):
+        table = RouteTable(diamond, RouteCostModel(undiscovered_weight=100))
+        # 全部未发现时，经过的区域越少越好
+        assert table.route("start", "end").path == ["start", "mountain", "end"]
+        for area_id in ("forest", "city"):
+            diamond.discover_area(area_id)
+        assert table.route("start", "end").path == ["start", "forest", "city", "end"]
+
+
+class TestInvalidation:
+    """增量失效测试"""
+
+    def test_unrelated_area_keeps_trees(self, diamond):
+        table = RouteTable(diamond, RouteCostModel())
+        table.route("start", "end")
+        table.route("city", "end")
+
+        diamond.add_area(_area("island", connections=["start"]))
+        assert table.get_stats()["cached_trees"] == 2
+        assert table.stats["invalidations"] == 0
+        assert table.route("island", "end").path == ["island", "start", "forest", "city", "end"]
+
+    def test_new_shortcut_drops_affected_trees(self, diamond):
+        table = RouteTable(diamond, RouteCostModel())
+        table.route("start", "end")
+        table.route("city", "end")
+
+        diamond.connect_areas("start", "end", bidirectional=False)
+        assert table.route("start", "end").path == ["start", "end"]
+        # city 出发的树不受这条连接影响
+        assert table.stats["invalidations"] == 1
+
+    def test_plan_travel(self, diamond):
+        manager = LocationManager(diamond)
+        manager.set_location("hero", "start")
+
+        travel = manager.plan_travel("hero", "end")
+        assert travel.path == ["start", "forest", "city", "end"]
+        assert travel.distance == travel.travel_time == 3
+        assert travel.stamina_cost == 20
+
+        diamond.add_area(_area("city", AreaType.CITY, ["end"], level_requirement=10))
+        assert manager.plan_travel("hero", "end", player_level=1).path == ["start", "mountain", "end"]
+        assert manager.plan_travel("hero", "nowhere") is None
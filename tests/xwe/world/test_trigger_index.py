@@ -0,0 +1,115 @@
+"""
+事件触发条件索引测试
+验证增量匹配结果与逐条比较一致，以及范围条件和事件增删
+"""
+
+import random
+
+from src.xwe.world import EventDefinition, EventSystem, TriggerIndex
+
+
+def _naive(trigger, context):
+    """逐条比较，作为对照"""
+    for key, expected in trigger.items():
+        if key not in context:
+            return False
+        value = context[key]
+        if isinstance(expected, dict) and expected and expected.keys() <= {"min", "max"}:
+            try:
+                if not expected.get("min", value) <= value <= expected.get("max", value):
+                    return False
+            except TypeError:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def _random_trigger(rng):
+    trigger = {}
+    for key in rng.sample(["location", "weather", "day", "level", "flag"], rng.randint(0, 3)):
+        if key in ("day", "level") and rng.random() < 0.6:
+            low = rng.randint(0, 20)
+            bounds = rng.choice([{"min": low}, {"max": low}, {"min": low, "max": low + rng.randint(0, 10)}])
+            trigger[key] = bounds
+        elif key == "flag":
+            trigger[key] = rng.choice([True, 1, [1, 2], "x"])
+        else:
+            trigger[key] = rng.randint(0, 4)
+    return trigger
+
+
+def _random_context(rng, previous):
+    context = dict(previous)
+    for key in ("location", "weather", "day", "level", "flag"):
+        roll = rng.random()
+        if roll < 0.15:
+            context.pop(key, None)
+        elif roll < 0.5:
+            if key == "flag":
+                context[key] = rng.choice([True, 1, 0, [1, 2], "x", None])
+            elif key in ("day", "level"):
+                context[key] = rng.choice([rng.randint(-2, 32), rng.random() * 30, "n/a"])
+            else:
+                context[key] = rng.randint(0, 4)
+    return context
+
+
+def test_matches_naive_scan():
+    rng = random.Random(3)
+    index = TriggerIndex()
+    triggers = {}
+    context = {}
+    for step in range(600):
+        if rng.random() < 0.3 or not triggers:
+            event_id = f"e{rng.randint(0, 80)}"
+            triggers[event_id] = _random_trigger(rng)
+            index.add(event_id, triggers[event_id])
+        if rng.random() < 0.1 and triggers:
+            event_id = rng.choice(list(triggers))
+            del triggers[event_id]
+            assert index.remove(event_id)
+
+        context = _random_context(rng, context)
+        expected = {event_id for event_id, trigger in triggers.items() if _naive(trigger, context)}
+        assert set(index.evaluate(context)) == expected, step
+
+
+def test_only_changed_keys_touch_events():
+    index = TriggerIndex()
+    for i in range(1000):
+        index.add(f"town{i}", {"location": f"town{i}", "weather": "rain"})
+    index.add("late_night", {"hour": {"min": 22}})
+
+    assert index.evaluate({"location": "town5", "weather": "rain", "hour": 10}) == ["town5"]
+    assert index.get_stats()["groups"] == 1000
+    touched = index.get_stats()["touched_events"]
+
+    # 换了地点：只有新地点那一组参与求值
+    assert index.evaluate({"location": "town7", "weather": "rain", "hour": 10}) == ["town7"]
+    assert index.get_stats()["touched_events"] - touched == 1
+
+    # 时间从 10 点走到 21 点，没有端点落在中间，不触及任何事件
+    touched = index.get_stats()["touched_events"]
+    index.evaluate({"location": "town7", "weather": "rain", "hour": 21})
+    assert index.get_stats()["touched_events"] == touched
+    assert index.evaluate({"location": "town7", "weather": "rain", "hour": 23}) == ["town7", "late_night"]
+
+
+def test_event_system_add_and_remove():
+    system = EventSystem()
+    system.add_event(EventDefinition("storm", "风暴", {"weather": "storm"}, "风暴来了"))
+    system.add_event(EventDefinition("harvest", "丰收", {"month": {"min": 8, "max": 10}}, "秋收"))
+    system.add_event(EventDefinition("always", "日常", {}, "又是一天"))
+
+    triggered = system.check_triggers({"weather": "storm", "month": 9})
+    assert [e.data["id"] for e in triggered] == ["storm", "harvest", "always"]
+
+    assert system.remove_event("storm")
+    assert not system.remove_event("storm")
+    assert [e.data["id"] for e in system.check_triggers({"weather": "storm", "month": 11})] == ["always"]
+
+    # 新加入的事件按上一次的上下文初始化
+    system.add_event(EventDefinition("winter", "冬至", {"month": {"min": 11}}, "冬天到了"))
+    assert [e.data["id"] for e in system.check_triggers({"month": 11})] == ["always", "winter"]
+    assert system.get_stats()["events"] == 3